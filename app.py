@@ -18,10 +18,15 @@ load_dotenv()
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from src.database_manager import DatabaseManager
+from src.indicator_engine import IndicatorEngine
 from src.stage2_analysis import main as run_analysis
 from src.auto_scheduler import get_auto_scheduler, init_auto_scheduler
+# Kolejka zadań z tego samego modułu co scheduler (jedna instancja w procesie)
+from src.auto_scheduler import get_job_manager
 from src.config_loader import get_api_key, is_api_auth_enabled, get_version_string, get_full_version_string, get_app_name, get_app_description
 from src.rate_limiter import rate_limit
+from src.adaptive_concurrency import yahoo_controller
+from src.yahoo_guard import yahoo_breaker
 import logging
 
 # Konfiguracja logowania
@@ -41,6 +46,7 @@ init_auto_scheduler()
 
 # Inicjalizacja menedżera bazy danych
 db_manager = DatabaseManager()
+indicator_engine = IndicatorEngine()
 
 # ===== FUNKCJE WALIDACYJNE =====
 
@@ -192,10 +198,14 @@ def dashboard():
             'today_run_info': today_run_info
         }
         
+        # Czasy etapów ostatniej analizy (z porównaniem do poprzedniej)
+        run_timings = db_manager.get_run_timings_summary()
+        
         return render_template('dashboard.html', 
                              latest_results={'stage1_companies': latest_results},
                              history=history,
-                             stats=stats)
+                             stats=stats,
+                             run_timings=run_timings)
                              
     except Exception as e:
         logger.error(f"Błąd w dashboard: {e}")
@@ -240,6 +250,10 @@ def results():
         # Sortuj po yield_netto malejąco (od największej do najmniejszej)
         companies = companies.sort_values(by='yield_netto', ascending=False, na_position='last')
         
+        # Zapisane wartości wskaźników (jedno zapytanie, bez przeliczania)
+        indicator_columns = indicator_engine.display_columns()
+        indicator_values = indicator_engine.get_latest_values(list(companies['ticker'].unique())) if indicator_columns else {}
+        
         # Konwertuj DataFrame na listę słowników dla template
         companies_list = []
         for _, row in companies.iterrows():
@@ -256,7 +270,8 @@ def results():
                 'price_for_5_percent_yield': row.get('price_for_5_percent_yield'),
                 'stochastic_1m': row.get('stochastic_1m') if row.get('stochastic_1m') is not None else 'N/A',
                 'stochastic_1w': row.get('stochastic_1w') if row.get('stochastic_1w') is not None else 'N/A',
-                'stage2_passed': row.get('stage2_passed')
+                'stage2_passed': row.get('stage2_passed'),
+                'indicators': indicator_values.get(row['ticker'], {})
             }
             companies_list.append(company_data)
         logger.info(f"Przekazuję do szablonu {len(companies_list)} spółek")
@@ -265,7 +280,8 @@ def results():
                              view_type=view_type, 
                              view_date=view_date,
                              date_filter=date_filter,
-                             ticker_filter=ticker_filter)
+                             ticker_filter=ticker_filter,
+                             indicator_columns=indicator_columns)
         
     except Exception as e:
         logger.error(f"Błąd w results: {e}")
@@ -599,16 +615,24 @@ def delete_info_column():
 @app.route('/run_analysis', methods=['POST'])
 def run_analysis_route():
     """
-    Uruchomienie analizy
+    Uruchomienie analizy w tle (postęp: /api/jobs/<job_id>)
     """
     try:
-        # Uruchom analizę
-        run_analysis()
+        # Dodaj analizę do kolejki zadań
+        job, created = get_job_manager().submit('analysis', run_analysis)
+        
+        if not created:
+            return jsonify({
+                'success': False,
+                'message': 'Analiza już trwa',
+                'job_id': job.id
+            }), 409
         
         return jsonify({
             'success': True,
-            'message': 'Analiza została uruchomiona pomyślnie'
-        })
+            'message': 'Analiza została uruchomiona w tle',
+            'job_id': job.id
+        }), 202
         
     except Exception as e:
         logger.error(f"Błąd podczas uruchamiania analizy: {e}")
@@ -617,6 +641,33 @@ def run_analysis_route():
             'message': f'Błąd: {str(e)}'
         }), 500
 
+# ===== API ENDPOINTY DLA ZADAŃ W TLE =====
+
+@app.route('/api/jobs')
+def list_jobs():
+    """Zwraca listę ostatnich zadań"""
+    return jsonify({'success': True, 'jobs': get_job_manager().list_jobs()})
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """Zwraca status i postęp zadania (etap, przetworzone/wszystkie tickery)"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Zadanie nie znalezione'}), 404
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Anuluje zadanie (trwające zatrzymuje się przed kolejnym tickerem)"""
+    if get_job_manager().cancel(job_id):
+        return jsonify({'success': True, 'message': 'Zgłoszono anulowanie zadania'})
+    return jsonify({'success': False, 'error': 'Zadanie nie istnieje lub już się zakończyło'}), 404
+
+@app.route('/api/yahoo/metrics')
+def yahoo_metrics():
+    """Zwraca stan kontrolera współbieżności zapytań do Yahoo (limity, opóźnienia, decyzje) i wyłącznika"""
+    return jsonify({'success': True, 'concurrency': yahoo_controller.metrics(), 'circuit': yahoo_breaker.state})
+
 @app.route('/api/companies')
 def api_companies():
     """
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Backtest reguły Etapu 2 (Stochastic %D 1M/1W poniżej progu) na notowaniach z tabeli stock_prices
+
+Użycie:
+    python scripts/backtest_stage2.py [--thresholds 10 20 30 40 50] [--k 14 36] [--d 3 12]
+                                      [--smoothing 3 12] [--horizons 5 20 60] [--start 2023-01-01]
+                                      [--signals 1M|1W 1M 1W] [--min-signals 100] [--max-cells 10000000] [--output grid.csv]
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from src.stage2_backtest import (Stage2Backtest, SIGNAL_TIMEFRAMES, DEFAULT_SIGNALS, DEFAULT_THRESHOLDS,
+                                 DEFAULT_K_PERIODS, DEFAULT_D_PERIODS, DEFAULT_SMOOTHINGS, DEFAULT_HORIZONS)
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtest reguły Etapu 2')
+    parser.add_argument('--db', default='data/analizator_growth.db', help='Ścieżka do bazy danych')
+    parser.add_argument('--tickers', nargs='*', help='Symbole spółek (domyślnie wszystkie w bazie)')
+    parser.add_argument('--thresholds', nargs='+', type=float, default=DEFAULT_THRESHOLDS, help='Progi %%D')
+    parser.add_argument('--k', nargs='+', type=int, default=DEFAULT_K_PERIODS, help='Okresy %%K')
+    parser.add_argument('--d', nargs='+', type=int, default=DEFAULT_D_PERIODS, help='Okresy %%D')
+    parser.add_argument('--smoothing', nargs='+', type=int, default=DEFAULT_SMOOTHINGS, help='Okresy wygładzania %%K')
+    parser.add_argument('--horizons', nargs='+', type=int, default=DEFAULT_HORIZONS, help='Horyzonty w notowaniach')
+    parser.add_argument('--signals', nargs='+', choices=list(SIGNAL_TIMEFRAMES), default=DEFAULT_SIGNALS,
+                        help='Sygnały: 1M|1W (reguła Etapu 2), 1M, 1W')
+    parser.add_argument('--start', type=date.fromisoformat, help='Sygnały od daty (YYYY-MM-DD)')
+    parser.add_argument('--min-signals', type=int, default=100, help='Minimalna liczba sygnałów w rankingu')
+    parser.add_argument('--max-cells', type=int, default=10_000_000, help='Limit komórek tablicy sygnałów na porcję')
+    parser.add_argument('--output', help='Zapisz pełną siatkę do pliku CSV')
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    result = Stage2Backtest(args.db, max_cells=args.max_cells).run(
+        args.tickers, args.thresholds, args.k, args.d, args.smoothing, args.horizons, args.start,
+        args.signals
+    )
+    elapsed = time.perf_counter() - start
+    
+    pd.set_option('display.width', 160)
+    print(f"=== BACKTEST REGUŁY ETAPU 2 ({len(result)} kombinacji, {elapsed:.2f} s) ===")
+    
+    current = result[(result['signal'] == '1M|1W') & (result['k_period'] == 36) &
+                     (result['smoothing'] == 12) & (result['d_period'] == 12)]
+    if not current.empty:
+        print("\nBieżąca reguła Etapu 2 (1M lub 1W poniżej progu, 36/12/12):")
+        print(current.pivot(index='threshold', columns='horizon', values='excess_return').round(4))
+    
+    ranked = result[result['signals'] >= args.min_signals].sort_values('excess_return', ascending=False)
+    for horizon, group in ranked.groupby('horizon'):
+        print(f"\nNajlepsze kombinacje dla horyzontu {horizon} notowań dziennych:")
+        print(group.head(5).to_string(index=False))
+    
+    if args.output:
+        result.to_csv(args.output, index=False)
+        print(f"\nZapisano siatkę do {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark pełnej analizy na syntetycznych danych - czasy etapów, szczytowe RSS
+i porównanie z wynikiem bazowym (kod wyjścia 1 przy regresji, 2 przy innej konfiguracji,
+3 gdy powtórzenie nie zwróciło wyniku)
+
+Użycie:
+    python scripts/benchmark_analysis.py [--tickers 50] [--years 5] [--rows 200] [--repeat 3]
+                                         [--output wynik.json] [--baseline benchmarks/analysis_baseline.json]
+                                         [--tolerance 0.25] [--timeout 3600] [--save-baseline]
+"""
+
+import os
+import sys
+import json
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.analysis_benchmark import run_benchmark, compare_to_baseline, load_result, save_result
+
+DEFAULT_BASELINE = 'benchmarks/analysis_baseline.json'
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pełnej analizy offline')
+    parser.add_argument('--tickers', type=int, default=50, help='Spółki przechodzące Etap 1 (N)')
+    parser.add_argument('--years', type=float, default=5.0, help='Lata notowań na spółkę (Y)')
+    parser.add_argument('--rows', type=int, help='Wiersze arkusza (M, domyślnie 4 x tickers)')
+    parser.add_argument('--repeat', type=int, default=3, help='Liczba powtórzeń (wynik to mediana)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Czas odpowiedzi Yahoo (sekundy)')
+    parser.add_argument('--cold', action='store_true', help='Pusta baza zamiast notowań do zeszłego tygodnia')
+    parser.add_argument('--seed', type=int, default=0, help='Ziarno danych syntetycznych')
+    parser.add_argument('--timeout', type=float, default=3600.0, help='Limit czasu jednego powtórzenia (sekundy)')
+    parser.add_argument('--output', help='Zapisz wynik do pliku JSON')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Plik z wynikiem bazowym')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Dopuszczalny wzrost względem bazowego')
+    parser.add_argument('--save-baseline', action='store_true', help='Zapisz wynik jako nowy bazowy')
+    args = parser.parse_args()
+    
+    import logging
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
+    try:
+        result = run_benchmark(universe=args.tickers, rows=args.rows, years=args.years, repeat=args.repeat,
+                               latency=args.latency, warm=not args.cold, seed=args.seed, timeout=args.timeout)
+    except RuntimeError as e:
+        print(f"Benchmark nie zakończył się: {e}")
+        return 3
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    if args.output:
+        save_result(result, args.output)
+    
+    if args.save_baseline:
+        save_result(result, args.baseline)
+        print(f"Zapisano wynik bazowy: {args.baseline}")
+        return 0
+    
+    if not os.path.exists(args.baseline):
+        print(f"Brak wyniku bazowego ({args.baseline}) - uruchom z --save-baseline")
+        return 0
+    
+    try:
+        regressions = compare_to_baseline(result, load_result(args.baseline), args.tolerance)
+    except ValueError as e:
+        print(f"Nie można porównać z wynikiem bazowym: {e}")
+        return 2
+    
+    if regressions:
+        print(f"=== REGRESJE (tolerancja {args.tolerance:.0%}) ===")
+        for regression in regressions:
+            print(f"  {regression['metric']}: {regression['baseline']} -> {regression['current']} "
+                  f"(+{regression['change']:.0%})")
+        return 1
+    print(f"Brak regresji względem {args.baseline} (tolerancja {args.tolerance:.0%})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
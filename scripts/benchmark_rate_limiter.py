@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark rate limitera - koszt pojedynczego sprawdzenia i wspólny limit między procesami
+
+Użycie:
+    python scripts/benchmark_rate_limiter.py [--checks 20000] [--workers 4] [--max-us 100]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import multiprocessing
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.rate_limiter import RateLimiter, SQLiteRateLimiter
+
+def measure(limiter, checks):
+    """Mierzy czas pojedynczych sprawdzeń (w mikrosekundach)"""
+    timings = []
+    for i in range(checks):
+        ip = f"10.0.{(i // 250) % 250}.{i % 250}"
+        start = time.perf_counter()
+        limiter.is_allowed(ip, 'api_general')
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    timings.sort()
+    return {
+        'mean_us': statistics.fmean(timings),
+        'p50_us': timings[len(timings) // 2],
+        'p99_us': timings[int(len(timings) * 0.99)]
+    }
+
+def _worker(db_path, limits, attempts, queue):
+    """Proces workera - liczy ile żądań z jednego IP zostało przepuszczonych"""
+    limiter = SQLiteRateLimiter(limits, db_path)
+    allowed = sum(1 for _ in range(attempts) if limiter.is_allowed('203.0.113.7', 'api_flags'))
+    queue.put(allowed)
+
+def shared_limit_check(db_path, workers, limits):
+    """Sprawdza czy N procesów respektuje jeden wspólny limit"""
+    capacity = limits['api_flags']['requests']
+    queue = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=_worker, args=(db_path, limits, capacity, queue))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return sum(queue.get() for _ in processes), capacity
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark rate limitera')
+    parser.add_argument('--checks', type=int, default=20000, help='Liczba sprawdzeń na backend')
+    parser.add_argument('--workers', type=int, default=4, help='Liczba procesów w teście wspólnego limitu')
+    parser.add_argument('--max-us', type=float, default=100.0, help='Maksymalny średni koszt sprawdzenia (µs)')
+    args = parser.parse_args()
+    
+    import logging
+    logging.disable(logging.WARNING)
+    
+    limits = {
+        'api_general': {'requests': 200, 'window': 3600},
+        'api_flags': {'requests': 50, 'window': 3600}
+    }
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'rate_limits.db')
+        
+        results = {
+            'memory': measure(RateLimiter(limits), args.checks),
+            'sqlite': measure(SQLiteRateLimiter(limits, db_path), args.checks)
+        }
+        
+        print("=== BENCHMARK RATE LIMITERA ===")
+        for backend, stats in results.items():
+            print(f"{backend:>7}: mean={stats['mean_us']:.1f}µs  p50={stats['p50_us']:.1f}µs  p99={stats['p99_us']:.1f}µs")
+        
+        allowed, capacity = shared_limit_check(os.path.join(tmp_dir, 'shared.db'), args.workers, limits)
+        print(f"Wspólny limit: {args.workers} procesów × {capacity} prób -> przepuszczono {allowed} (limit {capacity})")
+    
+    ok = results['sqlite']['mean_us'] <= args.max_us and allowed <= capacity
+    print("✅ OK" if ok else "❌ Przekroczono budżet lub limit")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
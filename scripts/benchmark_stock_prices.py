@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark schematu stock_prices - rozmiar bazy i odczyt 5 lat notowań tickera
+przed (stary schemat z tekstowym tickerem i datą) i po migracji do WITHOUT ROWID
+
+Użycie:
+    python scripts/benchmark_stock_prices.py [--tickers 300] [--days 1260] [--reads 200]
+"""
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import statistics
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.stock_data_manager import StockDataManager
+
+# Stary schemat stock_prices (sprzed migracji)
+LEGACY_SCHEMA = [
+    """
+    CREATE TABLE stock_prices (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ticker TEXT NOT NULL,
+        date DATE NOT NULL,
+        timeframe TEXT NOT NULL,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(ticker, date, timeframe)
+    )
+    """,
+    "CREATE INDEX idx_stock_prices_ticker_date ON stock_prices(ticker, date, timeframe)",
+    "CREATE INDEX idx_stock_prices_date ON stock_prices(date)"
+]
+
+LEGACY_READ = """
+    SELECT date, open, high, low, close, volume
+    FROM stock_prices 
+    WHERE ticker = ? AND timeframe = ?
+    ORDER BY date DESC
+    LIMIT ?
+"""
+
+def build_legacy_db(db_path, tickers, days):
+    """Tworzy bazę w starym schemacie z syntetycznymi notowaniami dziennymi"""
+    start = date.today() - timedelta(days=int(days * 7 / 5))
+    trading_days = [start + timedelta(days=i) for i in range(int(days * 7 / 5) + 7)]
+    trading_days = [d.isoformat() for d in trading_days if d.weekday() < 5][:days]
+    
+    with sqlite3.connect(db_path) as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.execute(statement)
+        
+        for i in range(tickers):
+            ticker = f"T{i:04d}"
+            price = random.uniform(20, 200)
+            rows = []
+            for day in trading_days:
+                price *= random.uniform(0.98, 1.02)
+                rows.append((ticker, day, '1D', price, price * 1.01, price * 0.99, price,
+                             random.randint(10_000, 5_000_000), '2025-01-01 00:00:00'))
+            conn.executemany("""
+                INSERT INTO stock_prices 
+                (ticker, date, timeframe, open, high, low, close, volume, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+        conn.commit()
+    
+    # Baza w stanie jak po latach dopisywania - bez wolnych stron
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute("VACUUM")
+    conn.close()
+
+def measure_reads(read, tickers, reads, days):
+    """Mierzy czas odczytu 5 lat notowań losowych tickerów (w milisekundach)"""
+    timings = []
+    for _ in range(reads):
+        ticker = f"T{random.randrange(tickers):04d}"
+        start = time.perf_counter()
+        rows = read(ticker, days)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert rows == days, f"{ticker}: {rows} != {days}"
+    timings.sort()
+    return statistics.fmean(timings), timings[len(timings) // 2]
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark schematu stock_prices')
+    parser.add_argument('--tickers', type=int, default=300, help='Liczba tickerów')
+    parser.add_argument('--days', type=int, default=1260, help='Liczba sesji na ticker (5 lat = 1260)')
+    parser.add_argument('--reads', type=int, default=200, help='Liczba odczytów w pomiarze')
+    args = parser.parse_args()
+    
+    import logging
+    logging.disable(logging.WARNING)
+    random.seed(42)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'stock_prices.db')
+        print(f"Tworzenie bazy: {args.tickers} tickerów × {args.days} sesji...")
+        build_legacy_db(db_path, args.tickers, args.days)
+        size_before = os.path.getsize(db_path)
+        
+        conn = sqlite3.connect(db_path)
+        def legacy_read(ticker, days):
+            return len(conn.execute(LEGACY_READ, (ticker, '1D', days)).fetchall())
+        mean_before, p50_before = measure_reads(legacy_read, args.tickers, args.reads, args.days)
+        conn.close()
+        
+        start = time.perf_counter()
+        manager = StockDataManager(db_path)
+        migration_s = time.perf_counter() - start
+        size_after = os.path.getsize(db_path)
+        
+        def read(ticker, days):
+            return len(manager.get_stock_data(ticker, '1D', limit=days))
+        
+        conn = sqlite3.connect(db_path)
+        mean_after, p50_after = measure_reads(
+            lambda ticker, days: len(conn.execute("""
+                SELECT p.day_number, p.open, p.high, p.low, p.close, p.volume
+                FROM stock_prices p JOIN tickers t ON t.id = p.ticker_id
+                WHERE t.symbol = ? AND p.timeframe = ?
+                ORDER BY p.day_number DESC LIMIT ?
+            """, (ticker, '1D', days)).fetchall()),
+            args.tickers, args.reads, args.days
+        )
+        conn.close()
+        mean_df, _ = measure_reads(read, args.tickers, min(args.reads, 50), args.days)
+        
+        print("=== BENCHMARK STOCK_PRICES ===")
+        print(f"Migracja: {migration_s:.2f}s")
+        print(f"Rozmiar bazy: {size_before / 1024 / 1024:.1f} MB -> {size_after / 1024 / 1024:.1f} MB "
+              f"({(1 - size_after / size_before) * 100:.0f}% mniej)")
+        print(f"Odczyt 5 lat (SQL):  mean {mean_before:.2f} ms -> {mean_after:.2f} ms "
+              f"(p50 {p50_before:.2f} -> {p50_after:.2f} ms)")
+        print(f"get_stock_data (DataFrame): mean {mean_df:.2f} ms")
+
+if __name__ == "__main__":
+    main()
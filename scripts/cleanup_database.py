@@ -33,14 +33,16 @@ def cleanup_database():
             'auto_schedule_runs',      # Historia uruchomień scheduler
             'flag_history',            # Historia zmian flag
             'company_flags',           # Aktualne flagi spółek
-            'company_notes'            # Notatki spółek
+            'company_notes',           # Notatki spółek
+            'analysis_run_timings'     # Czasy etapów analizy
         ]
         
         # Lista tabel do zachowania (konfiguracja)
         tables_to_keep = [
             'selection_rules_versions',        # Wersje reguł selekcji
             'informational_columns_versions',  # Wersje kolumn informacyjnych
-            'stock_prices'                     # Dane historyczne cen (opcjonalnie)
+            'stock_prices',                    # Dane historyczne cen (opcjonalnie)
+            'tickers'                          # Słownik tickerów dla stock_prices
         ]
         
         print("🗑️  USUWANE TABELE (dane historyczne):")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test obciążeniowy widoków (/, /results, /results?show_all=true, /notes, /history/<ticker>)
+na dużej bazie - percentyle czasów, przepustowość i zapytania SQL na żądanie
+
+Użycie:
+    python scripts/load_test_web.py [--db /tmp/large.db] [--days 730] [--tickers 300] [--selected 120]
+                                    [--requests 20] [--concurrency 8] [--output wynik.json]
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.db_seed import seed_large_database
+from src.web_load import prepare_app_workdir, web_environment, latest_tickers, run_load
+
+def main():
+    parser = argparse.ArgumentParser(description='Test obciążeniowy widoków Flask')
+    parser.add_argument('--workdir', help='Katalog roboczy aplikacji (domyślnie katalog tymczasowy)')
+    parser.add_argument('--db', help='Gotowa baza (z seed_large_db.py) - kopiowana do katalogu roboczego')
+    parser.add_argument('--days', type=int, default=730, help='Dni uruchomień w nowej bazie (bez --db)')
+    parser.add_argument('--tickers', type=int, default=300, help='Spółki w arkuszu nowej bazy (bez --db)')
+    parser.add_argument('--selected', type=int, default=120, help='Spółki Etapu 1 w nowej bazie (bez --db)')
+    parser.add_argument('--requests', type=int, default=20, help='Zapytania na ścieżkę')
+    parser.add_argument('--concurrency', type=int, default=8, help='Równolegli klienci')
+    parser.add_argument('--seed', type=int, default=0, help='Ziarno bazy i losowania spółek')
+    parser.add_argument('--output', help='Zapisz wynik do pliku JSON')
+    args = parser.parse_args()
+    
+    import logging
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
+    
+    workdir = args.workdir or tempfile.mkdtemp(prefix='analizator_web_load_')
+    db_path = prepare_app_workdir(workdir, args.db)
+    if not args.db:
+        print(f"Tworzenie bazy: {args.days} dni, {args.tickers} spółek, {args.selected} w selekcji...")
+        seed_large_database(db_path + '.seed', days=args.days, tickers=args.tickers,
+                            selected=args.selected, seed=args.seed)
+        os.replace(db_path + '.seed', db_path)
+    
+    with web_environment(workdir) as app:
+        # Logi żądań zaciemniają wynik - zostają tylko błędy
+        logging.getLogger().setLevel(logging.ERROR)
+        result = run_load(app, latest_tickers(db_path), requests_per_route=args.requests,
+                          concurrency=args.concurrency, seed=args.seed)
+    
+    print(f"=== TEST OBCIĄŻENIOWY ({args.requests} zapytań na ścieżkę, {args.concurrency} klientów) ===")
+    print(f"Katalog roboczy: {workdir}")
+    print(f"{'ścieżka':<26} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'SQL/req':>8} {'błędy':>6}")
+    for route, stats in result['routes'].items():
+        print(f"{route:<26} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} "
+              f"{stats['throughput_rps']:>8.1f} {stats['queries_per_request']:>8.1f} {stats['errors']:>6}")
+    total = result['total']
+    print(f"Razem: {total['requests']} zapytań w {total['seconds']:.1f}s ({total['throughput_rps']} req/s), "
+          f"błędy: {total['errors']}")
+    
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(result, file, indent=2, ensure_ascii=False)
+            file.write('\n')
+    return 1 if total['errors'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
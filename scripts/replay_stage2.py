@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Odtworzenie Etapu 2 (Stochastic 1M/1W) na każdy dzień notowań z zapisanej historii cen
+
+Użycie:
+    python scripts/replay_stage2.py [--tickers AAPL MSFT] [--days 730] [--threshold 30]
+                                    [--output replay.csv] [--backfill] [--overwrite]
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.stage2_replay import Stage2Replay
+from src.timezone_utils import get_local_now
+
+def main():
+    parser = argparse.ArgumentParser(description='Odtworzenie Etapu 2 na dni z przeszłości')
+    parser.add_argument('--db', default='data/analizator_growth.db', help='Ścieżka do bazy danych')
+    parser.add_argument('--tickers', nargs='*', help='Symbole spółek (domyślnie wszystkie w bazie)')
+    parser.add_argument('--days', type=int, default=730, help='Liczba dni wstecz w wyniku')
+    parser.add_argument('--threshold', type=float, default=30.0, help='Próg %%D dla Etapu 2')
+    parser.add_argument('--output', help='Zapisz wynik do pliku CSV')
+    parser.add_argument('--backfill', action='store_true', help='Uzupełnij wartości Etapu 2 w historii stage1_companies')
+    parser.add_argument('--overwrite', action='store_true', help='Przy --backfill nadpisz istniejące wartości')
+    args = parser.parse_args()
+    
+    replay = Stage2Replay(args.db, threshold=args.threshold)
+    
+    start = time.perf_counter()
+    result = replay.replay(args.tickers, start=get_local_now().date() - timedelta(days=args.days))
+    elapsed = time.perf_counter() - start
+    
+    print("=== ODTWORZENIE ETAPU 2 ===")
+    print(f"Spółki: {result['ticker'].nunique()}, wiersze (spółka × dzień): {len(result)}, czas: {elapsed:.2f} s")
+    if not result.empty:
+        daily = result.groupby('date')['stage2_passed'].agg(['sum', 'count'])
+        print(f"Dni: {len(daily)}, spółek z Etapem 2 dziennie: "
+              f"średnio {daily['sum'].mean():.1f}, min {daily['sum'].min()}, max {daily['sum'].max()}")
+    
+    if args.output:
+        result.to_csv(args.output, index=False)
+        print(f"Zapisano wynik do {args.output}")
+    
+    if args.backfill:
+        updated = replay.backfill_stage1_history(overwrite=args.overwrite)
+        print(f"Uzupełniono {updated} wierszy stage1_companies")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Pełna analiza (stage2_analysis.main) bez dostępu do Google Sheet i Yahoo Finance
+
+Arkusz i odpowiedzi Yahoo pochodzą z nagrań w katalogu --fixtures lub są syntetyczne;
+--record nagrywa je z prawdziwych źródeł (wymaga secrets/credentials.json i sieci).
+
+Użycie:
+    python scripts/run_offline.py [--workdir /tmp/offline] [--universe 50] [--rows 200]
+                                  [--latency 0.05] [--error-rate 0.02] [--seed 1]
+    python scripts/run_offline.py --fixtures fixtures/ --record
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.offline_fixtures import offline_environment
+from src.database_manager import DatabaseManager
+
+def main():
+    parser = argparse.ArgumentParser(description='Analiza offline z nagranymi lub syntetycznymi danymi')
+    parser.add_argument('--workdir', help='Katalog roboczy z bazą (domyślnie katalog tymczasowy)')
+    parser.add_argument('--fixtures', help='Katalog z nagraniami (sheet.json, yahoo.json)')
+    parser.add_argument('--record', action='store_true', help='Nagraj arkusz i odpowiedzi Yahoo do --fixtures')
+    parser.add_argument('--universe', type=int, default=20, help='Spółki przechodzące Etap 1 (dane syntetyczne)')
+    parser.add_argument('--rows', type=int, help='Wiersze syntetycznego arkusza (domyślnie 2 x universe)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Czas odpowiedzi Yahoo (sekundy)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Odsetek odpowiedzi 500 z Yahoo')
+    parser.add_argument('--capacity', type=int, default=8, help='Równoległe zapytania do Yahoo bez 429')
+    parser.add_argument('--seed', type=int, default=0, help='Ziarno danych syntetycznych i błędów')
+    args = parser.parse_args()
+    
+    if args.record and not args.fixtures:
+        parser.error('--record wymaga --fixtures')
+    workdir = args.workdir or tempfile.mkdtemp(prefix='analizator_offline_')
+    
+    from src.stage2_analysis import main as run_analysis
+    start = time.perf_counter()
+    with offline_environment(workdir, args.fixtures, universe=args.universe, rows=args.rows,
+                             latency=args.latency, error_rate=args.error_rate, seed=args.seed,
+                             capacity=args.capacity, record=args.record) as server:
+        run_analysis()
+        stats = dict(server.stats)
+    elapsed = time.perf_counter() - start
+    
+    db_path = os.path.join(workdir, 'data', 'analizator_growth.db')
+    summary = DatabaseManager(db_path).get_run_timings_summary()
+    with sqlite3.connect(db_path) as conn:
+        companies = conn.execute("SELECT COUNT(*) FROM stage1_companies WHERE run_id = ?",
+                                 (summary['run_id'],)).fetchone()[0]
+        prices = conn.execute("SELECT COUNT(*) FROM stock_prices").fetchone()[0]
+    
+    print("=== ANALIZA OFFLINE ===")
+    print(f"Katalog roboczy: {workdir}")
+    print(f"Czas: {elapsed:.2f}s, uruchomienie {summary['run_id']}: {companies} spółek, {prices} notowań w bazie")
+    print(f"Yahoo: {stats['requests']} zapytań, 429: {stats['throttled']}, 500: {stats['errors']}, "
+          f"z nagrania: {stats['replayed']}, nagrane: {stats['recorded']}")
+    for span in summary['spans']:
+        print(f"  {span['span_name']:<30} {span['total_ms'] / 1000:8.2f}s ({span['count']}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Tworzy dużą bazę testową: codzienne uruchomienia analizy, spółki, notatki, flagi i historię flag
+
+Użycie:
+    python scripts/seed_large_db.py --db /tmp/large.db [--days 730] [--tickers 300] [--selected 120] [--seed 0]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.db_seed import seed_large_database
+
+def main():
+    parser = argparse.ArgumentParser(description='Duża baza testowa do pomiarów wydajności widoków')
+    parser.add_argument('--db', required=True, help='Ścieżka do nowej bazy (plik nie może istnieć)')
+    parser.add_argument('--days', type=int, default=730, help='Liczba dni z codziennym uruchomieniem')
+    parser.add_argument('--tickers', type=int, default=300, help='Liczba spółek w arkuszu')
+    parser.add_argument('--selected', type=int, default=120, help='Spółki Etapu 1 w każdym uruchomieniu')
+    parser.add_argument('--seed', type=int, default=0, help='Ziarno losowania')
+    args = parser.parse_args()
+    
+    if os.path.exists(args.db):
+        parser.error(f'{args.db} już istnieje - podaj nową ścieżkę')
+    
+    start = time.perf_counter()
+    counts = seed_large_database(args.db, days=args.days, tickers=args.tickers,
+                                 selected=args.selected, seed=args.seed)
+    print(f"Utworzono {args.db} w {time.perf_counter() - start:.1f}s "
+          f"({os.path.getsize(args.db) / (1024 * 1024):.0f} MB)")
+    for table, count in counts.items():
+        print(f"  {table:<24} {count:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Adaptacyjna współbieżność i tempo zapytań do Yahoo Finance (AIMD)
+
+Limit równoległych zapytań i liczba zapytań na sekundę rosną o stały krok,
+gdy ostatnie zapytania są szybkie i bez błędów, a przy sygnałach dławienia
+(HTTP 429, skok błędów lub opóźnień) są mnożone przez decrease_factor.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+import numpy as np
+import logging
+try:
+    from .timezone_utils import get_utc_now
+except ImportError:
+    from timezone_utils import get_utc_now
+
+# Konfiguracja logowania
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Wyniki zapytania
+OK = 'ok'
+EMPTY = 'empty'  # pusty DataFrame - brak danych albo ukryte dławienie
+ERROR = 'error'
+THROTTLED = 'throttled'
+
+def classify_error(error: Exception) -> str:
+    """Rozpoznaje dławienie (HTTP 429, rate limit) wśród błędów zapytania"""
+    text = f"{type(error).__name__} {error}".lower()
+    if '429' in text or 'too many requests' in text or 'ratelimit' in text or 'rate limit' in text:
+        return THROTTLED
+    return ERROR
+
+class RequestSlot:
+    """Miejsce na jedno zapytanie; wywołujący ustawia outcome przed wyjściem z bloku"""
+    
+    def __init__(self, started: float):
+        self.started = started
+        self.outcome = OK
+
+class AdaptiveConcurrency:
+    """
+    Kontroler AIMD liczby równoległych zapytań i ich tempa
+    
+    Po każdych window zapytaniach: odsetek błędów (error, empty, throttled)
+    powyżej error_threshold lub p95 opóźnienia powyżej latency_target zmniejsza
+    limity, w przeciwnym razie są zwiększane. Odpowiedź throttled zmniejsza
+    limity od razu (raz na falę zapytań rozpoczętych przed poprzednim zmniejszeniem).
+    """
+    
+    def __init__(self, min_limit: int = 1, max_limit: int = 8, initial_limit: int = 2,
+                 min_rate: float = 0.5, max_rate: float = 20.0, initial_rate: float = 5.0,
+                 rate_step: float = 1.0, decrease_factor: float = 0.5,
+                 latency_target: float = 2.0, error_threshold: float = 0.25, window: int = 10,
+                 samples: int = 1000, history: int = 200, clock=time.monotonic, sleep=time.sleep):
+        """
+        Args:
+            min_limit, max_limit, initial_limit: Zakres i start liczby równoległych zapytań
+            min_rate, max_rate, initial_rate: Zakres i start tempa (zapytania na sekundę)
+            rate_step: Krok zwiększenia tempa
+            decrease_factor: Mnożnik limitów przy zmniejszeniu
+            latency_target: Docelowe p95 opóźnienia zapytania (sekundy)
+            error_threshold: Odsetek błędów w oknie powodujący zmniejszenie
+            window: Liczba zapytań między decyzjami
+            samples: Liczba ostatnich opóźnień trzymanych w metrykach (i nieodebranych przez drain_samples)
+            history: Liczba ostatnich decyzji trzymanych w metrykach
+            clock, sleep: Źródło czasu i oczekiwanie (do testów)
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate_step = rate_step
+        self.decrease_factor = decrease_factor
+        self.latency_target = latency_target
+        self.error_threshold = error_threshold
+        self.window = window
+        self.clock = clock
+        self.sleep = sleep
+        
+        self.limit = initial_limit
+        self.rate = initial_rate
+        self.in_flight = 0
+        self.decisions = deque(maxlen=history)
+        self._window = []
+        self._samples = deque(maxlen=samples)
+        self._unread = deque(maxlen=samples)
+        self._totals = {OK: 0, EMPTY: 0, ERROR: 0, THROTTLED: 0}
+        self._next_start = 0.0
+        self._last_decrease = float('-inf')
+        self._condition = threading.Condition()
+    
+    @contextmanager
+    def slot(self, admit=None):
+        """
+        Czeka na wolne miejsce i tempo, mierzy czas zapytania w bloku
+        
+        Args:
+            admit: Opcjonalne sprawdzenie tuż przed zapytaniem (np. wyłącznik) -
+                   wyjątek zwalnia miejsce bez zapisu wyniku
+        
+        Przykład:
+            with controller.slot() as request:
+                data = fetch()
+                request.outcome = OK if not data.empty else EMPTY
+        """
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+            # Tempo: kolejne zapytanie nie wcześniej niż 1/rate po poprzednim
+            now = self.clock()
+            start_at = max(now, self._next_start)
+            self._next_start = start_at + 1.0 / self.rate
+        if start_at > now:
+            self.sleep(start_at - now)
+        if admit is not None:
+            try:
+                admit()
+            except Exception:
+                with self._condition:
+                    self.in_flight -= 1
+                    self._condition.notify_all()
+                raise
+        
+        request = RequestSlot(self.clock())
+        try:
+            yield request
+        except Exception as e:
+            if request.outcome == OK:
+                request.outcome = classify_error(e)
+            raise
+        finally:
+            self._record(request, self.clock() - request.started)
+    
+    def _record(self, request: RequestSlot, latency: float):
+        """Zapisuje wynik zapytania i podejmuje decyzję AIMD"""
+        with self._condition:
+            self.in_flight -= 1
+            self._totals[request.outcome] += 1
+            sample = {'latency': latency, 'outcome': request.outcome}
+            self._samples.append(sample)
+            self._unread.append(sample)
+            self._window.append(sample)
+            
+            if request.outcome == THROTTLED:
+                if request.started > self._last_decrease:
+                    self._decrease('throttled')
+            elif len(self._window) >= self.window:
+                failures = sum(1 for item in self._window if item['outcome'] != OK)
+                p95 = float(np.percentile([item['latency'] for item in self._window], 95))
+                if failures / len(self._window) > self.error_threshold:
+                    self._decrease(f"błędy {failures}/{len(self._window)}")
+                elif p95 > self.latency_target:
+                    self._decrease(f"p95 {p95:.2f} s")
+                elif self.limit < self.max_limit or self.rate < self.max_rate:
+                    self.limit = min(self.max_limit, self.limit + 1)
+                    self.rate = min(self.max_rate, self.rate + self.rate_step)
+                    self._decide('increase', f"p95 {p95:.2f} s, błędy {failures}/{len(self._window)}")
+                else:
+                    self._window = []
+            self._condition.notify_all()
+    
+    def _decrease(self, reason: str):
+        """Zmniejszenie multiplikatywne (wywoływane pod blokadą)"""
+        self.limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self._last_decrease = self.clock()
+        self._decide('decrease', reason)
+    
+    def _decide(self, action: str, reason: str):
+        """Zapisuje decyzję i rozpoczyna nowe okno (wywoływane pod blokadą)"""
+        self._window = []
+        self.decisions.append({
+            'at': get_utc_now().isoformat(), 'action': action,
+            'limit': self.limit, 'rate': round(self.rate, 3), 'reason': reason
+        })
+        log = logger.warning if action == 'decrease' else logger.info
+        log(f"Współbieżność Yahoo: {action} -> {self.limit} równoległych, {self.rate:.2f} zapytań/s ({reason})")
+    
+    def drain_samples(self) -> List[Dict]:
+        """Zwraca opóźnienia zapytań od poprzedniego wywołania (latency w sekundach, outcome)"""
+        with self._condition:
+            samples = list(self._unread)
+            self._unread.clear()
+            return samples
+    
+    def metrics(self, decisions: Optional[int] = 20) -> Dict:
+        """
+        Bieżący stan kontrolera i statystyki ostatnich zapytań
+        
+        Args:
+            decisions: Liczba ostatnich decyzji w wyniku (None - wszystkie)
+        """
+        with self._condition:
+            latencies = [sample['latency'] for sample in self._samples]
+            return {
+                'limit': self.limit,
+                'rate': round(self.rate, 3),
+                'in_flight': self.in_flight,
+                'requests': dict(self._totals),
+                'latency_p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 1) if latencies else None,
+                'latency_p95_ms': round(float(np.percentile(latencies, 95)) * 1000, 1) if latencies else None,
+                'decisions': list(self.decisions)[-decisions:] if decisions else list(self.decisions)
+            }
+
+# Wspólny kontroler dla wszystkich zapytań do Yahoo w procesie
+yahoo_controller = AdaptiveConcurrency()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Skrypt testowy dla adaptacyjnej współbieżności zapytań do Yahoo (AIMD)
+"""
+
+import sys
+import os
+import tempfile
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+# Dodaj ścieżkę do modułów
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from adaptive_concurrency import AdaptiveConcurrency, classify_error, OK, EMPTY, THROTTLED
+from fake_yahoo_server import FakeYahooServer
+from run_timer import RunTimer
+from stock_data_manager import StockDataManager
+from yahoo_guard import CircuitBreaker
+from shared_fixtures import FakeClock
+
+def _request(controller, clock, latency, outcome=OK):
+    with controller.slot() as request:
+        clock.now += latency
+        request.outcome = outcome
+
+def test_aimd_decisions():
+    """
+    Testuje zwiększanie o krok przy zdrowych zapytaniach i zmniejszanie o połowę przy dławieniu
+    """
+    print("=== TEST DECYZJI AIMD ===")
+    
+    clock = FakeClock()
+    controller = AdaptiveConcurrency(min_limit=1, max_limit=4, initial_limit=2, initial_rate=4.0,
+                                     max_rate=6.0, latency_target=1.0, window=5, clock=clock, sleep=clock.sleep)
+    
+    # Tempo 4 zapytania/s - kolejne zapytanie czeka 0.25 s
+    for _ in range(5):
+        _request(controller, clock, 0.1)
+    assert abs(clock.now - (4 * 0.25 + 0.1)) < 1e-9
+    assert (controller.limit, controller.rate) == (3, 5.0)
+    
+    for _ in range(10):
+        _request(controller, clock, 0.1)
+    assert (controller.limit, controller.rate) == (4, 6.0), "Limity nie mogą przekroczyć maksimum"
+    
+    # 429 - natychmiastowe zmniejszenie
+    _request(controller, clock, 0.1, THROTTLED)
+    assert (controller.limit, controller.rate) == (2, 3.0)
+    
+    # Wolne odpowiedzi (p95 > latency_target) - zmniejszenie po oknie
+    for _ in range(5):
+        _request(controller, clock, 2.0)
+    assert (controller.limit, controller.rate) == (1, 1.5)
+    
+    # Puste odpowiedzi ponad error_threshold - zmniejszenie do minimum
+    for _ in range(5):
+        _request(controller, clock, 0.1, EMPTY)
+    assert controller.limit == 1
+    
+    actions = [decision['action'] for decision in controller.decisions]
+    print(actions)
+    assert actions == ['increase', 'increase', 'decrease', 'decrease', 'decrease']
+    
+    metrics = controller.metrics()
+    print(metrics)
+    assert metrics['requests'] == {'ok': 20, 'empty': 5, 'error': 0, 'throttled': 1}
+    assert len(controller.drain_samples()) == 26
+    assert controller.drain_samples() == []
+    assert [decision['action'] for decision in controller.metrics(decisions=2)['decisions']] == ['decrease', 'decrease']
+    
+    # Historia decyzji jest ograniczona (kontroler żyje przez cały czas działania aplikacji)
+    bounded = AdaptiveConcurrency(window=1, history=3, clock=clock, sleep=clock.sleep)
+    for _ in range(10):
+        _request(bounded, clock, 0.1)
+    assert len(bounded.decisions) == 3
+    assert len(bounded.metrics(decisions=None)['decisions']) == 3
+    unread = AdaptiveConcurrency(samples=4, clock=clock, sleep=clock.sleep)
+    for _ in range(10):
+        _request(unread, clock, 0.1)
+    assert len(unread.drain_samples()) == 4
+    
+    # Błędy z 429 w treści są rozpoznawane jako dławienie
+    assert classify_error(Exception('HTTP Error 429: Too Many Requests')) == THROTTLED
+    assert classify_error(ConnectionError('Connection reset')) == 'error'
+    
+    print("Test decyzji AIMD zakończony pomyślnie")
+
+def test_backoff_against_fake_yahoo():
+    """
+    Testuje zwiększanie współbieżności do pojemności serwera i wycofanie po 429
+    """
+    print("\n=== TEST Z LOKALNYM SERWEREM YAHOO ===")
+    
+    controller = AdaptiveConcurrency(min_limit=1, max_limit=8, initial_limit=1, initial_rate=1000.0,
+                                     max_rate=1000.0, window=4)
+    
+    with FakeYahooServer(capacity=3, latency=0.05) as server:
+        def fetch(symbol):
+            try:
+                with controller.slot():
+                    urllib.request.urlopen(f"{server.url}/v8/finance/chart/{symbol}?range=5d", timeout=5).read()
+                return True
+            except Exception:
+                return False
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(fetch, [f"T{i}" for i in range(60)]))
+        stats = dict(server.stats)
+    
+    print(stats)
+    print(controller.decisions)
+    assert stats['requests'] == 60
+    assert stats['max_in_flight'] <= controller.max_limit
+    assert sum(results) == 60 - stats['throttled']
+    
+    # Limit rośnie ponad pojemność serwera, pierwsze 429 zmniejsza go do jej poziomu
+    assert stats['throttled'] > 0
+    first_decrease = next(decision for decision in controller.decisions if decision['action'] == 'decrease')
+    assert first_decrease['reason'] == 'throttled'
+    assert first_decrease['limit'] <= server.capacity
+    assert max(decision['limit'] for decision in controller.decisions) > server.capacity
+    
+    print("Test z lokalnym serwerem Yahoo zakończony pomyślnie")
+
+def test_bulk_update_through_fake_yahoo():
+    """
+    Testuje równoległe pobieranie w update_all_stock_data przez yfinance i lokalny serwer
+    """
+    print("\n=== TEST MASOWEJ AKTUALIZACJI ===")
+    
+    tickers = [f"S{i}" for i in range(12)] + ['GONE']
+    with tempfile.TemporaryDirectory() as tmp_dir, FakeYahooServer(capacity=8, unknown=['GONE']) as server, \
+            server.yfinance_redirected():
+        manager = StockDataManager(os.path.join(tmp_dir, 'test.db'))
+        manager.guard.breaker = CircuitBreaker()
+        manager.guard.controller = AdaptiveConcurrency(initial_limit=4, max_limit=4, initial_rate=1000.0,
+                                                       max_rate=1000.0)
+        timer = RunTimer()
+        counts = manager.update_all_stock_data(tickers, timer)
+        print(counts, server.stats)
+        
+        assert counts['updated'] == 12
+        assert counts['no_data'] == 1
+        assert 1 < server.stats['max_in_flight'] <= 4
+        assert manager.get_last_date('S0', '1D') >= date(2025, 1, 1)
+        requests = [span for span in timer.summary() if span['span_name'] == 'db_write.yahoo_request']
+        assert requests and requests[0]['count'] == 13
+    
+    print("Test masowej aktualizacji zakończony pomyślnie")
+
+if __name__ == "__main__":
+    test_aimd_decisions()
+    test_backoff_against_fake_yahoo()
+    test_bulk_update_through_fake_yahoo()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Benchmark pełnej analizy (stage2_analysis.main) na syntetycznych danych
+
+Każde powtórzenie działa w osobnym procesie i katalogu roboczym (offline_environment):
+arkusz z rows wierszami, universe spółek przechodzących Etap 1 i years lat notowań.
+Wynik to czasy etapów (mediana z powtórzeń), odczyty wyników jak w widokach
+i szczytowe RSS - w JSON porównywalnym z zapisanym wynikiem bazowym.
+"""
+
+import io
+import os
+import sys
+import time
+import json
+import queue
+import sqlite3
+import platform
+import statistics
+import tempfile
+import multiprocessing
+from contextlib import redirect_stdout
+from datetime import timedelta
+from typing import Dict, List, Optional
+import pandas as pd
+import logging
+try:
+    from .fake_yahoo_server import synthetic_bars
+    from .offline_fixtures import offline_environment, synthetic_tickers
+    from .stock_data_manager import StockDataManager
+    from .database_manager import DatabaseManager
+    from .timezone_utils import get_utc_now
+except ImportError:
+    from fake_yahoo_server import synthetic_bars
+    from offline_fixtures import offline_environment, synthetic_tickers
+    from stock_data_manager import StockDataManager
+    from database_manager import DatabaseManager
+    from timezone_utils import get_utc_now
+
+logger = logging.getLogger(__name__)
+
+# Etap benchmarku -> spany RunTimer sumowane w jego czasie
+STAGE_SPANS = {
+    'sheet_import': ['stage1.sheet_fetch'],
+    'selection': ['stage1.selection'],
+    'price_fetch': ['stage2.price_fetch'],
+    'price_update': ['db_write.price_update', 'db_write.bulk_price_update'],
+    'indicators': ['stage2.indicators', 'db_write.indicators'],
+    'db_write': ['db_write'],
+    'total': ['total'],
+}
+
+# Różnice poniżej progu to szum pomiaru, nie regresja
+NOISE_FLOOR = {'seconds': 0.05, 'peak_rss_mb': 10.0}
+
+def peak_rss_mb() -> Optional[float]:
+    """Szczytowe RSS bieżącego procesu w MB (None, gdy system nie udostępnia)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux podaje KB, macOS bajty
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def seed_price_history(db_path: str, tickers: List[str], years: float, until_days_ago: int = 7) -> int:
+    """
+    Zapisuje syntetyczne notowania dzienne (jak z lokalnego serwera) kończące się until_days_ago dni temu
+    
+    Analiza na takiej bazie pobiera tylko brakujące dni - jak codzienne uruchomienie.
+    
+    Returns:
+        Liczba zapisanych notowań
+    """
+    # Schemat i wersje konfiguracji jak po wcześniejszych uruchomieniach analizy
+    DatabaseManager(db_path)
+    manager = StockDataManager(db_path)
+    now = get_utc_now()
+    saved = 0
+    for ticker in tickers:
+        bars = synthetic_bars(ticker, now - timedelta(days=int(years * 365)), now - timedelta(days=until_days_ago))
+        index = pd.to_datetime(bars.pop('timestamp'), unit='s').normalize()
+        data = pd.DataFrame({'Open': bars['open'], 'High': bars['high'], 'Low': bars['low'],
+                             'Close': bars['close'], 'Volume': bars['volume']}, index=index)
+        manager.save_data(ticker, data, '1D', source='benchmark')
+        saved += len(data)
+    return saved
+
+def measure_result_reads(db_path: str, tickers: List[str], history_reads: int = 10) -> float:
+    """Czas odczytów wyników jak w widokach: ostatnie wyniki, wszystkie wyniki, historia uruchomień i spółek"""
+    db_manager = DatabaseManager(db_path)
+    start = time.perf_counter()
+    db_manager.get_latest_results()
+    db_manager.get_all_results()
+    db_manager.get_analysis_history(limit=10)
+    for ticker in tickers[:history_reads]:
+        db_manager.get_company_history_with_versions(ticker, limit=20)
+    return time.perf_counter() - start
+
+def run_once(workdir: str, universe: int, rows: int, years: float, latency: float = 0.0,
+             seed: int = 0) -> dict:
+    """
+    Jedno uruchomienie analizy offline w workdir (baza w workdir/data może być wcześniej zasilona)
+    
+    Returns:
+        Słownik: stages (sekundy na etap), peak_rss_mb, counts
+    """
+    
+    with offline_environment(workdir, universe=universe, rows=rows, latency=latency, seed=seed,
+                             history_years=years) as server:
+        try:
+            from . import stage2_analysis
+        except ImportError:
+            import stage2_analysis
+        with redirect_stdout(io.StringIO()):
+            stage2_analysis.main()
+        yahoo_requests = server.stats['requests']
+    
+    db_path = os.path.join(workdir, 'data', 'analizator_growth.db')
+    summary = DatabaseManager(db_path).get_run_timings_summary()
+    totals = {span['span_name']: span['total_ms'] / 1000 for span in summary['spans']}
+    stages = {stage: round(sum(totals.get(name, 0.0) for name in names), 4)
+              for stage, names in STAGE_SPANS.items()}
+    stages['result_reads'] = round(measure_result_reads(db_path, synthetic_tickers(universe)), 4)
+    
+    with sqlite3.connect(db_path) as conn:
+        companies = conn.execute("SELECT COUNT(*) FROM stage1_companies WHERE run_id = ?",
+                                 (summary['run_id'],)).fetchone()[0]
+        prices = conn.execute("SELECT COUNT(*) FROM stock_prices").fetchone()[0]
+    return {
+        'stages': stages,
+        'peak_rss_mb': peak_rss_mb(),
+        'counts': {'companies': companies, 'stock_prices': prices, 'yahoo_requests': yahoo_requests},
+    }
+
+def _run_in_child(args: tuple, results):
+    logging.disable(logging.WARNING)
+    try:
+        results.put({'result': run_once(*args)})
+    except Exception as e:
+        results.put({'error': f"{type(e).__name__}: {e}"})
+
+def _wait_for_child(process, results, timeout: float) -> dict:
+    """
+    Czeka na wynik procesu powtórzenia
+    
+    Raises:
+        RuntimeError: Gdy proces zgłosił błąd, zakończył się bez wyniku lub przekroczył timeout
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            message = results.get(timeout=1.0)
+            break
+        except queue.Empty:
+            if not process.is_alive():
+                # Wynik mógł trafić do kolejki tuż przed zakończeniem procesu
+                try:
+                    message = results.get(timeout=1.0)
+                    break
+                except queue.Empty:
+                    raise RuntimeError(f"Proces benchmarku zakończył się kodem {process.exitcode} bez wyniku")
+            if time.monotonic() > deadline:
+                process.terminate()
+                raise RuntimeError(f"Przekroczono limit czasu powtórzenia ({timeout:.0f}s)")
+    if 'error' in message:
+        raise RuntimeError(f"Błąd w procesie benchmarku: {message['error']}")
+    return message['result']
+
+def run_benchmark(universe: int = 50, rows: Optional[int] = None, years: float = 5.0, repeat: int = 3,
+                  latency: float = 0.0, warm: bool = True, seed: int = 0, timeout: float = 3600.0) -> dict:
+    """
+    Powtarza analizę offline w osobnych procesach i zwraca medianę czasów etapów
+    
+    Args:
+        universe: Spółki przechodzące Etap 1 (N)
+        rows: Wiersze arkusza (M, domyślnie 4 x universe)
+        years: Lata notowań (Y) - historia serwera i zasilonej bazy
+        repeat: Liczba powtórzeń
+        latency: Czas odpowiedzi lokalnego serwera Yahoo (sekundy)
+        warm: Baza z notowaniami do zeszłego tygodnia (codzienne uruchomienie) zamiast pustej
+        seed: Ziarno danych syntetycznych
+        timeout: Limit czasu jednego powtórzenia (sekundy)
+    
+    Raises:
+        RuntimeError: Gdy powtórzenie nie zwróciło wyniku (błąd, awaria procesu, timeout)
+    
+    Returns:
+        Wynik w formacie JSON (config, stages, peak_rss_mb, counts, environment, created_at)
+    """
+    rows = rows if rows is not None else 4 * universe
+    context = multiprocessing.get_context('spawn')
+    runs = []
+    for i in range(repeat):
+        with tempfile.TemporaryDirectory(prefix='analizator_benchmark_') as workdir:
+            if warm:
+                os.makedirs(os.path.join(workdir, 'data'), exist_ok=True)
+                seed_price_history(os.path.join(workdir, 'data', 'analizator_growth.db'),
+                                   synthetic_tickers(universe), years)
+            # Osobny proces - czysty stan modułów i własne szczytowe RSS
+            results = context.Queue()
+            process = context.Process(target=_run_in_child, args=((workdir, universe, rows, years, latency, seed), results))
+            process.start()
+            try:
+                result = _wait_for_child(process, results, timeout)
+            finally:
+                process.join()
+            runs.append(result)
+            logger.info(f"Powtórzenie {i + 1}/{repeat}: {result['stages']['total']:.2f}s")
+    
+    return {
+        'config': {'universe': universe, 'rows': rows, 'years': years, 'repeat': repeat,
+                   'latency': latency, 'warm': warm, 'seed': seed},
+        'stages': {stage: round(statistics.median(run['stages'][stage] for run in runs), 4)
+                   for stage in runs[0]['stages']},
+        'peak_rss_mb': max((run['peak_rss_mb'] for run in runs if run['peak_rss_mb'] is not None), default=None),
+        'counts': runs[-1]['counts'],
+        'environment': {'python': platform.python_version(), 'platform': platform.platform()},
+        'created_at': get_utc_now().isoformat(timespec='seconds'),
+    }
+
+def compare_to_baseline(result: dict, baseline: dict, tolerance: float = 0.25) -> List[Dict]:
+    """
+    Porównuje wynik z wynikiem bazowym
+    
+    Regresja to wartość większa od bazowej o więcej niż tolerance (względnie)
+    i więcej niż NOISE_FLOOR (bezwzględnie).
+    
+    Raises:
+        ValueError: Gdy wyniki pochodzą z różnych konfiguracji benchmarku
+    
+    Returns:
+        Lista regresji: metric, baseline, current, change (względna)
+    """
+    if result['config'] != baseline['config']:
+        raise ValueError(f"Inna konfiguracja benchmarku: {result['config']} != {baseline['config']}")
+    
+    metrics = [(f"stages.{stage}", value, result['stages'].get(stage), NOISE_FLOOR['seconds'])
+               for stage, value in baseline['stages'].items()]
+    metrics.append(('peak_rss_mb', baseline.get('peak_rss_mb'), result.get('peak_rss_mb'), NOISE_FLOOR['peak_rss_mb']))
+    
+    regressions = []
+    for metric, base, current, noise in metrics:
+        if base is None or current is None:
+            continue
+        if current > base * (1 + tolerance) and current - base > noise:
+            regressions.append({'metric': metric, 'baseline': base, 'current': current,
+                                'change': round(current / base - 1, 3) if base else None})
+    return regressions
+
+def load_result(path: str) -> dict:
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+def save_result(result: dict, path: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(result, file, indent=2, ensure_ascii=False)
+        file.write('\n')
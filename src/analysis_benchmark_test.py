@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Skrypt testowy dla benchmarku pełnej analizy
+"""
+
+import sys
+import os
+import queue
+import logging
+import tempfile
+import multiprocessing
+
+# Dodaj ścieżkę do modułów
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from analysis_benchmark import STAGE_SPANS, compare_to_baseline, run_once, seed_price_history, _run_in_child, _wait_for_child
+from offline_fixtures import synthetic_tickers
+
+def test_run_once_on_seeded_database():
+    """
+    Testuje jedno uruchomienie benchmarku na bazie z notowaniami do zeszłego tygodnia
+    """
+    print("=== TEST URUCHOMIENIA BENCHMARKU ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.makedirs(os.path.join(tmp_dir, 'data'))
+        seeded = seed_price_history(os.path.join(tmp_dir, 'data', 'analizator_growth.db'), synthetic_tickers(2), 1)
+        result = run_once(tmp_dir, universe=2, rows=5, years=1)
+        print(result)
+        
+        assert set(result['stages']) == set(STAGE_SPANS) | {'result_reads'}
+        assert result['stages']['total'] > result['stages']['db_write'] > 0
+        assert result['counts']['companies'] == 2
+        assert result['counts']['stock_prices'] > seeded
+        if sys.platform != 'win32':
+            assert result['peak_rss_mb'] > 0
+    
+    print("Test uruchomienia benchmarku zakończony pomyślnie")
+
+def test_compare_to_baseline():
+    """
+    Testuje wykrywanie regresji z tolerancją względną i progiem szumu
+    """
+    print("\n=== TEST PORÓWNANIA Z WYNIKIEM BAZOWYM ===")
+    
+    config = {'universe': 10, 'rows': 40, 'years': 5, 'repeat': 3, 'latency': 0.0, 'warm': True, 'seed': 0}
+    baseline = {'config': config, 'stages': {'total': 2.0, 'selection': 0.01, 'db_write': 1.0}, 'peak_rss_mb': 100.0}
+    current = {'config': config, 'stages': {'total': 2.4, 'selection': 0.03, 'db_write': 1.5}, 'peak_rss_mb': 140.0}
+    
+    regressions = compare_to_baseline(current, baseline, tolerance=0.25)
+    print(regressions)
+    # total +20% w tolerancji, selection x3 poniżej progu szumu
+    assert [regression['metric'] for regression in regressions] == ['stages.db_write', 'peak_rss_mb']
+    assert regressions[0]['change'] == 0.5
+    
+    assert compare_to_baseline(current, baseline, tolerance=0.6) == []
+    
+    try:
+        compare_to_baseline(dict(current, config=dict(config, universe=20)), baseline)
+        assert False, "Różne konfiguracje nie są porównywalne"
+    except ValueError:
+        pass
+    
+    print("Test porównania z wynikiem bazowym zakończony pomyślnie")
+
+def test_failed_repeat_does_not_hang():
+    """
+    Testuje zgłoszenie błędu, gdy powtórzenie nie zwraca wyniku (zamiast czekania bez końca)
+    """
+    print("\n=== TEST BŁĘDU POWTÓRZENIA ===")
+    
+    # Wyjątek w run_once wraca do procesu głównego
+    results = queue.Queue()
+    try:
+        _run_in_child(('/nie/istnieje',), results)
+    finally:
+        logging.disable(logging.NOTSET)
+    message = results.get_nowait()
+    print(message)
+    assert 'TypeError' in message['error']
+    
+    # Proces zakończony bez wyniku
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=os._exit, args=(3,))
+    process.start()
+    try:
+        _wait_for_child(process, results, timeout=60)
+        assert False, "Brak wyniku powinien zgłosić błąd"
+    except RuntimeError as e:
+        print(e)
+        assert 'kodem 3' in str(e)
+    finally:
+        process.join()
+    
+    print("Test błędu powtórzenia zakończony pomyślnie")
+
+if __name__ == "__main__":
+    test_run_once_on_seeded_database()
+    test_compare_to_baseline()
+    test_failed_repeat_does_not_hang()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Skrypt testowy dla archiwizacji starych uruchomień analizy
+"""
+
+import sys
+import os
+import json
+import sqlite3
+import tempfile
+from datetime import timedelta
+
+# Dodaj ścieżkę do modułów
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database_manager import DatabaseManager
+from schema_migrations import payload_hash
+from timezone_utils import get_local_now
+
+def _insert_run(conn, run_id, days_ago, tickers):
+    """Dodaje uruchomienie sprzed days_ago dni ze spółkami o wspólnej treści JSON"""
+    run_day = get_local_now().date() - timedelta(days=days_ago)
+    conn.execute("""
+        INSERT INTO analysis_runs (id, run_date, selected_count, run_day)
+        VALUES (?, ?, ?, ?)
+    """, (run_id, f"{run_day.isoformat()} 07:00:00", len(tickers), run_day.isoformat()))
+    
+    payload = json.dumps({'run': 'old' if days_ago > 365 else 'new'})
+    conn.execute("INSERT OR IGNORE INTO json_payloads (hash, payload) VALUES (?, ?)",
+                 (payload_hash(payload), payload))
+    for ticker in tickers:
+        conn.execute("""
+            INSERT INTO stage1_companies (run_id, ticker, selection_hash, informational_hash, yield)
+            VALUES (?, ?, ?, ?, ?)
+        """, (run_id, ticker, payload_hash(payload), payload_hash(payload), 5.0))
+    return run_day.isoformat()
+
+def test_archive_old_runs():
+    """
+    Testuje przeniesienie starych uruchomień i odczyt historii z archiwum
+    """
+    print("=== TEST ARCHIWIZACJI STARYCH URUCHOMIEŃ ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_manager = DatabaseManager(os.path.join(tmp_dir, 'test.db'))
+        with sqlite3.connect(db_manager.db_path) as conn:
+            old_day = _insert_run(conn, 1, 500, ['AAA', 'BBB'])
+            _insert_run(conn, 2, 400, ['AAA'])
+            _insert_run(conn, 3, 10, ['AAA', 'BBB'])
+        
+        # Bez archiwum pełna historia pochodzi z bazy
+        assert not os.path.exists(db_manager.archive_path)
+        assert len(db_manager.get_company_history('AAA', limit=10)) == 3
+        
+        result = db_manager.archive_old_runs(retention_days=365)
+        assert (result['runs'], result['companies'], result['payloads']) == (2, 3, 1), result
+        assert os.path.exists(db_manager.archive_path)
+        
+        with sqlite3.connect(db_manager.db_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM analysis_runs").fetchone()[0] == 1
+            assert conn.execute("SELECT COUNT(*) FROM json_payloads").fetchone()[0] == 1
+        
+        # Limit mieszczący się w bieżących danych nie sięga do archiwum
+        recent = db_manager.get_company_history('AAA', limit=1)
+        assert list(recent['run_id']) == [3]
+        
+        # Dłuższa historia jest dopełniana z archiwum (od najnowszych)
+        history = db_manager.get_company_history_with_versions('AAA', limit=10)
+        assert list(history['run_id']) == [3, 2, 1]
+        assert history.iloc[-1]['selection_data_parsed'] == {'run': 'old'}
+        
+        assert len(db_manager.get_all_results()) == 5
+        assert len(db_manager.get_companies_by_ticker('BBB')) == 2
+        assert list(db_manager.get_companies_by_date(old_day)['ticker']) == ['AAA', 'BBB']
+        
+        # Ponowna archiwizacja nie ma nic do przeniesienia
+        assert db_manager.archive_old_runs(retention_days=365)['runs'] == 0
+        print(f"Przeniesiono {result['runs']} uruchomienia, historia AAA: {list(history['run_id'])}")
+
+if __name__ == "__main__":
+    test_archive_old_runs()
@@ -25,6 +25,7 @@ from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
 
 from database_manager import DatabaseManager
 from stage2_analysis import main as run_analysis
+from job_manager import get_job_manager, JobCancelled
 
 # Konfiguracja logowania
 def setup_logging():
@@ -118,8 +119,8 @@ class AutoScheduler:
         }
         self.json_logger.info(json.dumps(json_event))
     
-    def _run_analysis_job(self):
-        """Funkcja uruchamiana przez scheduler"""
+    def _run_analysis_job(self, progress=None):
+        """Funkcja uruchamiana w kolejce zadań (progress to obiekt Job)"""
         # Użyj czasu lokalnego dla run_id, ale UTC dla bazy danych
         now_local = get_local_now()
         run_id = f"auto_{now_local.strftime('%Y%m%d_%H%M%S')}"
@@ -135,7 +136,7 @@ class AutoScheduler:
         
         try:
             # Uruchom analizę
-            run_analysis()
+            run_analysis(progress)
             
             # Oblicz czas wykonania
             end_time = get_local_now()
@@ -155,6 +156,18 @@ class AutoScheduler:
             # Zapisz sukces do bazy
             self._save_run_completion(run_id, end_time, "success", None, companies_count, execution_time)
             
+        except JobCancelled:
+            end_time = get_local_now()
+            execution_time = int((end_time - start_time).total_seconds())
+            
+            self._log_event("auto_analysis_cancelled",
+                           run_id=run_id,
+                           status="cancelled",
+                           execution_time_seconds=execution_time)
+            
+            self._save_run_completion(run_id, end_time, "cancelled", None, 0, execution_time)
+            raise
+            
         except Exception as e:
             # Oblicz czas wykonania
             end_time = get_local_now()
@@ -185,31 +198,13 @@ class AutoScheduler:
             self._log_event('flag_snapshot_started', time=now_local.isoformat())
             self.readable_logger.info("Rozpoczęto codzienny snapshot flag")
             
-            # Pobierz wszystkie aktualne flagi
-            flags_df = self.db_manager.get_all_flags()
+            # Zapisz snapshot wszystkich flag jedną transakcją
+            snapshot_count = self.db_manager.snapshot_flags('daily_snapshot', run_id)
             
-            if flags_df.empty:
+            if snapshot_count == 0:
                 self.readable_logger.info("Brak flag do zapisania w historii")
                 return
             
-            # Zapisz snapshot do historii
-            snapshot_count = 0
-            for _, row in flags_df.iterrows():
-                ticker = row['ticker']
-                flag_color = row['flag_color']
-                flag_notes = row.get('flag_notes', '')
-                
-                # Sprawdź czy już jest wpis z dzisiaj dla tego tickera
-                today = now_local.date()
-                
-                # Zapisz do historii z powodem 'daily_snapshot'
-                success = self._save_flag_to_history(
-                    ticker, flag_color, flag_notes, 'daily_snapshot', run_id
-                )
-                
-                if success:
-                    snapshot_count += 1
-            
             self._log_event('flag_snapshot_completed', 
                            snapshot_count=snapshot_count,
                            time=get_utc_now().isoformat())
@@ -223,43 +218,23 @@ class AutoScheduler:
                            time=get_utc_now().isoformat())
             self.readable_logger.error(f"Błąd podczas codziennego snapshotu flag: {error_details}")
     
-    def _save_flag_to_history(self, ticker: str, flag_color: str, flag_notes: str, 
-                             change_reason: str, run_id: str = None) -> bool:
-        """Zapisuje flagę do historii"""
+    def _run_maintenance_job(self, progress=None):
+        """Przenosi stare uruchomienia analizy do archiwum (w kolejce zadań)"""
+        retention_days = int(self.config.get('maintenance', {}).get('retention_days', 365))
         try:
-            # Użyj czasu lokalnego
-            now_local = get_local_now()
+            self._log_event('maintenance_started', retention_days=retention_days)
+            if progress is not None:
+                progress.set_stage('archive')
             
-            with self.db_manager.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Sprawdź czy już jest wpis z dzisiaj dla tego tickera
-                today = now_local.date()
-                cursor.execute("""
-                    SELECT id FROM flag_history 
-                    WHERE ticker = ? AND DATE(changed_at) = ? AND change_reason = 'daily_snapshot'
-                """, (ticker, today))
-                
-                if cursor.fetchone():
-                    # Aktualizuj istniejący wpis
-                    cursor.execute("""
-                        UPDATE flag_history 
-                        SET flag_color = ?, flag_notes = ?, changed_at = ?
-                        WHERE ticker = ? AND DATE(changed_at) = ? AND change_reason = 'daily_snapshot'
-                    """, (flag_color, flag_notes, now_local, ticker, today))
-                else:
-                    # Dodaj nowy wpis
-                    cursor.execute("""
-                        INSERT INTO flag_history (ticker, flag_color, flag_notes, change_reason, run_id, changed_at)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    """, (ticker, flag_color, flag_notes, change_reason, run_id, now_local))
-                
-                conn.commit()
-                return True
-                
+            result = self.db_manager.archive_old_runs(retention_days)
+            
+            self._log_event('maintenance_completed', **result)
+            self.readable_logger.info(f"Archiwizacja zakończona - przeniesiono {result['runs']} uruchomień "
+                                      f"sprzed {result['cutoff']} ({result['companies']} spółek)")
         except Exception as e:
-            self.readable_logger.error(f"Błąd podczas zapisywania flagi do historii: {e}")
-            return False
+            self._log_event('maintenance_failed', error=str(e))
+            self.readable_logger.error(f"Błąd podczas archiwizacji starych uruchomień: {e}")
+            raise
     
     def _save_run_start(self, run_id: str, start_time: datetime):
         """Zapisuje rozpoczęcie uruchomienia do bazy"""
@@ -309,7 +284,7 @@ class AutoScheduler:
                 timezone = self.config['auto_schedule']['timezone']
                 
                 self.scheduler.add_job(
-                    func=self._run_analysis_job,
+                    func=self.run_now,
                     trigger=CronTrigger(hour=hour, minute=minute, timezone=timezone),
                     id='daily_analysis',
                     name='Codzienna analiza',
@@ -339,6 +314,25 @@ class AutoScheduler:
             except Exception as e:
                 self.readable_logger.error(f"Błąd podczas dodawania zadania flag snapshot: {e}")
         
+        # Dodaj zadanie archiwizacji starych uruchomień jeśli włączone
+        if self.config.get('maintenance', {}).get('enabled', False):
+            try:
+                time_str = self.config['maintenance']['time']
+                hour, minute = map(int, time_str.split(':'))
+                timezone = self.config['maintenance'].get('timezone', 'Europe/Warsaw')
+                
+                self.scheduler.add_job(
+                    func=self.run_maintenance_now,
+                    trigger=CronTrigger(hour=hour, minute=minute, timezone=timezone),
+                    id='maintenance',
+                    name='Archiwizacja starych uruchomień',
+                    replace_existing=True
+                )
+                jobs_added = True
+                self.readable_logger.info(f"Dodano zadanie archiwizacji - codziennie o {time_str} ({timezone})")
+            except Exception as e:
+                self.readable_logger.error(f"Błąd podczas dodawania zadania archiwizacji: {e}")
+        
         if not jobs_added:
             self.readable_logger.info("Brak włączonych zadań")
             return
@@ -464,10 +458,23 @@ class AutoScheduler:
             return []
     
     def run_now(self) -> Dict:
-        """Uruchamia analizę natychmiast"""
+        """Dodaje analizę do kolejki zadań (jedna analiza naraz)"""
+        try:
+            job, created = get_job_manager().submit('analysis', self._run_analysis_job)
+            if not created:
+                self._log_event("auto_analysis_skipped", reason="already_running", job_id=job.id)
+                return {"success": False, "message": "Analiza już trwa", "job_id": job.id}
+            return {"success": True, "message": "Analiza uruchomiona w tle", "job_id": job.id}
+        except Exception as e:
+            return {"success": False, "message": f"Błąd: {str(e)}"}
+    
+    def run_maintenance_now(self) -> Dict:
+        """Dodaje archiwizację do kolejki zadań (nie działa równolegle z analizą)"""
         try:
-            self._run_analysis_job()
-            return {"success": True, "message": "Analiza uruchomiona pomyślnie"}
+            job, created = get_job_manager().submit('maintenance', self._run_maintenance_job)
+            if not created:
+                return {"success": False, "message": "Archiwizacja już trwa", "job_id": job.id}
+            return {"success": True, "message": "Archiwizacja uruchomiona w tle", "job_id": job.id}
         except Exception as e:
             return {"success": False, "message": f"Błąd: {str(e)}"}
 
@@ -3,36 +3,54 @@
 Moduł do zarządzania cache
 """
 
+import sys
 import time
 import json
 import hashlib
+import threading
 from functools import wraps
 import logging
 
 logger = logging.getLogger(__name__)
 
+class _InFlight:
+    """
+    Obliczenie w toku dla danego klucza (single-flight)
+    """
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
 class CacheManager:
     """
     Prosty cache manager używający pamięci
+    
+    Obsługuje single-flight (tylko jeden wątek przelicza wygasły klucz,
+    pozostałe czekają na jego wynik) oraz opcjonalne stale-while-revalidate.
     """
     
     def __init__(self, default_ttl=300):  # 5 minut domyślnie
         self.cache = {}
         self.default_ttl = default_ttl
+        self._lock = threading.RLock()
+        self._inflight = {}
     
     def get(self, key):
         """
         Pobiera wartość z cache
         """
-        if key in self.cache:
-            value, timestamp, ttl = self.cache[key]
-            if time.time() - timestamp < ttl:
-                logger.debug(f"Cache hit for key: {key}")
-                return value
-            else:
-                # Usuń wygasły wpis
-                del self.cache[key]
-                logger.debug(f"Cache expired for key: {key}")
+        with self._lock:
+            if key in self.cache:
+                value, timestamp, ttl = self.cache[key]
+                if time.time() - timestamp < ttl:
+                    logger.debug(f"Cache hit for key: {key}")
+                    return value
+                else:
+                    # Usuń wygasły wpis
+                    del self.cache[key]
+                    logger.debug(f"Cache expired for key: {key}")
         
         logger.debug(f"Cache miss for key: {key}")
         return None
@@ -44,22 +62,110 @@ class CacheManager:
         if ttl is None:
             ttl = self.default_ttl
         
-        self.cache[key] = (value, time.time(), ttl)
+        with self._lock:
+            self.cache[key] = (value, time.time(), ttl)
         logger.debug(f"Cache set for key: {key}, ttl: {ttl}")
     
+    def get_or_compute(self, key, compute, ttl=None, stale_ttl=0):
+        """
+        Pobiera wartość z cache lub oblicza ją z semantyką single-flight
+        
+        Args:
+            key: Klucz cache
+            compute: Funkcja bez argumentów obliczająca wartość
+            ttl: Czas życia wpisu w sekundach
+            stale_ttl: Jak długo po wygaśnięciu zwracać starą wartość,
+                       odświeżając ją w tle (0 = wyłączone)
+        
+        Returns:
+            Wartość z cache lub świeżo obliczona
+        """
+        if ttl is None:
+            ttl = self.default_ttl
+        
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry is not None:
+                value, timestamp, entry_ttl = entry
+                age = time.time() - timestamp
+                if age < entry_ttl:
+                    logger.debug(f"Cache hit for key: {key}")
+                    return value
+                if age < entry_ttl + stale_ttl:
+                    # Zwróć starą wartość, odśwież w tle (jedno odświeżenie naraz)
+                    if key not in self._inflight:
+                        flight = _InFlight()
+                        self._inflight[key] = flight
+                        threading.Thread(
+                            target=self._compute_flight,
+                            args=(key, flight, compute, ttl),
+                            name=f"cache-refresh-{key[:40]}",
+                            daemon=True
+                        ).start()
+                        logger.debug(f"Cache stale for key: {key}, odświeżanie w tle")
+                    return value
+                del self.cache[key]
+            
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _InFlight()
+                self._inflight[key] = flight
+        
+        if leader:
+            logger.debug(f"Cache miss for key: {key}")
+            self._compute_flight(key, flight, compute, ttl)
+        else:
+            logger.debug(f"Cache miss for key: {key}, czekam na trwające obliczenie")
+            flight.event.wait()
+        
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+    
+    def _compute_flight(self, key, flight, compute, ttl):
+        """
+        Wykonuje obliczenie dla klucza i budzi oczekujące wątki
+        """
+        try:
+            flight.value = compute()
+        except Exception as e:
+            flight.error = e
+            logger.error(f"Błąd podczas obliczania wartości cache dla {key}: {e}")
+        finally:
+            with self._lock:
+                # Zapisz wynik tylko jeśli klucz nie został w międzyczasie unieważniony
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+                    if flight.error is None and flight.value is not None:
+                        self.cache[key] = (flight.value, time.time(), ttl)
+            flight.event.set()
+    
     def delete(self, key):
         """
         Usuwa wartość z cache
         """
-        if key in self.cache:
-            del self.cache[key]
-            logger.debug(f"Cache deleted for key: {key}")
+        with self._lock:
+            # Trwające obliczenie mogło przeczytać stare dane - nie zapisuj jego wyniku
+            self._inflight.pop(key, None)
+            if key in self.cache:
+                del self.cache[key]
+                logger.debug(f"Cache deleted for key: {key}")
+    
+    def keys(self):
+        """
+        Zwraca listę kluczy w cache i w trakcie obliczania
+        """
+        with self._lock:
+            return list(set(self.cache.keys()) | set(self._inflight.keys()))
     
     def clear(self):
         """
         Czyści cały cache
         """
-        self.cache.clear()
+        with self._lock:
+            self.cache.clear()
+            self._inflight.clear()
         logger.info("Cache cleared")
     
     def cleanup_expired(self):
@@ -69,12 +175,13 @@ class CacheManager:
         now = time.time()
         expired_keys = []
         
-        for key, (value, timestamp, ttl) in self.cache.items():
-            if now - timestamp >= ttl:
-                expired_keys.append(key)
-        
-        for key in expired_keys:
-            del self.cache[key]
+        with self._lock:
+            for key, (value, timestamp, ttl) in self.cache.items():
+                if now - timestamp >= ttl:
+                    expired_keys.append(key)
+            
+            for key in expired_keys:
+                del self.cache[key]
         
         if expired_keys:
             logger.info(f"Cleaned up {len(expired_keys)} expired cache entries")
@@ -87,25 +194,34 @@ class CacheManager:
         active_entries = 0
         expired_entries = 0
         
-        for key, (value, timestamp, ttl) in self.cache.items():
-            if now - timestamp < ttl:
-                active_entries += 1
-            else:
-                expired_entries += 1
-        
-        return {
-            'total_entries': len(self.cache),
-            'active_entries': active_entries,
-            'expired_entries': expired_entries,
-            'memory_usage': len(str(self.cache))
-        }
+        with self._lock:
+            for key, (value, timestamp, ttl) in self.cache.items():
+                if now - timestamp < ttl:
+                    active_entries += 1
+                else:
+                    expired_entries += 1
+            
+            return {
+                'total_entries': len(self.cache),
+                'active_entries': active_entries,
+                'expired_entries': expired_entries,
+                'inflight_entries': len(self._inflight),
+                'memory_usage': len(str(self.cache))
+            }
 
 # Globalna instancja cache managera
-cache_manager = CacheManager()
+# Moduł bywa ładowany jako 'cache_manager' i 'src.cache_manager' (różne style importu),
+# obie kopie muszą współdzielić jedną instancję, aby inwalidacja działała w całym procesie
+_other_module = sys.modules.get('src.cache_manager' if __name__ == 'cache_manager' else 'cache_manager')
+cache_manager = getattr(_other_module, 'cache_manager', None) or CacheManager()
 
-def cached(ttl=300, key_prefix=''):
+def cached(ttl=300, key_prefix='', stale_ttl=0):
     """
     Decorator do cache'owania funkcji
+    
+    Równoległe wywołania z tym samym kluczem czekają na jedno obliczenie.
+    Przy stale_ttl > 0 po wygaśnięciu zwracana jest stara wartość,
+    a odświeżenie odbywa się w tle.
     """
     def decorator(f):
         @wraps(f)
@@ -113,16 +229,9 @@ def cached(ttl=300, key_prefix=''):
             # Generuj klucz cache na podstawie argumentów
             cache_key = f"{key_prefix}:{f.__name__}:{hashlib.md5(str(args).encode() + str(kwargs).encode()).hexdigest()}"
             
-            # Sprawdź cache
-            cached_result = cache_manager.get(cache_key)
-            if cached_result is not None:
-                return cached_result
-            
-            # Wykonaj funkcję i zapisz wynik
-            result = f(*args, **kwargs)
-            cache_manager.set(cache_key, result, ttl)
-            
-            return result
+            return cache_manager.get_or_compute(
+                cache_key, lambda: f(*args, **kwargs), ttl, stale_ttl
+            )
         return wrapper
     return decorator
 
@@ -131,7 +240,7 @@ def invalidate_cache(pattern):
     Usuwa wpisy z cache pasujące do wzorca
     """
     keys_to_delete = []
-    for key in cache_manager.cache.keys():
+    for key in cache_manager.keys():
         if pattern in key:
             keys_to_delete.append(key)
     
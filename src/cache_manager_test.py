@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Skrypt testowy dla cache (single-flight i stale-while-revalidate)
+"""
+
+import sys
+import os
+import time
+import threading
+
+# Dodaj ścieżkę do modułów
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from cache_manager import CacheManager
+
+def test_single_flight():
+    """
+    Testuje czy równoległe chybienia wykonują tylko jedno obliczenie
+    """
+    print("=== TEST SINGLE-FLIGHT ===")
+    
+    cache = CacheManager()
+    calls = []
+    
+    def slow_compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return 'wynik'
+    
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute('k', slow_compute, ttl=60)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    print(f"Obliczeń: {len(calls)}, wyników: {len(results)}")
+    assert len(calls) == 1
+    assert results == ['wynik'] * 8
+
+def test_stale_while_revalidate():
+    """
+    Testuje zwracanie starej wartości podczas odświeżania w tle
+    """
+    print("=== TEST STALE-WHILE-REVALIDATE ===")
+    
+    cache = CacheManager()
+    cache.set('k', 'stara', ttl=0.05)
+    time.sleep(0.1)
+    
+    refreshed = threading.Event()
+    
+    def compute():
+        refreshed.set()
+        return 'nowa'
+    
+    assert cache.get_or_compute('k', compute, ttl=60, stale_ttl=60) == 'stara'
+    assert refreshed.wait(2)
+    
+    # Poczekaj aż wątek w tle zapisze wynik
+    for _ in range(100):
+        if cache.get('k') == 'nowa':
+            break
+        time.sleep(0.01)
+    
+    print(f"Wartość po odświeżeniu: {cache.get('k')}")
+    assert cache.get('k') == 'nowa'
+
+def test_invalidation_during_compute():
+    """
+    Testuje czy wynik obliczenia unieważnionego w trakcie nie trafia do cache
+    """
+    print("=== TEST INWALIDACJI W TRAKCIE OBLICZANIA ===")
+    
+    cache = CacheManager()
+    
+    def compute():
+        cache.delete('k')
+        return 'przestarzała'
+    
+    assert cache.get_or_compute('k', compute, ttl=60) == 'przestarzała'
+    assert cache.get('k') is None
+
+if __name__ == "__main__":
+    test_single_flight()
+    test_stale_while_revalidate()
+    test_invalidation_during_compute()
+    print("✅ Testy cache zakończone")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Skrypt testowy dla korekty historii po splitach i dywidendach
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Dodaj ścieżkę do modułów
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from stock_data_manager import StockDataManager
+
+SPLIT_DAY = pd.Timestamp('2025-03-03')
+
+def _history(days=200):
+    """Notowania 'nieskorygowane' (tak jak zapisane przed zdarzeniem)"""
+    index = pd.bdate_range('2024-06-03', periods=days)
+    close = 100 + np.sin(np.arange(days) / 5) * 10
+    return pd.DataFrame({
+        'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+        'Volume': np.full(days, 1000.0), 'Dividends': 0.0, 'Stock Splits': 0.0
+    }, index=index)
+
+def _fake_fetch(source, calls):
+    """Zastępuje pobieranie z Yahoo - zwraca notowania od start_date"""
+    def fetch(ticker, start_date=None):
+        calls.append(start_date)
+        data = source() if callable(source) else source
+        return data[data.index.date >= start_date].copy() if start_date else data.copy()
+    return fetch
+
+def _stored_close(manager, ticker):
+    return manager.get_stock_data(ticker, '1D', limit=1000)['close']
+
+def test_split_rescales_history():
+    """
+    Testuje przeskalowanie zapisanej historii po splicie 2:1 bez pełnego pobrania
+    """
+    print("=== TEST SPLITU ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'test.db')
+        manager = StockDataManager(db_path)
+        history = _history()
+        stored = history[history.index < SPLIT_DAY - pd.Timedelta(days=3)]
+        calls = []
+        
+        manager.fetch_daily_data = _fake_fetch(stored, calls)
+        manager.update_stock_data('AAA')
+        manager.fetch_daily_data = _fake_fetch(stored, calls)
+        manager.update_stock_data('BBB')
+        
+        # Wartości wskaźników obu spółek
+        with sqlite3.connect(db_path) as conn:
+            conn.executemany("""
+                INSERT INTO indicator_values (ticker_id, timeframe, indicator, params_hash, day_number, value)
+                SELECT id, '1D', 'rsi', x'00', 1, 50 FROM tickers WHERE symbol = ?
+            """, [('AAA',), ('BBB',)])
+        
+        # Yahoo po splicie: historia sprzed splitu podzielona przez 2, wolumen × 2
+        adjusted = history.copy()
+        before = adjusted.index < SPLIT_DAY
+        adjusted.loc[before, ['Open', 'High', 'Low', 'Close']] /= 2
+        adjusted.loc[before, 'Volume'] *= 2
+        adjusted.loc[SPLIT_DAY, 'Stock Splits'] = 2.0
+        
+        manager.fetch_daily_data = _fake_fetch(adjusted, calls)
+        manager.update_stock_data('AAA')
+        
+        assert calls[-1] is not None  # tylko okno porównania, bez pełnej historii
+        close = _stored_close(manager, 'AAA')
+        expected = adjusted['Close']
+        print(f"Zapisane: {len(close)}, maks. różnica: {np.abs(close.values - expected.values).max()}")
+        assert len(close) == len(adjusted)
+        assert np.allclose(close.values, expected.values)
+        volume = manager.get_stock_data('AAA', '1D', limit=1000)['volume']
+        assert (volume.values == adjusted['Volume'].values).all()
+        
+        actions = manager.get_corporate_actions('AAA')
+        assert list(actions.index) == [SPLIT_DAY] and actions['split_ratio'].iloc[0] == 2.0
+        
+        # Unieważnione tylko wskaźniki AAA; historia BBB bez zmian
+        with sqlite3.connect(db_path) as conn:
+            remaining = [row[0] for row in conn.execute("""
+                SELECT t.symbol FROM indicator_values v JOIN tickers t ON t.id = v.ticker_id
+            """)]
+        assert remaining == ['BBB']
+        assert np.allclose(_stored_close(manager, 'BBB').values, stored['Close'].values)
+
+def test_dividend_and_inconsistent_window():
+    """
+    Testuje korektę po dywidendzie i pełne pobranie przy niejednolitej korekcie
+    """
+    print("=== TEST DYWIDENDY ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = StockDataManager(os.path.join(tmp_dir, 'test.db'))
+        history = _history()
+        stored = history[history.index < SPLIT_DAY - pd.Timedelta(days=3)]
+        calls = []
+        manager.fetch_daily_data = _fake_fetch(stored, calls)
+        manager.update_stock_data('AAA')
+        
+        # Dywidenda 1% - ceny sprzed odcięcia × 0.99, wolumen bez zmian
+        adjusted = history.copy()
+        before = adjusted.index < SPLIT_DAY
+        adjusted.loc[before, ['Open', 'High', 'Low', 'Close']] *= 0.99
+        adjusted.loc[SPLIT_DAY, 'Dividends'] = 1.0
+        manager.fetch_daily_data = _fake_fetch(adjusted, calls)
+        manager.update_stock_data('AAA')
+        assert np.allclose(_stored_close(manager, 'AAA').values, adjusted['Close'].values)
+        assert (manager.get_stock_data('AAA', '1D', limit=1000)['volume'] == 1000).all()
+        
+        # Rewizja niejednolita w oknie porównania - pełne pobranie historii
+        revised = adjusted.copy()
+        revised[['Open', 'High', 'Low', 'Close']] = revised[['Open', 'High', 'Low', 'Close']].mul(
+            np.linspace(0.9, 1.0, len(revised)), axis=0)
+        revised['Dividends'] = 0.0
+        manager.fetch_daily_data = _fake_fetch(revised, calls)
+        manager.update_stock_data('AAA')
+        assert calls[-1] is None
+        assert np.allclose(_stored_close(manager, 'AAA').values, revised['Close'].values)
+
+if __name__ == "__main__":
+    test_split_rescales_history()
+    test_dividend_and_inconsistent_window()
+    print("✅ Testy zdarzeń korporacyjnych zakończone")
@@ -1,15 +1,19 @@
+import os
+import zlib
 import sqlite3
 import pandas as pd
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import logging
 try:
     from .cache_manager import cached, invalidate_cache
     from .timezone_utils import get_utc_now, get_local_now, utc_to_local, local_to_utc, ensure_utc, ensure_local, format_datetime_for_display
+    from .schema_migrations import apply_migrations, payload_hash, init_archive_schema
 except ImportError:
     from cache_manager import cached, invalidate_cache
     from timezone_utils import get_utc_now, get_local_now, utc_to_local, local_to_utc, ensure_utc, ensure_local, format_datetime_for_display
+    from schema_migrations import apply_migrations, payload_hash, init_archive_schema
 
 # Konfiguracja logowania
 logging.basicConfig(level=logging.INFO)
@@ -20,14 +24,17 @@ class DatabaseManager:
     Klasa do zarządzania bazą danych SQLite dla Analizatora Growth
     """
     
-    def __init__(self, db_path: str = "data/analizator_growth.db"):
+    def __init__(self, db_path: str = "data/analizator_growth.db", archive_path: str = None):
         """
         Inicjalizuje menedżer bazy danych
         
         Args:
             db_path: Ścieżka do pliku bazy danych
+            archive_path: Ścieżka do archiwum starych uruchomień
+                          (domyślnie <db_path>_archive.db)
         """
         self.db_path = db_path
+        self.archive_path = archive_path or f"{os.path.splitext(db_path)[0]}_archive.db"
         self.init_database()
     
     def get_connection(self):
@@ -37,144 +44,12 @@ class DatabaseManager:
     def init_database(self):
         """
         Inicjalizuje bazę danych z wszystkimi tabelami
+        
+        Stosuje tylko oczekujące migracje (schema_migrations); przy aktualnym
+        schemacie to jeden odczyt PRAGMA user_version.
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Tabela uruchomień analizy
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS analysis_runs (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        run_date TIMESTAMP NOT NULL,
-                        selected_count INTEGER DEFAULT 0,
-                        notes TEXT,
-                        selection_rules_version TEXT,
-                        informational_columns_version TEXT
-                    )
-                """)
-                
-                # Tabela wersji reguł selekcji
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS selection_rules_versions (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        version TEXT UNIQUE NOT NULL,
-                        rules_json TEXT NOT NULL,
-                        created_at TIMESTAMP NOT NULL,
-                        description TEXT
-                    )
-                """)
-                
-                # Tabela wersji kolumn informacyjnych
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS informational_columns_versions (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        version TEXT UNIQUE NOT NULL,
-                        columns_json TEXT NOT NULL,
-                        created_at TIMESTAMP NOT NULL,
-                        description TEXT
-                    )
-                """)
-                
-                # Tabela spółek z Etapu 1 (z JSON dla elastyczności)
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS stage1_companies (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        run_id INTEGER NOT NULL,
-                        ticker TEXT NOT NULL,
-                        selection_data TEXT,  -- JSON z danymi selekcji
-                        informational_data TEXT,  -- JSON z danymi informacyjnymi
-                        yield REAL,
-                        yield_netto REAL,
-                        current_price REAL,
-                        price_for_5_percent_yield REAL,
-                        stochastic_1m REAL,
-                        stochastic_1w REAL,
-                        stage2_passed BOOLEAN,
-                        FOREIGN KEY (run_id) REFERENCES analysis_runs (id)
-                    )
-                """)
-                
-                # Tabela notatek dla spółek
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS company_notes (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        ticker TEXT NOT NULL,
-                        note_number INTEGER NOT NULL,
-                        title TEXT,
-                        content TEXT NOT NULL,
-                        created_at TIMESTAMP NOT NULL,
-                        updated_at TIMESTAMP NOT NULL,
-                        UNIQUE(ticker, note_number)
-                    )
-                """)
-                
-                # Tabela automatycznych uruchomień
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS auto_schedule_runs (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        run_id TEXT UNIQUE NOT NULL,
-                        scheduled_time TIMESTAMP,
-                        started_at TIMESTAMP,
-                        completed_at TIMESTAMP,
-                        status TEXT NOT NULL, -- success, error, timeout
-                        error_details TEXT, -- JSON z błędami
-                        companies_count INTEGER,
-                        execution_time_seconds INTEGER,
-                        created_at TIMESTAMP NOT NULL
-                    )
-                """)
-                
-                # Tabela flag spółek
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS company_flags (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        ticker TEXT NOT NULL UNIQUE,
-                        flag_color TEXT NOT NULL CHECK (flag_color IN ('red', 'green', 'yellow', 'blue', 'none')),
-                        flag_notes TEXT,
-                        created_at TIMESTAMP NOT NULL,
-                        updated_at TIMESTAMP NOT NULL
-                    )
-                """)
-                
-                # Tabela historii flag
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS flag_history (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        ticker TEXT NOT NULL,
-                        flag_color TEXT NOT NULL,
-                        previous_flag_color TEXT,
-                        flag_notes TEXT,
-                        changed_at TIMESTAMP NOT NULL,
-                        change_reason TEXT DEFAULT 'manual',
-                        run_id INTEGER,
-                        FOREIGN KEY (run_id) REFERENCES analysis_runs(id)
-                    )
-                """)
-                
-                # Dodaj kolumny jeśli nie istnieją (migracja)
-                try:
-                    cursor.execute("ALTER TABLE stage1_companies ADD COLUMN current_price REAL")
-                except sqlite3.OperationalError:
-                    pass  # Kolumna już istnieje
-                
-                try:
-                    cursor.execute("ALTER TABLE stage1_companies ADD COLUMN price_for_5_percent_yield REAL")
-                except sqlite3.OperationalError:
-                    pass  # Kolumna już istnieje
-                
-                # Dodaj indeksy dla lepszej wydajności
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_stage1_run_id ON stage1_companies(run_id)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_stage1_ticker ON stage1_companies(ticker)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_notes_ticker ON company_notes(ticker)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_notes_ticker_number ON company_notes(ticker, note_number)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_flags_ticker ON company_flags(ticker)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_flag_history_ticker ON flag_history(ticker)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_flag_history_date ON flag_history(changed_at)")
-                
-                conn.commit()
-                logger.info("Baza danych zainicjalizowana pomyślnie")
-                
+            apply_migrations(self.db_path)
         except Exception as e:
             logger.error(f"Błąd podczas inicjalizacji bazy danych: {e}")
             raise
@@ -199,10 +74,10 @@ class DatabaseManager:
                 cursor = conn.cursor()
                 
                 # Usuń poprzednie uruchomienia z dzisiaj (jedno uruchomienie dziennie)
-                today = get_local_now().date()
+                today = get_local_now().date().isoformat()
                 cursor.execute("""
                     SELECT id FROM analysis_runs 
-                    WHERE DATE(run_date) = ?
+                    WHERE run_day = ?
                     ORDER BY run_date DESC
                 """, (today,))
                 
@@ -221,10 +96,10 @@ class DatabaseManager:
                 # Utwórz nowe uruchomienie
                 cursor.execute("""
                     INSERT INTO analysis_runs (run_date, selected_count, notes, 
-                                              selection_rules_version, informational_columns_version)
-                    VALUES (?, ?, ?, ?, ?)
+                                              selection_rules_version, informational_columns_version, run_day)
+                    VALUES (?, ?, ?, ?, ?, ?)
                 """, (get_utc_now(), selected_count, notes, 
-                      current_selection_version, current_info_version))
+                      current_selection_version, current_info_version, today))
                 
                 run_id = cursor.lastrowid
                 conn.commit()
@@ -241,7 +116,8 @@ class DatabaseManager:
             logger.error(f"Błąd podczas tworzenia uruchomienia analizy: {e}")
             raise
     
-    def save_stage1_companies(self, run_id: int, stage1_df: pd.DataFrame, stage2_df: pd.DataFrame):
+    def save_stage1_companies(self, run_id: int, stage1_df: pd.DataFrame, stage2_df: pd.DataFrame,
+                              progress=None, timer=None):
         """
         Zapisuje spółki Etapu 1 z danymi selekcji i informacjami o Etapie 2
         
@@ -249,14 +125,24 @@ class DatabaseManager:
             run_id: ID uruchomienia analizy
             stage1_df: DataFrame z wynikami Etapu 1
             stage2_df: DataFrame z wynikami Etapu 2
+            progress: Opcjonalny raport postępu (liczba zapisanych spółek)
+            timer: Opcjonalny RunTimer mierzący czasy kroków zapisu
         """
         try:
             # Importuj Stock Data Manager dla pobierania cen i obliczania Stochastic
             from src.stock_data_manager import StockDataManager
+            from src.indicator_engine import IndicatorEngine
+            from src.quote_service import get_quote_service
+            from src.run_timer import NullTimer
+            timer = timer or NullTimer()
             stock_manager = StockDataManager()
+            indicator_engine = IndicatorEngine(stock_manager.db_path)
             with sqlite3.connect(self.db_path) as conn:
                 # Przygotuj dane do zapisu
                 records = []
+                payloads = {}
+                sheet_prices = {}
+                price_skips = 0
                 for _, row in stage1_df.iterrows():
                     ticker = row.get('Ticker', row.get('Ticker_3', ''))
                     
@@ -291,101 +177,368 @@ class DatabaseManager:
                     # Aktualizuj dane historyczne dla spółki
                     try:
                         logger.info(f"Aktualizuję dane historyczne dla {ticker}")
-                        stock_manager.update_stock_data(ticker)
+                        with timer.span('db_write.price_update', ticker):
+                            status = stock_manager.update_stock_data(ticker)
+                        if status == 'skipped':
+                            price_skips += 1
+                            timer.record('db_write.price_skip', 0.0, ticker=ticker)
                     except Exception as e:
                         logger.warning(f"Błąd podczas aktualizacji danych dla {ticker}: {e}")
                     
-                    # Pobierz aktualną cenę i oblicz cenę dla Yield 5%
-                    current_price = None
-                    price_for_5_percent_yield = None
-                    
-                    try:
-                        # Pobierz ostatnią cenę z danych historycznych
-                        data_1d = stock_manager.get_stock_data(ticker, '1D', limit=1)
-                        if not data_1d.empty:
-                            current_price = float(data_1d['Close'].iloc[-1])
-                    except Exception as e:
-                        logger.warning(f"Nie można pobrać ceny z Yahoo Finance dla {ticker}: {e}")
-                        # Fallback: użyj ceny z Google Sheets
-                        try:
-                            current_price_str = row.get('Current Price', '')
-                            if current_price_str and current_price_str != 'N/A':
-                                # Usuń symbol $ i konwertuj na float
-                                current_price = float(current_price_str.replace('$', '').replace(',', ''))
-                                logger.info(f"Używam ceny z Google Sheets dla {ticker}: ${current_price}")
-                        except Exception as e2:
-                            logger.warning(f"Nie można pobrać ceny z Google Sheets dla {ticker}: {e2}")
-                    
-                    # Oblicz cenę dla Yield 5% jeśli mamy cenę i yield
-                    if current_price and yield_value:
-                        price_for_5_percent_yield = self.calculate_price_for_5_percent_yield(
-                            ticker, yield_value, current_price
-                        )
-                        logger.info(f"Obliczono price_for_5_percent_yield dla {ticker}: ${price_for_5_percent_yield:.2f}")
+                    # Cena z arkusza - gdy brak ceny z notowań (ceny wszystkich spółek pobierane po pętli)
+                    sheet_prices[ticker] = row.get('Current Price', '')
                     
                     # Przygotuj dane informacyjne w JSON
                     informational_data = {}
                     for key, column_name in config['informational_columns'].items():
                         informational_data[key] = row.get(column_name, '')
                     
+                    # Dane w JSON zapisywane raz w json_payloads, spółka trzyma hash treści
+                    selection_json = json.dumps(selection_data, ensure_ascii=False)
+                    informational_json = json.dumps(informational_data, ensure_ascii=False)
+                    payloads[payload_hash(selection_json)] = selection_json
+                    payloads[payload_hash(informational_json)] = informational_json
+                    
                     record = {
                         'run_id': run_id,
                         'ticker': ticker,
-                        # Dane w JSON
-                        'selection_data': json.dumps(selection_data, ensure_ascii=False),
-                        'informational_data': json.dumps(informational_data, ensure_ascii=False),
+                        'selection_hash': payload_hash(selection_json),
+                        'informational_hash': payload_hash(informational_json),
                         # Pola Yield
                         'yield': yield_value,
                         'yield_netto': yield_netto_value,
-                        # Pola cenowe
-                        'current_price': current_price,
-                        'price_for_5_percent_yield': price_for_5_percent_yield,
+                        # Pola cenowe (uzupełniane po pętli)
+                        'current_price': None,
+                        'price_for_5_percent_yield': None,
                         # Informacje o Etapie 2 - oblicz z lokalnych danych
                         'stochastic_1m': None,
                         'stochastic_1w': None,
                         'stage2_passed': False
                     }
                     records.append(record)
+                    if progress is not None:
+                        progress.advance()
                 
-                # Zapisz do bazy
-                df_to_save = pd.DataFrame(records)
-                df_to_save.to_sql('stage1_companies', conn, if_exists='append', index=False)
+                # Ceny wszystkich spółek naraz: ostatnie notowania z bazy, brakujące z Yahoo
+                with timer.span('db_write.quotes'):
+                    quotes = get_quote_service(stock_manager.db_path).get_quotes([record['ticker'] for record in records])
+                for record in records:
+                    ticker = record['ticker']
+                    current_price = quotes.get(ticker)
+                    if current_price is None:
+                        # Fallback: użyj ceny z Google Sheets
+                        try:
+                            current_price_str = str(sheet_prices.get(ticker, '') or '')
+                            if current_price_str and current_price_str != 'N/A':
+                                # Usuń symbol $ i konwertuj na float
+                                current_price = float(current_price_str.replace('$', '').replace(',', ''))
+                                logger.info(f"Używam ceny z Google Sheets dla {ticker}: ${current_price}")
+                        except Exception as e:
+                            logger.warning(f"Nie można pobrać ceny z Google Sheets dla {ticker}: {e}")
+                    record['current_price'] = current_price
+                    
+                    # Oblicz cenę dla Yield 5% jeśli mamy cenę i yield
+                    if current_price and record['yield']:
+                        record['price_for_5_percent_yield'] = self.calculate_price_for_5_percent_yield(
+                            ticker, record['yield'], current_price
+                        )
                 
-                # Oblicz Stochastic dla wszystkich spółek
-                logger.info("Obliczam Stochastic dla wszystkich spółek...")
+                # Zapisz do bazy
+                with timer.span('db_write.insert'):
+                    new_payloads = self._store_payloads(conn, payloads)
+                    df_to_save = pd.DataFrame(records)
+                    df_to_save.to_sql('stage1_companies', conn, if_exists='append', index=False)
+                logger.info(f"Pominięto pobieranie notowań dla {price_skips} z {len(records)} spółek "
+                            f"(brak nowej sesji giełdowej)")
+                logger.info(f"Dane JSON: {len(payloads)} unikalnych treści dla {len(records)} spółek, "
+                            f"{new_payloads} nowych")
+                
+                # Oblicz wskaźniki dla wszystkich spółek (zapisywane w indicator_values,
+                # Stochastic 1M/1W trafia też do kolumn Etapu 2)
+                logger.info("Obliczam wskaźniki dla wszystkich spółek...")
+                stage2_updates = []
                 for record in records:
                     ticker = record['ticker']
                     try:
-                        stochastic_values = stock_manager.get_stochastic_values(ticker)
-                        if stochastic_values:
-                            # Aktualizuj rekord w bazie
-                            cursor = conn.cursor()
-                            cursor.execute("""
-                                UPDATE stage1_companies 
-                                SET stochastic_1m = ?, stochastic_1w = ?, stage2_passed = ?
-                                WHERE run_id = ? AND ticker = ?
-                            """, (
-                                stochastic_values.get('1M'),
-                                stochastic_values.get('1W'),
-                                (stochastic_values.get('1M', 100) < 30) or (stochastic_values.get('1W', 100) < 30),
-                                run_id,
-                                ticker
-                            ))
+                        with timer.span('db_write.indicators', ticker):
+                            indicator_values = indicator_engine.update(ticker, stock_manager)
+                        stochastic_1m = indicator_values.get('stochastic_1m')
+                        stochastic_1w = indicator_values.get('stochastic_1w')
+                        if stochastic_1m is not None or stochastic_1w is not None:
+                            stage2_passed = (stochastic_1m if stochastic_1m is not None else 100) < 30 or \
+                                            (stochastic_1w if stochastic_1w is not None else 100) < 30
+                            stage2_updates.append((stochastic_1m, stochastic_1w, stage2_passed, run_id, ticker))
                     except Exception as e:
-                        logger.warning(f"Błąd podczas obliczania Stochastic dla {ticker}: {e}")
+                        logger.warning(f"Błąd podczas obliczania wskaźników dla {ticker}: {e}")
                 
+                conn.executemany("""
+                    UPDATE stage1_companies 
+                    SET stochastic_1m = ?, stochastic_1w = ?, stage2_passed = ?
+                    WHERE run_id = ? AND ticker = ?
+                """, stage2_updates)
                 conn.commit()
                 logger.info(f"Zapisano {len(records)} spółek Etapu 1 z danymi Etapu 2 dla uruchomienia {run_id}")
                 
                 # Masowa aktualizacja danych historycznych dla wszystkich wybranych spółek
                 selected_tickers = [record['ticker'] for record in records]
                 logger.info(f"Rozpoczynam masową aktualizację danych dla {len(selected_tickers)} spółek")
-                stock_manager.update_all_stock_data(selected_tickers)
+                with timer.span('db_write.bulk_price_update'):
+                    stock_manager.update_all_stock_data(selected_tickers, timer)
                 
         except Exception as e:
             logger.error(f"Błąd podczas zapisywania spółek Etapu 1: {e}")
             raise
     
+    def _store_payloads(self, conn, payloads: Dict[bytes, str]) -> int:
+        """
+        Zapisuje treści JSON w json_payloads (istniejące hashe są pomijane)
+        
+        Returns:
+            Liczba nowych treści
+        """
+        cursor = conn.cursor()
+        before = conn.total_changes
+        cursor.executemany(
+            "INSERT OR IGNORE INTO json_payloads (hash, payload) VALUES (?, ?)",
+            payloads.items()
+        )
+        return conn.total_changes - before
+    
+    def _attach_payloads(self, conn, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Zamienia kolumny selection_hash/informational_hash na dane JSON
+        
+        Każda unikalna treść jest pobierana i dekodowana raz, wiersze z tą samą
+        treścią współdzielą jeden słownik (tylko do odczytu).
+        
+        Returns:
+            DataFrame z kolumnami selection_data, informational_data (tekst JSON)
+            oraz selection_data_parsed, informational_data_parsed (dict)
+        """
+        hashes = list(set(df['selection_hash'].dropna()) | set(df['informational_hash'].dropna()))
+        payloads = dict(self._fetch_payloads(conn, "SELECT hash, payload FROM main.json_payloads", hashes))
+        
+        # Treści uruchomień przeniesionych do archiwum (tylko gdy archiwum jest dołączone)
+        missing = [key for key in hashes if key not in payloads]
+        if missing and self._is_archive_attached(conn):
+            for key, payload_z in self._fetch_payloads(conn, "SELECT hash, payload_z FROM archive.json_payloads", missing):
+                payloads[key] = zlib.decompress(payload_z).decode('utf-8')
+        decoded = {key: json.loads(payload) for key, payload in payloads.items()}
+        
+        for column in ('selection', 'informational'):
+            keys = df.pop(f'{column}_hash')
+            df[f'{column}_data'] = keys.map(lambda key: payloads.get(key))
+            df[f'{column}_data_parsed'] = keys.map(lambda key: decoded.get(key, {}))
+        return df
+    
+    def _fetch_payloads(self, conn, query: str, hashes: list) -> list:
+        """Wykonuje zapytanie o treści JSON dla listy hashy (w porcjach po 500)"""
+        rows = []
+        for i in range(0, len(hashes), 500):
+            chunk = hashes[i:i + 500]
+            cursor = conn.execute(f"{query} WHERE hash IN ({','.join('?' * len(chunk))})", chunk)
+            rows.extend(cursor.fetchall())
+        return rows
+    
+    def _is_archive_attached(self, conn) -> bool:
+        """Sprawdza czy archiwum jest dołączone do połączenia"""
+        return conn.execute("SELECT 1 FROM pragma_database_list WHERE name = 'archive'").fetchone() is not None
+    
+    def _attach_archive(self, conn) -> bool:
+        """
+        Dołącza archiwum starych uruchomień jako schemat 'archive'
+        
+        Returns:
+            True jeśli archiwum jest dołączone, False jeśli jeszcze nie istnieje
+        """
+        if self._is_archive_attached(conn):
+            return True
+        if not os.path.exists(self.archive_path):
+            return False
+        conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+        return True
+    
+    def _read_with_archive(self, conn, query: str, params, fallback: str) -> pd.DataFrame:
+        """
+        Wykonuje zapytanie na bieżących danych, a archiwum czyta tylko gdy zakres tego wymaga
+        
+        Archiwum zawiera wyłącznie uruchomienia starsze od bieżących, więc wiersze
+        archiwalne są dopisywane na końcu (zachowując sortowanie od najnowszych).
+        
+        Args:
+            query: Zapytanie z {db} w miejscu schematu tabel analysis_runs/stage1_companies
+            params: Parametry zapytania
+            fallback: Kiedy sięgać do archiwum:
+                      'union' - zawsze (pełna historia),
+                      'fill' - gdy brakuje wierszy do limitu (ostatni parametr to LIMIT),
+                      'empty' - gdy bieżące dane nic nie zwróciły
+        
+        Returns:
+            DataFrame z wynikami
+        """
+        params = list(params)
+        df = pd.read_sql(query.format(db='main'), conn, params=params)
+        
+        if fallback == 'fill':
+            missing = params[-1] - len(df)
+            if missing <= 0:
+                return df
+            params[-1] = missing
+        elif fallback == 'empty' and not df.empty:
+            return df
+        
+        if not self._attach_archive(conn):
+            return df
+        
+        archived = pd.read_sql(query.format(db='archive'), conn, params=params)
+        if archived.empty:
+            return df
+        if df.empty:
+            return archived
+        return pd.concat([df, archived], ignore_index=True)
+    
+    def archive_old_runs(self, retention_days: int = 365) -> dict:
+        """
+        Przenosi uruchomienia starsze niż retention_days do archiwum
+        
+        Wiersze analysis_runs i stage1_companies są kopiowane do archiwum
+        i usuwane z bazy w jednej transakcji. Treści JSON trafiają do archiwum
+        skompresowane zlib, a te nieużywane już przez bieżące dane są usuwane.
+        Czasy etapów archiwizowanych uruchomień są usuwane.
+        
+        Args:
+            retention_days: Ile dni uruchomień zostaje w bazie
+        
+        Returns:
+            Dict z datą graniczną (cutoff) i liczbą przeniesionych uruchomień,
+            spółek i treści JSON
+        """
+        cutoff = (get_local_now().date() - timedelta(days=retention_days)).isoformat()
+        result = {'cutoff': cutoff, 'runs': 0, 'companies': 0, 'payloads': 0}
+        
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM analysis_runs WHERE run_day < ? LIMIT 1", (cutoff,))
+            if cursor.fetchone() is None:
+                logger.info(f"Brak uruchomień starszych niż {cutoff} do archiwizacji")
+                return result
+            
+            # ATTACH tworzy plik archiwum przy pierwszej archiwizacji
+            conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+            init_archive_schema(cursor)
+            conn.create_function('zlib_compress', 1,
+                                 lambda payload: zlib.compress(payload.encode('utf-8'), 9),
+                                 deterministic=True)
+            
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.execute("""
+                    CREATE TEMP TABLE archived_runs AS
+                    SELECT id FROM main.analysis_runs WHERE run_day < ?
+                """, (cutoff,))
+                cursor.execute("""
+                    INSERT OR REPLACE INTO archive.analysis_runs
+                        (id, run_date, selected_count, notes,
+                         selection_rules_version, informational_columns_version, run_day)
+                    SELECT id, run_date, selected_count, notes,
+                           selection_rules_version, informational_columns_version, run_day
+                    FROM main.analysis_runs WHERE id IN (SELECT id FROM temp.archived_runs)
+                """)
+                result['runs'] = cursor.rowcount
+                cursor.execute("""
+                    INSERT OR REPLACE INTO archive.stage1_companies
+                        (id, run_id, ticker, selection_hash, informational_hash,
+                         yield, yield_netto, current_price, price_for_5_percent_yield,
+                         stochastic_1m, stochastic_1w, stage2_passed)
+                    SELECT id, run_id, ticker, selection_hash, informational_hash,
+                           yield, yield_netto, current_price, price_for_5_percent_yield,
+                           stochastic_1m, stochastic_1w, stage2_passed
+                    FROM main.stage1_companies WHERE run_id IN (SELECT id FROM temp.archived_runs)
+                """)
+                result['companies'] = cursor.rowcount
+                cursor.execute("""
+                    INSERT OR IGNORE INTO archive.json_payloads (hash, payload_z)
+                    SELECT hash, zlib_compress(payload) FROM main.json_payloads
+                    WHERE hash IN (
+                        SELECT selection_hash FROM main.stage1_companies
+                        WHERE run_id IN (SELECT id FROM temp.archived_runs)
+                        UNION
+                        SELECT informational_hash FROM main.stage1_companies
+                        WHERE run_id IN (SELECT id FROM temp.archived_runs)
+                    )
+                """)
+                result['payloads'] = cursor.rowcount
+                
+                cursor.execute("DELETE FROM main.stage1_companies WHERE run_id IN (SELECT id FROM temp.archived_runs)")
+                cursor.execute("DELETE FROM main.analysis_run_timings WHERE run_id IN (SELECT id FROM temp.archived_runs)")
+                cursor.execute("DELETE FROM main.analysis_runs WHERE id IN (SELECT id FROM temp.archived_runs)")
+                cursor.execute("""
+                    DELETE FROM main.json_payloads
+                    WHERE hash NOT IN (
+                        SELECT selection_hash FROM main.stage1_companies WHERE selection_hash IS NOT NULL
+                        UNION
+                        SELECT informational_hash FROM main.stage1_companies WHERE informational_hash IS NOT NULL
+                    )
+                """)
+                cursor.execute("DROP TABLE temp.archived_runs")
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            
+            invalidate_cache('analysis_history')
+            invalidate_cache('latest_results')
+            logger.info(f"Zarchiwizowano {result['runs']} uruchomień sprzed {cutoff} "
+                        f"({result['companies']} spółek, {result['payloads']} nowych treści JSON)")
+            return result
+        
+        except Exception as e:
+            logger.error(f"Błąd podczas archiwizacji starych uruchomień: {e}")
+            raise
+        finally:
+            conn.close()
+    
+    def get_payload_stats(self) -> dict:
+        """
+        Zwraca statystyki deduplikacji danych JSON spółek
+        
+        Przegląda całe json_payloads i stage1_companies - do wywołania na żądanie,
+        zapis uruchomienia loguje tylko liczbę nowych treści.
+        
+        Returns:
+            Dict z liczbą referencji, unikalnych treści oraz bajtami
+            bez deduplikacji (logical_bytes) i faktycznie zapisanymi (stored_bytes)
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT COUNT(*), COALESCE(SUM(LENGTH(p.payload)), 0)
+                    FROM (
+                        SELECT selection_hash AS hash FROM stage1_companies WHERE selection_hash IS NOT NULL
+                        UNION ALL
+                        SELECT informational_hash FROM stage1_companies WHERE informational_hash IS NOT NULL
+                    ) r
+                    JOIN json_payloads p ON p.hash = r.hash
+                """)
+                references, logical_bytes = cursor.fetchone()
+                cursor.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(payload) + LENGTH(hash)), 0) FROM json_payloads")
+                payloads, payload_bytes = cursor.fetchone()
+                
+                # Każda referencja to 16-bajtowy hash w stage1_companies
+                stored_bytes = payload_bytes + references * 16
+                return {
+                    'references': references,
+                    'unique_payloads': payloads,
+                    'logical_bytes': logical_bytes,
+                    'stored_bytes': stored_bytes,
+                    'saved_percent': round((1 - stored_bytes / logical_bytes) * 100, 1) if logical_bytes else 0.0
+                }
+        except Exception as e:
+            logger.error(f"Błąd podczas pobierania statystyk danych JSON: {e}")
+            return {}
+    
     def _load_data_columns_config(self):
         """
         Ładuje konfigurację kolumn danych
@@ -473,9 +626,9 @@ class DatabaseManager:
                 # Zapisz nową wersję
                 rules_json = json.dumps(selection_rules, ensure_ascii=False)
                 cursor.execute("""
-                    INSERT INTO selection_rules_versions (version, rules_json, description)
-                    VALUES (?, ?, ?)
-                """, (new_version, rules_json, f"Automatycznie utworzona wersja {new_version}"))
+                    INSERT INTO selection_rules_versions (version, rules_json, created_at, description)
+                    VALUES (?, ?, ?, ?)
+                """, (new_version, rules_json, get_utc_now(), f"Automatycznie utworzona wersja {new_version}"))
                 
                 conn.commit()
                 logger.info(f"Utworzono nową wersję reguł selekcji: {new_version}")
@@ -511,9 +664,9 @@ class DatabaseManager:
                 # Zapisz nową wersję
                 columns_json = json.dumps(informational_columns, ensure_ascii=False)
                 cursor.execute("""
-                    INSERT INTO informational_columns_versions (version, columns_json, description)
-                    VALUES (?, ?, ?)
-                """, (new_version, columns_json, f"Automatycznie utworzona wersja {new_version}"))
+                    INSERT INTO informational_columns_versions (version, columns_json, created_at, description)
+                    VALUES (?, ?, ?, ?)
+                """, (new_version, columns_json, get_utc_now(), f"Automatycznie utworzona wersja {new_version}"))
                 
                 conn.commit()
                 logger.info(f"Utworzono nową wersję kolumn informacyjnych: {new_version}")
@@ -536,12 +689,12 @@ class DatabaseManager:
         """
         try:
             with sqlite3.connect(self.db_path) as conn:
-                history = pd.read_sql("""
+                history = self._read_with_archive(conn, """
                     SELECT 
                         ar.run_date,
                         sc.ticker,
-                        sc.selection_data,
-                        sc.informational_data,
+                        sc.selection_hash,
+                        sc.informational_hash,
                         sc.yield,
                         sc.yield_netto,
                         sc.current_price,
@@ -550,13 +703,15 @@ class DatabaseManager:
                         sc.stochastic_1w,
                         sc.stage2_passed,
                         ar.id as run_id
-                    FROM stage1_companies sc
-                    JOIN analysis_runs ar ON sc.run_id = ar.id
+                    FROM {db}.stage1_companies sc
+                    JOIN {db}.analysis_runs ar ON sc.run_id = ar.id
                     WHERE sc.ticker = ?
                     ORDER BY ar.run_date DESC
                     LIMIT ?
-                """, conn, params=[ticker, limit])
+                """, [ticker, limit], fallback='fill')
                 
+                if not history.empty:
+                    history = self._attach_payloads(conn, history)
                 return history
                 
         except Exception as e:
@@ -576,32 +731,27 @@ class DatabaseManager:
         try:
             with sqlite3.connect(self.db_path) as conn:
                 query = """
-                    SELECT s.ticker, s.selection_data, s.informational_data,
+                    SELECT s.ticker, s.selection_hash, s.informational_hash,
                            s.yield, s.yield_netto, s.current_price,
                            s.price_for_5_percent_yield,
                            s.stochastic_1m, s.stochastic_1w, s.stage2_passed,
                            a.run_date,
                            COALESCE(f.flag_color, 'none') as flag_color,
                            f.flag_notes
-                    FROM stage1_companies s
-                    JOIN analysis_runs a ON s.run_id = a.id
-                    LEFT JOIN company_flags f ON s.ticker = f.ticker
-                    WHERE DATE(a.run_date) = ?
+                    FROM {db}.stage1_companies s
+                    JOIN {db}.analysis_runs a ON s.run_id = a.id
+                    LEFT JOIN main.company_flags f ON s.ticker = f.ticker
+                    WHERE a.run_day = ?
                     ORDER BY s.ticker
                 """
-                df = pd.read_sql(query, conn, params=(date_str,))
+                df = self._read_with_archive(conn, query, (date_str,), fallback='empty')
                 
                 if df.empty:
                     logger.warning(f"Brak danych dla daty {date_str}")
                     return df
                 
-                # Parsuj JSON dane
-                df['selection_data_parsed'] = df['selection_data'].apply(
-                    lambda x: json.loads(x) if x else {}
-                )
-                df['informational_data_parsed'] = df['informational_data'].apply(
-                    lambda x: json.loads(x) if x else {}
-                )
+                # Dołącz dane JSON (każda unikalna treść dekodowana raz)
+                df = self._attach_payloads(conn, df)
                 
                 # Dodaj liczbę notatek dla każdej spółki
                 df['notes_count'] = df['ticker'].apply(self.get_company_notes_count)
@@ -623,7 +773,7 @@ class DatabaseManager:
         try:
             with sqlite3.connect(self.db_path) as conn:
                 result = pd.read_sql("""
-                    SELECT DATE(run_date) as run_date
+                    SELECT run_day as run_date
                     FROM analysis_runs 
                     ORDER BY run_date DESC 
                     LIMIT 1
@@ -647,14 +797,14 @@ class DatabaseManager:
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
-                today = get_local_now().date()
+                today = get_local_now().date().isoformat()
                 cursor.execute("""
-                    SELECT COUNT(*) FROM analysis_runs 
-                    WHERE DATE(run_date) = ?
+                    SELECT 1 FROM analysis_runs 
+                    WHERE run_day = ?
+                    LIMIT 1
                 """, (today,))
                 
-                count = cursor.fetchone()[0]
-                return count > 0
+                return cursor.fetchone() is not None
                 
         except Exception as e:
             logger.error(f"Błąd podczas sprawdzania dzisiejszej selekcji: {e}")
@@ -670,12 +820,12 @@ class DatabaseManager:
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
-                today = get_local_now().date()
+                today = get_local_now().date().isoformat()
                 cursor.execute("""
                     SELECT id, run_date, selected_count, notes,
                            selection_rules_version, informational_columns_version
                     FROM analysis_runs 
-                    WHERE DATE(run_date) = ?
+                    WHERE run_day = ?
                     ORDER BY run_date DESC
                     LIMIT 1
                 """, (today,))
@@ -697,7 +847,7 @@ class DatabaseManager:
             logger.error(f"Błąd podczas pobierania informacji o dzisiejszej selekcji: {e}")
             return {}
     
-    @cached(ttl=300, key_prefix='latest_results')  # 5 minut - cache jest invalidowany po zmianie flagi
+    @cached(ttl=300, key_prefix='latest_results', stale_ttl=300)  # 5 minut - cache jest invalidowany po zmianie flagi
     def get_latest_results(self) -> pd.DataFrame:
         """
         Pobiera najnowsze wyniki analizy z danymi selekcji i informacjami o Etapie 2
@@ -717,7 +867,7 @@ class DatabaseManager:
             # Spółki Etapu 1 z danymi selekcji i informacjami o Etapie 2
             with sqlite3.connect(self.db_path) as conn:
                 query = """
-                    SELECT s.ticker, s.selection_data, s.informational_data, 
+                    SELECT s.ticker, s.selection_hash, s.informational_hash, 
                            s.yield, s.yield_netto, s.current_price, 
                            s.price_for_5_percent_yield,
                            s.stochastic_1m, s.stochastic_1w, s.stage2_passed,
@@ -734,13 +884,8 @@ class DatabaseManager:
                     logger.warning(f"Brak danych dla uruchomienia {run_id}")
                     return df
                 
-                # Parsuj JSON dane
-                df['selection_data_parsed'] = df['selection_data'].apply(
-                    lambda x: json.loads(x) if x else {}
-                )
-                df['informational_data_parsed'] = df['informational_data'].apply(
-                    lambda x: json.loads(x) if x else {}
-                )
+                # Dołącz dane JSON (każda unikalna treść dekodowana raz)
+                df = self._attach_payloads(conn, df)
                 
                 # Dodaj liczbę notatek dla każdej spółki
                 df['notes_count'] = df['ticker'].apply(self.get_company_notes_count)
@@ -762,31 +907,26 @@ class DatabaseManager:
         try:
             with sqlite3.connect(self.db_path) as conn:
                 query = """
-                    SELECT s.run_id, s.ticker, s.selection_data, s.informational_data, 
+                    SELECT s.run_id, s.ticker, s.selection_hash, s.informational_hash, 
                            s.yield, s.yield_netto, s.current_price, 
                            s.price_for_5_percent_yield,
                            s.stochastic_1m, s.stochastic_1w, s.stage2_passed,
                            ar.run_date,
                            COALESCE(f.flag_color, 'none') as flag_color,
                            f.flag_notes
-                    FROM stage1_companies s
-                    LEFT JOIN analysis_runs ar ON s.run_id = ar.id
-                    LEFT JOIN company_flags f ON s.ticker = f.ticker
+                    FROM {db}.stage1_companies s
+                    LEFT JOIN {db}.analysis_runs ar ON s.run_id = ar.id
+                    LEFT JOIN main.company_flags f ON s.ticker = f.ticker
                     ORDER BY ar.run_date DESC, s.ticker
                 """
-                df = pd.read_sql(query, conn)
+                df = self._read_with_archive(conn, query, (), fallback='union')
                 
                 if df.empty:
                     logger.warning("Brak danych w bazie")
                     return df
                 
-                # Parsuj JSON dane
-                df['selection_data_parsed'] = df['selection_data'].apply(
-                    lambda x: json.loads(x) if x else {}
-                )
-                df['informational_data_parsed'] = df['informational_data'].apply(
-                    lambda x: json.loads(x) if x else {}
-                )
+                # Dołącz dane JSON (każda unikalna treść dekodowana raz)
+                df = self._attach_payloads(conn, df)
                 
                 # Dodaj liczbę notatek dla każdej spółki
                 df['notes_count'] = df['ticker'].apply(self.get_company_notes_count)
@@ -855,16 +995,99 @@ class DatabaseManager:
                 query = """
                     SELECT id, run_date, selected_count, notes, 
                            selection_rules_version, informational_columns_version
-                    FROM analysis_runs 
+                    FROM {db}.analysis_runs 
                     ORDER BY run_date DESC 
                     LIMIT ?
                 """
-                df = pd.read_sql(query, conn, params=(limit,))
+                df = self._read_with_archive(conn, query, (limit,), fallback='fill')
                 return df
         except Exception as e:
             logger.error(f"Błąd podczas pobierania historii: {e}")
             return pd.DataFrame()
     
+    def save_run_timings(self, run_id: int, spans: List[Dict]) -> int:
+        """
+        Zapisuje czasy etapów uruchomienia analizy
+        
+        Args:
+            run_id: ID uruchomienia analizy
+            spans: Lista spanów z RunTimer.spans
+            
+        Returns:
+            Liczba zapisanych spanów
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany("""
+                    INSERT INTO analysis_run_timings 
+                    (run_id, span_name, ticker, started_at, offset_ms, duration_ms)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, [
+                    (run_id, span['span_name'], span['ticker'], span['started_at'],
+                     span['offset_ms'], span['duration_ms'])
+                    for span in spans
+                ])
+                conn.commit()
+                logger.info(f"Zapisano {len(spans)} czasów etapów dla uruchomienia {run_id}")
+                return len(spans)
+        except Exception as e:
+            logger.error(f"Błąd podczas zapisywania czasów etapów: {e}")
+            return 0
+    
+    def get_run_timings_summary(self, run_id: int = None) -> dict:
+        """
+        Pobiera czasy etapów uruchomienia zagregowane po nazwie spanu,
+        razem z czasami poprzedniego uruchomienia do porównania
+        
+        Args:
+            run_id: ID uruchomienia (domyślnie ostatnie z zapisanymi czasami)
+            
+        Returns:
+            Dict z run_id, previous_run_id i listą spans
+            (span_name, count, total_ms, max_ms, previous_total_ms)
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                if run_id is None:
+                    cursor.execute("SELECT MAX(run_id) FROM analysis_run_timings")
+                    run_id = cursor.fetchone()[0]
+                if run_id is None:
+                    return {'run_id': None, 'previous_run_id': None, 'spans': []}
+                
+                cursor.execute("SELECT MAX(run_id) FROM analysis_run_timings WHERE run_id < ?", (run_id,))
+                previous_run_id = cursor.fetchone()[0]
+                
+                cursor.execute("""
+                    SELECT run_id, span_name, COUNT(*), SUM(duration_ms), MAX(duration_ms), MIN(offset_ms)
+                    FROM analysis_run_timings 
+                    WHERE run_id IN (?, ?)
+                    GROUP BY run_id, span_name
+                    ORDER BY MIN(offset_ms)
+                """, (run_id, previous_run_id))
+                
+                previous = {}
+                spans = []
+                for row_run_id, span_name, count, total_ms, max_ms, _ in cursor.fetchall():
+                    if row_run_id == run_id:
+                        spans.append({
+                            'span_name': span_name,
+                            'count': count,
+                            'total_ms': total_ms,
+                            'max_ms': max_ms
+                        })
+                    else:
+                        previous[span_name] = total_ms
+                
+                for span in spans:
+                    span['previous_total_ms'] = previous.get(span['span_name'])
+                
+                return {'run_id': run_id, 'previous_run_id': previous_run_id, 'spans': spans}
+                
+        except Exception as e:
+            logger.error(f"Błąd podczas pobierania czasów etapów: {e}")
+            return {'run_id': None, 'previous_run_id': None, 'spans': []}
+    
     def get_company_history_with_versions(self, ticker: str, limit: int = 10) -> pd.DataFrame:
         """
         Pobiera historię konkretnej spółki z wersjonowaniem
@@ -883,23 +1106,18 @@ class DatabaseManager:
                            sc.yield, sc.yield_netto, sc.current_price, sc.price_for_5_percent_yield,
                            sc.stochastic_1m, sc.stochastic_1w, sc.stage2_passed,
                            ar.selection_rules_version, ar.informational_columns_version,
-                           sc.selection_data, sc.informational_data
-                    FROM stage1_companies sc
-                    JOIN analysis_runs ar ON sc.run_id = ar.id
+                           sc.selection_hash, sc.informational_hash
+                    FROM {db}.stage1_companies sc
+                    JOIN {db}.analysis_runs ar ON sc.run_id = ar.id
                     WHERE sc.ticker = ?
                     ORDER BY ar.run_date DESC
                     LIMIT ?
                 """
-                df = pd.read_sql(query, conn, params=(ticker, limit))
+                df = self._read_with_archive(conn, query, (ticker, limit), fallback='fill')
                 
-                # Parsuj JSON dane
+                # Dołącz dane JSON (każda unikalna treść dekodowana raz)
                 if not df.empty:
-                    df['selection_data_parsed'] = df['selection_data'].apply(
-                        lambda x: json.loads(x) if x else {}
-                    )
-                    df['informational_data_parsed'] = df['informational_data'].apply(
-                        lambda x: json.loads(x) if x else {}
-                    )
+                    df = self._attach_payloads(conn, df)
                 
                 return df
                 
@@ -1264,32 +1482,27 @@ class DatabaseManager:
         try:
             with sqlite3.connect(self.db_path) as conn:
                 query = """
-                    SELECT s.ticker, s.selection_data, s.informational_data,
+                    SELECT s.ticker, s.selection_hash, s.informational_hash,
                            s.yield, s.yield_netto, s.current_price, 
                            s.price_for_5_percent_yield,
                            s.stochastic_1m, s.stochastic_1w, s.stage2_passed,
                            a.run_date,
                            COALESCE(f.flag_color, 'none') as flag_color,
                            f.flag_notes
-                    FROM stage1_companies s
-                    JOIN analysis_runs a ON s.run_id = a.id
-                    LEFT JOIN company_flags f ON s.ticker = f.ticker
+                    FROM {db}.stage1_companies s
+                    JOIN {db}.analysis_runs a ON s.run_id = a.id
+                    LEFT JOIN main.company_flags f ON s.ticker = f.ticker
                     WHERE s.ticker = ?
                     ORDER BY a.run_date DESC
                 """
-                df = pd.read_sql(query, conn, params=(ticker.upper(),))
+                df = self._read_with_archive(conn, query, (ticker.upper(),), fallback='union')
                 
                 if df.empty:
                     logger.warning(f"Brak danych dla spółki {ticker}")
                     return df
                 
-                # Parsuj JSON dane
-                df['selection_data_parsed'] = df['selection_data'].apply(
-                    lambda x: json.loads(x) if x else {}
-                )
-                df['informational_data_parsed'] = df['informational_data'].apply(
-                    lambda x: json.loads(x) if x else {}
-                )
+                # Dołącz dane JSON (każda unikalna treść dekodowana raz)
+                df = self._attach_payloads(conn, df)
                 
                 # Dodaj liczbę notatek
                 df['notes_count'] = df['ticker'].apply(self.get_company_notes_count)
@@ -1414,6 +1627,44 @@ class DatabaseManager:
             logger.error(f"Błąd podczas ustawiania flagi dla {ticker}: {e}")
             return False
     
+    def snapshot_flags(self, change_reason: str = 'daily_snapshot', run_id: str = None) -> int:
+        """
+        Zapisuje stan wszystkich flag do historii jedną operacją zbiorową
+        
+        Ponowne uruchomienie tego samego dnia nadpisuje wpisy z tego dnia
+        (UPSERT po unikalnym kluczu ticker, snapshot_date, change_reason).
+        
+        Args:
+            change_reason: Powód zapisu w historii
+            run_id: ID uruchomienia (opcjonalne)
+            
+        Returns:
+            Liczba zapisanych flag
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                # WHERE true rozdziela SELECT od klauzuli ON CONFLICT (wymóg parsera SQLite)
+                cursor.execute("""
+                    INSERT INTO flag_history (ticker, flag_color, flag_notes, change_reason, 
+                                              run_id, changed_at, snapshot_date)
+                    SELECT ticker, flag_color, flag_notes, ?, ?, ?, ?
+                    FROM company_flags
+                    WHERE true
+                    ON CONFLICT(ticker, snapshot_date, change_reason) WHERE snapshot_date IS NOT NULL
+                    DO UPDATE SET flag_color = excluded.flag_color,
+                                  flag_notes = excluded.flag_notes,
+                                  changed_at = excluded.changed_at,
+                                  run_id = excluded.run_id
+                """, (change_reason, run_id, get_utc_now(), get_local_now().date().isoformat()))
+                
+                snapshot_count = cursor.rowcount
+                conn.commit()
+                return snapshot_count
+        except Exception as e:
+            logger.error(f"Błąd podczas zapisywania snapshotu flag: {e}")
+            raise
+    
     def get_flag_history(self, ticker: str, limit: int = 10) -> pd.DataFrame:
         """
         Pobiera historię flag dla spółki
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Duża baza danych do testów wydajności widoków
+
+Codzienne uruchomienia analizy z ostatnich days dni: spółki Etapu 1 (z rotacją
+części spółek między dniami, dane JSON w json_payloads jak przy zapisie analizy),
+czasy etapów, notatki, flagi i historia flag (dzienne snapshoty i zmiany ręczne).
+Dane są losowane z ziarnem - ta sama konfiguracja daje tę samą bazę.
+"""
+
+import os
+import json
+import random
+import sqlite3
+from datetime import timedelta
+from typing import Dict, List
+import yaml
+import logging
+try:
+    from .database_manager import DatabaseManager
+    from .schema_migrations import payload_hash
+    from .timezone_utils import get_utc_now, utc_to_local
+except ImportError:
+    from database_manager import DatabaseManager
+    from schema_migrations import payload_hash
+    from timezone_utils import get_utc_now, utc_to_local
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FLAG_COLORS = ['red', 'green', 'yellow', 'blue']
+SECTORS = ['Technology', 'Industrials', 'Health Care', 'Utilities', 'Consumer Staples', 'Financials']
+
+# Spany zapisywane przy każdym uruchomieniu (nazwa, średni czas w ms); per spółka - z tickerem
+RUN_SPANS = [('config_check', 15), ('stage1', 2500), ('stage1.sheet_fetch', 2300), ('stage1.selection', 120),
+             ('stage2', 60000), ('db_write', 45000), ('db_write.create_run', 5), ('db_write.quotes', 400),
+             ('db_write.insert', 80), ('db_write.bulk_price_update', 9000), ('total', 110000)]
+TICKER_SPANS = [('stage2.price_fetch', 250), ('db_write.price_update', 180), ('db_write.indicators', 40)]
+
+def seed_tickers(count: int) -> List[str]:
+    """Symbole spółek bazy testowej: T0001, T0002, ..."""
+    return [f"T{i:04d}" for i in range(1, count + 1)]
+
+def seed_large_database(db_path: str, days: int = 730, tickers: int = 300, selected: int = 120,
+                        churn: float = 0.03, notes_share: float = 0.2, flags_share: float = 0.25,
+                        seed: int = 0) -> Dict[str, int]:
+    """
+    Zapisuje historię codziennych uruchomień analizy do nowej bazy
+    
+    Args:
+        db_path: Ścieżka do pliku bazy (plik nie może istnieć)
+        days: Liczba dni z uruchomieniem (ostatnie kończy się dzisiaj)
+        tickers: Liczba spółek w arkuszu, z których losowana jest selekcja
+        selected: Liczba spółek Etapu 1 w każdym uruchomieniu
+        churn: Odsetek spółek selekcji wymienianych z dnia na dzień
+        notes_share: Odsetek spółek z notatkami (1-5 notatek)
+        flags_share: Odsetek spółek z flagą (z dziennym snapshotem w historii)
+        seed: Ziarno losowania
+    
+    Returns:
+        Liczba zapisanych wierszy w tabelach
+    """
+    if os.path.exists(db_path):
+        raise FileExistsError(f"Baza {db_path} już istnieje - podaj nową ścieżkę")
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    DatabaseManager(db_path)
+    
+    with open(os.path.join(REPO_ROOT, 'config', 'data_columns.yaml'), 'r', encoding='utf-8') as file:
+        columns = yaml.safe_load(file)
+    with open(os.path.join(REPO_ROOT, 'config', 'selection_rules.yaml'), 'r', encoding='utf-8') as file:
+        selection_rules = yaml.safe_load(file)
+    
+    rng = random.Random(seed)
+    universe = seed_tickers(tickers)
+    profiles = {ticker: {'price': rng.uniform(20, 300), 'yield': rng.uniform(0.8, 5.5),
+                         'sector': rng.choice(SECTORS), 'streak': rng.randint(5, 50),
+                         'phase': rng.randrange(11)} for ticker in universe}
+    now = get_utc_now()
+    first_day = (now - timedelta(days=days - 1)).replace(hour=6, minute=0, second=0, microsecond=0)
+    counts = {'analysis_runs': 0, 'stage1_companies': 0, 'json_payloads': 0, 'analysis_run_timings': 0,
+              'company_notes': 0, 'company_flags': 0, 'flag_history': 0}
+    
+    with sqlite3.connect(db_path) as conn:
+        created_at = first_day - timedelta(days=1)
+        conn.execute("""
+            INSERT INTO selection_rules_versions (version, rules_json, created_at, description)
+            VALUES ('v1.0', ?, ?, 'Wersja początkowa')
+        """, (json.dumps(selection_rules, ensure_ascii=False), created_at))
+        conn.execute("""
+            INSERT INTO informational_columns_versions (version, columns_json, created_at, description)
+            VALUES ('v1.0', ?, ?, 'Wersja początkowa')
+        """, (json.dumps(columns['informational_columns'], ensure_ascii=False), created_at))
+        
+        flagged = rng.sample(universe, int(tickers * flags_share))
+        flags = {ticker: rng.choice(FLAG_COLORS) for ticker in flagged}
+        current = rng.sample(universe, min(selected, tickers))
+        payloads = {}
+        for day in range(days):
+            run_date = first_day + timedelta(days=day)
+            run_day = utc_to_local(run_date).date().isoformat()
+            
+            # Rotacja selekcji - część spółek wypada, na ich miejsce wchodzą inne z arkusza
+            replaced = int(len(current) * churn)
+            if replaced:
+                in_selection = set(current)
+                outside = [ticker for ticker in universe if ticker not in in_selection]
+                for index in rng.sample(range(len(current)), min(replaced, len(outside))):
+                    current[index] = outside.pop(rng.randrange(len(outside)))
+            
+            cursor = conn.execute("""
+                INSERT INTO analysis_runs (run_date, selected_count, notes, selection_rules_version,
+                                           informational_columns_version, run_day)
+                VALUES (?, ?, 'Analiza: Etap 1 (selekcja) + Etap 2 (dane informacyjne)', 'v1.0', 'v1.0', ?)
+            """, (run_date, len(current), run_day))
+            run_id = cursor.lastrowid
+            
+            rows = []
+            for ticker in current:
+                profile = profiles[ticker]
+                profile['price'] *= rng.uniform(0.98, 1.02)
+                # Dane z arkusza zmieniają się rzadko (cotygodniowa aktualizacja) - treści JSON się powtarzają
+                week = day // 7
+                if day % 7 == 0 or 'sheet_price' not in profile:
+                    profile['sheet_price'] = profile['price']
+                yield_value = round(profile['yield'] * (1 + ((week + profile['phase']) % 11 - 5) / 100), 2)
+                selection_json = json.dumps({
+                    # Wartości z arkusza są tekstem, jak przy zapisie analizy
+                    'country': 'USA', 'quality_rating': '13.00', 'yield': f"{yield_value:.2f}%",
+                    'dividend_growth_streak': str(profile['streak'] + day // 365),
+                    'sp_credit_rating': 'A+', 'dk_valuation_rating': 'Ultra Value Buy'
+                }, ensure_ascii=False)
+                informational_json = json.dumps({
+                    'date_edited': (first_day + timedelta(days=week * 7)).date().isoformat(),
+                    'company': f"Company {ticker}", 'sector': profile['sector'],
+                    'current_price': f"${profile['sheet_price']:.2f}",
+                    'historical_fair_value': f"${profile['sheet_price'] * 1.1:.2f}",
+                    'market_cap_billion': f"{profile['sheet_price'] / 2:.1f}"
+                }, ensure_ascii=False)
+                for payload in (selection_json, informational_json):
+                    payloads[payload_hash(payload)] = payload
+                
+                price = round(profile['price'], 2)
+                stochastic_1m = round(rng.uniform(0, 100), 2)
+                stochastic_1w = round(rng.uniform(0, 100), 2)
+                rows.append((run_id, ticker, payload_hash(selection_json), payload_hash(informational_json),
+                             yield_value, round(yield_value * 0.81, 4), price,
+                             round(price * yield_value / 5, 2), stochastic_1m, stochastic_1w,
+                             stochastic_1m < 30 or stochastic_1w < 30))
+            conn.executemany("""
+                INSERT INTO stage1_companies (run_id, ticker, selection_hash, informational_hash, yield,
+                                              yield_netto, current_price, price_for_5_percent_yield,
+                                              stochastic_1m, stochastic_1w, stage2_passed)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            counts['stage1_companies'] += len(rows)
+            
+            spans = [(run_id, name, None, run_date, 0.0, rng.uniform(0.7, 1.3) * duration)
+                     for name, duration in RUN_SPANS]
+            spans += [(run_id, name, ticker, run_date, 0.0, rng.uniform(0.5, 2.0) * duration)
+                      for ticker in current for name, duration in TICKER_SPANS]
+            conn.executemany("""
+                INSERT INTO analysis_run_timings (run_id, span_name, ticker, started_at, offset_ms, duration_ms)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, spans)
+            counts['analysis_run_timings'] += len(spans)
+            
+            # Flagi: rzadkie zmiany ręczne i dzienny snapshot wieczorem
+            changes = []
+            manual = rng.sample(flagged, min(len(flagged), 2)) if rng.random() < 0.3 else []
+            for ticker in manual:
+                previous = flags[ticker]
+                flags[ticker] = rng.choice([color for color in FLAG_COLORS if color != previous])
+                changes.append((ticker, flags[ticker], previous, f"Zmiana {run_day}", run_date + timedelta(hours=3),
+                                'manual', None, None))
+            snapshot_at = run_date + timedelta(hours=15, minutes=30)
+            changes += [(ticker, color, None, None, snapshot_at, 'daily_snapshot', None,
+                         utc_to_local(snapshot_at).date().isoformat())
+                        for ticker, color in flags.items()]
+            conn.executemany("""
+                INSERT OR IGNORE INTO flag_history (ticker, flag_color, previous_flag_color, flag_notes, changed_at,
+                                                    change_reason, run_id, snapshot_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, changes)
+            counts['flag_history'] += len(changes)
+            counts['analysis_runs'] += 1
+        
+        conn.executemany("INSERT OR IGNORE INTO json_payloads (hash, payload) VALUES (?, ?)", payloads.items())
+        counts['json_payloads'] = len(payloads)
+        
+        conn.executemany("""
+            INSERT INTO company_flags (ticker, flag_color, flag_notes, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, [(ticker, color, f"Flaga {color}", first_day, now) for ticker, color in flags.items()])
+        counts['company_flags'] = len(flags)
+        
+        notes = []
+        for ticker in rng.sample(universe, int(tickers * notes_share)):
+            for number in range(1, rng.randint(1, 5) + 1):
+                written = first_day + timedelta(days=rng.randrange(days))
+                notes.append((ticker, number, f"Notatka {number}",
+                              f"Analiza spółki {ticker}: " + "wycena, dywidenda, zadłużenie. " * rng.randint(1, 10),
+                              written, written))
+        conn.executemany("""
+            INSERT INTO company_notes (ticker, note_number, title, content, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, notes)
+        counts['company_notes'] = len(notes)
+        conn.commit()
+    
+    logger.info(f"Utworzono bazę testową {db_path}: " + ", ".join(f"{name} {count}" for name, count in counts.items()))
+    return counts
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Lokalny serwer udający Yahoo Finance (endpointy /v8/finance/chart i /v7/finance/spark) do testów
+
+Odpowiedzi są deterministyczne: notowania dzienne wyliczane z symbolu
+i daty (lub odtwarzane z nagrania - Cassette), opóźnienie stałe, a zapytanie
+ponad capacity równoległych dostaje HTTP 429 - jak dławienie po stronie Yahoo.
+Połączenia są utrzymywane (HTTP/1.1 keep-alive), odpowiedzi mają ETag
+i odpowiadają 304 na If-None-Match. Z upstream serwer działa jak proxy
+nagrywające odpowiedzi prawdziwego Yahoo do pliku cassette.
+
+Uruchomienie: python src/fake_yahoo_server.py --port 8765 --capacity 4
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+CHART_PATH = '/v8/finance/chart/'
+SPARK_PATH = '/v7/finance/spark'
+
+# Cache stref czasowych yfinance można ustawić raz na proces - wspólny katalog dla testów
+_tz_cache_dir = None
+
+# range -> liczba dni wstecz
+RANGES = {'1d': 1, '5d': 5, '1mo': 31, '3mo': 92, '6mo': 183, '1y': 366, '2y': 731, '5y': 1827,
+          '10y': 3653, 'ytd': 366, 'max': 3653}
+
+def synthetic_bars(symbol: str, start: datetime, end: datetime) -> Dict[str, List]:
+    """Notowania dzienne (dni robocze) zależne tylko od symbolu i daty"""
+    seed = zlib.crc32(symbol.encode('utf-8')) % 1000
+    timestamps, opens, highs, lows, closes, volumes = [], [], [], [], [], []
+    day = start.date()
+    while day < end.date() or (day == end.date() and not timestamps):
+        if day.weekday() < 5:
+            n = day.toordinal()
+            close = 20.0 + seed / 10 + (n % 97) / 4
+            open_ = close - 0.5 + (n % 5) / 5
+            timestamps.append(int(datetime(day.year, day.month, day.day, 13, 30, tzinfo=timezone.utc).timestamp()))
+            opens.append(round(open_, 2))
+            highs.append(round(max(open_, close) + 1.0, 2))
+            lows.append(round(min(open_, close) - 1.0, 2))
+            closes.append(round(close, 2))
+            volumes.append(100000 + (n * 7919 + seed) % 50000)
+        day += timedelta(days=1)
+    return {'timestamp': timestamps, 'open': opens, 'high': highs, 'low': lows, 'close': closes, 'volume': volumes}
+
+class FakeYahooServer:
+    """
+    Serwer HTTP w osobnym wątku
+    
+    Przykład:
+        with FakeYahooServer(capacity=2) as server:
+            url = f"{server.url}/v8/finance/chart/AAPL?range=1mo&interval=1d"
+    """
+    
+    def __init__(self, capacity: int = 4, latency: float = 0.02, unknown: Iterable[str] = (),
+                 host: str = '127.0.0.1', port: int = 0, cassette=None, upstream: Optional[str] = None,
+                 error_rate: float = 0.0, seed: int = 0, history_days: Optional[int] = None):
+        """
+        Args:
+            capacity: Liczba równoległych zapytań obsługiwanych bez 429
+            latency: Czas odpowiedzi (sekundy)
+            unknown: Symbole, dla których serwer zwraca 404 (brak danych)
+            host, port: Adres nasłuchu (port 0 - wolny port)
+            cassette: Nagrane odpowiedzi (offline_fixtures.Cassette) - odtwarzane przed syntetycznymi
+            upstream: Adres prawdziwego Yahoo - zapytania są przekazywane i nagrywane w cassette
+            error_rate: Odsetek zapytań kończonych błędem 500 (losowanie z ziarnem seed)
+            history_days: Długość historii notowań (dni wstecz; None - bez ograniczenia)
+        """
+        self.capacity = capacity
+        self.latency = latency
+        self.unknown = set(unknown)
+        self.cassette = cassette
+        self.upstream = upstream.rstrip('/') if upstream else None
+        self.error_rate = error_rate
+        self.history_days = history_days
+        self.stats = {'requests': 0, 'throttled': 0, 'not_found': 0, 'not_modified': 0, 'max_in_flight': 0,
+                      'errors': 0, 'replayed': 0, 'recorded': 0}
+        self._random = random.Random(seed)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def url(self) -> str:
+        """Adres bazowy (odpowiednik https://query2.finance.yahoo.com)"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self) -> 'FakeYahooServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def __enter__(self) -> 'FakeYahooServer':
+        return self.start()
+    
+    def __exit__(self, *exc_info):
+        self.stop()
+    
+    def patch_yfinance(self, monkeypatch=None):
+        """Kieruje zapytania yfinance na ten serwer (monkeypatch z pytest; bez niego - do końca procesu)"""
+        global _tz_cache_dir
+        import yfinance
+        import yfinance.base
+        if _tz_cache_dir is None:
+            _tz_cache_dir = tempfile.mkdtemp(prefix='fake_yahoo_tz_')
+            try:
+                yfinance.set_tz_cache_location(_tz_cache_dir)
+            except AssertionError:
+                pass  # cache stref już utworzony w tym procesie
+        if monkeypatch is not None:
+            monkeypatch.setattr(yfinance.base, '_BASE_URL_', self.url)
+        else:
+            yfinance.base._BASE_URL_ = self.url
+    
+    @contextmanager
+    def yfinance_redirected(self):
+        """Kieruje zapytania yfinance na ten serwer do końca bloku (bez monkeypatch z pytest)"""
+        import yfinance.base
+        base_url = yfinance.base._BASE_URL_
+        self.patch_yfinance()
+        try:
+            yield self
+        finally:
+            yfinance.base._BASE_URL_ = base_url
+    
+    def _enter(self) -> bool:
+        """Rejestruje zapytanie; False gdy przekroczono capacity"""
+        with self._lock:
+            self.stats['requests'] += 1
+            self._in_flight += 1
+            self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self._in_flight)
+            if self._in_flight > self.capacity:
+                self.stats['throttled'] += 1
+                return False
+            return True
+    
+    def _leave(self):
+        with self._lock:
+            self._in_flight -= 1
+    
+    def _inject_error(self) -> bool:
+        """Losuje błąd 500 z prawdopodobieństwem error_rate"""
+        with self._lock:
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.stats['errors'] += 1
+                return True
+            return False
+    
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+    
+    def _forward(self, path: str, headers) -> tuple:
+        """Przekazuje zapytanie do upstream (status, Content-Type, treść)"""
+        request = urllib.request.Request(f"{self.upstream}{path}", headers={
+            key: value for key, value in headers.items() if key.lower() in ('user-agent', 'accept', 'cookie')
+        })
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return response.status, response.headers.get('Content-Type', 'application/json'), response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers.get('Content-Type', 'text/plain'), e.read()
+    
+    def chart(self, symbol: str, query: Dict[str, List[str]]) -> Dict:
+        """Odpowiedź JSON endpointu chart"""
+        now = datetime.now(timezone.utc)
+        if 'period1' in query:
+            start = datetime.fromtimestamp(int(query['period1'][0]), timezone.utc)
+            end = datetime.fromtimestamp(int(query.get('period2', [now.timestamp()])[0]), timezone.utc)
+        else:
+            end = now
+            start = now - timedelta(days=RANGES.get(query.get('range', ['1mo'])[0], 31))
+        if self.history_days is not None:
+            start = max(start, now - timedelta(days=self.history_days))
+        bars = synthetic_bars(symbol, start, end)
+        return {'chart': {'result': [{
+            'meta': {
+                'currency': 'USD', 'symbol': symbol, 'exchangeName': 'NMS', 'instrumentType': 'EQUITY',
+                'exchangeTimezoneName': 'America/New_York', 'timezone': 'EDT', 'priceHint': 2,
+                'dataGranularity': '1d', 'range': query.get('range', [''])[0],
+                'validRanges': list(RANGES)
+            },
+            'timestamp': bars.pop('timestamp'),
+            'indicators': {'quote': [bars], 'adjclose': [{'adjclose': bars['close']}]}
+        }], 'error': None}}
+    
+    def spark(self, symbols: List[str]) -> Dict:
+        """Odpowiedź JSON endpointu spark - ostatnia cena wielu symboli (nieznane pominięte)"""
+        now = datetime.now(timezone.utc)
+        result = []
+        for symbol in symbols:
+            if symbol in self.unknown:
+                continue
+            bars = synthetic_bars(symbol, now - timedelta(days=7), now)
+            result.append({'symbol': symbol, 'response': [{
+                'meta': {'currency': 'USD', 'symbol': symbol, 'regularMarketPrice': bars['close'][-1],
+                         'exchangeTimezoneName': 'America/New_York', 'instrumentType': 'EQUITY'},
+                'timestamp': bars['timestamp'][-1:],
+                'indicators': {'quote': [{'close': bars['close'][-1:]}]}
+            }]})
+        return {'spark': {'result': result, 'error': None}}
+    
+    def _handler_class(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if server.upstream:
+                    status, content_type, body = server._forward(self.path, self.headers)
+                    server.cassette.record(url.path, query, status, content_type, body)
+                    server._count('recorded')
+                    self._send(status, body, content_type)
+                    return
+                
+                admitted = server._enter()
+                try:
+                    time.sleep(server.latency)
+                    if not admitted:
+                        self._send(429, b'Too Many Requests', 'text/plain')
+                        return
+                    if server._inject_error():
+                        self._send(500, b'Internal Server Error', 'text/plain')
+                        return
+                    recorded = server.cassette.lookup(url.path, query) if server.cassette is not None else None
+                    if recorded is not None:
+                        server._count('replayed')
+                        self._send(recorded['status'], recorded['body'].encode('utf-8'), recorded['content_type'])
+                        return
+                    if not url.path.startswith(CHART_PATH) and url.path != SPARK_PATH:
+                        self._send(404, b'Not Found', 'text/plain')
+                        return
+                    if url.path == SPARK_PATH:
+                        symbols = query.get('symbols', [''])[0].split(',')
+                        self._send(200, json.dumps(server.spark(symbols)).encode('utf-8'))
+                        return
+                    symbol = url.path[len(CHART_PATH):]
+                    if symbol in server.unknown:
+                        server._count('not_found')
+                        body = {'chart': {'result': None, 'error': {
+                            'code': 'Not Found', 'description': 'No data found, symbol may be delisted'}}}
+                        self._send(404, json.dumps(body).encode('utf-8'))
+                        return
+                    body = json.dumps(server.chart(symbol, query)).encode('utf-8')
+                    etag = f'"{zlib.crc32(body):08x}"'
+                    if self.headers.get('If-None-Match') == etag:
+                        server._count('not_modified')
+                        self._send(304, b'', headers={'ETag': etag})
+                        return
+                    self._send(200, body, headers={'ETag': etag})
+                finally:
+                    server._leave()
+            
+            def _send(self, status: int, body: bytes, content_type: str = 'application/json', headers: Dict = None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                if status != 304:
+                    self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return Handler
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Lokalny serwer udający Yahoo Finance')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--capacity', type=int, default=4, help='Równoległe zapytania bez 429')
+    parser.add_argument('--latency', type=float, default=0.05, help='Czas odpowiedzi (sekundy)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Odsetek odpowiedzi 500')
+    parser.add_argument('--seed', type=int, default=0, help='Ziarno losowania błędów')
+    parser.add_argument('--cassette', help='Plik z nagranymi odpowiedziami (odtwarzanie)')
+    parser.add_argument('--upstream', help='Nagrywanie: adres Yahoo, np. https://query2.finance.yahoo.com')
+    args = parser.parse_args()
+    
+    cassette = None
+    if args.cassette:
+        from offline_fixtures import Cassette
+        cassette = Cassette(args.cassette)
+    server = FakeYahooServer(capacity=args.capacity, latency=args.latency, port=args.port, cassette=cassette,
+                             upstream=args.upstream, error_rate=args.error_rate, seed=args.seed)
+    print(f"Serwer na {server.url} (capacity={args.capacity}, latency={args.latency}s)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+        if cassette is not None and args.upstream:
+            cassette.save()
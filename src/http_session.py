@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Wspólna sesja HTTP dla zapytań do Yahoo Finance
+
+Jedna pula połączeń keep-alive na proces zamiast nowego połączenia TCP/TLS
+przy każdym yf.Ticker, opcjonalny cache odpowiedzi na dysku (czas ważności
+i ponowna walidacja przez ETag) oraz liczniki ponownego użycia połączeń.
+"""
+
+import sqlite3
+import threading
+import time
+import json
+from typing import Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+import logging
+try:
+    from .config_loader import get_config
+except ImportError:
+    from config_loader import get_config
+
+logger = logging.getLogger(__name__)
+
+# Domyślne ustawienia (używane gdy brak sekcji yahoo_finance.http w config/api.yaml)
+DEFAULT_HTTP_CONFIG = {
+    'pool_size': 16,  # połączeń na host - co najmniej maksymalna współbieżność zapytań
+    'cache': {
+        'enabled': False,
+        'path': 'data/http_cache.db',
+        'ttl': 300,  # sekundy; po tym czasie odpowiedź z ETag jest walidowana zapytaniem warunkowym
+    },
+}
+
+def load_http_config() -> dict:
+    """Ładuje sekcję yahoo_finance.http z config/api.yaml uzupełnioną wartościami domyślnymi"""
+    config = {'pool_size': DEFAULT_HTTP_CONFIG['pool_size'], 'cache': dict(DEFAULT_HTTP_CONFIG['cache'])}
+    try:
+        http = get_config('api').get('yahoo_finance', {}).get('http', {}) or {}
+        if 'pool_size' in http:
+            config['pool_size'] = int(http['pool_size'])
+        config['cache'].update(http.get('cache') or {})
+    except Exception as e:
+        logger.warning(f"Nie można załadować konfiguracji sesji HTTP, używam domyślnej: {e}")
+    return config
+
+class ResponseCache:
+    """
+    Cache odpowiedzi GET w SQLite
+    
+    Świeża odpowiedź jest zwracana bez zapytania; po upływie ttl odpowiedź
+    z ETag jest walidowana (If-None-Match), 304 przedłuża jej ważność.
+    """
+    
+    def __init__(self, db_path: str = 'data/http_cache.db', ttl: float = 300, clock=time.time):
+        """
+        Args:
+            db_path: Ścieżka do pliku bazy cache
+            ttl: Czas ważności odpowiedzi (sekundy)
+            clock: Źródło czasu (do testów)
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.clock = clock
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS http_responses (
+                    url TEXT PRIMARY KEY,
+                    status_code INTEGER NOT NULL,
+                    headers TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    etag TEXT,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.commit()
+    
+    def get(self, url: str) -> Optional[dict]:
+        """Zapisana odpowiedź (także nieświeża) lub None"""
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute("""
+                SELECT status_code, headers, body, etag, expires_at FROM http_responses WHERE url = ?
+            """, (url,)).fetchone()
+        if row is None:
+            return None
+        return {'status_code': row[0], 'headers': json.loads(row[1]), 'body': row[2], 'etag': row[3],
+                'fresh': row[4] > self.clock()}
+    
+    def put(self, url: str, response: requests.Response):
+        """Zapisuje odpowiedź 200 (pomija Cache-Control: no-store)"""
+        if response.status_code != 200 or 'no-store' in response.headers.get('Cache-Control', ''):
+            return
+        headers = {key: value for key, value in response.headers.items()
+                   if key.lower() not in ('content-encoding', 'content-length', 'transfer-encoding')}
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO http_responses (url, status_code, headers, body, etag, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (url, response.status_code, json.dumps(headers), response.content,
+                  response.headers.get('ETag'), self.clock() + self.ttl))
+            conn.commit()
+    
+    def touch(self, url: str):
+        """Przedłuża ważność odpowiedzi potwierdzonej przez 304"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("UPDATE http_responses SET expires_at = ? WHERE url = ?", (self.clock() + self.ttl, url))
+            conn.commit()
+
+class PooledAdapter(HTTPAdapter):
+    """
+    Adapter z pulą połączeń, opcjonalnym cache i licznikami zapytań
+    
+    Liczba nowych połączeń pochodzi z liczników pul urllib3 (num_connections),
+    więc odsetek ponownego użycia to 1 - nowe połączenia / zapytania sieciowe.
+    """
+    
+    def __init__(self, pool_size: int = 16, cache: Optional[ResponseCache] = None):
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counts = {'requests': 0, 'cache_hits': 0, 'revalidated': 0, 'throttled': 0}
+    
+    def send(self, request, **kwargs):
+        self._local.status = None
+        cached = self.cache.get(request.url) if self.cache is not None and request.method == 'GET' else None
+        if cached is not None and cached['fresh']:
+            self._count('cache_hits')
+            return self._cached_response(request, cached)
+        if cached is not None and cached['etag']:
+            request.headers['If-None-Match'] = cached['etag']
+        
+        response = super().send(request, **kwargs)
+        self._count('requests')
+        self._local.status = response.status_code
+        if response.status_code == 429:
+            self._count('throttled')
+        if self.cache is not None and request.method == 'GET':
+            if response.status_code == 304 and cached is not None:
+                self._count('revalidated')
+                self.cache.touch(request.url)
+                response.close()
+                return self._cached_response(request, cached)
+            self.cache.put(request.url, response)
+        return response
+    
+    def _count(self, key: str):
+        with self._lock:
+            self._counts[key] += 1
+    
+    @staticmethod
+    def _cached_response(request, cached: dict) -> requests.Response:
+        response = requests.Response()
+        response.status_code = cached['status_code']
+        response.headers = CaseInsensitiveDict(cached['headers'])
+        response._content = cached['body']
+        response.url = request.url
+        response.request = request
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+    
+    def last_status(self) -> Optional[int]:
+        """Kod HTTP ostatniej odpowiedzi sieciowej w bieżącym wątku (None - z cache lub brak)"""
+        return getattr(self._local, 'status', None)
+    
+    def stats(self) -> Dict[str, int]:
+        """Liczniki od utworzenia sesji: requests, new_connections, cache_hits, revalidated, throttled"""
+        new_connections = 0
+        pools = self.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                new_connections += pool.num_connections
+        with self._lock:
+            return dict(self._counts, new_connections=new_connections)
+
+def create_session(pool_size: int = 16, cache: Optional[ResponseCache] = None) -> requests.Session:
+    """Sesja requests z PooledAdapter dla http i https"""
+    session = requests.Session()
+    adapter = PooledAdapter(pool_size, cache)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_yahoo_session() -> requests.Session:
+    """Wspólna sesja dla wszystkich zapytań do Yahoo w procesie (tworzona przy pierwszym użyciu)"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            config = load_http_config()
+            cache = None
+            if config['cache'].get('enabled'):
+                cache = ResponseCache(config['cache']['path'], float(config['cache']['ttl']))
+                logger.info(f"Cache odpowiedzi Yahoo: {config['cache']['path']} (ważność {config['cache']['ttl']} s)")
+            _session = create_session(config['pool_size'], cache)
+        return _session
+
+def _adapter(session: requests.Session = None) -> PooledAdapter:
+    return (session or get_yahoo_session()).get_adapter('https://')
+
+def last_status(session: requests.Session = None) -> Optional[int]:
+    """Kod HTTP ostatniej odpowiedzi Yahoo w bieżącym wątku"""
+    adapter = _adapter(session)
+    return adapter.last_status() if isinstance(adapter, PooledAdapter) else None
+
+def session_stats(session: requests.Session = None) -> Dict[str, int]:
+    """Liczniki zapytań wspólnej sesji (lub podanej)"""
+    adapter = _adapter(session)
+    return adapter.stats() if isinstance(adapter, PooledAdapter) else {}
+
+def connection_reuse(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, float]:
+    """
+    Zapytania i połączenia między dwoma odczytami session_stats
+    
+    Returns:
+        Słownik: requests, new_connections, reused, reuse_ratio (None gdy brak zapytań), cache_hits
+    """
+    requests_made = after.get('requests', 0) - before.get('requests', 0)
+    new_connections = after.get('new_connections', 0) - before.get('new_connections', 0)
+    reused = max(requests_made - new_connections, 0)
+    return {
+        'requests': requests_made,
+        'new_connections': new_connections,
+        'reused': reused,
+        'reuse_ratio': round(reused / requests_made, 3) if requests_made else None,
+        'cache_hits': after.get('cache_hits', 0) - before.get('cache_hits', 0),
+    }
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Skrypt testowy dla wspólnej sesji HTTP (pula połączeń, cache odpowiedzi)
+"""
+
+import sys
+import os
+import tempfile
+
+# Dodaj ścieżkę do modułów
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import yfinance as yf
+from fake_yahoo_server import FakeYahooServer
+from http_session import ResponseCache, create_session, connection_reuse
+from shared_fixtures import FakeClock
+
+def test_connection_reuse():
+    """
+    Testuje ponowne użycie jednego połączenia keep-alive przez kolejne zapytania i yfinance
+    """
+    print("=== TEST PONOWNEGO UŻYCIA POŁĄCZEŃ ===")
+    
+    with FakeYahooServer() as server:
+        session = create_session(pool_size=4)
+        adapter = session.get_adapter(server.url)
+        before = adapter.stats()
+        
+        for i in range(5):
+            response = session.get(f"{server.url}/v8/finance/chart/T{i}", params={'range': '5d'})
+            assert response.status_code == 200
+        
+        # yfinance przez tę samą sesję (zapytanie o strefę czasową i o notowania)
+        with server.yfinance_redirected():
+            data = yf.Ticker('AAPL', session=session).history(period='1mo')
+        assert not data.empty
+        
+        reuse = connection_reuse(before, adapter.stats())
+        print(reuse)
+        assert reuse['new_connections'] == 1
+        assert reuse['requests'] == server.stats['requests'] == 7
+        assert reuse['reuse_ratio'] == round(6 / 7, 3)
+    
+    print("Test ponownego użycia połączeń zakończony pomyślnie")
+
+def test_response_cache_and_throttling():
+    """
+    Testuje odpowiedź z cache, walidację przez ETag po czasie ważności i kod 429
+    """
+    print("\n=== TEST CACHE ODPOWIEDZI ===")
+    
+    clock = FakeClock(1000.0)
+    with tempfile.TemporaryDirectory() as tmp_dir, FakeYahooServer() as server:
+        session = create_session(cache=ResponseCache(os.path.join(tmp_dir, 'cache.db'), ttl=60, clock=clock))
+        adapter = session.get_adapter(server.url)
+        url = f"{server.url}/v8/finance/chart/MSFT?range=1mo"
+        
+        first = session.get(url).json()
+        assert session.get(url).json() == first
+        assert server.stats['requests'] == 1
+        
+        # Po czasie ważności - zapytanie warunkowe i 304
+        clock.now += 61
+        assert session.get(url).json() == first
+        assert server.stats['requests'] == 2 and server.stats['not_modified'] == 1
+        assert session.get(url).json() == first
+        assert server.stats['requests'] == 2
+        
+        stats = adapter.stats()
+        print(stats)
+        assert stats['cache_hits'] == 2 and stats['revalidated'] == 1
+        
+        # Dławienie - kod 429 dostępny po zapytaniu w tym samym wątku
+        server.capacity = 0
+        assert session.get(f"{server.url}/v8/finance/chart/NVDA").status_code == 429
+        assert adapter.last_status() == 429
+        assert adapter.stats()['throttled'] == 1
+    
+    print("Test cache odpowiedzi zakończony pomyślnie")
+
+if __name__ == "__main__":
+    test_connection_reuse()
+    test_response_cache_and_throttling()
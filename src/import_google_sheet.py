@@ -2,6 +2,7 @@ import gspread
 import pandas as pd
 import yaml
 import os
+import json
 from oauth2client.service_account import ServiceAccountCredentials
 import logging
 
@@ -21,6 +22,44 @@ def load_data_columns_config():
         logger.error(f"Błąd podczas ładowania konfiguracji kolumn: {e}")
         raise
 
+def fetch_sheet_values():
+    """
+    Pobiera wszystkie komórki zakładki Google Sheet (lista wierszy)
+    
+    Zmienne środowiskowe GOOGLE_SHEET_FIXTURE (odtworzenie zapisanych komórek
+    z pliku JSON zamiast połączenia z Google) i GOOGLE_SHEET_RECORD (zapis
+    pobranych komórek do pliku JSON) pozwalają uruchomić analizę offline.
+    """
+    fixture_path = os.getenv('GOOGLE_SHEET_FIXTURE')
+    if fixture_path:
+        with open(fixture_path, 'r', encoding='utf-8') as file:
+            logger.info(f"Używam zapisanych danych arkusza z {fixture_path}")
+            return json.load(file)
+    
+    # Ustawienia dostępu do Google Sheet
+    SCOPE = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+    CREDS_PATH = os.getenv('GOOGLE_CREDENTIALS_PATH', 'secrets/credentials.json')
+    SHEET_NAME = os.getenv('GOOGLE_SHEET_NAME', '03_DK_Master_XLS_Source')
+    WORKSHEET_NAME = os.getenv('GOOGLE_WORKSHEET_NAME', 'DK')
+    
+    # Autoryzacja i połączenie z Google Sheet
+    creds = ServiceAccountCredentials.from_json_keyfile_name(CREDS_PATH, SCOPE)
+    client = gspread.authorize(creds)
+    
+    # Otwórz arkusz i zakładkę
+    sheet = client.open(SHEET_NAME)
+    worksheet = sheet.worksheet(WORKSHEET_NAME)
+    
+    # Pobierz wszystkie dane
+    data = worksheet.get_all_values()
+    
+    record_path = os.getenv('GOOGLE_SHEET_RECORD')
+    if record_path:
+        with open(record_path, 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False)
+        logger.info(f"Zapisano dane arkusza do {record_path}")
+    return data
+
 def import_google_sheet_data():
     """
     Importuje dane z Google Sheet z podziałem na kolumny selekcji i informacyjne
@@ -29,22 +68,7 @@ def import_google_sheet_data():
         # Załaduj konfigurację kolumn
         config = load_data_columns_config()
         
-        # Ustawienia dostępu do Google Sheet
-        SCOPE = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-        CREDS_PATH = os.getenv('GOOGLE_CREDENTIALS_PATH', 'secrets/credentials.json')
-        SHEET_NAME = os.getenv('GOOGLE_SHEET_NAME', '03_DK_Master_XLS_Source')
-        WORKSHEET_NAME = os.getenv('GOOGLE_WORKSHEET_NAME', 'DK')
-        
-        # Autoryzacja i połączenie z Google Sheet
-        creds = ServiceAccountCredentials.from_json_keyfile_name(CREDS_PATH, SCOPE)
-        client = gspread.authorize(creds)
-        
-        # Otwórz arkusz i zakładkę
-        sheet = client.open(SHEET_NAME)
-        worksheet = sheet.worksheet(WORKSHEET_NAME)
-        
-        # Pobierz wszystkie dane
-        data = worksheet.get_all_values()
+        data = fetch_sheet_values()
         
         # Użyj wiersza 4 (indeks 4) jako nagłówków, pomiń pierwsze 5 wierszy
         # Napraw duplikaty nazw kolumn
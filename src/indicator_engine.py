@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Moduł do liczenia i zapisu wskaźników technicznych w tabeli indicator_values
+"""
+
+import sqlite3
+import yaml
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+import logging
+try:
+    from .indicators import INDICATORS, params_hash
+    from .stock_data_manager import StockDataManager, resample_bars
+    from .schema_migrations import apply_migrations
+except ImportError:
+    from indicators import INDICATORS, params_hash
+    from stock_data_manager import StockDataManager, resample_bars
+    from schema_migrations import apply_migrations
+
+# Konfiguracja logowania
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Świece wyższych interwałów jak w StockDataManager.get_weekly_data/get_monthly_data:
+# (reguła resample, liczba ostatnich notowań dziennych)
+TIMEFRAME_BARS = {
+    '1W': ('W-SUN', 260 * 7),
+    '1M': ('M', 60 * 30),
+}
+DAILY_BARS_LIMIT = max(limit for _, limit in TIMEFRAME_BARS.values())
+
+# Używane gdy brak config/indicators.yaml - kolumny Etapu 2
+DEFAULT_SPECS = {
+    'stochastic_1m': {'indicator': 'stochastic', 'timeframe': '1M',
+                      'params': {'k_period': 36, 'd_period': 12, 'smoothing': 12}},
+    'stochastic_1w': {'indicator': 'stochastic', 'timeframe': '1W',
+                      'params': {'k_period': 36, 'd_period': 12, 'smoothing': 12}},
+}
+
+def load_indicator_specs(config_path: str = 'config/indicators.yaml') -> Dict[str, dict]:
+    """
+    Ładuje listę wskaźników do liczenia
+    
+    Returns:
+        Słownik etykieta -> {label, indicator, timeframe, params, params_hash, display}
+    """
+    specs = None
+    try:
+        with open(config_path, 'r', encoding='utf-8') as file:
+            specs = (yaml.safe_load(file) or {}).get('indicators')
+    except FileNotFoundError:
+        logger.warning(f"Brak pliku {config_path}, używam domyślnych wskaźników")
+    except Exception as e:
+        logger.error(f"Błąd podczas ładowania konfiguracji wskaźników: {e}")
+    
+    result = {}
+    for label, spec in (specs or DEFAULT_SPECS).items():
+        if spec.get('indicator') not in INDICATORS:
+            logger.warning(f"Nieznany wskaźnik {spec.get('indicator')} ({label}) - pomijam")
+            continue
+        params = spec.get('params') or {}
+        result[label] = {
+            'label': label,
+            'indicator': spec['indicator'],
+            'timeframe': spec.get('timeframe', '1D'),
+            'params': params,
+            'params_hash': params_hash(spec['indicator'], params),
+            'display': spec.get('display')
+        }
+    return result
+
+class IndicatorEngine:
+    """
+    Liczy wskaźniki z rejestru na dzień ostatniego notowania i zapisuje je w bazie
+    
+    Wartość dla (ticker, interwał, wskaźnik, parametry, dzień) jest liczona
+    co najwyżej raz - kolejne wywołania dla tego samego notowania czytają
+    ją z indicator_values.
+    """
+    
+    def __init__(self, db_path: str = 'data/analizator_growth.db', specs: Dict[str, dict] = None):
+        """
+        Args:
+            db_path: Ścieżka do pliku bazy danych
+            specs: Wskaźniki do liczenia (domyślnie z config/indicators.yaml)
+        """
+        self.db_path = db_path
+        self.specs = specs if specs is not None else load_indicator_specs()
+        apply_migrations(self.db_path)
+    
+    def update(self, ticker: str, stock_manager: StockDataManager = None) -> Dict[str, Optional[float]]:
+        """
+        Zwraca wartości wskaźników spółki, licząc tylko brakujące dla ostatniego notowania
+        
+        Args:
+            ticker: Symbol spółki
+            stock_manager: Opcjonalny StockDataManager do odczytu notowań
+        
+        Returns:
+            Słownik etykieta -> wartość (None gdy niedostępna)
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT t.id, MAX(p.day_number) FROM tickers t
+                JOIN stock_prices p ON p.ticker_id = t.id AND p.timeframe = '1D'
+                WHERE t.symbol = ?
+            """, (ticker,))
+            ticker_id, day_number = cursor.fetchone()
+            if day_number is None:
+                return {label: None for label in self.specs}
+            
+            cursor.execute("""
+                SELECT timeframe, indicator, params_hash, value FROM indicator_values
+                WHERE ticker_id = ? AND day_number = ?
+            """, (ticker_id, day_number))
+            stored = {(timeframe, indicator, key): value for timeframe, indicator, key, value in cursor.fetchall()}
+            
+            values = {}
+            missing = []
+            for label, spec in self.specs.items():
+                key = (spec['timeframe'], spec['indicator'], spec['params_hash'])
+                if key in stored:
+                    values[label] = stored[key]
+                else:
+                    missing.append(spec)
+            if not missing:
+                return values
+            
+            bars = self._load_bars(ticker, stock_manager or StockDataManager(self.db_path))
+            rows = []
+            for spec in missing:
+                value = self._compute(ticker, spec, bars)
+                values[spec['label']] = value
+                rows.append((ticker_id, spec['timeframe'], spec['indicator'], spec['params_hash'], day_number, value))
+            
+            cursor.executemany("""
+                INSERT OR REPLACE INTO indicator_values
+                (ticker_id, timeframe, indicator, params_hash, day_number, value)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+            conn.commit()
+            logger.info(f"Obliczono {len(rows)} wskaźników dla {ticker}")
+            return values
+    
+    def get_latest_values(self, tickers: List[str] = None) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Pobiera ostatnie zapisane wartości wskaźników (bez przeliczania)
+        
+        Args:
+            tickers: Lista symboli (None = wszystkie)
+        
+        Returns:
+            Słownik ticker -> {etykieta: wartość}
+        """
+        labels = {(spec['timeframe'], spec['indicator'], spec['params_hash']): label
+                  for label, spec in self.specs.items()}
+        query = """
+            WITH latest AS (
+                SELECT v.ticker_id, MAX(v.day_number) AS day_number
+                FROM indicator_values v
+                GROUP BY v.ticker_id
+            )
+            SELECT t.symbol, v.timeframe, v.indicator, v.params_hash, v.value
+            FROM latest
+            JOIN tickers t ON t.id = latest.ticker_id
+            JOIN indicator_values v ON v.ticker_id = latest.ticker_id AND v.day_number = latest.day_number
+        """
+        params = []
+        if tickers is not None:
+            if not tickers:
+                return {}
+            query += f" WHERE t.symbol IN ({','.join('?' * len(tickers))})"
+            params = list(tickers)
+        
+        result = {}
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                for ticker, timeframe, indicator, key, value in conn.execute(query, params):
+                    label = labels.get((timeframe, indicator, key))
+                    if label is not None:
+                        result.setdefault(ticker, {})[label] = value
+        except Exception as e:
+            logger.error(f"Błąd podczas pobierania wartości wskaźników: {e}")
+        return result
+    
+    def display_columns(self) -> List[Dict[str, str]]:
+        """Wskaźniki wyświetlane w tabeli wyników (etykieta i nazwa kolumny)"""
+        return [{'label': label, 'display': spec['display']}
+                for label, spec in self.specs.items() if spec.get('display')]
+    
+    def _load_bars(self, ticker: str, stock_manager: StockDataManager) -> Dict[str, pd.DataFrame]:
+        """Wczytuje notowania dzienne raz i buduje z nich świece potrzebnych interwałów"""
+        daily = stock_manager.get_stock_data(ticker, '1D', limit=DAILY_BARS_LIMIT)
+        bars = {'1D': daily}
+        for timeframe in {spec['timeframe'] for spec in self.specs.values()} & set(TIMEFRAME_BARS):
+            rule, limit = TIMEFRAME_BARS[timeframe]
+            bars[timeframe] = resample_bars(daily.tail(limit), rule) if not daily.empty else daily
+        return bars
+    
+    def _compute(self, ticker: str, spec: dict, bars: Dict[str, pd.DataFrame]) -> Optional[float]:
+        """Liczy wartość wskaźnika na ostatnią świecę"""
+        data = bars.get(spec['timeframe'])
+        if data is None or data.empty:
+            return None
+        try:
+            series = INDICATORS[spec['indicator']](data, **spec['params'])
+            value = series.iloc[-1] if len(series) else np.nan
+            return None if pd.isna(value) else float(value)
+        except Exception as e:
+            logger.warning(f"Błąd podczas obliczania {spec['label']} dla {ticker}: {e}")
+            return None
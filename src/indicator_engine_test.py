@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Skrypt testowy dla rejestru wskaźników i tabeli indicator_values
+"""
+
+import sys
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Dodaj ścieżkę do modułów
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import indicators
+from indicator_engine import IndicatorEngine, load_indicator_specs
+from stock_data_manager import StockDataManager
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'indicators.yaml')
+
+def _random_walk(days):
+    """Generuje dzienne notowania (błądzenie losowe) w dni robocze"""
+    rng = np.random.default_rng(3)
+    index = pd.bdate_range(end='2025-06-30', periods=days)
+    close = 30 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+    spread = close * rng.uniform(0.005, 0.03, days)
+    return pd.DataFrame({
+        'Open': close, 'High': close + spread, 'Low': close - spread,
+        'Close': close, 'Volume': rng.integers(1000, 5000, days)
+    }, index=index)
+
+def test_values_computed_once_per_bar():
+    """
+    Testuje liczenie wskaźników raz na notowanie i odczyt bez przeliczania
+    """
+    print("=== TEST REJESTRU WSKAŹNIKÓW ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'test.db')
+        stock_manager = StockDataManager(db_path)
+        data = _random_walk(1400)
+        stock_manager.save_data('AAA', data.iloc[:-1], '1D')
+        
+        engine = IndicatorEngine(db_path, specs=load_indicator_specs(CONFIG_PATH))
+        
+        calls = []
+        original = dict(indicators.INDICATORS)
+        for name, func in original.items():
+            indicators.INDICATORS[name] = lambda bars, _func=func, _name=name, **params: calls.append(_name) or _func(bars, **params)
+        try:
+            values = engine.update('AAA', stock_manager)
+            assert len(calls) == len(engine.specs)
+            assert engine.update('AAA', stock_manager) == values
+            assert len(calls) == len(engine.specs)  # drugi raz bez obliczeń
+            
+            # Nowe notowanie - wskaźniki liczone ponownie, raz
+            stock_manager.save_data('AAA', data.iloc[-1:], '1D')
+            new_values = engine.update('AAA', stock_manager)
+            assert len(calls) == 2 * len(engine.specs)
+        finally:
+            indicators.INDICATORS.update(original)
+        
+        print(new_values)
+        live = stock_manager.get_stochastic_values('AAA')
+        assert abs(new_values['stochastic_1w'] - live['1W']) < 1e-9
+        assert abs(new_values['stochastic_1m'] - live['1M']) < 1e-9
+        assert 0 <= new_values['rsi_14'] <= 100
+        assert new_values['drawdown_52w'] <= 0
+        
+        assert engine.get_latest_values(['AAA'])['AAA'] == new_values
+        assert engine.get_latest_values(['ZZZ']) == {}
+        assert engine.update('ZZZ', stock_manager)['rsi_14'] is None
+
+def test_rsi_without_losses():
+    """
+    Testuje RSI dla serii bez strat (stale rosnącej i bez zmian ceny)
+    """
+    print("\n=== TEST RSI BEZ STRAT ===")
+    
+    index = pd.bdate_range(end='2025-06-30', periods=30)
+    rising = indicators.rsi(pd.DataFrame({'close': np.linspace(10, 40, 30)}, index=index))
+    flat = indicators.rsi(pd.DataFrame({'close': np.full(30, 25.0)}, index=index))
+    print(rising.tail(3).tolist(), flat.tail(3).tolist())
+    
+    # Okres rozgrzewki bez wartości, potem 100 dla wzrostów i 50 dla ceny bez zmian
+    assert rising.iloc[:14].isna().all() and flat.iloc[:14].isna().all()
+    assert (rising.iloc[14:] == 100).all()
+    assert (flat.iloc[14:] == 50).all()
+    
+    print("Test RSI bez strat zakończony pomyślnie")
+
+if __name__ == "__main__":
+    test_values_computed_once_per_bar()
+    test_rsi_without_losses()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Rejestr wskaźników technicznych
+
+Wskaźnik to funkcja (świece z kolumnami high/low/close, parametry) -> Series
+z wartością na każdą świecę; nowe wskaźniki dodaje się dekoratorem
+@register_indicator.
+"""
+
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, Tuple
+
+INDICATORS: Dict[str, Callable[..., pd.Series]] = {}
+
+def register_indicator(name: str):
+    """Rejestruje funkcję wskaźnika pod podaną nazwą"""
+    def decorator(func):
+        INDICATORS[name] = func
+        return func
+    return decorator
+
+def params_hash(indicator: str, params: dict) -> bytes:
+    """Klucz parametrów wskaźnika w tabeli indicator_values (8 bajtów SHA-256)"""
+    payload = json.dumps({'indicator': indicator, 'params': params}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).digest()[:8]
+
+def stochastic_oscillator(high: pd.Series, low: pd.Series, close: pd.Series,
+                          k_period: int = 36, d_period: int = 12,
+                          smoothing: int = 12) -> Tuple[pd.Series, pd.Series]:
+    """
+    Oblicza Stochastic Oscillator
+    
+    Args:
+        high, low, close: Ceny
+        k_period: Okres dla %K (domyślnie 36)
+        d_period: Okres dla %D (domyślnie 12)
+        smoothing: Okres wygładzania (domyślnie 12)
+    
+    Returns:
+        Tuple (%K, %D) jako Series
+    """
+    # Oblicz %K
+    lowest_low = low.rolling(window=k_period).min()
+    highest_high = high.rolling(window=k_period).max()
+    
+    # Unikaj dzielenia przez zero
+    denominator = highest_high - lowest_low
+    denominator = denominator.replace(0, np.nan)
+    
+    k_raw = 100 * ((close - lowest_low) / denominator)
+    
+    # Wygładź %K
+    k_smoothed = k_raw.rolling(window=smoothing).mean()
+    
+    # Oblicz %D (SMA z %K)
+    d_smoothed = k_smoothed.rolling(window=d_period).mean()
+    
+    return k_smoothed, d_smoothed
+
+@register_indicator('stochastic')
+def stochastic(bars: pd.DataFrame, k_period: int = 36, d_period: int = 12, smoothing: int = 12) -> pd.Series:
+    """%D Stochastic (NaN gdy świec jest mniej niż k_period + smoothing + d_period)"""
+    if len(bars) < k_period + smoothing + d_period:
+        return pd.Series(np.nan, index=bars.index)
+    return stochastic_oscillator(bars['high'], bars['low'], bars['close'], k_period, d_period, smoothing)[1]
+
+@register_indicator('rsi')
+def rsi(bars: pd.DataFrame, period: int = 14) -> pd.Series:
+    """RSI z wygładzaniem Wildera"""
+    delta = bars['close'].diff()
+    average_gain = delta.clip(lower=0).ewm(alpha=1 / period, min_periods=period, adjust=False).mean()
+    average_loss = (-delta.clip(upper=0)).ewm(alpha=1 / period, min_periods=period, adjust=False).mean()
+    result = 100 - 100 / (1 + average_gain / average_loss.replace(0, np.nan))
+    # Brak strat w okresie: 100 przy samych wzrostach, 50 przy cenie bez zmian
+    no_loss = average_loss == 0
+    result[no_loss & (average_gain > 0)] = 100.0
+    result[no_loss & (average_gain == 0)] = 50.0
+    return result
+
+@register_indicator('sma_distance')
+def sma_distance(bars: pd.DataFrame, period: int = 50) -> pd.Series:
+    """Odległość zamknięcia od średniej kroczącej SMA (w %)"""
+    return (bars['close'] / bars['close'].rolling(window=period).mean() - 1) * 100
+
+@register_indicator('ema_distance')
+def ema_distance(bars: pd.DataFrame, period: int = 20) -> pd.Series:
+    """Odległość zamknięcia od wykładniczej średniej kroczącej EMA (w %)"""
+    ema = bars['close'].ewm(span=period, min_periods=period, adjust=False).mean()
+    return (bars['close'] / ema - 1) * 100
+
+@register_indicator('drawdown_52w')
+def drawdown_52w(bars: pd.DataFrame, window: int = 252) -> pd.Series:
+    """Spadek zamknięcia od najwyższej ceny z ostatnich 52 tygodni (w %, wartości ujemne)"""
+    return (bars['close'] / bars['high'].rolling(window=window).max() - 1) * 100
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Moduł do uruchamiania długich zadań (analizy) w tle z raportowaniem postępu
+"""
+
+import uuid
+import queue
+import threading
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+try:
+    from .timezone_utils import get_utc_now
+except ImportError:
+    from timezone_utils import get_utc_now
+
+logger = logging.getLogger(__name__)
+
+class JobCancelled(BaseException):
+    """
+    Zadanie zostało anulowane
+    
+    Dziedziczy po BaseException, aby przejść przez bloki `except Exception`
+    w kodzie analizy i przerwać ją natychmiast.
+    """
+
+class NullProgress:
+    """
+    Pusty raport postępu dla uruchomień poza kolejką zadań (CLI, testy)
+    """
+    
+    def set_stage(self, stage: str, total: int = None):
+        pass
+    
+    def advance(self, count: int = 1):
+        pass
+    
+    def check_cancelled(self):
+        pass
+
+class Job:
+    """
+    Zadanie w kolejce wraz z postępem (etap, przetworzone/wszystkie tickery)
+    """
+    
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.status = 'queued'  # queued, running, completed, failed, cancelled
+        self.stage = None
+        self.done = 0
+        self.total = 0
+        self.error = None
+        self.created_at = get_utc_now()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel_event = threading.Event()
+    
+    def set_stage(self, stage: str, total: int = None):
+        """Ustawia bieżący etap i zeruje licznik tickerów"""
+        self.stage = stage
+        self.done = 0
+        self.total = total or 0
+        logger.info(f"Zadanie {self.id}: etap '{stage}'" + (f" ({total} tickerów)" if total else ""))
+    
+    def advance(self, count: int = 1):
+        """Zwiększa liczbę przetworzonych tickerów"""
+        self.done += count
+    
+    def cancel(self):
+        """Zgłasza prośbę o anulowanie"""
+        self._cancel_event.set()
+    
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_event.is_set()
+    
+    def check_cancelled(self):
+        """Przerywa zadanie jeśli zgłoszono anulowanie"""
+        if self._cancel_event.is_set():
+            raise JobCancelled(f"Zadanie {self.id} zostało anulowane")
+    
+    def to_dict(self) -> Dict:
+        return {
+            'job_id': self.id,
+            'name': self.name,
+            'status': self.status,
+            'stage': self.stage,
+            'done': self.done,
+            'total': self.total,
+            'cancel_requested': self.cancel_requested,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class JobManager:
+    """
+    Kolejka zadań z jednym wykonawcą
+    
+    Zadania są wykonywane kolejno przez jeden wątek roboczy pod blokadą
+    run_lock, więc dwie analizy nigdy nie działają jednocześnie. Zgłoszenie
+    zadania o nazwie, które już czeka lub trwa, zwraca istniejące zadanie.
+    """
+    
+    def __init__(self, max_history: int = 50):
+        self.jobs = OrderedDict()
+        self.max_history = max_history
+        self.run_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+    
+    def submit(self, name: str, func: Callable[[Job], None]) -> Tuple[Job, bool]:
+        """
+        Dodaje zadanie do kolejki
+        
+        Args:
+            name: Nazwa zadania (np. 'analysis')
+            func: Funkcja wywoływana z obiektem Job (raport postępu)
+        
+        Returns:
+            Tuple (zadanie, czy utworzono nowe)
+        """
+        with self._lock:
+            for job in self.jobs.values():
+                if job.name == name and job.status in ('queued', 'running') and not job.cancel_requested:
+                    return job, False
+            
+            job = Job(name)
+            self.jobs[job.id] = job
+            self._trim_history()
+            self._queue.put((job, func))
+            
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._worker_loop, name='job-worker', daemon=True)
+                self._worker.start()
+        
+        logger.info(f"Dodano zadanie {name} ({job.id}) do kolejki")
+        return job, True
+    
+    def _worker_loop(self):
+        """Pętla wątku roboczego"""
+        while True:
+            job, func = self._queue.get()
+            try:
+                if job.cancel_requested:
+                    job.status = 'cancelled'
+                    job.finished_at = get_utc_now()
+                    continue
+                
+                with self.run_lock:
+                    job.status = 'running'
+                    job.started_at = get_utc_now()
+                    try:
+                        func(job)
+                        job.status = 'completed'
+                    except JobCancelled:
+                        job.status = 'cancelled'
+                        logger.info(f"Zadanie {job.id} anulowane")
+                    except Exception as e:
+                        job.status = 'failed'
+                        job.error = str(e)
+                        logger.error(f"Błąd w zadaniu {job.id}: {e}")
+                    finally:
+                        job.finished_at = get_utc_now()
+            finally:
+                self._queue.task_done()
+    
+    def _trim_history(self):
+        """Usuwa najstarsze zakończone zadania ponad limit historii"""
+        finished = [job_id for job_id, job in self.jobs.items()
+                    if job.status in ('completed', 'failed', 'cancelled')]
+        while len(self.jobs) > self.max_history and finished:
+            del self.jobs[finished.pop(0)]
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        """Zwraca zadanie po ID"""
+        return self.jobs.get(job_id)
+    
+    def cancel(self, job_id: str) -> bool:
+        """
+        Anuluje zadanie (czekające od razu, trwające przy najbliższym tickerze)
+        
+        Returns:
+            True jeśli zgłoszono anulowanie
+        """
+        job = self.jobs.get(job_id)
+        if job is None or job.status not in ('queued', 'running'):
+            return False
+        job.cancel()
+        return True
+    
+    def list_jobs(self) -> List[Dict]:
+        """Zwraca listę zadań od najnowszego"""
+        return [job.to_dict() for job in reversed(list(self.jobs.values()))]
+
+# Globalna instancja
+job_manager = JobManager()
+
+def get_job_manager() -> JobManager:
+    """Zwraca globalną instancję kolejki zadań"""
+    return job_manager
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Skrypt testowy dla kolejki zadań w tle
+"""
+
+import sys
+import os
+import time
+import threading
+
+# Dodaj ścieżkę do modułów
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from job_manager import JobManager
+
+def wait_for(job, timeout=5):
+    """Czeka aż zadanie się zakończy"""
+    deadline = time.time() + timeout
+    while job.status in ('queued', 'running') and time.time() < deadline:
+        time.sleep(0.01)
+    return job.status
+
+def test_progress_and_dedupe():
+    """
+    Testuje raportowanie postępu i odrzucanie duplikatu trwającego zadania
+    """
+    print("=== TEST POSTĘPU I DUPLIKATÓW ===")
+    
+    manager = JobManager()
+    release = threading.Event()
+    
+    def work(progress):
+        progress.set_stage('Etap 2', total=3)
+        for _ in range(3):
+            release.wait(2)
+            progress.advance()
+    
+    job, created = manager.submit('analysis', work)
+    duplicate, duplicate_created = manager.submit('analysis', work)
+    assert created and not duplicate_created
+    assert duplicate is job
+    
+    release.set()
+    assert wait_for(job) == 'completed'
+    print(f"Postęp: {job.stage} {job.done}/{job.total}")
+    assert (job.done, job.total) == (3, 3)
+
+def test_cancel_between_tickers():
+    """
+    Testuje anulowanie zadania przy sprawdzeniu między tickerami
+    """
+    print("=== TEST ANULOWANIA ===")
+    
+    manager = JobManager()
+    started = threading.Event()
+    
+    def work(progress):
+        progress.set_stage('Etap 2', total=100)
+        started.set()
+        for _ in range(100):
+            progress.check_cancelled()
+            time.sleep(0.01)
+            progress.advance()
+    
+    job, _ = manager.submit('analysis', work)
+    assert started.wait(2)
+    assert manager.cancel(job.id)
+    assert wait_for(job) == 'cancelled'
+    print(f"Anulowano po {job.done}/{job.total} tickerach")
+    assert job.done < job.total
+    
+    # Po anulowaniu można zlecić nowe zadanie
+    failing, created = manager.submit('analysis', lambda progress: 1 / 0)
+    assert created
+    assert wait_for(failing) == 'failed'
+    assert failing.error
+
+if __name__ == "__main__":
+    test_progress_and_dedupe()
+    test_cancel_between_tickers()
+    print("✅ Testy kolejki zadań zakończone")
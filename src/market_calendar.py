@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Kalendarze sesji giełdowych
+
+Pozwalają sprawdzić przed pobraniem danych, czy od ostatniego zapisanego
+notowania mogła powstać nowa świeca dzienna (weekendy, święta giełdowe,
+kolejne uruchomienie tego samego dnia).
+"""
+
+import pytz
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Optional, Set
+try:
+    from .timezone_utils import get_utc_now, ensure_utc
+except ImportError:
+    from timezone_utils import get_utc_now, ensure_utc
+
+class ExchangeCalendar:
+    """
+    Kalendarz sesji giełdy: dni robocze bez świąt, zamknięcie o close_time czasu lokalnego
+    
+    Nowe giełdy dodaje się przez podklasę z metodą holidays(year) i wpis w CALENDARS.
+    """
+    
+    name = None
+    timezone = None
+    close_time = time(16, 0)
+    settle_minutes = 30  # czas po zamknięciu, po którym świeca dzienna jest ostateczna
+    
+    def __init__(self):
+        self._holidays: Dict[int, Set[date]] = {}
+    
+    def holidays(self, year: int) -> Set[date]:
+        """Dni bez sesji (poza weekendami) w danym roku"""
+        return set()
+    
+    def is_session(self, day: date) -> bool:
+        """Czy w danym dniu odbywa się sesja"""
+        if day.weekday() >= 5:
+            return False
+        if day.year not in self._holidays:
+            self._holidays[day.year] = self.holidays(day.year)
+        return day not in self._holidays[day.year]
+    
+    def previous_session(self, day: date) -> date:
+        """Ostatnia sesja przed podanym dniem"""
+        day -= timedelta(days=1)
+        while not self.is_session(day):
+            day -= timedelta(days=1)
+        return day
+    
+    def session_end(self, day: date) -> datetime:
+        """Moment (UTC), od którego świeca dzienna sesji jest ostateczna"""
+        tz = pytz.timezone(self.timezone)
+        close = tz.localize(datetime.combine(day, self.close_time))
+        return (close + timedelta(minutes=self.settle_minutes)).astimezone(pytz.UTC)
+    
+    def last_completed_session(self, now: Optional[datetime] = None) -> date:
+        """
+        Ostatnia zakończona sesja
+        
+        Args:
+            now: Moment odniesienia (domyślnie teraz; bez strefy - UTC)
+        """
+        now = ensure_utc(now or get_utc_now())
+        today = now.astimezone(pytz.timezone(self.timezone)).date()
+        if self.is_session(today) and now >= self.session_end(today):
+            return today
+        return self.previous_session(today)
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-ty dzień tygodnia w miesiącu (n = -1 - ostatni)"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def _easter(year: int) -> date:
+    """Niedziela Wielkanocna (kalendarz gregoriański)"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    return date(year, month, (h + l - 7 * m + 33 * month + 19) % 32)
+
+def _observed(day: date) -> date:
+    """Święto w sobotę obchodzone w piątek, w niedzielę - w poniedziałek"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+class NYSECalendar(ExchangeCalendar):
+    """
+    Kalendarz NYSE (także Nasdaq - te same dni sesji)
+    
+    Skrócone sesje (np. dzień po Święcie Dziękczynienia) są traktowane jak pełne -
+    świeca jest uznawana za ostateczną po zwykłej godzinie zamknięcia.
+    """
+    
+    name = 'NYSE'
+    timezone = 'America/New_York'
+    
+    # Jednorazowe zamknięcia (huragan Sandy, żałoba narodowa)
+    SPECIAL_CLOSURES = {
+        date(2012, 10, 29), date(2012, 10, 30), date(2018, 12, 5), date(2025, 1, 9),
+    }
+    
+    def holidays(self, year: int) -> Set[date]:
+        days = {
+            _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+            _nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+            _easter(year) - timedelta(days=2),  # Good Friday
+            _nth_weekday(year, 5, 0, -1),  # Memorial Day
+            _observed(date(year, 7, 4)),  # Independence Day
+            _nth_weekday(year, 9, 0, 1),  # Labor Day
+            _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+            _observed(date(year, 12, 25)),  # Christmas
+        }
+        # Nowy Rok w sobotę nie jest obchodzony w piątek poprzedniego roku
+        if date(year, 1, 1).weekday() != 5:
+            days.add(_observed(date(year, 1, 1)))
+        if year >= 2022:
+            days.add(_observed(date(year, 6, 19)))  # Juneteenth
+        return days | {day for day in self.SPECIAL_CLOSURES if day.year == year}
+
+CALENDARS: Dict[str, ExchangeCalendar] = {
+    'NYSE': NYSECalendar(),
+}
+
+# Sufiks tickera Yahoo -> giełda (tickery bez sufiksu to rynek amerykański)
+SUFFIX_EXCHANGES: Dict[str, str] = {}
+
+def get_calendar_for_ticker(ticker: str) -> Optional[ExchangeCalendar]:
+    """
+    Zwraca kalendarz giełdy dla tickera
+    
+    Returns:
+        Kalendarz lub None, gdy giełda nie jest znana (dane pobierane zawsze)
+    """
+    symbol, _, suffix = ticker.upper().rpartition('.')
+    if not symbol:
+        return CALENDARS['NYSE']
+    if suffix in SUFFIX_EXCHANGES:
+        return CALENDARS.get(SUFFIX_EXCHANGES[suffix])
+    # Jednoliterowy sufiks to klasa akcji (np. BRK.B), nie giełda
+    return CALENDARS['NYSE'] if len(suffix) == 1 else None
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Skrypt testowy dla kalendarza sesji giełdowych i pomijania pobierania
+"""
+
+import sys
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import pytz
+from datetime import date, datetime
+
+# Dodaj ścieżkę do modułów
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from market_calendar import CALENDARS, get_calendar_for_ticker
+from stock_data_manager import StockDataManager
+from yahoo_finance_analyzer import YahooFinanceAnalyzer
+
+NEW_YORK = pytz.timezone('America/New_York')
+
+def _ny(*args):
+    return NEW_YORK.localize(datetime(*args)).astimezone(pytz.UTC)
+
+def test_nyse_holidays():
+    """
+    Testuje święta NYSE i ostatnią zakończoną sesję
+    """
+    print("=== TEST KALENDARZA NYSE ===")
+    
+    nyse = CALENDARS['NYSE']
+    holidays_2025 = sorted(nyse.holidays(2025))
+    print(holidays_2025)
+    assert holidays_2025 == [
+        date(2025, 1, 1), date(2025, 1, 9), date(2025, 1, 20), date(2025, 2, 17), date(2025, 4, 18),
+        date(2025, 5, 26), date(2025, 6, 19), date(2025, 7, 4), date(2025, 9, 1), date(2025, 11, 27),
+        date(2025, 12, 25)
+    ]
+    # Nowy Rok 2022 w sobotę - 31.12.2021 był dniem sesji; Boże Narodzenie 2022 obchodzone 26.12
+    assert nyse.is_session(date(2021, 12, 31))
+    assert not nyse.is_session(date(2022, 12, 26))
+    assert nyse.is_session(date(2021, 6, 18))  # Juneteenth dopiero od 2022
+    
+    # Przed zamknięciem - poprzednia sesja; po zamknięciu - bieżąca; weekend i święto
+    assert nyse.last_completed_session(_ny(2025, 7, 3, 12, 0)) == date(2025, 7, 2)
+    assert nyse.last_completed_session(_ny(2025, 7, 3, 17, 0)) == date(2025, 7, 3)
+    assert nyse.last_completed_session(_ny(2025, 7, 6, 12, 0)) == date(2025, 7, 3)
+    assert nyse.last_completed_session(_ny(2025, 7, 7, 9, 0)) == date(2025, 7, 3)
+    
+    assert get_calendar_for_ticker('AAPL') is nyse
+    assert get_calendar_for_ticker('BRK.B') is nyse
+    assert get_calendar_for_ticker('PKN.WA') is None
+
+def test_update_skips_without_new_session():
+    """
+    Testuje pomijanie pobierania, gdy zapisana jest ostatnia zakończona sesja
+    """
+    print("=== TEST POMIJANIA POBIERANIA ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = StockDataManager(os.path.join(tmp_dir, 'test.db'))
+        index = pd.bdate_range(end='2025-07-03', periods=30)
+        close = 50 + np.arange(30.0)
+        data = pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                             'Volume': np.full(30, 100.0)}, index=index)
+        calls = []
+        
+        def fetch(ticker, start_date=None):
+            calls.append(ticker)
+            return data[data.index.date >= start_date].copy() if start_date else data.copy()
+        manager.fetch_daily_data = fetch
+        
+        # Pierwsze pobranie w trakcie sesji 3.07 - świeca 3.07 nie jest zapisywana
+        assert manager.update_stock_data('AAPL', now=_ny(2025, 7, 3, 12, 0)) == 'updated'
+        assert manager.get_last_date('AAPL', '1D') == date(2025, 7, 2)
+        assert manager.update_stock_data('AAPL', now=_ny(2025, 7, 3, 13, 0)) == 'skipped'
+        
+        # Po zamknięciu - pobranie; w weekend i w święto 4.07 - bez zapytań do Yahoo
+        assert manager.update_stock_data('AAPL', now=_ny(2025, 7, 3, 17, 0)) == 'updated'
+        assert manager.get_last_date('AAPL', '1D') == date(2025, 7, 3)
+        calls.clear()
+        for now in (_ny(2025, 7, 4, 18, 0), _ny(2025, 7, 5, 12, 0), _ny(2025, 7, 7, 9, 0)):
+            assert manager.update_stock_data('AAPL', now=now) == 'skipped'
+        assert calls == []
+
+def test_analyzer_reads_stored_bars_without_new_session():
+    """
+    Testuje odczyt notowań z bazy w analizatorze, gdy nie zakończyła się nowa sesja
+    """
+    print("=== TEST ANALIZATORA BEZ NOWEJ SESJI ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = StockDataManager(os.path.join(tmp_dir, 'test.db'))
+        index = pd.bdate_range(end='2025-07-03', periods=60)
+        close = 50 + np.arange(60.0)
+        manager.save_data('AAPL', pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                                                'Volume': np.full(60, 100.0)}, index=index), '1D')
+        calls = []
+        manager.guard.fetch = lambda ticker, fetch: calls.append(ticker)
+        
+        # W weekend po sesji 3.07 - miesiąc notowań z bazy, bez zapytania do Yahoo
+        data = YahooFinanceAnalyzer(stock_manager=manager).get_stock_data('AAPL', '1mo', now=_ny(2025, 7, 5, 12, 0))
+        print(data.tail(3))
+        assert calls == []
+        assert list(data.columns) == ['Open', 'High', 'Low', 'Close', 'Volume']
+        assert data.index[0] == pd.Timestamp('2025-06-04') and data.index[-1] == pd.Timestamp('2025-07-03')
+        assert data['Close'].iloc[-1] == 109.0
+        
+        # Nowa sesja, za krótka historia w bazie lub nieznana giełda - zapytanie do Yahoo
+        YahooFinanceAnalyzer(stock_manager=manager).get_stock_data('AAPL', '1mo', now=_ny(2025, 7, 7, 17, 0))
+        YahooFinanceAnalyzer(stock_manager=manager).get_stock_data('AAPL', '1y', now=_ny(2025, 7, 5, 12, 0))
+        YahooFinanceAnalyzer(stock_manager=manager).get_stock_data('AAPL', 'max', now=_ny(2025, 7, 5, 12, 0))
+        assert calls == ['AAPL', 'AAPL', 'AAPL']
+
+if __name__ == "__main__":
+    test_nyse_holidays()
+    test_update_skips_without_new_session()
+    test_analyzer_reads_stored_bars_without_new_session()
+    print("✅ Testy kalendarza giełdowego zakończone")
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Nagrywanie i odtwarzanie danych zewnętrznych analizy (Google Sheet i Yahoo Finance)
+
+Cassette to plik JSON z odpowiedziami Yahoo nagranymi przez FakeYahooServer
+działający jako proxy; przy odtwarzaniu ten sam serwer zwraca nagrane odpowiedzi,
+a dla zapytań spoza nagrania - syntetyczne notowania. Komórki arkusza są
+zapisywane i odtwarzane przez zmienne GOOGLE_SHEET_RECORD / GOOGLE_SHEET_FIXTURE
+(import_google_sheet.fetch_sheet_values). offline_environment łączy oba elementy,
+więc stage2_analysis.main działa bez dostępu do sieci.
+"""
+
+import os
+import sys
+import json
+import random
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+import yaml
+import logging
+try:
+    from .fake_yahoo_server import FakeYahooServer
+except ImportError:
+    from fake_yahoo_server import FakeYahooServer
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UPSTREAM_URL = 'https://query2.finance.yahoo.com'
+
+# Parametry zapytań zależne od chwili wykonania - pomijane w kluczu nagrania
+VOLATILE_PARAMS = ('period1', 'period2', 'crumb', '_')
+
+class Cassette:
+    """
+    Nagrane odpowiedzi HTTP, kluczem jest ścieżka i posortowane parametry zapytania
+    """
+    
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Plik JSON z nagraniem (wczytywany, jeśli istnieje)
+        """
+        self.path = path
+        self.responses: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                self.responses = json.load(file).get('responses', {})
+    
+    @staticmethod
+    def key(path: str, query: Dict[str, List[str]]) -> str:
+        params = sorted((name, ','.join(values)) for name, values in query.items() if name not in VOLATILE_PARAMS)
+        return path + '?' + '&'.join(f"{name}={value}" for name, value in params)
+    
+    def lookup(self, path: str, query: Dict[str, List[str]]) -> Optional[dict]:
+        """Nagrana odpowiedź (status, content_type, body) lub None"""
+        with self._lock:
+            return self.responses.get(self.key(path, query))
+    
+    def record(self, path: str, query: Dict[str, List[str]], status: int, content_type: str, body: bytes):
+        """Zapisuje odpowiedź w pamięci (na dysk - save)"""
+        with self._lock:
+            self.responses[self.key(path, query)] = {
+                'status': status, 'content_type': content_type, 'body': body.decode('utf-8', errors='replace')
+            }
+    
+    def save(self):
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as file:
+                json.dump({'version': 1, 'responses': self.responses}, file, ensure_ascii=False)
+        logger.info(f"Zapisano {len(self.responses)} odpowiedzi Yahoo do {self.path}")
+
+def synthetic_tickers(count: int) -> List[str]:
+    """Symbole syntetycznych spółek: SYN0001, SYN0002, ..."""
+    return [f"SYN{i:04d}" for i in range(1, count + 1)]
+
+def synthetic_sheet_values(universe: int, rows: Optional[int] = None, seed: int = 0) -> List[List[str]]:
+    """
+    Komórki arkusza DK w układzie Google Sheet (nagłówki w wierszu 4)
+    
+    Args:
+        universe: Liczba spółek spełniających reguły Etapu 1
+        rows: Łączna liczba wierszy spółek (domyślnie 2 x universe); pozostałe nie przechodzą selekcji
+        seed: Ziarno losowania wartości informacyjnych
+    
+    Returns:
+        Lista wierszy jak z worksheet.get_all_values()
+    """
+    with open(os.path.join(REPO_ROOT, 'config', 'data_columns.yaml'), 'r', encoding='utf-8') as file:
+        config = yaml.safe_load(file)
+    selection = config['selection_columns']
+    info = config['informational_columns']
+    headers = [config['ticker_column']] + list(selection.values()) + list(info.values())
+    
+    rng = random.Random(seed)
+    rows = rows if rows is not None else 2 * universe
+    values = [[''] * len(headers) for _ in range(4)] + [headers]
+    for i, ticker in enumerate(synthetic_tickers(rows)):
+        selected = i < universe
+        price = rng.uniform(20, 200)
+        cells = {
+            config['ticker_column']: ticker,
+            selection['country']: 'USA',
+            selection['quality_rating']: '13.00' if selected else '9.00',
+            selection['yield']: f"{rng.uniform(0.5, 5):.2f}%",
+            selection['dividend_growth_streak']: str(rng.randint(5, 40)),
+            selection['sp_credit_rating']: 'A+' if selected else 'BBB-',
+            selection['dk_valuation_rating']: 'Ultra Value Buy' if selected else 'Hold',
+            info['date_edited']: '2025-01-02',
+            info['company']: f"Synthetic {ticker}",
+            info['sector']: rng.choice(['Technology', 'Industrials', 'Health Care', 'Utilities']),
+            info['current_price']: f"${price:.2f}",
+            info['historical_fair_value']: f"${price * rng.uniform(0.8, 1.3):.2f}",
+            info['market_cap_billion']: f"{rng.uniform(1, 500):.1f}",
+        }
+        values.append([cells.get(header, '') for header in headers])
+    return values
+
+def _link(source: str, target: str):
+    if not os.path.exists(target) and os.path.exists(source):
+        os.symlink(source, target)
+
+@contextmanager
+def offline_environment(workdir: str, fixtures_dir: Optional[str] = None, universe: int = 20,
+                        rows: Optional[int] = None, latency: float = 0.0, error_rate: float = 0.0,
+                        seed: int = 0, capacity: int = 8, history_years: Optional[float] = None,
+                        record: bool = False):
+    """
+    Uruchamia analizę w katalogu roboczym z arkuszem i Yahoo z nagrań lub danych syntetycznych
+    
+    Katalog roboczy dostaje config (dowiązanie) i pustą bazę w data/; na czas bloku
+    staje się bieżącym katalogiem, a yfinance i QuoteService (YAHOO_BASE_URL) kierują
+    zapytania na lokalny serwer.
+    
+    Args:
+        workdir: Katalog roboczy analizy
+        fixtures_dir: Katalog z nagraniami (sheet.json, yahoo.json); bez niego - dane syntetyczne
+        universe: Liczba syntetycznych spółek przechodzących Etap 1 (gdy brak nagrania arkusza)
+        rows: Liczba wierszy syntetycznego arkusza (domyślnie 2 x universe)
+        latency, error_rate, seed, capacity: Zachowanie lokalnego serwera Yahoo
+        history_years: Długość syntetycznej historii notowań (lata; None - tyle, ile zapytanie obejmuje)
+        record: Nagrywa arkusz z Google i odpowiedzi prawdziwego Yahoo do fixtures_dir
+    
+    Yields:
+        FakeYahooServer obsługujący zapytania (statystyki w server.stats)
+    """
+    import yfinance.base
+    
+    # Moduły importujące src.* wymagają katalogu repozytorium w sys.path także po zmianie katalogu
+    if REPO_ROOT not in sys.path:
+        sys.path.append(REPO_ROOT)
+    if record and not fixtures_dir:
+        raise ValueError("Nagrywanie wymaga katalogu fixtures_dir")
+    workdir = os.path.abspath(workdir)
+    fixtures_dir = os.path.abspath(fixtures_dir) if fixtures_dir else None
+    os.makedirs(os.path.join(workdir, 'data'), exist_ok=True)
+    _link(os.path.join(REPO_ROOT, 'config'), os.path.join(workdir, 'config'))
+    if record:
+        _link(os.path.join(REPO_ROOT, 'secrets'), os.path.join(workdir, 'secrets'))
+        os.makedirs(fixtures_dir, exist_ok=True)
+    
+    saved_env = {name: os.environ.get(name)
+                 for name in ('GOOGLE_SHEET_FIXTURE', 'GOOGLE_SHEET_RECORD', 'YAHOO_BASE_URL')}
+    sheet_path = os.path.join(fixtures_dir, 'sheet.json') if fixtures_dir else None
+    if record:
+        os.environ.pop('GOOGLE_SHEET_FIXTURE', None)
+        os.environ['GOOGLE_SHEET_RECORD'] = sheet_path
+    else:
+        if not (sheet_path and os.path.exists(sheet_path)):
+            sheet_path = os.path.join(workdir, 'sheet.json')
+            with open(sheet_path, 'w', encoding='utf-8') as file:
+                json.dump(synthetic_sheet_values(universe, rows, seed), file)
+        os.environ.pop('GOOGLE_SHEET_RECORD', None)
+        os.environ['GOOGLE_SHEET_FIXTURE'] = sheet_path
+    
+    cassette = Cassette(os.path.join(fixtures_dir, 'yahoo.json')) if fixtures_dir else None
+    server = FakeYahooServer(capacity=capacity, latency=latency, cassette=cassette,
+                             upstream=UPSTREAM_URL if record else None, error_rate=error_rate, seed=seed,
+                             history_days=int(history_years * 365) if history_years else None)
+    base_url = yfinance.base._BASE_URL_
+    cwd = os.getcwd()
+    server.start()
+    try:
+        server.patch_yfinance()
+        os.environ['YAHOO_BASE_URL'] = server.url
+        os.chdir(workdir)
+        logger.info(f"Analiza offline w {workdir} (Yahoo: {server.url}, arkusz: {sheet_path or 'nagrywanie'})")
+        yield server
+    finally:
+        os.chdir(cwd)
+        yfinance.base._BASE_URL_ = base_url
+        server.stop()
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        if record:
+            cassette.save()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Skrypt testowy dla analizy offline (nagrania arkusza i Yahoo, lokalny serwer)
+"""
+
+import sys
+import os
+import json
+import sqlite3
+import tempfile
+import urllib.error
+import urllib.request
+
+# Dodaj ścieżkę do modułów
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fake_yahoo_server import FakeYahooServer
+from offline_fixtures import Cassette, offline_environment, synthetic_sheet_values
+from import_google_sheet import fetch_sheet_values
+
+def test_full_analysis_offline():
+    """
+    Testuje pełne stage2_analysis.main na syntetycznym arkuszu i lokalnym serwerze Yahoo
+    """
+    print("=== TEST ANALIZY OFFLINE ===")
+    
+    import stage2_analysis
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with offline_environment(tmp_dir, universe=3, rows=8) as server:
+            stage2_analysis.main()
+            stats = dict(server.stats)
+        print(stats)
+        
+        assert 'GOOGLE_SHEET_FIXTURE' not in os.environ
+        with sqlite3.connect(os.path.join(tmp_dir, 'data', 'analizator_growth.db')) as conn:
+            run_id, selected = conn.execute("SELECT id, selected_count FROM analysis_runs").fetchone()
+            tickers = [row[0] for row in conn.execute(
+                "SELECT ticker FROM stage1_companies WHERE run_id = ? AND current_price IS NOT NULL ORDER BY ticker",
+                (run_id,))]
+            prices = conn.execute("SELECT COUNT(*) FROM stock_prices").fetchone()[0]
+            timings = conn.execute("SELECT COUNT(*) FROM analysis_run_timings WHERE run_id = ?", (run_id,)).fetchone()[0]
+        
+        assert selected == 3
+        assert tickers == ['SYN0001', 'SYN0002', 'SYN0003']
+        assert prices > 0 and timings > 0
+        assert stats['requests'] > 0 and stats['errors'] == 0
+    
+    print("Test analizy offline zakończony pomyślnie")
+
+def test_record_and_replay():
+    """
+    Testuje nagranie odpowiedzi przez proxy, odtworzenie z pliku i nagranie arkusza
+    """
+    print("\n=== TEST NAGRYWANIA I ODTWARZANIA ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'yahoo.json')
+        chart = '/v8/finance/chart/REC?range=5d&interval=1d'
+        
+        # Nagranie - "upstream" to drugi lokalny serwer
+        with FakeYahooServer() as upstream:
+            cassette = Cassette(path)
+            with FakeYahooServer(cassette=cassette, upstream=upstream.url) as proxy:
+                recorded = urllib.request.urlopen(f"{proxy.url}{chart}&period2=123").read()
+                assert proxy.stats['recorded'] == 1
+            cassette.save()
+        
+        # Odtworzenie - symbol nieznany serwerowi, odpowiedź tylko z nagrania (period2 pominięte w kluczu)
+        with FakeYahooServer(cassette=Cassette(path), unknown=['REC']) as server:
+            assert urllib.request.urlopen(f"{server.url}{chart}&period2=456").read() == recorded
+            assert server.stats['replayed'] == 1 and server.stats['not_found'] == 0
+        
+        # Błędy 500 losowane powtarzalnie z ziarna
+        results = []
+        for _ in range(2):
+            with FakeYahooServer(error_rate=0.5, seed=7) as server:
+                codes = []
+                for i in range(10):
+                    try:
+                        codes.append(urllib.request.urlopen(f"{server.url}/v8/finance/chart/E{i}").status)
+                    except urllib.error.HTTPError as e:
+                        codes.append(e.code)
+                results.append(codes)
+        print(results[0])
+        assert results[0] == results[1] and 500 in results[0] and 200 in results[0]
+        
+        # Arkusz - zapis komórek i odczyt bez połączenia z Google
+        sheet_path = os.path.join(tmp_dir, 'sheet.json')
+        with open(sheet_path, 'w', encoding='utf-8') as file:
+            json.dump(synthetic_sheet_values(2), file)
+        os.environ['GOOGLE_SHEET_FIXTURE'] = sheet_path
+        try:
+            values = fetch_sheet_values()
+        finally:
+            del os.environ['GOOGLE_SHEET_FIXTURE']
+        assert values[4][0] == 'Ticker' and len(values) == 5 + 4
+        assert [row[0] for row in values[5:7]] == ['SYN0001', 'SYN0002']
+    
+    print("Test nagrywania i odtwarzania zakończony pomyślnie")
+
+if __name__ == "__main__":
+    test_full_analysis_offline()
+    test_record_and_replay()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Skrypt testowy dla tabeli price_freshness i planu pobierania
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import numpy as np
+import pandas as pd
+from datetime import date
+
+# Dodaj ścieżkę do modułów
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from stock_data_manager import StockDataManager, date_to_day_number
+from schema_migrations import apply_migrations
+
+def _bars(end, days):
+    index = pd.bdate_range(end=end, periods=days)
+    close = 20 + np.arange(days, dtype=float)
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Volume': np.full(days, 100.0)}, index=index)
+
+def test_freshness_maintained_by_save_data():
+    """
+    Testuje stan notowań po zapisie, czyszczeniu, błędzie pobrania i migracji
+    """
+    print("=== TEST PRICE_FRESHNESS ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'test.db')
+        manager = StockDataManager(db_path)
+        manager.save_data('AAA', _bars('2025-03-31', 10), '1D')
+        manager.save_data('AAA', _bars('2025-04-02', 3), '1D')  # 2 nowe dni, 1 nadpisany
+        
+        freshness = manager.get_freshness()
+        print(freshness)
+        assert freshness['AAA']['first_date'] == date(2025, 3, 18)
+        assert freshness['AAA']['last_date'] == date(2025, 4, 2)
+        assert freshness['AAA']['bar_count'] == 12
+        assert freshness['AAA']['last_fetch_at'] is not None and freshness['AAA']['last_error'] is None
+        assert manager.get_last_date('AAA', '1D') == date(2025, 4, 2)
+        
+        # Błąd pobrania zostaje do następnego udanego zapisu
+        manager.fetch_daily_data = lambda ticker, start_date=None: None
+        assert manager.update_stock_data('BBB') == 'no_data'
+        assert manager.get_freshness(['BBB'])['BBB'] == {
+            'first_date': None, 'last_date': None, 'bar_count': 0, 'last_fetch_at': None, 'last_error': 'Brak danych'
+        }
+        manager.save_data('BBB', _bars('2025-03-31', 5), '1D')
+        assert manager.get_freshness(['BBB'])['BBB']['last_error'] is None
+        
+        # Czyszczenie starych notowań przelicza pierwszy dzień i liczbę notowań
+        keep_days = (date.today() - date(2025, 3, 24)).days
+        manager.cleanup_old_data(keep_days=keep_days)
+        with sqlite3.connect(db_path) as conn:
+            expected = conn.execute("""
+                SELECT MIN(day_number), COUNT(*) FROM stock_prices WHERE ticker_id = 1
+            """).fetchone()
+        assert date_to_day_number(manager.get_freshness()['AAA']['first_date']) == expected[0]
+        assert manager.get_freshness()['AAA']['bar_count'] == expected[1]
+        
+        # Migracja wypełnia tabelę z istniejących notowań
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("DELETE FROM price_freshness")
+            conn.execute("PRAGMA user_version = 9")
+        apply_migrations(db_path)
+        assert manager.get_freshness()['AAA']['bar_count'] == expected[1]
+
+def test_plan_updates():
+    """
+    Testuje kolejność pobierania: najstarsze najpierw, niepobrane na końcu, aktualne pominięte
+    """
+    print("=== TEST PLANU POBIERANIA ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = StockDataManager(os.path.join(tmp_dir, 'test.db'))
+        manager.save_data('OLD', _bars('2025-05-30', 5), '1D')
+        manager.save_data('MID', _bars('2025-06-20', 5), '1D')
+        manager.save_data('NOW', _bars('2025-07-03', 5), '1D')
+        
+        # Sesja 3.07.2025 zakończona, kolejna (7.07) jeszcze nie
+        plan = manager.plan_updates(['NEW', 'MID', 'NOW', 'OLD', 'PKN.WA'],
+                                    now=pd.Timestamp('2025-07-07 12:00', tz='America/New_York').to_pydatetime())
+        print(plan)
+        assert plan == {'fetch': ['OLD', 'MID', 'NEW', 'PKN.WA'], 'skip': ['NOW']}
+
+if __name__ == "__main__":
+    test_freshness_maintained_by_save_data()
+    test_plan_updates()
+    print("✅ Testy price_freshness zakończone")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Walidacja notowań OHLCV przed zapisem lub użyciem w obliczeniach
+
+Jedno przejście po macierzy (notowania × open/high/low/close/volume) daje
+maskę przyczyn dla każdego wiersza. Notowania łamiące niezmienniki OHLC są
+odrzucane do kwarantanny zamiast odrzucać całą historię spółki; notowania
+oznaczone heurystycznie (skok wolumenu, powtórzenie) są zachowywane i tylko
+zapisywane w kwarantannie do wglądu.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import List, Tuple
+
+# Przyczyny oznaczenia (bity maski zapisywanej w price_quarantine.reasons)
+NON_POSITIVE = 1  # cena <= 0 lub brak ceny
+HIGH_BELOW_LOW = 2  # High < Low
+OHLC_OUTSIDE_RANGE = 4  # Open lub Close poza zakresem Low-High
+VOLUME_SPIKE = 8  # wolumen wielokrotnie większy od mediany partii
+STALE_REPEAT = 16  # notowanie identyczne z poprzednim
+
+# Niezmienniki OHLC - takie notowanie nie trafia do stock_prices ani do obliczeń.
+# Skok wolumenu (wyniki, zmiana składu indeksu) i powtórzenie (dzień bez obrotu)
+# to prawdziwe dane rynkowe - usunięcie ich zostawiłoby dziury w oknach wskaźników.
+REJECT_REASONS = NON_POSITIVE | HIGH_BELOW_LOW | OHLC_OUTSIDE_RANGE
+
+REASON_NAMES = {
+    NON_POSITIVE: 'non_positive',
+    HIGH_BELOW_LOW: 'high_below_low',
+    OHLC_OUTSIDE_RANGE: 'ohlc_outside_range',
+    VOLUME_SPIKE: 'volume_spike',
+    STALE_REPEAT: 'stale_repeat',
+}
+
+REQUIRED_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Skok wolumenu: wolumen > VOLUME_SPIKE_FACTOR × mediana wolumenu partii
+# (sprawdzany tylko gdy partia ma co najmniej VOLUME_SPIKE_MIN_ROWS notowań)
+VOLUME_SPIKE_FACTOR = 50.0
+VOLUME_SPIKE_MIN_ROWS = 20
+
+def validate_ohlc(data: pd.DataFrame,
+                  volume_spike_factor: float = VOLUME_SPIKE_FACTOR,
+                  volume_spike_min_rows: int = VOLUME_SPIKE_MIN_ROWS) -> np.ndarray:
+    """
+    Zwraca maskę przyczyn oznaczenia dla każdego notowania (0 = poprawne)
+    
+    Args:
+        data: DataFrame z kolumnami Open, High, Low, Close, Volume
+        volume_spike_factor: Krotność mediany wolumenu uznawana za skok
+        volume_spike_min_rows: Minimalna liczba notowań do sprawdzania skoków wolumenu
+    
+    Returns:
+        Tablica uint8 z bitami przyczyn (NON_POSITIVE, HIGH_BELOW_LOW, ...)
+    """
+    missing = [col for col in REQUIRED_COLUMNS if col not in data.columns]
+    if missing:
+        raise ValueError(f"Brak wymaganych kolumn: {missing}")
+    
+    values = data[REQUIRED_COLUMNS].to_numpy(dtype=float)
+    open_, high, low, close, volume = values.T
+    reasons = np.zeros(len(values), dtype=np.uint8)
+    
+    # NaN nie spełnia > 0, więc brak ceny też jest odrzucany
+    reasons[~(values[:, :4] > 0).all(axis=1)] |= NON_POSITIVE
+    reasons[high < low] |= HIGH_BELOW_LOW
+    reasons[(np.maximum(open_, close) > high) | (np.minimum(open_, close) < low)] |= OHLC_OUTSIDE_RANGE
+    
+    if len(values) >= volume_spike_min_rows:
+        positive = volume[volume > 0]
+        if len(positive):
+            reasons[volume > volume_spike_factor * np.median(positive)] |= VOLUME_SPIKE
+    
+    if len(values) > 1:
+        repeated = (values[1:] == values[:-1]).all(axis=1)
+        reasons[1:][repeated] |= STALE_REPEAT
+    
+    return reasons
+
+def split_valid_rows(data: pd.DataFrame, **kwargs) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Dzieli notowania na używane w obliczeniach i zapisywane w kwarantannie
+    
+    Returns:
+        Tuple (notowania bez przyczyn z REJECT_REASONS,
+        wszystkie oznaczone notowania z kolumną reasons - odrzucone i zachowane)
+    """
+    reasons = validate_ohlc(data, **kwargs)
+    flagged = reasons != 0
+    quarantined = data[flagged].copy()
+    quarantined['reasons'] = reasons[flagged].astype(int)
+    return data[(reasons & REJECT_REASONS) == 0], quarantined
+
+def rejected_rows(quarantined: pd.DataFrame) -> pd.DataFrame:
+    """Notowania z kwarantanny usunięte z danych (przyczyny z REJECT_REASONS)"""
+    return quarantined[(quarantined['reasons'] & REJECT_REASONS) != 0]
+
+def describe_reasons(mask: int) -> List[str]:
+    """Zamienia maskę przyczyn na listę nazw"""
+    return [name for bit, name in REASON_NAMES.items() if mask & bit]
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Skrypt testowy dla walidacji notowań OHLCV i tabeli price_quarantine
+"""
+
+import sys
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Dodaj ścieżkę do modułów
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from price_validation import (validate_ohlc, split_valid_rows, describe_reasons, NON_POSITIVE,
+                              HIGH_BELOW_LOW, OHLC_OUTSIDE_RANGE, VOLUME_SPIKE, STALE_REPEAT)
+from stock_data_manager import StockDataManager
+
+def _bars(days=30):
+    """Poprawne notowania dzienne"""
+    index = pd.date_range('2025-01-06', periods=days, freq='B', tz='America/New_York')
+    close = 10 + np.arange(days) * 0.1
+    return pd.DataFrame({
+        'Open': close - 0.05, 'High': close + 0.2, 'Low': close - 0.2,
+        'Close': close, 'Volume': np.full(days, 1000.0)
+    }, index=index)
+
+def _broken_bars():
+    """Notowania z błędami w wierszach 3, 7, 10, 15 i 21"""
+    data = _bars()
+    data.iloc[3, data.columns.get_loc('Close')] = 0.0
+    data.iloc[7, data.columns.get_loc('Low')] = data['High'].iloc[7] + 1
+    data.iloc[10, data.columns.get_loc('Open')] = data['High'].iloc[10] + 1
+    data.iloc[15, data.columns.get_loc('Volume')] = 1_000_000
+    data.iloc[21] = data.iloc[20]
+    return data
+
+def test_validate_ohlc():
+    """
+    Testuje maskę przyczyn odrzucenia
+    """
+    print("=== TEST WALIDACJI OHLCV ===")
+    
+    reasons = validate_ohlc(_broken_bars())
+    print(dict(enumerate(reasons[reasons != 0])))
+    assert reasons[3] & NON_POSITIVE and reasons[3] & OHLC_OUTSIDE_RANGE
+    assert reasons[7] & HIGH_BELOW_LOW
+    assert reasons[10] == OHLC_OUTSIDE_RANGE
+    assert reasons[15] == VOLUME_SPIKE
+    assert reasons[21] == STALE_REPEAT
+    assert np.flatnonzero(reasons).tolist() == [3, 7, 10, 15, 21]
+    assert describe_reasons(NON_POSITIVE | STALE_REPEAT) == ['non_positive', 'stale_repeat']
+    
+    # Pojedyncze nowe notowanie - bez sprawdzania skoku wolumenu
+    single = _bars(1)
+    single['Volume'] = 1e12
+    assert validate_ohlc(single).tolist() == [0]
+    
+    clean, rejected = split_valid_rows(_bars())
+    assert len(clean) == 30 and rejected.empty
+
+def test_save_data_quarantine():
+    """
+    Testuje zapis poprawnych notowań, kwarantannę błędnych i zachowanie oznaczonych heurystycznie
+    """
+    print("=== TEST KWARANTANNY ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = StockDataManager(os.path.join(tmp_dir, 'test.db'))
+        data = _broken_bars()
+        
+        assert manager.save_data('AAPL', data, '1D') == 3
+        stored = manager.get_stock_data('AAPL', '1D', limit=100)
+        quarantine = manager.get_quarantine('AAPL')
+        print(quarantine)
+        assert len(stored) == 27
+        assert len(quarantine) == 5
+        assert quarantine['reasons'].tolist()[1] & HIGH_BELOW_LOW
+        
+        # Skok wolumenu i powtórzone notowanie zostają w stock_prices (i są oznaczone w kwarantannie)
+        assert quarantine['reasons'].tolist()[3:] == [VOLUME_SPIKE, STALE_REPEAT]
+        assert stored['volume'].max() == 1_000_000
+        assert (stored['close'] == data['Close'].iloc[20]).sum() == 2
+        assert set(quarantine['source']) == {'stock_data_manager'}
+        
+        # Poprawione notowanie zastępuje wpis w kwarantannie
+        assert manager.save_data('AAPL', _bars().iloc[7:8], '1D') == 0
+        assert len(manager.get_quarantine('AAPL')) == 4
+        assert len(manager.get_stock_data('AAPL', '1D', limit=100)) == 28
+        assert manager.get_quarantine('MSFT').empty
+
+if __name__ == "__main__":
+    test_validate_ohlc()
+    test_save_data_quarantine()
+    print("✅ Testy walidacji notowań zakończone")
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Aktualne ceny wielu spółek naraz
+
+Cena pochodzi z ostatniego zapisanego notowania dziennego (jedno zapytanie
+SQL dla całej listy); tylko spółki bez notowania z ostatniej zakończonej
+sesji są pobierane z Yahoo - partiami przez endpoint spark zamiast ciężkiego
+Ticker.info dla każdej spółki. Wyniki są trzymane w pamięci przez ttl sekund.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+try:
+    from .market_calendar import get_calendar_for_ticker
+    from .http_session import get_yahoo_session
+    from .adaptive_concurrency import yahoo_controller, classify_error
+    from .yahoo_guard import yahoo_breaker, CircuitOpenError
+    from .schema_migrations import apply_migrations
+    from .stock_data_manager import day_number_to_date
+except ImportError:
+    from market_calendar import get_calendar_for_ticker
+    from http_session import get_yahoo_session
+    from adaptive_concurrency import yahoo_controller, classify_error
+    from yahoo_guard import yahoo_breaker, CircuitOpenError
+    from schema_migrations import apply_migrations
+    from stock_data_manager import day_number_to_date
+
+# Konfiguracja logowania
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+YAHOO_BASE_URL = 'https://query2.finance.yahoo.com'
+BASE_URL_ENV = 'YAHOO_BASE_URL'  # podmiana adresu Yahoo (analiza offline - offline_fixtures)
+SPARK_PATH = '/v7/finance/spark'
+SPARK_BATCH = 20  # maksymalna liczba symboli w jednym zapytaniu spark
+
+class QuoteService:
+    """
+    Ceny bieżące z notowań w bazie lub partiami z Yahoo, z krótkim cache w pamięci
+    """
+    
+    def __init__(self, db_path: str = 'data/analizator_growth.db', ttl: float = 60.0,
+                 live: bool = True, session=None, clock=time.monotonic):
+        """
+        Args:
+            db_path: Ścieżka do pliku bazy danych
+            ttl: Czas przechowywania ceny w pamięci (sekundy)
+            live: Czy pobierać z Yahoo ceny spółek bez aktualnego notowania w bazie
+            session: Sesja HTTP (domyślnie wspólna sesja Yahoo)
+            clock: Źródło czasu (do testów)
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.live = live
+        self.session = session
+        self.clock = clock
+        self._cache: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        apply_migrations(self.db_path)
+    
+    def get_quote(self, ticker: str) -> Optional[float]:
+        """Cena jednej spółki (jak get_quotes)"""
+        return self.get_quotes([ticker]).get(ticker)
+    
+    def get_quotes(self, tickers: List[str], now: Optional[datetime] = None) -> Dict[str, Optional[float]]:
+        """
+        Zwraca ceny spółek
+        
+        Args:
+            tickers: Lista symboli
+            now: Moment odniesienia dla kalendarza sesji (domyślnie teraz)
+        
+        Returns:
+            Słownik ticker -> cena (None gdy niedostępna)
+        """
+        result = {}
+        missing = []
+        with self._lock:
+            for ticker in dict.fromkeys(tickers):
+                cached = self._cache.get(ticker)
+                if cached and cached[1] > self.clock():
+                    result[ticker] = cached[0]
+                else:
+                    missing.append(ticker)
+        if not missing:
+            return result
+        
+        stored = self._stored_quotes(missing)
+        stale = []
+        for ticker in missing:
+            price, last_date = stored.get(ticker, (None, None))
+            calendar = get_calendar_for_ticker(ticker)
+            if price is not None and (calendar is None or last_date >= calendar.last_completed_session(now)):
+                result[ticker] = price
+            else:
+                stale.append(ticker)
+        
+        if stale and self.live:
+            live = self._live_quotes(stale)
+            logger.info(f"Ceny z Yahoo: {len(live)} z {len(stale)} spółek bez aktualnego notowania w bazie")
+        else:
+            live = {}
+        for ticker in stale:
+            # Brak ceny z Yahoo - ostatnie zapisane notowanie, nawet starsze
+            result[ticker] = live.get(ticker, stored.get(ticker, (None, None))[0])
+        
+        # Brak ceny też jest zapamiętywany - bez ponownych zapytań o nieznane symbole przez ttl
+        expires_at = self.clock() + self.ttl
+        with self._lock:
+            for ticker in missing:
+                self._cache[ticker] = (result[ticker], expires_at)
+        return result
+    
+    def _stored_quotes(self, tickers: List[str]) -> Dict[str, tuple]:
+        """Zamknięcie i data ostatniego notowania dziennego spółek (jedno zapytanie)"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                rows = conn.execute(f"""
+                    SELECT t.symbol, p.close, p.day_number
+                    FROM price_freshness f
+                    JOIN tickers t ON t.id = f.ticker_id
+                    JOIN stock_prices p ON p.ticker_id = f.ticker_id AND p.timeframe = f.timeframe
+                                       AND p.day_number = f.last_day
+                    WHERE f.timeframe = '1D' AND t.symbol IN ({','.join('?' * len(tickers))})
+                """, tickers).fetchall()
+            return {ticker: (float(close), day_number_to_date(day_number)) for ticker, close, day_number in rows}
+        except Exception as e:
+            logger.error(f"Błąd podczas pobierania zapisanych cen: {e}")
+            return {}
+    
+    def _live_quotes(self, tickers: List[str]) -> Dict[str, float]:
+        """Ceny z Yahoo partiami po SPARK_BATCH symboli (z aliasami symboli Yahoo)"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                aliases = dict(conn.execute(f"""
+                    SELECT symbol, yahoo_symbol FROM symbol_aliases
+                    WHERE symbol IN ({','.join('?' * len(tickers))})
+                """, tickers).fetchall())
+        except Exception as e:
+            logger.error(f"Błąd podczas pobierania aliasów symboli: {e}")
+            aliases = {}
+        by_symbol = {aliases.get(ticker, ticker): ticker for ticker in tickers}
+        symbols = list(by_symbol)
+        
+        session = self.session or get_yahoo_session()
+        base_url = _base_url()
+        prices = {}
+        for start in range(0, len(symbols), SPARK_BATCH):
+            batch = symbols[start:start + SPARK_BATCH]
+            try:
+                with yahoo_controller.slot(admit=yahoo_breaker.before_request) as request:
+                    try:
+                        response = session.get(f"{base_url}{SPARK_PATH}", timeout=30, params={
+                            'symbols': ','.join(batch), 'range': '1d', 'interval': '1d'
+                        })
+                        response.raise_for_status()
+                        payload = response.json()
+                    except Exception as e:
+                        yahoo_breaker.record(False)
+                        request.outcome = classify_error(e)
+                        raise
+                    yahoo_breaker.record(True)
+                for item in (payload.get('spark') or {}).get('result') or []:
+                    meta = ((item.get('response') or [{}])[0] or {}).get('meta') or {}
+                    price = meta.get('regularMarketPrice')
+                    if item.get('symbol') in by_symbol and price is not None:
+                        prices[by_symbol[item['symbol']]] = float(price)
+            except CircuitOpenError as e:
+                logger.warning(f"Pomijam ceny z Yahoo: {e}")
+                break
+            except Exception as e:
+                logger.error(f"Błąd podczas pobierania cen z Yahoo dla {', '.join(batch)}: {e}")
+        return prices
+    
+    def clear(self):
+        """Usuwa ceny z cache w pamięci"""
+        with self._lock:
+            self._cache.clear()
+
+def _base_url() -> str:
+    """Adres Yahoo dla endpointu spark (zmienna środowiskowa BASE_URL_ENV lub YAHOO_BASE_URL)"""
+    return os.environ.get(BASE_URL_ENV) or YAHOO_BASE_URL
+
+_quote_services: Dict[str, QuoteService] = {}
+_quote_services_lock = threading.Lock()
+
+def get_quote_service(db_path: str = 'data/analizator_growth.db') -> QuoteService:
+    """Wspólny serwis cen dla bazy (cache w pamięci między wywołaniami)"""
+    with _quote_services_lock:
+        if db_path not in _quote_services:
+            _quote_services[db_path] = QuoteService(db_path)
+        return _quote_services[db_path]
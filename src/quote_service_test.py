@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Skrypt testowy dla serwisu cen bieżących (notowania z bazy, partie spark, cache)
+"""
+
+import sys
+import os
+import tempfile
+from datetime import datetime
+
+# Dodaj ścieżkę do modułów
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from quote_service import QuoteService, YAHOO_BASE_URL, SPARK_PATH
+from stock_data_manager import StockDataManager
+from shared_fixtures import FakeClock, daily_bars
+
+NOW = datetime(2025, 7, 1, 12, 0)  # przed sesją 1 lipca - ostatnia zakończona 30 czerwca
+
+class _SparkResponse:
+    def __init__(self, payload):
+        self.payload = payload
+    
+    def raise_for_status(self):
+        pass
+    
+    def json(self):
+        return self.payload
+
+class _SparkSession:
+    """Sesja HTTP odpowiadająca jak endpoint spark - cena 50.0 dla każdego znanego symbolu"""
+    
+    def __init__(self, unknown=()):
+        self.unknown = set(unknown)
+        self.requests = []
+    
+    def get(self, url, timeout=None, params=None):
+        symbols = params['symbols'].split(',')
+        self.requests.append((url, symbols))
+        return _SparkResponse({'spark': {'result': [
+            {'symbol': symbol, 'response': [{'meta': {'symbol': symbol, 'regularMarketPrice': 50.0}}]}
+            for symbol in symbols if symbol not in self.unknown
+        ], 'error': None}})
+
+def test_quotes_from_stored_bars_and_spark():
+    """
+    Testuje ceny z ostatnich notowań w bazie i pobieranie brakujących partiami z Yahoo
+    """
+    print("=== TEST SERWISU CEN ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = StockDataManager(os.path.join(tmp_dir, 'test.db'))
+        manager.save_data('AAPL', daily_bars('2025-06-30', 25.0), '1D')
+        manager.save_data('OLD', daily_bars('2025-06-20', 15.0), '1D')
+        
+        # Bez Yahoo: aktualne notowanie z bazy, starsze też lepsze niż brak ceny
+        offline = QuoteService(manager.db_path, live=False)
+        assert offline.get_quotes(['AAPL', 'OLD', 'NONE'], now=NOW) == {'AAPL': 25.0, 'OLD': 15.0, 'NONE': None}
+        
+        clock = FakeClock()
+        session = _SparkSession(unknown=['GONE'])
+        quotes = QuoteService(manager.db_path, ttl=60, session=session, clock=clock)
+        tickers = ['AAPL', 'OLD', 'GONE'] + [f"T{i}" for i in range(25)]
+        prices = quotes.get_quotes(tickers, now=NOW)
+        print(prices)
+        
+        assert prices['AAPL'] == 25.0
+        assert prices['OLD'] == 50.0, "Cena spółki z nieaktualnym notowaniem z Yahoo"
+        assert prices['GONE'] is None
+        assert all(prices[f"T{i}"] == 50.0 for i in range(25))
+        # 27 symboli bez aktualnego notowania - dwie partie spark
+        assert [len(symbols) for _, symbols in session.requests] == [20, 7]
+        assert {url for url, _ in session.requests} == {f"{YAHOO_BASE_URL}{SPARK_PATH}"}
+        
+        # Cache w pamięci przez ttl
+        assert quotes.get_quotes(tickers, now=NOW) == prices
+        assert len(session.requests) == 2
+        clock.now += 61
+        quotes.get_quotes(['T0'], now=NOW)
+        assert len(session.requests) == 3
+    
+    print("Test serwisu cen zakończony pomyślnie")
+
+if __name__ == "__main__":
+    test_quotes_from_stored_bars_and_spark()
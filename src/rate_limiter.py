@@ -3,80 +3,315 @@
 Moduł do rate limiting API
 """
 
+import os
+import math
 import time
-from collections import defaultdict, deque
+import sqlite3
+import threading
 from functools import wraps
 from flask import request, jsonify
 import logging
+try:
+    from .config_loader import get_config
+except ImportError:
+    from config_loader import get_config
 
 logger = logging.getLogger(__name__)
 
+# Względne ścieżki z konfiguracji są liczone od katalogu projektu, nie od katalogu bieżącego
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Domyślne limity (używane gdy brak sekcji rate_limits w config/api.yaml)
+DEFAULT_LIMITS = {
+    'api_notes': {'requests': 100, 'window': 3600},  # 100 żądań na godzinę
+    'api_flags': {'requests': 50, 'window': 3600},   # 50 żądań na godzinę
+    'api_general': {'requests': 200, 'window': 3600} # 200 żądań na godzinę
+}
+
+def load_rate_limits() -> dict:
+    """
+    Ładuje limity z sekcji api.rate_limits w config/api.yaml
+    
+    Klucze notes/flags/general odpowiadają typom api_notes/api_flags/api_general,
+    wspólne okno czasowe podane jest jako window.
+    """
+    limits = {name: dict(limit) for name, limit in DEFAULT_LIMITS.items()}
+    try:
+        rate_limits = get_config('api').get('api', {}).get('rate_limits', {}) or {}
+        window = int(rate_limits.get('window', 3600))
+        for key, value in rate_limits.items():
+            if key in ('window', 'backend', 'storage_path'):
+                continue
+            limits[f"api_{key}"] = {'requests': int(value), 'window': window}
+        for limit in limits.values():
+            limit['window'] = window
+    except Exception as e:
+        logger.warning(f"Nie można załadować limitów z konfiguracji, używam domyślnych: {e}")
+    return limits
+
 class RateLimiter:
     """
-    Prosty rate limiter używający sliding window
+    Rate limiter oparty na token bucket
+    
+    Każda para (IP, typ endpointu) ma stały stan: liczbę tokenów i czas
+    ostatniej aktualizacji. Bezczynne klucze (z pełnym kubełkiem) są okresowo
+    usuwane, więc pamięć nie rośnie wraz z liczbą jednorazowych klientów.
     """
     
-    def __init__(self):
-        # Słownik przechowujący historię żądań dla każdego IP
-        self.requests = defaultdict(lambda: deque())
+    def __init__(self, limits: dict = None, cleanup_interval: int = 300):
+        # Słownik (typ endpointu, IP) -> [tokeny, czas ostatniej aktualizacji]
+        self.buckets = {}
         # Konfiguracja limitów
-        self.limits = {
-            'api_notes': {'requests': 100, 'window': 3600},  # 100 żądań na godzinę
-            'api_flags': {'requests': 50, 'window': 3600},   # 50 żądań na godzinę
-            'api_general': {'requests': 200, 'window': 3600} # 200 żądań na godzinę
-        }
+        self.limits = limits if limits is not None else load_rate_limits()
+        self.cleanup_interval = cleanup_interval
+        self._last_cleanup = time.time()
+        self._lock = threading.Lock()
+    
+    def _refill(self, ip, endpoint_type, now):
+        """
+        Zwraca kubełek dla klucza po uzupełnieniu tokenów (wywoływać pod lockiem)
+        """
+        max_requests = self.limits[endpoint_type]['requests']
+        rate = max_requests / self.limits[endpoint_type]['window']
+        
+        bucket = self.buckets.get((endpoint_type, ip))
+        if bucket is None:
+            bucket = [float(max_requests), now]
+            self.buckets[(endpoint_type, ip)] = bucket
+        else:
+            bucket[0] = min(max_requests, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        return bucket
     
     def is_allowed(self, ip, endpoint_type='api_general'):
         """
         Sprawdza czy żądanie jest dozwolone
         """
         now = time.time()
-        window = self.limits[endpoint_type]['window']
+        with self._lock:
+            if now - self._last_cleanup >= self.cleanup_interval:
+                self._evict_idle(now)
+            
+            bucket = self._refill(ip, endpoint_type, now)
+            
+            # Sprawdź czy nie przekroczono limitu
+            if bucket[0] < 1:
+                logger.warning(f"Rate limit exceeded for IP {ip} on endpoint {endpoint_type}")
+                return False
+            
+            # Zużyj token
+            bucket[0] -= 1
+            return True
+    
+    def get_remaining_requests(self, ip, endpoint_type='api_general'):
+        """
+        Zwraca liczbę pozostałych żądań
+        """
+        with self._lock:
+            bucket = self._refill(ip, endpoint_type, time.time())
+            return int(bucket[0])
+    
+    def get_reset_time(self, ip, endpoint_type='api_general'):
+        """
+        Zwraca czas (w sekundach) do odzyskania kolejnego żądania
+        """
+        with self._lock:
+            bucket = self.buckets.get((endpoint_type, ip))
+            if bucket is None:
+                return 0
+            bucket = self._refill(ip, endpoint_type, time.time())
+            if bucket[0] >= 1:
+                return 0
+            
+            rate = self.limits[endpoint_type]['requests'] / self.limits[endpoint_type]['window']
+            return int(math.ceil((1 - bucket[0]) / rate))
+    
+    def _evict_idle(self, now):
+        """
+        Usuwa kubełki, które zdążyły się w pełni uzupełnić (wywoływać pod lockiem)
+        """
+        idle_keys = []
+        for (endpoint_type, ip), (tokens, last) in self.buckets.items():
+            limit = self.limits[endpoint_type]
+            missing = limit['requests'] - tokens
+            if (now - last) * limit['requests'] >= missing * limit['window']:
+                idle_keys.append((endpoint_type, ip))
+        
+        for key in idle_keys:
+            del self.buckets[key]
+        
+        self._last_cleanup = now
+        if idle_keys:
+            logger.debug(f"Usunięto {len(idle_keys)} bezczynnych kluczy rate limitera")
+
+class SQLiteRateLimiter:
+    """
+    Rate limiter token bucket ze stanem współdzielonym między procesami
+    
+    Kubełki są przechowywane w tabeli SQLite w trybie WAL. Każde sprawdzenie
+    to jedno atomowe UPSERT ... RETURNING, więc przy N workerach (np. gunicorn)
+    limit pozostaje wspólny, a nie N-krotny.
+    """
+    
+    def __init__(self, limits: dict = None, db_path: str = 'data/rate_limits.db',
+                 cleanup_interval: int = 300):
+        self.limits = limits if limits is not None else load_rate_limits()
+        self.db_path = db_path
+        self.cleanup_interval = cleanup_interval
+        self._last_cleanup = time.time()
+        self._local = threading.local()
+        self.init_database()
+    
+    def get_connection(self):
+        """
+        Zwraca połączenie dla bieżącego wątku (nowe po forku procesu)
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Liczniki są ulotne - utrata ostatnich zmian przy awarii systemu jest akceptowalna
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    def init_database(self):
+        """
+        Tworzy tabelę kubełków rate limitera
+        """
+        directory = os.path.dirname(self.db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        
+        self.get_connection().execute("""
+            CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                bucket_key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                allowed INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+    
+    def is_allowed(self, ip, endpoint_type='api_general'):
+        """
+        Sprawdza czy żądanie jest dozwolone (jedna atomowa instrukcja)
+        """
+        now = time.time()
+        if now - self._last_cleanup >= self.cleanup_interval:
+            self._evict_idle(now)
+        
         max_requests = self.limits[endpoint_type]['requests']
+        params = {
+            'key': f"{endpoint_type}:{ip}",
+            'capacity': float(max_requests),
+            'rate': max_requests / self.limits[endpoint_type]['window'],
+            'now': now
+        }
         
-        # Usuń stare żądania (poza oknem czasowym)
-        requests = self.requests[ip]
-        while requests and now - requests[0] > window:
-            requests.popleft()
+        # Wszystkie wyrażenia w SET widzą stan wiersza sprzed aktualizacji
+        row = self.get_connection().execute("""
+            INSERT INTO rate_limit_buckets (bucket_key, tokens, updated_at, allowed)
+            VALUES (:key, :capacity - 1, :now, 1)
+            ON CONFLICT(bucket_key) DO UPDATE SET
+                allowed = MIN(:capacity, tokens + MAX(0, :now - updated_at) * :rate) >= 1,
+                tokens = MIN(:capacity, tokens + MAX(0, :now - updated_at) * :rate)
+                         - (MIN(:capacity, tokens + MAX(0, :now - updated_at) * :rate) >= 1),
+                updated_at = MAX(updated_at, :now)
+            RETURNING allowed
+        """, params).fetchone()
         
-        # Sprawdź czy nie przekroczono limitu
-        if len(requests) >= max_requests:
+        if not row[0]:
             logger.warning(f"Rate limit exceeded for IP {ip} on endpoint {endpoint_type}")
             return False
-        
-        # Dodaj nowe żądanie
-        requests.append(now)
         return True
     
+    def _get_tokens(self, ip, endpoint_type):
+        """
+        Zwraca aktualną liczbę tokenów (None jeśli klucz nie istnieje)
+        """
+        row = self.get_connection().execute(
+            "SELECT tokens, updated_at FROM rate_limit_buckets WHERE bucket_key = ?",
+            (f"{endpoint_type}:{ip}",)
+        ).fetchone()
+        if row is None:
+            return None
+        
+        max_requests = self.limits[endpoint_type]['requests']
+        rate = max_requests / self.limits[endpoint_type]['window']
+        return min(max_requests, row[0] + max(0, time.time() - row[1]) * rate)
+    
     def get_remaining_requests(self, ip, endpoint_type='api_general'):
         """
         Zwraca liczbę pozostałych żądań
         """
-        now = time.time()
-        window = self.limits[endpoint_type]['window']
-        max_requests = self.limits[endpoint_type]['requests']
-        
-        # Usuń stare żądania
-        requests = self.requests[ip]
-        while requests and now - requests[0] > window:
-            requests.popleft()
-        
-        return max(0, max_requests - len(requests))
+        tokens = self._get_tokens(ip, endpoint_type)
+        if tokens is None:
+            return self.limits[endpoint_type]['requests']
+        return int(tokens)
     
     def get_reset_time(self, ip, endpoint_type='api_general'):
         """
-        Zwraca czas do resetu limitu
+        Zwraca czas (w sekundach) do odzyskania kolejnego żądania
         """
-        requests = self.requests[ip]
-        if not requests:
+        tokens = self._get_tokens(ip, endpoint_type)
+        if tokens is None or tokens >= 1:
             return 0
         
-        window = self.limits[endpoint_type]['window']
-        oldest_request = requests[0]
-        return int(oldest_request + window - time.time())
+        rate = self.limits[endpoint_type]['requests'] / self.limits[endpoint_type]['window']
+        return int(math.ceil((1 - tokens) / rate))
+    
+    def _evict_idle(self, now):
+        """
+        Usuwa kubełki nieużywane dłużej niż najdłuższe okno (są już pełne)
+        """
+        self._last_cleanup = now
+        max_window = max(limit['window'] for limit in self.limits.values())
+        try:
+            cursor = self.get_connection().execute(
+                "DELETE FROM rate_limit_buckets WHERE updated_at < ?", (now - max_window,)
+            )
+            if cursor.rowcount:
+                logger.debug(f"Usunięto {cursor.rowcount} bezczynnych kluczy rate limitera")
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Nie można usunąć bezczynnych kluczy rate limitera: {e}")
+
+def resolve_storage_path(path: str) -> str:
+    """Zwraca ścieżkę bazy rate limitera (względna - od katalogu projektu)"""
+    return path if os.path.isabs(path) else os.path.join(REPO_ROOT, path)
+
+def create_rate_limiter():
+    """
+    Tworzy rate limiter zgodnie z api.rate_limits.backend ('memory' lub 'sqlite')
+    """
+    limits = load_rate_limits()
+    try:
+        rate_limits = get_config('api').get('api', {}).get('rate_limits', {}) or {}
+    except Exception:
+        rate_limits = {}
+    
+    backend = rate_limits.get('backend', 'memory')
+    if backend == 'sqlite':
+        try:
+            return SQLiteRateLimiter(limits, resolve_storage_path(rate_limits.get('storage_path', 'data/rate_limits.db')))
+        except Exception as e:
+            logger.error(f"Nie można zainicjalizować współdzielonego rate limitera, używam pamięci: {e}")
+    
+    return RateLimiter(limits)
+
+# Globalna instancja rate limitera (tworzona przy pierwszym użyciu, nie przy imporcie)
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
 
-# Globalna instancja rate limitera
-rate_limiter = RateLimiter()
+def get_rate_limiter():
+    """Zwraca globalną instancję rate limitera"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = create_rate_limiter()
+    return _rate_limiter
 
 def rate_limit(endpoint_type='api_general'):
     """
@@ -93,6 +328,7 @@ def rate_limit(endpoint_type='api_general'):
                 ip = 'unknown'
             
             # Sprawdź rate limit
+            rate_limiter = get_rate_limiter()
             if not rate_limiter.is_allowed(ip, endpoint_type):
                 remaining = rate_limiter.get_remaining_requests(ip, endpoint_type)
                 reset_time = rate_limiter.get_reset_time(ip, endpoint_type)
@@ -112,6 +348,7 @@ def get_rate_limit_info(ip, endpoint_type='api_general'):
     """
     Zwraca informacje o rate limicie dla danego IP
     """
+    rate_limiter = get_rate_limiter()
     remaining = rate_limiter.get_remaining_requests(ip, endpoint_type)
     reset_time = rate_limiter.get_reset_time(ip, endpoint_type)
     
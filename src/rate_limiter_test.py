@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Skrypt testowy dla tworzenia globalnego rate limitera
+"""
+
+import sys
+import os
+import tempfile
+import importlib
+
+# Dodaj ścieżkę do modułów
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import rate_limiter
+
+def test_lazy_limiter_and_storage_path():
+    """
+    Testuje, że import nie tworzy bazy w katalogu bieżącym, a ścieżka jest liczona od katalogu projektu
+    """
+    print("=== TEST TWORZENIA RATE LIMITERA ===")
+    
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            module = importlib.reload(rate_limiter)
+            assert module._rate_limiter is None
+            assert not os.path.exists(os.path.join(tmp_dir, 'data'))
+            
+            assert module.resolve_storage_path('data/rate_limits.db') == \
+                os.path.join(module.REPO_ROOT, 'data', 'rate_limits.db')
+            absolute = os.path.join(tmp_dir, 'limits.db')
+            assert module.resolve_storage_path(absolute) == absolute
+            
+            # Jedna instancja tworzona przy pierwszym użyciu
+            created = []
+            module.create_rate_limiter = lambda: created.append(module.RateLimiter()) or created[-1]
+            limiter = module.get_rate_limiter()
+            assert module.get_rate_limiter() is limiter
+            assert len(created) == 1
+        finally:
+            os.chdir(previous_cwd)
+            importlib.reload(rate_limiter)
+    
+    print("Test tworzenia rate limitera zakończony pomyślnie")
+
+if __name__ == "__main__":
+    test_lazy_limiter_and_storage_path()
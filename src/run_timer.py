@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Moduł do pomiaru czasów etapów analizy (spany)
+"""
+
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List
+try:
+    from .timezone_utils import get_utc_now
+except ImportError:
+    from timezone_utils import get_utc_now
+
+class NullTimer:
+    """
+    Pusty pomiar czasu dla wywołań poza pipeline'em analizy
+    """
+    
+    def span(self, name: str, ticker: str = None):
+        return nullcontext()
+    
+    def record(self, name: str, duration_ms: float, started_at=None, ticker: str = None,
+               offset_ms: float = 0.0):
+        pass
+
+class RunTimer:
+    """
+    Zbiera czasy etapów i kroków jednego uruchomienia analizy
+    
+    Nazwy spanów są hierarchiczne z kropką (np. 'stage2.price_fetch'),
+    kroki wykonywane per ticker zapisują też ticker.
+    """
+    
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._started_at = get_utc_now()
+    
+    @contextmanager
+    def span(self, name: str, ticker: str = None):
+        """
+        Mierzy czas bloku kodu
+        
+        Args:
+            name: Nazwa spanu (np. 'stage1.sheet_fetch')
+            ticker: Ticker dla kroków wykonywanych per spółka
+        """
+        started_at = get_utc_now()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000, started_at, ticker,
+                        offset_ms=(start - self._started) * 1000)
+    
+    def record(self, name: str, duration_ms: float, started_at=None, ticker: str = None,
+               offset_ms: float = 0.0):
+        """Dodaje zmierzony span (offset_ms - początek względem startu timera)"""
+        with self._lock:
+            self.spans.append({
+                'span_name': name,
+                'ticker': ticker,
+                'started_at': started_at or get_utc_now(),
+                'offset_ms': offset_ms,
+                'duration_ms': duration_ms
+            })
+    
+    def record_total(self):
+        """Dodaje span 'total' od utworzenia timera do teraz"""
+        self.record('total', (time.perf_counter() - self._started) * 1000, self._started_at)
+    
+    def summary(self) -> List[Dict]:
+        """
+        Zwraca spany zagregowane po nazwie (w kolejności rozpoczęcia)
+        
+        Returns:
+            Lista słowników: span_name, count, total_ms, max_ms
+        """
+        summary = {}
+        with self._lock:
+            for span in sorted(self.spans, key=lambda span: span['offset_ms']):
+                item = summary.setdefault(span['span_name'], {
+                    'span_name': span['span_name'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0
+                })
+                item['count'] += 1
+                item['total_ms'] += span['duration_ms']
+                item['max_ms'] = max(item['max_ms'], span['duration_ms'])
+        return list(summary.values())
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Skrypt testowy dla pomiaru czasów etapów analizy
+"""
+
+import sys
+import os
+import time
+import tempfile
+
+# Dodaj ścieżkę do modułów
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from run_timer import RunTimer
+from database_manager import DatabaseManager
+
+def test_run_timings_persisted():
+    """
+    Testuje zapis spanów i agregację z porównaniem do poprzedniego uruchomienia
+    """
+    print("=== TEST CZASÓW ETAPÓW ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_manager = DatabaseManager(os.path.join(tmp_dir, 'test.db'))
+        
+        for run_id in (1, 2):
+            timer = RunTimer()
+            with timer.span('stage2'):
+                for ticker in ('AAPL', 'MSFT'):
+                    with timer.span('stage2.price_fetch', ticker):
+                        time.sleep(0.01 * run_id)
+            timer.record_total()
+            assert db_manager.save_run_timings(run_id, timer.spans) == 4
+        
+        summary = db_manager.get_run_timings_summary()
+        spans = {span['span_name']: span for span in summary['spans']}
+        print(f"Uruchomienie {summary['run_id']}: {[span['span_name'] for span in summary['spans']]}")
+        
+        assert (summary['run_id'], summary['previous_run_id']) == (2, 1)
+        assert [span['span_name'] for span in summary['spans']] == ['total', 'stage2', 'stage2.price_fetch']
+        assert spans['stage2.price_fetch']['count'] == 2
+        assert spans['stage2.price_fetch']['total_ms'] > spans['stage2.price_fetch']['previous_total_ms']
+
+if __name__ == "__main__":
+    test_run_timings_persisted()
+    print("✅ Testy czasów etapów zakończone")
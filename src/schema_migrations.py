@@ -0,0 +1,573 @@
+#!/usr/bin/env python3
+"""
+Moduł do migracji schematu bazy danych (numerowane migracje + PRAGMA user_version)
+
+Każda migracja ma numer i jest wykonywana dokładnie raz - po jej zastosowaniu
+numer trafia do PRAGMA user_version w tej samej transakcji. Gdy schemat jest
+aktualny, otwarcie bazy kosztuje jeden odczyt PRAGMA.
+
+Migracje muszą być idempotentne: bazy sprzed wprowadzenia numeracji
+(user_version = 0) mają już część tabel i kolumn.
+"""
+
+import sqlite3
+import hashlib
+import logging
+import pandas as pd
+try:
+    from .timezone_utils import utc_to_local
+except ImportError:
+    from timezone_utils import utc_to_local
+
+logger = logging.getLogger(__name__)
+
+def _column_exists(cursor, table: str, column: str) -> bool:
+    """Sprawdza czy tabela ma daną kolumnę"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in cursor.fetchall())
+
+def _add_column(cursor, table: str, column: str, definition: str):
+    """Dodaje kolumnę jeśli nie istnieje"""
+    if not _column_exists(cursor, table, column):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+def _migration_001_base_schema(cursor):
+    """Tabele analizy, wersji konfiguracji, notatek, harmonogramu i flag"""
+    # Tabela uruchomień analizy
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS analysis_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_date TIMESTAMP NOT NULL,
+            selected_count INTEGER DEFAULT 0,
+            notes TEXT,
+            selection_rules_version TEXT,
+            informational_columns_version TEXT
+        )
+    """)
+    
+    # Tabela wersji reguł selekcji
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS selection_rules_versions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            version TEXT UNIQUE NOT NULL,
+            rules_json TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            description TEXT
+        )
+    """)
+    
+    # Tabela wersji kolumn informacyjnych
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS informational_columns_versions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            version TEXT UNIQUE NOT NULL,
+            columns_json TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            description TEXT
+        )
+    """)
+    
+    # Tabela spółek z Etapu 1 (z JSON dla elastyczności)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stage1_companies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id INTEGER NOT NULL,
+            ticker TEXT NOT NULL,
+            selection_data TEXT,  -- JSON z danymi selekcji
+            informational_data TEXT,  -- JSON z danymi informacyjnymi
+            yield REAL,
+            yield_netto REAL,
+            current_price REAL,
+            price_for_5_percent_yield REAL,
+            stochastic_1m REAL,
+            stochastic_1w REAL,
+            stage2_passed BOOLEAN,
+            FOREIGN KEY (run_id) REFERENCES analysis_runs (id)
+        )
+    """)
+    
+    # Tabela notatek dla spółek
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS company_notes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticker TEXT NOT NULL,
+            note_number INTEGER NOT NULL,
+            title TEXT,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            updated_at TIMESTAMP NOT NULL,
+            UNIQUE(ticker, note_number)
+        )
+    """)
+    
+    # Tabela automatycznych uruchomień
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS auto_schedule_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT UNIQUE NOT NULL,
+            scheduled_time TIMESTAMP,
+            started_at TIMESTAMP,
+            completed_at TIMESTAMP,
+            status TEXT NOT NULL, -- success, error, timeout
+            error_details TEXT, -- JSON z błędami
+            companies_count INTEGER,
+            execution_time_seconds INTEGER,
+            created_at TIMESTAMP NOT NULL
+        )
+    """)
+    
+    # Tabela flag spółek
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS company_flags (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticker TEXT NOT NULL UNIQUE,
+            flag_color TEXT NOT NULL CHECK (flag_color IN ('red', 'green', 'yellow', 'blue', 'none')),
+            flag_notes TEXT,
+            created_at TIMESTAMP NOT NULL,
+            updated_at TIMESTAMP NOT NULL
+        )
+    """)
+    
+    # Tabela historii flag
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS flag_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticker TEXT NOT NULL,
+            flag_color TEXT NOT NULL,
+            previous_flag_color TEXT,
+            flag_notes TEXT,
+            changed_at TIMESTAMP NOT NULL,
+            change_reason TEXT DEFAULT 'manual',
+            run_id INTEGER,
+            FOREIGN KEY (run_id) REFERENCES analysis_runs(id)
+        )
+    """)
+    
+    # Kolumny dodane później do stage1_companies (bardzo stare bazy)
+    _add_column(cursor, 'stage1_companies', 'current_price', 'REAL')
+    _add_column(cursor, 'stage1_companies', 'price_for_5_percent_yield', 'REAL')
+    
+    # Indeksy
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_stage1_run_id ON stage1_companies(run_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_stage1_ticker ON stage1_companies(ticker)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_notes_ticker ON company_notes(ticker)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_notes_ticker_number ON company_notes(ticker, note_number)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_flags_ticker ON company_flags(ticker)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_flag_history_ticker ON flag_history(ticker)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_flag_history_date ON flag_history(changed_at)")
+
+def _migration_002_flag_snapshot_date(cursor):
+    """
+    Kolumna flag_history.snapshot_date z unikalnym kluczem (ticker, data, powód)
+    
+    Snapshoty zapisywały changed_at w czasie lokalnym, więc data to pierwsze 10 znaków.
+    Z duplikatów z tego samego dnia zostaje najnowszy wpis.
+    """
+    _add_column(cursor, 'flag_history', 'snapshot_date', 'DATE')
+    cursor.execute("""
+        UPDATE flag_history
+        SET snapshot_date = SUBSTR(changed_at, 1, 10)
+        WHERE change_reason = 'daily_snapshot' AND snapshot_date IS NULL
+    """)
+    cursor.execute("""
+        DELETE FROM flag_history
+        WHERE snapshot_date IS NOT NULL AND id NOT IN (
+            SELECT MAX(id) FROM flag_history
+            WHERE snapshot_date IS NOT NULL
+            GROUP BY ticker, snapshot_date, change_reason
+        )
+    """)
+    if cursor.rowcount > 0:
+        logger.info(f"Usunięto {cursor.rowcount} zduplikowanych snapshotów flag")
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_flag_history_snapshot
+        ON flag_history(ticker, snapshot_date, change_reason)
+        WHERE snapshot_date IS NOT NULL
+    """)
+
+def _migration_003_run_timings(cursor):
+    """Tabela czasów etapów analizy (spany)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS analysis_run_timings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id INTEGER NOT NULL,
+            span_name TEXT NOT NULL, -- np. stage1.sheet_fetch, stage2.price_fetch
+            ticker TEXT, -- dla kroków wykonywanych per spółka
+            started_at TIMESTAMP NOT NULL,
+            offset_ms REAL NOT NULL, -- początek względem startu analizy
+            duration_ms REAL NOT NULL,
+            FOREIGN KEY (run_id) REFERENCES analysis_runs(id)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_run_timings_run_id ON analysis_run_timings(run_id)")
+
+# Klucz główny jest jednocześnie jedynym indeksem tabeli (WITHOUT ROWID)
+STOCK_PRICES_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS stock_prices (
+        ticker_id INTEGER NOT NULL,
+        timeframe TEXT NOT NULL,
+        day_number INTEGER NOT NULL, -- dni od 1970-01-01
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume INTEGER,
+        PRIMARY KEY (ticker_id, timeframe, day_number)
+    ) WITHOUT ROWID
+"""
+
+def _migration_004_compact_stock_prices(cursor):
+    """
+    Słownik tickers i tabela stock_prices WITHOUT ROWID (ticker_id, timeframe, day_number)
+    
+    Stara tabela (tekstowy ticker i data ISO) jest przenoszona do nowego schematu
+    i usuwana razem z indeksami.
+    
+    Returns:
+        True jeśli przeniesiono dane (po migracji warto wykonać VACUUM)
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tickers (
+            id INTEGER PRIMARY KEY,
+            symbol TEXT NOT NULL UNIQUE
+        )
+    """)
+    
+    if not _column_exists(cursor, 'stock_prices', 'ticker'):
+        cursor.execute(STOCK_PRICES_SCHEMA)
+        return False
+    
+    logger.info("Migracja stock_prices do schematu WITHOUT ROWID...")
+    cursor.execute("ALTER TABLE stock_prices RENAME TO stock_prices_legacy")
+    cursor.execute("DROP INDEX IF EXISTS idx_stock_prices_ticker_date")
+    cursor.execute("DROP INDEX IF EXISTS idx_stock_prices_date")
+    cursor.execute(STOCK_PRICES_SCHEMA)
+    cursor.execute("""
+        INSERT OR IGNORE INTO tickers (symbol)
+        SELECT DISTINCT ticker FROM stock_prices_legacy
+    """)
+    cursor.execute("""
+        INSERT OR REPLACE INTO stock_prices
+        (ticker_id, timeframe, day_number, open, high, low, close, volume)
+        SELECT t.id, p.timeframe, CAST(ROUND(julianday(p.date) - 2440587.5) AS INTEGER),
+               p.open, p.high, p.low, p.close, p.volume
+        FROM stock_prices_legacy p
+        JOIN tickers t ON t.symbol = p.ticker
+        ORDER BY t.id, p.timeframe, p.date
+    """)
+    migrated = cursor.rowcount
+    cursor.execute("DROP TABLE stock_prices_legacy")
+    logger.info(f"Przeniesiono {migrated} notowań do nowego schematu stock_prices")
+    return True
+
+def _migration_005_run_day(cursor):
+    """
+    Kolumna analysis_runs.run_day (lokalna data uruchomienia) z indeksem
+    
+    run_date jest zapisywane w UTC, a dzień uruchomienia liczymy w czasie lokalnym
+    (Europe/Warsaw ze zmianą czasu), dlatego konwersja odbywa się w Pythonie.
+    """
+    _add_column(cursor, 'analysis_runs', 'run_day', 'DATE')
+    cursor.execute("SELECT id, run_date FROM analysis_runs WHERE run_day IS NULL")
+    updates = []
+    for run_id, run_date in cursor.fetchall():
+        try:
+            run_day = utc_to_local(pd.Timestamp(run_date).to_pydatetime()).date().isoformat()
+        except (ValueError, TypeError):
+            run_day = str(run_date)[:10]
+        updates.append((run_day, run_id))
+    
+    cursor.executemany("UPDATE analysis_runs SET run_day = ? WHERE id = ?", updates)
+    if updates:
+        logger.info(f"Uzupełniono run_day dla {len(updates)} uruchomień analizy")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_analysis_runs_run_day
+        ON analysis_runs(run_day, run_date)
+    """)
+
+def payload_hash(payload: str) -> bytes:
+    """Zwraca klucz treści JSON w tabeli json_payloads (16 bajtów SHA-256)"""
+    return hashlib.sha256(payload.encode('utf-8')).digest()[:16]
+
+def _migration_006_json_payloads(cursor):
+    """
+    Tabela json_payloads (treść JSON adresowana hashem) i referencje w stage1_companies
+    
+    Dane selekcji i informacyjne są zwykle identyczne dzień po dniu, więc każda
+    treść jest zapisana raz, a stage1_companies trzyma tylko jej hash.
+    
+    Returns:
+        True jeśli przeniesiono dane (po migracji warto wykonać VACUUM)
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS json_payloads (
+            hash BLOB PRIMARY KEY, -- 16 bajtów SHA-256 treści
+            payload TEXT NOT NULL
+        ) WITHOUT ROWID
+    """)
+    _add_column(cursor, 'stage1_companies', 'selection_hash', 'BLOB')
+    _add_column(cursor, 'stage1_companies', 'informational_hash', 'BLOB')
+    if not _column_exists(cursor, 'stage1_companies', 'selection_data'):
+        return False
+    
+    cursor.execute("""
+        SELECT id, selection_data, informational_data FROM stage1_companies
+        WHERE selection_data IS NOT NULL OR informational_data IS NOT NULL
+    """)
+    payloads = {}
+    updates = []
+    for company_id, selection_data, informational_data in cursor.fetchall():
+        hashes = []
+        for payload in (selection_data, informational_data):
+            if payload is None:
+                hashes.append(None)
+                continue
+            key = payload_hash(payload)
+            payloads[key] = payload
+            hashes.append(key)
+        updates.append((hashes[0], hashes[1], company_id))
+    
+    if not updates:
+        return False
+    
+    cursor.executemany("INSERT OR IGNORE INTO json_payloads (hash, payload) VALUES (?, ?)", payloads.items())
+    cursor.executemany("""
+        UPDATE stage1_companies
+        SET selection_hash = ?, informational_hash = ?, selection_data = NULL, informational_data = NULL
+        WHERE id = ?
+    """, updates)
+    logger.info(f"Przeniesiono dane JSON {len(updates)} spółek do {len(payloads)} unikalnych wpisów json_payloads")
+    return True
+
+def _migration_007_indicator_values(cursor):
+    """
+    Tabela indicator_values - wartości wskaźników na dzień ostatniego notowania
+    
+    Klucz (ticker_id, timeframe, indicator, params_hash, day_number) pozwala
+    policzyć wskaźnik co najwyżej raz na nowe notowanie; NULL oznacza wartość
+    policzoną, ale niedostępną (za krótka historia).
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS indicator_values (
+            ticker_id INTEGER NOT NULL,
+            timeframe TEXT NOT NULL, -- 1D, 1W, 1M
+            indicator TEXT NOT NULL, -- nazwa z rejestru wskaźników
+            params_hash BLOB NOT NULL, -- 8 bajtów SHA-256 parametrów
+            day_number INTEGER NOT NULL, -- dzień ostatniego notowania (od 1970-01-01)
+            value REAL,
+            PRIMARY KEY (ticker_id, timeframe, indicator, params_hash, day_number)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_indicator_values_day
+        ON indicator_values(ticker_id, day_number)
+    """)
+
+def _migration_008_price_quarantine(cursor):
+    """
+    Tabela price_quarantine - notowania odrzucone przez walidację OHLCV
+    
+    reasons to maska bitów z price_validation (NON_POSITIVE, HIGH_BELOW_LOW, ...).
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS price_quarantine (
+            ticker_id INTEGER NOT NULL,
+            timeframe TEXT NOT NULL,
+            day_number INTEGER NOT NULL, -- dzień notowania (od 1970-01-01)
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL,
+            volume REAL,
+            reasons INTEGER NOT NULL, -- maska przyczyn odrzucenia
+            source TEXT, -- ścieżka pobierania, która odrzuciła notowanie
+            quarantined_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (ticker_id, timeframe, day_number)
+        ) WITHOUT ROWID
+    """)
+
+def _migration_009_corporate_actions(cursor):
+    """
+    Tabela corporate_actions - dywidendy i splity pobrane razem z notowaniami
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS corporate_actions (
+            ticker_id INTEGER NOT NULL,
+            day_number INTEGER NOT NULL, -- dzień odcięcia (od 1970-01-01)
+            dividend REAL, -- dywidenda na akcję (0 gdy brak)
+            split_ratio REAL, -- współczynnik splitu (NULL gdy brak)
+            PRIMARY KEY (ticker_id, day_number)
+        ) WITHOUT ROWID
+    """)
+
+def _migration_010_price_freshness(cursor):
+    """
+    Tabela price_freshness - stan notowań każdej spółki w jednym wierszu
+    
+    Zastępuje zapytania MAX(day_number) po stock_prices dla każdego tickera;
+    utrzymywana przez StockDataManager.save_data i wypełniana z istniejących notowań.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS price_freshness (
+            ticker_id INTEGER NOT NULL,
+            timeframe TEXT NOT NULL,
+            first_day INTEGER, -- pierwsze zapisane notowanie (od 1970-01-01)
+            last_day INTEGER, -- ostatnie zapisane notowanie
+            bar_count INTEGER NOT NULL DEFAULT 0,
+            last_fetch_at TIMESTAMP, -- ostatnie udane pobranie
+            last_error TEXT, -- błąd ostatniej próby pobrania (NULL po udanym)
+            PRIMARY KEY (ticker_id, timeframe)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        INSERT OR IGNORE INTO price_freshness (ticker_id, timeframe, first_day, last_day, bar_count)
+        SELECT ticker_id, timeframe, MIN(day_number), MAX(day_number), COUNT(*)
+        FROM stock_prices
+        GROUP BY ticker_id, timeframe
+    """)
+
+def _migration_011_symbol_guard(cursor):
+    """
+    Tabele symbol_failures (negatywny cache tickerów) i symbol_aliases (symbole Yahoo)
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS symbol_failures (
+            symbol TEXT PRIMARY KEY,
+            failure_count INTEGER NOT NULL,
+            first_failed_at TIMESTAMP NOT NULL,
+            last_failed_at TIMESTAMP NOT NULL,
+            next_check_at TIMESTAMP NOT NULL -- wcześniej ticker nie jest odpytywany
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS symbol_aliases (
+            symbol TEXT PRIMARY KEY, -- ticker z arkusza
+            yahoo_symbol TEXT NOT NULL,
+            source TEXT NOT NULL, -- manual lub auto (znaleziony automatycznie)
+            resolved_at TIMESTAMP NOT NULL
+        ) WITHOUT ROWID
+    """)
+
+# Lista migracji w kolejności - nowe migracje dopisuj tylko na końcu
+MIGRATIONS = [
+    (1, 'Schemat bazowy', _migration_001_base_schema),
+    (2, 'Data snapshotu flag', _migration_002_flag_snapshot_date),
+    (3, 'Czasy etapów analizy', _migration_003_run_timings),
+    (4, 'Kompaktowa tabela stock_prices', _migration_004_compact_stock_prices),
+    (5, 'Lokalny dzień uruchomienia', _migration_005_run_day),
+    (6, 'Deduplikacja danych JSON spółek', _migration_006_json_payloads),
+    (7, 'Wartości wskaźników technicznych', _migration_007_indicator_values),
+    (8, 'Kwarantanna błędnych notowań', _migration_008_price_quarantine),
+    (9, 'Zdarzenia korporacyjne', _migration_009_corporate_actions),
+    (10, 'Stan notowań spółek', _migration_010_price_freshness),
+    (11, 'Negatywny cache i aliasy tickerów', _migration_011_symbol_guard),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(db_path: str) -> int:
+    """Zwraca wersję schematu bazy (PRAGMA user_version)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+def apply_migrations(db_path: str) -> int:
+    """
+    Stosuje oczekujące migracje schematu
+    
+    Przy aktualnym schemacie wykonuje tylko odczyt PRAGMA user_version.
+    Migracje działają pod blokadą zapisu (BEGIN IMMEDIATE), więc równolegle
+    startujące procesy nie zastosują tej samej migracji dwa razy.
+    
+    Args:
+        db_path: Ścieżka do pliku bazy danych
+    
+    Returns:
+        Wersja schematu po migracji
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return version
+        
+        vacuum = False
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # Inny proces mógł zastosować migracje zanim dostaliśmy blokadę
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            for number, description, migration in MIGRATIONS:
+                if number <= version:
+                    continue
+                logger.info(f"Migracja schematu {number}: {description}")
+                vacuum = bool(migration(cursor)) or vacuum
+                cursor.execute(f"PRAGMA user_version = {number}")
+                version = number
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        
+        logger.info(f"Schemat bazy danych w wersji {version}")
+        
+        if vacuum:
+            # Zwolnij miejsce po przeniesieniu danych (VACUUM nie może działać w transakcji)
+            try:
+                conn.execute("VACUUM")
+            except sqlite3.Error as e:
+                logger.warning(f"Nie udało się wykonać VACUUM po migracji: {e}")
+        
+        return version
+    finally:
+        conn.close()
+
+def init_archive_schema(cursor, schema: str = 'archive'):
+    """
+    Tworzy tabele archiwum starych uruchomień w dołączonej bazie
+    
+    Archiwum ma te same kolumny co analysis_runs i stage1_companies (bez
+    dawnych kolumn JSON), a treści JSON trzyma skompresowane zlib.
+    
+    Args:
+        cursor: Kursor połączenia z dołączonym archiwum
+        schema: Nazwa schematu archiwum (ATTACH ... AS schema)
+    """
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {schema}.analysis_runs (
+            id INTEGER PRIMARY KEY,
+            run_date TIMESTAMP NOT NULL,
+            selected_count INTEGER DEFAULT 0,
+            notes TEXT,
+            selection_rules_version TEXT,
+            informational_columns_version TEXT,
+            run_day DATE
+        )
+    """)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {schema}.stage1_companies (
+            id INTEGER PRIMARY KEY,
+            run_id INTEGER NOT NULL,
+            ticker TEXT NOT NULL,
+            selection_hash BLOB,
+            informational_hash BLOB,
+            yield REAL,
+            yield_netto REAL,
+            current_price REAL,
+            price_for_5_percent_yield REAL,
+            stochastic_1m REAL,
+            stochastic_1w REAL,
+            stage2_passed BOOLEAN
+        )
+    """)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {schema}.json_payloads (
+            hash BLOB PRIMARY KEY,
+            payload_z BLOB NOT NULL -- treść JSON skompresowana zlib
+        ) WITHOUT ROWID
+    """)
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_analysis_runs_run_day ON analysis_runs(run_day, run_date)")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_stage1_companies_run_id ON stage1_companies(run_id)")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_stage1_companies_ticker ON stage1_companies(ticker)")
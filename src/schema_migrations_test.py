@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Skrypt testowy dla migracji schematu (PRAGMA user_version)
+"""
+
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+
+# Dodaj ścieżkę do modułów
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import schema_migrations
+from schema_migrations import apply_migrations, get_schema_version, SCHEMA_VERSION
+from database_manager import DatabaseManager
+
+def test_fresh_database():
+    """
+    Testuje utworzenie nowej bazy i szybką ścieżkę przy aktualnym schemacie
+    """
+    print("=== TEST NOWEJ BAZY ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'test.db')
+        DatabaseManager(db_path)
+        assert get_schema_version(db_path) == SCHEMA_VERSION
+        
+        # Przy aktualnym schemacie żadna migracja nie jest wykonywana
+        def fail(cursor):
+            raise AssertionError("Migracja wykonana przy aktualnym schemacie")
+        
+        original = schema_migrations.MIGRATIONS
+        schema_migrations.MIGRATIONS = [(number, description, fail) for number, description, _ in original]
+        try:
+            start = time.perf_counter()
+            for _ in range(100):
+                DatabaseManager(db_path)
+            elapsed_ms = (time.perf_counter() - start) * 10
+        finally:
+            schema_migrations.MIGRATIONS = original
+        
+        print(f"Konstruktor przy aktualnym schemacie: {elapsed_ms:.3f} ms")
+
+def test_legacy_database_upgrade():
+    """
+    Testuje migrację bazy sprzed numeracji migracji (user_version = 0)
+    """
+    print("=== TEST MIGRACJI STAREJ BAZY ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'test.db')
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("""
+                CREATE TABLE analysis_runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_date TIMESTAMP NOT NULL,
+                    selected_count INTEGER DEFAULT 0,
+                    notes TEXT,
+                    selection_rules_version TEXT,
+                    informational_columns_version TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE stage1_companies (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_id INTEGER NOT NULL,
+                    ticker TEXT NOT NULL
+                )
+            """)
+            conn.execute("INSERT INTO analysis_runs (run_date) VALUES ('2025-03-01 23:30:00')")
+        
+        assert apply_migrations(db_path) == SCHEMA_VERSION
+        
+        with sqlite3.connect(db_path) as conn:
+            run_day = conn.execute("SELECT run_day FROM analysis_runs").fetchone()[0]
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(stage1_companies)")]
+        
+        print(f"run_day: {run_day}, kolumny stage1_companies: {columns}")
+        assert run_day == '2025-03-02'  # 23:30 UTC to już następny dzień w Warszawie
+        assert 'current_price' in columns and 'price_for_5_percent_yield' in columns
+        
+        # Ponowne wywołanie nic nie zmienia
+        assert apply_migrations(db_path) == SCHEMA_VERSION
+
+def test_json_payload_deduplication():
+    """
+    Testuje przeniesienie danych JSON spółek do json_payloads i odczyt wyników
+    """
+    print("=== TEST DEDUPLIKACJI DANYCH JSON ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'test.db')
+        with sqlite3.connect(db_path) as conn:
+            # Baza w wersji 5 - dane JSON jeszcze w stage1_companies
+            for number, _, migration in schema_migrations.MIGRATIONS[:5]:
+                migration(conn.cursor())
+            conn.execute("PRAGMA user_version = 5")
+            for run_id, run_day in ((1, '2025-03-01'), (2, '2025-03-02')):
+                conn.execute("INSERT INTO analysis_runs (id, run_date, run_day) VALUES (?, ?, ?)",
+                             (run_id, f"{run_day} 10:00:00", run_day))
+                for ticker in ('AAPL', 'MSFT'):
+                    conn.execute("""
+                        INSERT INTO stage1_companies (run_id, ticker, selection_data, informational_data)
+                        VALUES (?, ?, ?, '{"company": "Firma"}')
+                    """, (run_id, ticker, f'{{"country": "USA", "ticker": "{ticker}"}}'))
+        
+        db_manager = DatabaseManager(db_path)
+        stats = db_manager.get_payload_stats()
+        print(f"Statystyki: {stats}")
+        assert stats['references'] == 8
+        assert stats['unique_payloads'] == 3
+        
+        df = db_manager.get_companies_by_date('2025-03-02')
+        assert list(df['ticker']) == ['AAPL', 'MSFT']
+        assert df.iloc[1]['selection_data_parsed'] == {'country': 'USA', 'ticker': 'MSFT'}
+        assert df.iloc[0]['informational_data_parsed'] is df.iloc[1]['informational_data_parsed']
+        assert 'selection_hash' not in df.columns
+
+if __name__ == "__main__":
+    test_fresh_database()
+    test_legacy_database_upgrade()
+    print("✅ Testy migracji schematu zakończone")
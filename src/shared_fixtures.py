@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Wspólne pomocnicze obiekty testów: sterowany zegar i syntetyczne notowania dzienne
+"""
+
+import numpy as np
+import pandas as pd
+
+class FakeClock:
+    """
+    Zegar sterowany przez test - przekazywany jako clock (i sleep) zamiast time.monotonic
+    
+    Przykład:
+        clock = FakeClock()
+        cache = ResponseCache(path, ttl=60, clock=clock)
+        clock.now += 61
+    """
+    
+    def __init__(self, now: float = 0.0):
+        self.now = now
+    
+    def __call__(self) -> float:
+        return self.now
+    
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+def daily_bars(end: str = '2025-06-30', last_close: float = 20.0, days: int = 30) -> pd.DataFrame:
+    """
+    Poprawne notowania dzienne w formacie yfinance (dni robocze do end, Close rosnący od 10 do last_close)
+    """
+    close = np.linspace(10, last_close, days)
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Volume': np.full(days, 100.0)}, index=pd.bdate_range(end=end, periods=days))
@@ -16,6 +16,10 @@ from import_google_sheet import import_google_sheet_data
 from stock_selector import StockSelector
 from yahoo_finance_analyzer import YahooFinanceAnalyzer
 from database_manager import DatabaseManager
+from stock_data_manager import StockDataManager
+from job_manager import NullProgress
+from run_timer import RunTimer, NullTimer
+from http_session import session_stats, connection_reuse
 
 def _get_ticker_column(df):
     """
@@ -36,24 +40,27 @@ def _extract_tickers(df):
         return df[ticker_col].tolist()
     return []
 
-def get_stage1_stocks():
+def get_stage1_stocks(timer=None):
     """
     Pobiera spółki z Etapu 1 (DK Rating xls)
     """
     import logging
     logger = logging.getLogger(__name__)
+    timer = timer or NullTimer()
     
     logger.info("=== ETAP 1 - Pobieranie spółek z Google Sheet ===")
     
     try:
         # Import danych z Google Sheet
-        df = import_google_sheet_data()
+        with timer.span('stage1.sheet_fetch'):
+            df = import_google_sheet_data()
         logger.info(f"Pobrano {len(df)} spółek z Google Sheet")
         logger.info(f"Kolumny w DataFrame: {list(df.columns)}")
         
         # Zastosuj reguły selekcji
-        selector = StockSelector()
-        selected_df = selector.select_stocks(df)
+        with timer.span('stage1.selection'):
+            selector = StockSelector()
+            selected_df = selector.select_stocks(df)
         logger.info(f"Kolumny po selekcji: {list(selected_df.columns)}")
         
         # Wyciągnij listę tickerów
@@ -111,7 +118,7 @@ def _log_stage2_results(results_df):
             else:
                 logger.info(f"  {ticker}: 1M={stoch_1m:.1f}%, 1W={stoch_1w:.1f}% (oba > 30%)")
 
-def analyze_stage2(stage1_stocks):
+def analyze_stage2(stage1_stocks, progress=None, timer=None):
     """
     Analizuje spółki z Etapu 1 pod kątem warunków Etapu 2
     """
@@ -126,10 +133,10 @@ def analyze_stage2(stage1_stocks):
     
     try:
         # Inicjalizuj analizator
-        analyzer = YahooFinanceAnalyzer()
+        analyzer = YahooFinanceAnalyzer(timer, StockDataManager())
         
         # Analizuj wszystkie spółki
-        results_df = analyzer.analyze_stage2_stocks(stage1_stocks)
+        results_df = analyzer.analyze_stage2_stocks(stage1_stocks, progress)
         
         # Wyświetl wyniki
         _log_stage2_results(results_df)
@@ -172,12 +179,21 @@ def get_final_selection(stage1_stocks, stage2_results):
 
 # Funkcja save_results została usunięta - wszystkie dane są w bazie danych
 
-def main():
+def main(progress=None):
     """
     Główna funkcja z wersjonowaniem
+    
+    Args:
+        progress: Raport postępu zadania (Job z job_manager); pozwala też anulować
+                  analizę przed zapisem do bazy danych
+    
+    Czasy etapów (spany) są zapisywane w analysis_run_timings dla utworzonego uruchomienia.
     """
     import logging
     logger = logging.getLogger(__name__)
+    progress = progress or NullProgress()
+    timer = RunTimer()
+    http_before = session_stats()
     
     logger.info("=== ANALIZATOR GROWTH - ETAP 2 (Z WERSJONOWANIEM) ===")
     try:
@@ -190,8 +206,10 @@ def main():
     db_manager = DatabaseManager()
     
     # Sprawdź zmiany w konfiguracji
+    progress.set_stage('Sprawdzanie konfiguracji')
     logger.info("0. SPRAWDZANIE ZMIAN W KONFIGURACJI...")
-    changes = db_manager.detect_config_changes()
+    with timer.span('config_check'):
+        changes = db_manager.detect_config_changes()
     if changes['selection_changed']:
         logger.warning(f"Wykryto zmiany w regułach selekcji - utworzono wersję: {changes['new_selection_version']}")
     if changes['info_changed']:
@@ -200,14 +218,20 @@ def main():
         logger.info("Brak zmian w konfiguracji")
     
     # Etap 1 - Pobierz spółki
-    stage1_stocks, stage1_df = get_stage1_stocks()
+    progress.check_cancelled()
+    progress.set_stage('Etap 1 - import i selekcja')
+    with timer.span('stage1'):
+        stage1_stocks, stage1_df = get_stage1_stocks(timer)
     
     if not stage1_stocks:
         logger.warning("Brak spółek z Etapu 1. Kończę analizę.")
         return
     
     # Etap 2 - Analizuj Yahoo Finance
-    stage2_results = analyze_stage2(stage1_stocks)
+    progress.check_cancelled()
+    progress.set_stage('Etap 2 - analiza Yahoo Finance', total=len(stage1_stocks))
+    with timer.span('stage2'):
+        stage2_results = analyze_stage2(stage1_stocks, progress, timer)
     
     if stage2_results.empty:
         logger.warning("Brak wyników z Etapu 2. Kończę analizę.")
@@ -216,22 +240,40 @@ def main():
     # Wynik końcowy
     final_stocks = get_final_selection(stage1_stocks, stage2_results)
     
-    # Zapisz wyniki do bazy danych
+    # Zapisz wyniki do bazy danych (od tego momentu anulowanie nie przerywa zapisu)
+    progress.check_cancelled()
+    progress.set_stage('Zapis do bazy danych', total=len(stage1_df))
+    run_id = None
     try:
-        # Utwórz nowe uruchomienie analizy (z wersjonowaniem)
-        run_id = db_manager.create_analysis_run(
-            selected_count=len(final_stocks),  # Etap 1 to jedyna selekcja
-            notes="Analiza: Etap 1 (selekcja) + Etap 2 (dane informacyjne)"
-        )
-        
-        # Zapisz spółki Etapu 1 z danymi selekcji i informacjami o Etapie 2 (z JSON)
-        db_manager.save_stage1_companies(run_id, stage1_df, stage2_results)
+        with timer.span('db_write'):
+            # Utwórz nowe uruchomienie analizy (z wersjonowaniem)
+            with timer.span('db_write.create_run'):
+                run_id = db_manager.create_analysis_run(
+                    selected_count=len(final_stocks),  # Etap 1 to jedyna selekcja
+                    notes="Analiza: Etap 1 (selekcja) + Etap 2 (dane informacyjne)"
+                )
+            
+            # Zapisz spółki Etapu 1 z danymi selekcji i informacjami o Etapie 2 (z JSON)
+            db_manager.save_stage1_companies(run_id, stage1_df, stage2_results, progress, timer)
         
         logger.info(f"Wszystkie wyniki zapisane do bazy danych (run_id: {run_id})")
         
     except Exception as e:
         logger.error(f"Błąd podczas zapisywania do bazy danych: {e}")
     
+    # Ponowne użycie połączeń HTTP do Yahoo w tym uruchomieniu
+    reuse = connection_reuse(http_before, session_stats())
+    if reuse['requests']:
+        logger.info(f"Połączenia do Yahoo: {reuse['requests']} zapytań, {reuse['new_connections']} nowych połączeń, "
+                    f"ponowne użycie {reuse['reuse_ratio']:.0%}, z cache {reuse['cache_hits']}")
+    
+    # Zapisz czasy etapów dla uruchomienia
+    timer.record_total()
+    for span in timer.summary():
+        logger.info(f"Czas {span['span_name']}: {span['total_ms'] / 1000:.2f}s ({span['count']}x)")
+    if run_id is not None:
+        db_manager.save_run_timings(run_id, timer.spans)
+    
     # CSV nie jest potrzebny - wszystkie dane są w bazie danych
     
     logger.info("=== ANALIZA ZAKOŃCZONA ===")
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Moduł do backtestu reguły Etapu 2 (Stochastic %D 1M/1W poniżej progu) na zapisanych notowaniach
+"""
+
+import itertools
+import numpy as np
+import pandas as pd
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+try:
+    from .stage2_replay import Stage2Replay, TIMEFRAMES, point_in_time_stochastic
+    from .stock_data_manager import date_to_day_number
+except ImportError:
+    from stage2_replay import Stage2Replay, TIMEFRAMES, point_in_time_stochastic
+    from stock_data_manager import date_to_day_number
+
+# Konfiguracja logowania
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Domyślna siatka parametrów (bieżące ustawienia Etapu 2: 36/12/12, próg 30)
+DEFAULT_THRESHOLDS = (10, 20, 30, 40, 50)
+DEFAULT_K_PERIODS = (14, 36)
+DEFAULT_D_PERIODS = (3, 12)
+DEFAULT_SMOOTHINGS = (3, 12)
+DEFAULT_HORIZONS = (5, 20, 60)
+
+# Sygnał -> interwały, z których przynajmniej jeden musi mieć %D poniżej progu
+# ('1M|1W' to reguła Etapu 2 z check_stage2_conditions)
+SIGNAL_TIMEFRAMES = {
+    '1M|1W': ('1M', '1W'),
+    '1M': ('1M',),
+    '1W': ('1W',),
+}
+DEFAULT_SIGNALS = tuple(SIGNAL_TIMEFRAMES)
+
+def build_bar_matrix(bars: pd.DataFrame) -> Tuple[List[str], Dict[str, np.ndarray]]:
+    """
+    Układa notowania spółek w macierze (notowania × spółki)
+    
+    Wiersz to kolejne notowanie spółki, wyrównane do ostatniego notowania
+    (krótsza historia jest dopełniona NaN na początku). Dzięki temu
+    horyzonty liczone w notowaniach nie przechodzą przez dni
+    bez sesji innej giełdy.
+    
+    Args:
+        bars: DataFrame (ticker, day_number, high, low, close) posortowany po tickerze i dniu
+    
+    Returns:
+        Tuple (lista tickerów, słownik macierzy high, low, close, day_number)
+    """
+    tickers = list(dict.fromkeys(bars['ticker']))
+    counts = bars.groupby('ticker', sort=False).size().reindex(tickers).to_numpy()
+    rows = int(counts.max()) if len(counts) else 0
+    
+    # Pozycja wiersza: ostatnie notowanie każdej spółki w ostatnim wierszu
+    column = np.repeat(np.arange(len(tickers)), counts)
+    row = np.concatenate([np.arange(rows - count, rows) for count in counts]) if len(counts) else np.array([], dtype=int)
+    
+    matrices = {}
+    for name in ('high', 'low', 'close'):
+        matrix = np.full((rows, len(tickers)), np.nan)
+        matrix[row, column] = bars[name].to_numpy(dtype=float)
+        matrices[name] = matrix
+    day_numbers = np.full((rows, len(tickers)), -1, dtype=np.int64)
+    day_numbers[row, column] = bars['day_number'].to_numpy()
+    matrices['day_number'] = day_numbers
+    return tickers, matrices
+
+def stochastic_d(day_numbers: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                 timeframe: str, k_period: int, d_period: int, smoothing: int) -> np.ndarray:
+    """
+    Oblicza %D Stochastic 1M lub 1W na koniec każdego dnia dla macierzy (notowania × spółki)
+    
+    Wartości są takie, jak przy analizie uruchomionej tego dnia: świece miesięczne
+    lub tygodniowe z notowań do tego dnia włącznie (point_in_time_stochastic).
+    """
+    freq, window_days, min_bars = TIMEFRAMES[timeframe]
+    result = np.full(close.shape, np.nan)
+    for column in range(close.shape[1]):
+        rows = np.flatnonzero(day_numbers[:, column] >= 0)
+        if len(rows):
+            result[rows, column] = point_in_time_stochastic(
+                day_numbers[rows, column], high[rows, column], low[rows, column], close[rows, column],
+                freq, window_days, min_bars, k_period, d_period, smoothing
+            )
+    return result
+
+def forward_returns(close: np.ndarray, horizon: int) -> np.ndarray:
+    """Stopa zwrotu po horizon notowaniach (NaN gdy brak notowania)"""
+    result = np.full(close.shape, np.nan)
+    if len(close) > horizon:
+        result[:-horizon] = close[horizon:] / close[:-horizon] - 1
+    return result
+
+class Stage2Backtest:
+    """
+    Backtest sygnału wejścia Etapu 2 na siatce progów i parametrów Stochastic
+    
+    Sygnał to %D na świecach miesięcznych (1M) i/lub tygodniowych (1W) poniżej
+    progu, z wartościami liczonymi na koniec każdego dnia jak przy analizie
+    uruchomionej tego dnia; '1M|1W' to reguła Etapu 2 (przynajmniej jeden poniżej progu).
+    Dla każdej kombinacji (k, wygładzenie, d) %D jest liczone raz, a wszystkie
+    sygnały i progi porównywane naraz w układzie (parametry × sygnały × progi × notowania × spółki).
+    Spółki są przetwarzane porcjami tak, aby ten układ mieścił się w max_cells.
+    """
+    
+    def __init__(self, db_path: str = 'data/analizator_growth.db', max_cells: int = 10_000_000):
+        """
+        Args:
+            db_path: Ścieżka do pliku bazy danych
+            max_cells: Maksymalna liczba komórek tablicy sygnałów w jednej porcji
+        """
+        self.db_path = db_path
+        self.max_cells = max_cells
+    
+    def run(self, tickers: Optional[List[str]] = None,
+            thresholds: Sequence[float] = DEFAULT_THRESHOLDS,
+            k_periods: Sequence[int] = DEFAULT_K_PERIODS,
+            d_periods: Sequence[int] = DEFAULT_D_PERIODS,
+            smoothings: Sequence[int] = DEFAULT_SMOOTHINGS,
+            horizons: Sequence[int] = DEFAULT_HORIZONS,
+            start: Optional[date] = None,
+            signals: Sequence[str] = DEFAULT_SIGNALS) -> pd.DataFrame:
+        """
+        Liczy statystyki sygnałów dla całej siatki parametrów
+        
+        Args:
+            tickers: Lista symboli (None = wszystkie w stock_prices)
+            thresholds: Progi %D
+            k_periods, d_periods, smoothings: Parametry Stochastic
+            horizons: Horyzonty stopy zwrotu (w notowaniach dziennych)
+            start: Uwzględniaj tylko sygnały od tej daty (historia przed nią służy do rozgrzewki)
+            signals: Sygnały z SIGNAL_TIMEFRAMES ('1M|1W', '1M', '1W')
+        
+        Returns:
+            DataFrame: signal, k_period, smoothing, d_period, threshold, horizon, signals,
+            mean_return, hit_rate, baseline_return, excess_return
+        """
+        bars = Stage2Replay(self.db_path).load_daily_bars(tickers)
+        return self.run_on_bars(bars, thresholds, k_periods, d_periods, smoothings, horizons, start, signals)
+    
+    def run_on_bars(self, bars: pd.DataFrame,
+                    thresholds: Sequence[float] = DEFAULT_THRESHOLDS,
+                    k_periods: Sequence[int] = DEFAULT_K_PERIODS,
+                    d_periods: Sequence[int] = DEFAULT_D_PERIODS,
+                    smoothings: Sequence[int] = DEFAULT_SMOOTHINGS,
+                    horizons: Sequence[int] = DEFAULT_HORIZONS,
+                    start: Optional[date] = None,
+                    signals: Sequence[str] = DEFAULT_SIGNALS) -> pd.DataFrame:
+        """Jak run(), dla notowań dziennych już wczytanych (ticker, day_number, high, low, close)"""
+        unknown = [signal for signal in signals if signal not in SIGNAL_TIMEFRAMES]
+        if unknown:
+            raise ValueError(f"Nieznane sygnały: {unknown} (dostępne: {list(SIGNAL_TIMEFRAMES)})")
+        signal_names = list(signals)
+        timeframes = sorted({timeframe for signal in signal_names for timeframe in SIGNAL_TIMEFRAMES[signal]})
+        params = list(itertools.product(k_periods, smoothings, d_periods))
+        threshold_values = np.asarray(thresholds, dtype=float)
+        horizons = list(horizons)
+        
+        shape = (len(params), len(signal_names), len(threshold_values), len(horizons))
+        signal_counts = np.zeros(shape)
+        return_sums = np.zeros(shape)
+        hits = np.zeros(shape)
+        baseline_counts = np.zeros(len(horizons))
+        baseline_sums = np.zeros(len(horizons))
+        
+        tickers, matrices = build_bar_matrix(bars)
+        rows = len(matrices['close'])
+        chunk_size = max(1, self.max_cells // max(1, len(params) * len(signal_names) * len(threshold_values) * rows))
+        start_day = date_to_day_number(start) if start is not None else None
+        
+        for offset in range(0, len(tickers), chunk_size):
+            chunk = slice(offset, offset + chunk_size)
+            day_numbers, high, low, close = (matrices[name][:, chunk] for name in ('day_number', 'high', 'low', 'close'))
+            in_range = day_numbers >= (start_day if start_day is not None else 0)
+            
+            # Sygnały dla wszystkich progów naraz: (parametry × sygnały × progi × notowania × spółki)
+            entries = []
+            for k, s, d in params:
+                below = {}
+                for timeframe in timeframes:
+                    values = stochastic_d(day_numbers, high, low, close, timeframe, k, d, s)
+                    values[~in_range] = np.nan
+                    below[timeframe] = values[None] < threshold_values[:, None, None]
+                entries.append([np.logical_or.reduce([below[timeframe] for timeframe in SIGNAL_TIMEFRAMES[signal]])
+                                for signal in signal_names])
+            entries = np.asarray(entries).reshape(len(params) * len(signal_names) * len(threshold_values), -1).astype(float)
+            
+            for index, horizon in enumerate(horizons):
+                returns = forward_returns(close, horizon)
+                returns[~in_range] = np.nan
+                valid = ~np.isnan(returns)
+                flat_returns = np.where(valid, returns, 0.0).ravel()
+                
+                signal_counts[..., index] += (entries @ valid.ravel()).reshape(shape[:3])
+                return_sums[..., index] += (entries @ flat_returns).reshape(shape[:3])
+                hits[..., index] += (entries @ (flat_returns > 0)).reshape(shape[:3])
+                baseline_counts[index] += valid.sum()
+                baseline_sums[index] += returns[valid].sum()
+        
+        logger.info(f"Backtest: {len(tickers)} spółek, {len(params)} kombinacji parametrów, "
+                    f"{len(signal_names)} sygnałów, {len(threshold_values)} progów, {len(horizons)} horyzontów, "
+                    f"porcje po {chunk_size} spółek")
+        
+        records = []
+        for (g, signal), (p, (k, s, d)), (t, threshold), (h, horizon) in itertools.product(
+                enumerate(signal_names), enumerate(params), enumerate(threshold_values), enumerate(horizons)):
+            count = signal_counts[p, g, t, h]
+            baseline = baseline_sums[h] / baseline_counts[h] if baseline_counts[h] else np.nan
+            mean_return = return_sums[p, g, t, h] / count if count else np.nan
+            records.append({
+                'signal': signal, 'k_period': k, 'smoothing': s, 'd_period': d, 'threshold': threshold,
+                'horizon': horizon, 'signals': int(count),
+                'mean_return': mean_return,
+                'hit_rate': hits[p, g, t, h] / count if count else np.nan,
+                'baseline_return': baseline,
+                'excess_return': mean_return - baseline
+            })
+        return pd.DataFrame(records)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Skrypt testowy dla backtestu reguły Etapu 2
+"""
+
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Dodaj ścieżkę do modułów
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from stock_data_manager import date_to_day_number
+from stage2_replay import TIMEFRAMES, point_in_time_stochastic
+from stage2_backtest import Stage2Backtest
+
+def _synthetic_bars():
+    """Notowania dwóch spółek o różnej długości historii (1M dostępne tylko dla dłuższej)"""
+    frames = []
+    rng = np.random.default_rng(7)
+    for ticker, days in (('AAA', 1700), ('BBB', 700)):
+        index = pd.bdate_range(end='2025-06-30', periods=days)
+        close = 40 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+        spread = close * rng.uniform(0.005, 0.03, days)
+        frames.append(pd.DataFrame({
+            'ticker': ticker,
+            'day_number': [date_to_day_number(day) for day in index],
+            'high': close + spread, 'low': close - spread, 'close': close
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def _naive_stats(bars, timeframes, k, s, d, threshold, horizon):
+    """Statystyki sygnałów liczone pętlą po spółkach (pandas)"""
+    returns = []
+    for _, group in bars.groupby('ticker'):
+        group = group.reset_index(drop=True)
+        entry = pd.Series(False, index=group.index)
+        for timeframe in timeframes:
+            freq, window_days, min_bars = TIMEFRAMES[timeframe]
+            values = point_in_time_stochastic(group['day_number'].to_numpy(), group['high'].to_numpy(),
+                                              group['low'].to_numpy(), group['close'].to_numpy(),
+                                              freq, window_days, min_bars, k, d, s)
+            entry |= pd.Series(values < threshold)
+        forward = group['close'].shift(-horizon) / group['close'] - 1
+        returns.extend(forward[entry & forward.notna()])
+    return len(returns), float(np.mean(returns)), float(np.mean(np.array(returns) > 0))
+
+def test_grid_matches_naive_loop():
+    """
+    Testuje zgodność wektorowej siatki (reguła 1M lub 1W) z pętlą po spółkach i niezależność od porcji
+    """
+    print("=== TEST BACKTESTU REGUŁY ETAPU 2 ===")
+    
+    bars = _synthetic_bars()
+    grid = dict(thresholds=(20, 30), k_periods=(14, 36), d_periods=(3, 12), smoothings=(12,), horizons=(5, 20))
+    
+    result = Stage2Backtest(max_cells=10_000_000).run_on_bars(bars, **grid)
+    assert len(result) == 3 * 2 * 2 * 1 * 2 * 2
+    
+    for signal, timeframes in (('1M|1W', ('1M', '1W')), ('1M', ('1M',)), ('1W', ('1W',))):
+        for k, d, threshold, horizon in ((14, 3, 30, 5), (36, 12, 30, 20)):
+            row = result[(result['signal'] == signal) & (result['k_period'] == k) & (result['d_period'] == d) &
+                         (result['threshold'] == threshold) & (result['horizon'] == horizon)].iloc[0]
+            signals, mean_return, hit_rate = _naive_stats(bars, timeframes, k, 12, d, threshold, horizon)
+            print(f"{signal} k={k} d={d} próg={threshold} h={horizon}: {signals} sygnałów, średnio {mean_return:.4f}")
+            assert row['signals'] == signals > 0
+            assert abs(row['mean_return'] - mean_return) < 1e-12
+            assert abs(row['hit_rate'] - hit_rate) < 1e-12
+    
+    # Reguła Etapu 2 obejmuje sygnały obu interwałów
+    current = result[(result['k_period'] == 36) & (result['d_period'] == 12) &
+                     (result['threshold'] == 30) & (result['horizon'] == 5)].set_index('signal')['signals']
+    assert current['1M|1W'] >= max(current['1M'], current['1W'])
+    
+    # Porcje po jednej spółce dają ten sam wynik
+    chunked = Stage2Backtest(max_cells=1).run_on_bars(bars, **grid)
+    pd.testing.assert_frame_equal(result, chunked)
+    
+    try:
+        Stage2Backtest().run_on_bars(bars, signals=('1D',))
+        assert False, "Nieznany sygnał powinien zgłosić błąd"
+    except ValueError:
+        pass
+    
+    print("Test backtestu reguły Etapu 2 zakończony pomyślnie")
+
+if __name__ == "__main__":
+    test_grid_matches_naive_loop()
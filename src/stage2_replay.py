@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Moduł do odtwarzania wartości Etapu 2 (Stochastic 1M/1W) na dowolny dzień z przeszłości
+"""
+
+import sqlite3
+import pandas as pd
+import numpy as np
+from datetime import date, timedelta
+from typing import List, Optional
+import logging
+try:
+    from .stock_data_manager import EPOCH_DATE, date_to_day_number
+    from .schema_migrations import apply_migrations
+except ImportError:
+    from stock_data_manager import EPOCH_DATE, date_to_day_number
+    from schema_migrations import apply_migrations
+
+# Konfiguracja logowania
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Parametry jak w StockDataManager.get_stochastic_values:
+# (okres świec pandas, liczba dziennych świec w oknie, minimalna liczba świec)
+TIMEFRAMES = {
+    '1M': ('M', 60 * 30, 60),
+    '1W': ('W-SUN', 260 * 7, 60),
+}
+
+def point_in_time_stochastic(day_numbers: np.ndarray, high: np.ndarray, low: np.ndarray,
+                             close: np.ndarray, freq: str, window_days: int, min_bars: int,
+                             k_period: int = 36, d_period: int = 12, smoothing: int = 12) -> np.ndarray:
+    """
+    Oblicza %D Stochastic na świecach tygodniowych/miesięcznych na koniec każdego dnia
+    
+    Wartość dla dnia i jest równa wynikowi obliczenia "na żywo" z danymi do dnia i
+    włącznie: świece zamknięte są stałe, a ostatnia świeca jest częściowa (max/min
+    narastająco i bieżące zamknięcie). Sumy kroczące zamkniętych świec są liczone
+    raz, więc koszt zależy od liczby notowań, a nie notowań × dni.
+    
+    Args:
+        day_numbers: Posortowane numery dni notowań jednej spółki
+        high, low, close: Ceny dzienne
+        freq: Okres świecy pandas ('M', 'W-SUN')
+        window_days: Liczba ostatnich dziennych notowań branych do agregacji
+        min_bars: Minimalna liczba świec w oknie
+    
+    Returns:
+        Tablica %D (NaN gdy wartość nie byłaby obliczona)
+    """
+    n = len(day_numbers)
+    if n == 0:
+        return np.array([], dtype=float)
+    
+    dates = pd.to_datetime(day_numbers, unit='D')
+    _, bucket = np.unique(dates.to_period(freq).asi8, return_inverse=True)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    
+    # Zamknięte świece i ich wartości kroczące kończące się na poprzedniej świecy
+    bucket_low = pd.Series(np.minimum.reduceat(low, starts))
+    bucket_high = pd.Series(np.maximum.reduceat(high, starts))
+    bucket_close = pd.Series(close[ends])
+    
+    lowest_low = bucket_low.rolling(k_period).min()
+    highest_high = bucket_high.rolling(k_period).max()
+    k_raw = 100 * (bucket_close - lowest_low) / (highest_high - lowest_low).replace(0, np.nan)
+    k_smoothed = k_raw.rolling(smoothing).mean()
+    
+    prev_low = bucket_low.rolling(k_period - 1).min().shift(1).to_numpy()[bucket]
+    prev_high = bucket_high.rolling(k_period - 1).max().shift(1).to_numpy()[bucket]
+    prev_k_raw = k_raw.rolling(smoothing - 1).sum().shift(1).to_numpy()[bucket]
+    prev_k_smoothed = k_smoothed.rolling(d_period - 1).sum().shift(1).to_numpy()[bucket]
+    
+    # Częściowa świeca na koniec każdego dnia
+    partial_low = pd.Series(low).groupby(bucket).cummin().to_numpy()
+    partial_high = pd.Series(high).groupby(bucket).cummax().to_numpy()
+    
+    current_low = np.minimum(prev_low, partial_low)
+    current_high = np.maximum(prev_high, partial_high)
+    denominator = current_high - current_low
+    denominator[denominator == 0] = np.nan
+    current_k_raw = 100 * (close - current_low) / denominator
+    current_k_smoothed = (prev_k_raw + current_k_raw) / smoothing
+    current_d = (prev_k_smoothed + current_k_smoothed) / d_period
+    
+    # Liczba świec w oknie ostatnich window_days notowań
+    first = np.maximum(np.arange(n) - window_days + 1, 0)
+    current_d[bucket - bucket[first] + 1 < min_bars] = np.nan
+    return current_d
+
+class Stage2Replay:
+    """
+    Odtwarza Stochastic 1M/1W i wynik Etapu 2 na dni z przeszłości
+    
+    Notowania dzienne wszystkich spółek są czytane jednym zapytaniem, a wartości
+    na każdy dzień liczone jednym przejściem po notowaniach spółki.
+    """
+    
+    def __init__(self, db_path: str = 'data/analizator_growth.db', threshold: float = 30.0):
+        """
+        Args:
+            db_path: Ścieżka do pliku bazy danych
+            threshold: Próg %D dla Etapu 2 (jak w zapisie analizy)
+        """
+        self.db_path = db_path
+        self.threshold = threshold
+        apply_migrations(self.db_path)
+    
+    def load_daily_bars(self, tickers: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Pobiera notowania dzienne spółek jednym zapytaniem
+        
+        Args:
+            tickers: Lista symboli (None = wszystkie w bazie)
+        
+        Returns:
+            DataFrame (ticker, day_number, high, low, close) posortowany po tickerze i dniu
+        """
+        query = """
+            SELECT t.symbol AS ticker, p.day_number, p.high, p.low, p.close
+            FROM stock_prices p
+            JOIN tickers t ON t.id = p.ticker_id
+            WHERE p.timeframe = '1D'
+        """
+        params = []
+        if tickers:
+            query += f" AND t.symbol IN ({','.join('?' * len(tickers))})"
+            params = list(tickers)
+        query += " ORDER BY t.symbol, p.day_number"
+        
+        with sqlite3.connect(self.db_path) as conn:
+            return pd.read_sql(query, conn, params=params)
+    
+    def replay(self, tickers: Optional[List[str]] = None, start: Optional[date] = None,
+               end: Optional[date] = None) -> pd.DataFrame:
+        """
+        Oblicza Stochastic 1M/1W i wynik Etapu 2 na koniec każdego dnia notowań
+        
+        Args:
+            tickers: Lista symboli (None = wszystkie w bazie)
+            start, end: Zakres dni wyniku (włącznie); do obliczeń używana jest cała historia
+        
+        Returns:
+            DataFrame (ticker, date, stochastic_1m, stochastic_1w, stage2_passed)
+        """
+        bars = self.load_daily_bars(tickers)
+        columns = ['ticker', 'date', 'stochastic_1m', 'stochastic_1w', 'stage2_passed']
+        if bars.empty:
+            return pd.DataFrame(columns=columns)
+        
+        frames = []
+        for ticker, group in bars.groupby('ticker', sort=False):
+            values = self._replay_ticker(group)
+            values.insert(0, 'ticker', ticker)
+            frames.append(values)
+        result = pd.concat(frames, ignore_index=True)
+        
+        if start is not None:
+            result = result[result['day_number'] >= date_to_day_number(start)]
+        if end is not None:
+            result = result[result['day_number'] <= date_to_day_number(end)]
+        
+        result['date'] = pd.to_datetime(result.pop('day_number'), unit='D')
+        result['stage2_passed'] = self._stage2_passed(result['stochastic_1m'], result['stochastic_1w'])
+        logger.info(f"Odtworzono Etap 2 dla {result['ticker'].nunique()} spółek "
+                    f"({len(result)} dni) z {len(bars)} notowań")
+        return result[columns].reset_index(drop=True)
+    
+    def values_as_of(self, requests: pd.DataFrame) -> pd.DataFrame:
+        """
+        Zwraca wartości Etapu 2 dla par (ticker, dzień)
+        
+        Dla dnia bez notowań używane jest ostatnie notowanie przed nim.
+        
+        Args:
+            requests: DataFrame z kolumnami ticker i as_of (data)
+        
+        Returns:
+            Kopia requests z kolumnami stochastic_1m, stochastic_1w, stage2_passed
+        """
+        result = requests.copy()
+        result['stochastic_1m'] = np.nan
+        result['stochastic_1w'] = np.nan
+        if result.empty:
+            result['stage2_passed'] = False
+            return result
+        
+        bars = self.load_daily_bars(sorted(result['ticker'].unique()))
+        as_of = (pd.to_datetime(result['as_of']) - pd.Timestamp(EPOCH_DATE)).dt.days.to_numpy()
+        for ticker, group in bars.groupby('ticker', sort=False):
+            values = self._replay_ticker(group)
+            rows = np.flatnonzero(result['ticker'].to_numpy() == ticker)
+            positions = np.searchsorted(values['day_number'].to_numpy(), as_of[rows], side='right') - 1
+            found = positions >= 0
+            for column in ('stochastic_1m', 'stochastic_1w'):
+                result.iloc[rows[found], result.columns.get_loc(column)] = values[column].to_numpy()[positions[found]]
+        
+        result['stage2_passed'] = self._stage2_passed(result['stochastic_1m'], result['stochastic_1w'])
+        return result
+    
+    def backfill_stage1_history(self, overwrite: bool = False) -> int:
+        """
+        Uzupełnia Stochastic 1M/1W i stage2_passed w historii stage1_companies
+        
+        Wartości są liczone na koniec sesji poprzedzającej dzień uruchomienia
+        (analiza rano korzysta z notowań zamkniętych poprzedniego dnia).
+        
+        Args:
+            overwrite: Czy nadpisać istniejące wartości (domyślnie tylko puste)
+        
+        Returns:
+            Liczba zaktualizowanych wierszy
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            query = """
+                SELECT s.id, s.ticker, a.run_day
+                FROM stage1_companies s
+                JOIN analysis_runs a ON s.run_id = a.id
+                WHERE a.run_day IS NOT NULL
+            """
+            if not overwrite:
+                query += " AND s.stochastic_1m IS NULL AND s.stochastic_1w IS NULL"
+            rows = pd.read_sql(query, conn)
+            if rows.empty:
+                logger.info("Brak wierszy stage1_companies do uzupełnienia")
+                return 0
+            
+            rows['as_of'] = pd.to_datetime(rows['run_day']) - timedelta(days=1)
+            values = self.values_as_of(rows)
+            values = values[values['stochastic_1m'].notna() | values['stochastic_1w'].notna()]
+            
+            updates = [
+                (None if pd.isna(stochastic_1m) else float(stochastic_1m),
+                 None if pd.isna(stochastic_1w) else float(stochastic_1w),
+                 bool(passed), int(company_id))
+                for company_id, stochastic_1m, stochastic_1w, passed in zip(
+                    values['id'], values['stochastic_1m'], values['stochastic_1w'], values['stage2_passed']
+                )
+            ]
+            conn.executemany("""
+                UPDATE stage1_companies
+                SET stochastic_1m = ?, stochastic_1w = ?, stage2_passed = ?
+                WHERE id = ?
+            """, updates)
+            conn.commit()
+        
+        logger.info(f"Uzupełniono wartości Etapu 2 dla {len(updates)} z {len(rows)} wierszy stage1_companies")
+        return len(updates)
+    
+    def _replay_ticker(self, bars: pd.DataFrame) -> pd.DataFrame:
+        """Oblicza %D 1M i 1W na koniec każdego dnia notowań jednej spółki"""
+        day_numbers = bars['day_number'].to_numpy()
+        high = bars['high'].to_numpy(dtype=float)
+        low = bars['low'].to_numpy(dtype=float)
+        close = bars['close'].to_numpy(dtype=float)
+        
+        values = pd.DataFrame({'day_number': day_numbers})
+        for name, (freq, window_days, min_bars) in TIMEFRAMES.items():
+            values[f'stochastic_{name.lower()}'] = point_in_time_stochastic(
+                day_numbers, high, low, close, freq, window_days, min_bars
+            )
+        return values
+    
+    def _stage2_passed(self, stochastic_1m: pd.Series, stochastic_1w: pd.Series) -> pd.Series:
+        """Warunek Etapu 2: przynajmniej jeden %D poniżej progu"""
+        return (stochastic_1m.fillna(100) < self.threshold) | (stochastic_1w.fillna(100) < self.threshold)
@@ -4,75 +4,108 @@ Moduł do zarządzania danymi historycznymi spółek
 """
 
 import sqlite3
+from concurrent.futures import Future, ThreadPoolExecutor
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import logging
 import yfinance as yf
 try:
     from .timezone_utils import get_utc_now, get_local_now, utc_to_local, local_to_utc, ensure_utc, ensure_local, format_datetime_for_display
+    from .schema_migrations import apply_migrations
+    from .indicators import stochastic_oscillator
+    from .price_validation import split_valid_rows, rejected_rows, describe_reasons
+    from .market_calendar import get_calendar_for_ticker
+    from .yahoo_guard import SymbolGuard, CircuitOpenError
+    from .http_session import get_yahoo_session
 except ImportError:
     from timezone_utils import get_utc_now, get_local_now, utc_to_local, local_to_utc, ensure_utc, ensure_local, format_datetime_for_display
+    from schema_migrations import apply_migrations
+    from indicators import stochastic_oscillator
+    from price_validation import split_valid_rows, rejected_rows, describe_reasons
+    from market_calendar import get_calendar_for_ticker
+    from yahoo_guard import SymbolGuard, CircuitOpenError
+    from http_session import get_yahoo_session
 
 # Konfiguracja logowania
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Przy aktualizacji pobierane jest też OVERLAP_DAYS dni już zapisanych - porównanie
+# zamknięć w tym oknie wykrywa ponowne skorygowanie historii (split, dywidenda)
+OVERLAP_DAYS = 14
+DRIFT_TOLERANCE = 1e-4  # względna różnica zamknięć uznawana za korektę
+DRIFT_CONSISTENCY = 1e-3  # maksymalny rozrzut współczynników w oknie
+
+# Daty notowań są zapisywane jako numer dnia od 1970-01-01 (INTEGER zamiast tekstu ISO)
+EPOCH_DATE = date(1970, 1, 1)
+
+def date_to_day_number(value) -> int:
+    """Zamienia datę na numer dnia od 1970-01-01"""
+    if isinstance(value, datetime):
+        value = value.date()
+    return (value - EPOCH_DATE).days
+
+def day_number_to_date(day_number: int) -> date:
+    """Zamienia numer dnia od 1970-01-01 na datę"""
+    return EPOCH_DATE + timedelta(days=int(day_number))
+
+def resample_bars(daily_data: pd.DataFrame, rule: str) -> pd.DataFrame:
+    """
+    Agreguje notowania dzienne do świec wyższego interwału
+    
+    Args:
+        daily_data: Notowania dzienne (open, high, low, close, volume)
+        rule: Reguła pandas ('W-SUN' - tygodnie do niedzieli, 'M' - miesiące)
+    """
+    return daily_data.resample(rule).agg({
+        'open': 'first',
+        'high': 'max',
+        'low': 'min',
+        'close': 'last',
+        'volume': 'sum'
+    }).dropna()
+
 class StockDataManager:
     """
     Klasa do zarządzania danymi historycznymi spółek
+    
+    Notowania są w tabeli WITHOUT ROWID z kluczem (ticker_id, timeframe, day_number),
+    symbole w słowniku tickers - wiersz nie powtarza tekstu tickera ani daty.
     """
     
     def __init__(self, db_path: str = 'data/analizator_growth.db'):
         self.db_path = db_path
         self.init_database()
+        self.guard = SymbolGuard(db_path)  # Negatywny cache, aliasy i wyłącznik zapytań do Yahoo
     
     def init_database(self):
-        """Inicjalizuje tabelę stock_prices"""
+        """Inicjalizuje tabele tickers i stock_prices (migracje schematu)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Utwórz tabelę stock_prices
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS stock_prices (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        ticker TEXT NOT NULL,
-                        date DATE NOT NULL,
-                        timeframe TEXT NOT NULL,
-                        open REAL,
-                        high REAL,
-                        low REAL,
-                        close REAL,
-                        volume INTEGER,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        UNIQUE(ticker, date, timeframe)
-                    )
-                """)
-                
-                # Utwórz indeksy
-                cursor.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_stock_prices_ticker_date 
-                    ON stock_prices(ticker, date, timeframe)
-                """)
-                
-                cursor.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_stock_prices_date 
-                    ON stock_prices(date)
-                """)
-                
-                conn.commit()
-                logger.info("Tabela stock_prices zainicjalizowana pomyślnie")
-                
+            apply_migrations(self.db_path)
         except Exception as e:
             logger.error(f"Błąd podczas inicjalizacji tabeli stock_prices: {e}")
             raise
     
+    def _get_ticker_id(self, cursor, ticker: str, create: bool = False) -> Optional[int]:
+        """
+        Zwraca ID tickera ze słownika tickers
+        
+        Args:
+            cursor: Kursor bazy danych
+            ticker: Symbol spółki
+            create: Czy dodać ticker jeśli nie istnieje
+        """
+        if create:
+            cursor.execute("INSERT OR IGNORE INTO tickers (symbol) VALUES (?)", (ticker,))
+        cursor.execute("SELECT id FROM tickers WHERE symbol = ?", (ticker,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
     def get_last_date(self, ticker: str, timeframe: str) -> Optional[datetime]:
         """
-        Pobiera ostatnią datę dla danego tickera i timeframe
+        Pobiera ostatnią datę dla danego tickera i timeframe (z price_freshness)
         
         Args:
             ticker: Symbol spółki
@@ -85,22 +118,123 @@ class StockDataManager:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
-                    SELECT MAX(date) FROM stock_prices 
-                    WHERE ticker = ? AND timeframe = ?
+                    SELECT f.last_day FROM price_freshness f
+                    JOIN tickers t ON t.id = f.ticker_id
+                    WHERE t.symbol = ? AND f.timeframe = ?
                 """, (ticker, timeframe))
                 
                 result = cursor.fetchone()
-                if result and result[0]:
-                    return datetime.strptime(result[0], '%Y-%m-%d').date()
+                if result and result[0] is not None:
+                    return day_number_to_date(result[0])
                 return None
                 
         except Exception as e:
             logger.error(f"Błąd podczas pobierania ostatniej daty dla {ticker}: {e}")
             return None
     
+    def get_freshness(self, tickers: Optional[List[str]] = None, timeframe: str = '1D') -> Dict[str, dict]:
+        """
+        Pobiera stan notowań spółek jednym zapytaniem
+        
+        Args:
+            tickers: Lista symboli (None = wszystkie zapisane)
+            timeframe: '1D' lub '1W'
+        
+        Returns:
+            Słownik ticker -> {first_date, last_date, bar_count, last_fetch_at, last_error}
+        """
+        query = """
+            SELECT t.symbol, f.first_day, f.last_day, f.bar_count, f.last_fetch_at, f.last_error
+            FROM price_freshness f
+            JOIN tickers t ON t.id = f.ticker_id
+            WHERE f.timeframe = ?
+        """
+        params = [timeframe]
+        if tickers is not None:
+            if not tickers:
+                return {}
+            query += f" AND t.symbol IN ({','.join('?' * len(tickers))})"
+            params.extend(tickers)
+        
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                return {
+                    ticker: {
+                        'first_date': day_number_to_date(first_day) if first_day is not None else None,
+                        'last_date': day_number_to_date(last_day) if last_day is not None else None,
+                        'bar_count': bar_count,
+                        'last_fetch_at': last_fetch_at,
+                        'last_error': last_error
+                    }
+                    for ticker, first_day, last_day, bar_count, last_fetch_at, last_error in conn.execute(query, params)
+                }
+        except Exception as e:
+            logger.error(f"Błąd podczas pobierania stanu notowań: {e}")
+            return {}
+    
+    def plan_updates(self, tickers: List[str], now: Optional[datetime] = None,
+                     freshness: Optional[Dict[str, dict]] = None) -> Dict[str, List[str]]:
+        """
+        Planuje pobieranie notowań na podstawie jednego odczytu price_freshness
+        
+        Najpierw spółki z najstarszym ostatnim notowaniem, na końcu nigdy
+        niepobrane (pełna historia, najdłuższe pobranie); spółki z zapisaną
+        ostatnią zakończoną sesją są pomijane.
+        
+        Args:
+            tickers: Lista symboli
+            now: Moment odniesienia dla kalendarza (domyślnie teraz)
+            freshness: Wynik get_freshness, jeśli już odczytany
+        
+        Returns:
+            Słownik {'fetch': [tickery w kolejności], 'skip': [tickery aktualne]}
+        """
+        if freshness is None:
+            freshness = self.get_freshness(tickers)
+        stale, never_fetched, skip = [], [], []
+        for ticker in dict.fromkeys(tickers):
+            last_date = freshness.get(ticker, {}).get('last_date')
+            if last_date is None:
+                never_fetched.append(ticker)
+                continue
+            calendar = get_calendar_for_ticker(ticker)
+            if calendar and last_date >= calendar.last_completed_session(now):
+                skip.append(ticker)
+            else:
+                stale.append((last_date, ticker))
+        return {'fetch': [ticker for _, ticker in sorted(stale)] + never_fetched, 'skip': skip}
+    
+    def _update_freshness(self, cursor, ticker_id: int, timeframe: str, fetched: bool = True):
+        """Przelicza wiersz price_freshness z notowań spółki (zakres klucza głównego)"""
+        cursor.execute("""
+            INSERT INTO price_freshness (ticker_id, timeframe, first_day, last_day, bar_count, last_fetch_at, last_error)
+            SELECT :ticker_id, :timeframe, MIN(day_number), MAX(day_number), COUNT(*), :fetched_at, NULL
+            FROM stock_prices WHERE ticker_id = :ticker_id AND timeframe = :timeframe
+            ON CONFLICT (ticker_id, timeframe) DO UPDATE SET
+                first_day = excluded.first_day, last_day = excluded.last_day, bar_count = excluded.bar_count,
+                last_fetch_at = COALESCE(excluded.last_fetch_at, last_fetch_at),
+                last_error = CASE WHEN excluded.last_fetch_at IS NULL THEN last_error END
+        """, {'ticker_id': ticker_id, 'timeframe': timeframe, 'fetched_at': get_utc_now() if fetched else None})
+    
+    def _record_fetch_error(self, ticker: str, timeframe: str, error: str):
+        """Zapisuje błąd ostatniej próby pobrania w price_freshness"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                ticker_id = self._get_ticker_id(cursor, ticker, create=True)
+                cursor.execute("""
+                    INSERT INTO price_freshness (ticker_id, timeframe, last_error) VALUES (?, ?, ?)
+                    ON CONFLICT (ticker_id, timeframe) DO UPDATE SET last_error = excluded.last_error
+                """, (ticker_id, timeframe, error))
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Błąd podczas zapisu stanu pobierania dla {ticker}: {e}")
+    
     def fetch_daily_data(self, ticker: str, start_date: Optional[datetime] = None) -> Optional[pd.DataFrame]:
         """
-        Pobiera dane dzienne z Yahoo Finance (5 lat historii)
+        Pobiera dane dzienne z Yahoo Finance (5 lat historii lub od start_date)
+        
+        Dane zawierają kolumny Dividends i Stock Splits (zdarzenia korporacyjne).
         
         Args:
             ticker: Symbol spółki
@@ -108,16 +242,23 @@ class StockDataManager:
             
         Returns:
             DataFrame z danymi dziennymi lub None jeśli błąd
+        
+        Raises:
+            CircuitOpenError: Gdy zapytania do Yahoo są wstrzymane przez wyłącznik
         """
         try:
             logger.info(f"Pobieram dane dzienne dla {ticker}")
             
-            stock = yf.Ticker(ticker)
+            def history(symbol):
+                stock = yf.Ticker(symbol, session=get_yahoo_session())
+                # Przy aktualizacji pobierz tylko brakujący zakres, inaczej 5 lat
+                if start_date:
+                    return stock.history(start=start_date.isoformat(), actions=True)
+                return stock.history(period='5y', actions=True)
             
-            # Pobierz 5 lat danych dziennych
-            data = stock.history(period='5y')
+            data = self.guard.fetch(ticker, history)
             
-            if data.empty:
+            if data is None or data.empty:
                 logger.warning(f"Brak danych dziennych dla {ticker}")
                 return None
             
@@ -131,47 +272,151 @@ class StockDataManager:
             
             return data
             
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Błąd podczas pobierania danych dziennych dla {ticker}: {e}")
             return None
     
-    def save_data(self, ticker: str, data: pd.DataFrame, timeframe: str):
+    def save_data(self, ticker: str, data: pd.DataFrame, timeframe: str, source: str = 'stock_data_manager'):
         """
         Zapisuje dane do bazy danych
         
+        Notowania są walidowane (price_validation.validate_ohlc); wiersze łamiące
+        niezmienniki OHLC trafiają tylko do price_quarantine, pozostałe do stock_prices -
+        jeden zły dzień nie blokuje zapisu reszty historii. Notowania oznaczone
+        heurystycznie (skok wolumenu, powtórzenie) są zapisywane i dodatkowo
+        odnotowane w price_quarantine.
+        
         Args:
             ticker: Symbol spółki
             data: DataFrame z danymi
             timeframe: '1D' lub '1W'
+            source: Źródło danych zapisywane przy notowaniach w kwarantannie
+        
+        Returns:
+            Liczba notowań odrzuconych (niezapisanych w stock_prices)
         """
         try:
+            clean, quarantined = split_valid_rows(data)
+            rejected = rejected_rows(quarantined)
+            
+            rows = [
+                (day_number, open_, high, low, close, int(volume) if not pd.isna(volume) else None)
+                for day_number, open_, high, low, close, volume in zip(
+                    self._day_numbers(clean).tolist(), clean['Open'].tolist(), clean['High'].tolist(),
+                    clean['Low'].tolist(), clean['Close'].tolist(), clean['Volume'].tolist()
+                )
+            ]
+            
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
+                ticker_id = self._get_ticker_id(cursor, ticker, create=True)
                 
-                for date, row in data.iterrows():
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO stock_prices 
-                        (ticker, date, timeframe, open, high, low, close, volume, updated_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        ticker,
-                        date.strftime('%Y-%m-%d'),
-                        timeframe,
-                        row['Open'],
-                        row['High'],
-                        row['Low'],
-                        row['Close'],
-                        int(row['Volume']) if not pd.isna(row['Volume']) else None,
-                        get_utc_now().strftime('%Y-%m-%d %H:%M:%S')
-                    ))
+                cursor.executemany("""
+                    INSERT OR REPLACE INTO stock_prices 
+                    (ticker_id, timeframe, day_number, open, high, low, close, volume)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, [(ticker_id, timeframe) + row for row in rows])
+                
+                # Poprawne notowanie zastępuje wcześniej odrzucone z tego samego dnia
+                cursor.executemany("""
+                    DELETE FROM price_quarantine
+                    WHERE ticker_id = ? AND timeframe = ? AND day_number = ?
+                """, [(ticker_id, timeframe, row[0]) for row in rows])
                 
+                if not quarantined.empty:
+                    self._quarantine_rows(cursor, ticker_id, timeframe, quarantined, source)
+                
+                self._update_freshness(cursor, ticker_id, timeframe)
                 conn.commit()
-                logger.info(f"Zapisano {len(data)} rekordów dla {ticker} ({timeframe})")
+                logger.info(f"Zapisano {len(rows)} rekordów dla {ticker} ({timeframe})")
+            
+            if not quarantined.empty:
+                reasons = sorted({name for mask in quarantined['reasons'] for name in describe_reasons(mask)})
+                logger.warning(f"{ticker} ({timeframe}): {len(quarantined)} notowań w kwarantannie, "
+                               f"odrzucono {len(rejected)} ({', '.join(reasons)})")
+            return len(rejected)
                 
         except Exception as e:
             logger.error(f"Błąd podczas zapisywania danych dla {ticker}: {e}")
             raise
     
+    def quarantine_data(self, ticker: str, rejected: pd.DataFrame, timeframe: str, source: str):
+        """
+        Zapisuje odrzucone notowania (z kolumną reasons) w price_quarantine
+        
+        Args:
+            ticker: Symbol spółki
+            rejected: Notowania odrzucone przez price_validation.split_valid_rows
+            timeframe: '1D' lub '1W'
+            source: Źródło danych (np. 'yahoo_finance_analyzer')
+        """
+        if rejected.empty:
+            return
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                ticker_id = self._get_ticker_id(cursor, ticker, create=True)
+                self._quarantine_rows(cursor, ticker_id, timeframe, rejected, source)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Błąd podczas zapisu kwarantanny dla {ticker}: {e}")
+    
+    def get_quarantine(self, ticker: Optional[str] = None) -> pd.DataFrame:
+        """
+        Pobiera notowania z kwarantanny
+        
+        Args:
+            ticker: Symbol spółki (None = wszystkie)
+        
+        Returns:
+            DataFrame: ticker, timeframe, date, open, high, low, close, volume, reasons, source, quarantined_at
+        """
+        query = """
+            SELECT t.symbol AS ticker, q.timeframe, q.day_number, q.open, q.high, q.low, q.close,
+                   q.volume, q.reasons, q.source, q.quarantined_at
+            FROM price_quarantine q
+            JOIN tickers t ON t.id = q.ticker_id
+        """
+        params = []
+        if ticker is not None:
+            query += " WHERE t.symbol = ?"
+            params.append(ticker)
+        query += " ORDER BY t.symbol, q.timeframe, q.day_number"
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                df = pd.read_sql_query(query, conn, params=params)
+            df.insert(2, 'date', [day_number_to_date(day) for day in df.pop('day_number')])
+            return df
+        except Exception as e:
+            logger.error(f"Błąd podczas pobierania kwarantanny: {e}")
+            return pd.DataFrame()
+    
+    def _day_numbers(self, data: pd.DataFrame) -> pd.Index:
+        """Numer dnia z lokalnej daty notowania (bez strefy czasowej giełdy)"""
+        index = pd.DatetimeIndex(data.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        return (index.normalize() - pd.Timestamp(EPOCH_DATE)).days
+    
+    def _quarantine_rows(self, cursor, ticker_id: int, timeframe: str, rejected: pd.DataFrame, source: str):
+        """Zapisuje odrzucone notowania w price_quarantine (kursor w otwartej transakcji)"""
+        quarantined_at = get_utc_now()
+        cursor.executemany("""
+            INSERT OR REPLACE INTO price_quarantine
+            (ticker_id, timeframe, day_number, open, high, low, close, volume, reasons, source, quarantined_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (ticker_id, timeframe, day_number, open_, high, low, close,
+             None if pd.isna(volume) else volume, int(reasons), source, quarantined_at)
+            for day_number, open_, high, low, close, volume, reasons in zip(
+                self._day_numbers(rejected).tolist(), rejected['Open'].tolist(), rejected['High'].tolist(),
+                rejected['Low'].tolist(), rejected['Close'].tolist(), rejected['Volume'].tolist(),
+                rejected['reasons'].tolist()
+            )
+        ])
+    
     def cleanup_old_data(self, keep_days: int = 1825):
         """
         Usuwa stare dane, zachowując tylko ostatnie keep_days (5 lat = 1825 dni)
@@ -188,10 +433,22 @@ class StockDataManager:
                 
                 cursor.execute("""
                     DELETE FROM stock_prices 
-                    WHERE date < ?
-                """, (cutoff_date.strftime('%Y-%m-%d'),))
+                    WHERE day_number < ?
+                """, (date_to_day_number(cutoff_date),))
                 
                 deleted_count = cursor.rowcount
+                
+                # Przelicz stan notowań spółek, którym usunięto najstarsze notowania
+                cursor.execute("""
+                    UPDATE price_freshness SET
+                        first_day = (SELECT MIN(p.day_number) FROM stock_prices p
+                                     WHERE p.ticker_id = price_freshness.ticker_id AND p.timeframe = price_freshness.timeframe),
+                        last_day = (SELECT MAX(p.day_number) FROM stock_prices p
+                                    WHERE p.ticker_id = price_freshness.ticker_id AND p.timeframe = price_freshness.timeframe),
+                        bar_count = (SELECT COUNT(*) FROM stock_prices p
+                                     WHERE p.ticker_id = price_freshness.ticker_id AND p.timeframe = price_freshness.timeframe)
+                    WHERE first_day < ?
+                """, (date_to_day_number(cutoff_date),))
                 conn.commit()
                 
                 if deleted_count > 0:
@@ -219,15 +476,7 @@ class StockDataManager:
                 return pd.DataFrame()
             
             # Agreguj do tygodniowych (niedziela jako koniec tygodnia)
-            weekly_data = daily_data.resample('W-SUN').agg({
-                'open': 'first',
-                'high': 'max',
-                'low': 'min',
-                'close': 'last',
-                'volume': 'sum'
-            }).dropna()
-            
-            return weekly_data
+            return resample_bars(daily_data, 'W-SUN')
             
         except Exception as e:
             logger.error(f"Błąd podczas agregacji danych tygodniowych dla {ticker}: {e}")
@@ -252,15 +501,7 @@ class StockDataManager:
                 return pd.DataFrame()
             
             # Agreguj do miesięcznych (ostatni dzień miesiąca)
-            monthly_data = daily_data.resample('ME').agg({
-                'open': 'first',
-                'high': 'max',
-                'low': 'min',
-                'close': 'last',
-                'volume': 'sum'
-            }).dropna()
-            
-            return monthly_data
+            return resample_bars(daily_data, 'M')
             
         except Exception as e:
             logger.error(f"Błąd podczas agregacji danych miesięcznych dla {ticker}: {e}")
@@ -281,17 +522,18 @@ class StockDataManager:
         try:
             with sqlite3.connect(self.db_path) as conn:
                 query = """
-                    SELECT date, open, high, low, close, volume
-                    FROM stock_prices 
-                    WHERE ticker = ? AND timeframe = ?
-                    ORDER BY date DESC
+                    SELECT p.day_number, p.open, p.high, p.low, p.close, p.volume
+                    FROM stock_prices p
+                    JOIN tickers t ON t.id = p.ticker_id
+                    WHERE t.symbol = ? AND p.timeframe = ?
+                    ORDER BY p.day_number DESC
                     LIMIT ?
                 """
                 
                 df = pd.read_sql(query, conn, params=[ticker, timeframe, limit])
                 
                 if not df.empty:
-                    df['date'] = pd.to_datetime(df['date'])
+                    df['date'] = pd.to_datetime(df.pop('day_number'), unit='D')
                     df.set_index('date', inplace=True)
                     df.sort_index(inplace=True)  # Sortuj chronologicznie
                 
@@ -301,62 +543,285 @@ class StockDataManager:
             logger.error(f"Błąd podczas pobierania danych dla {ticker}: {e}")
             return pd.DataFrame()
     
-    def update_stock_data(self, ticker: str):
+    def update_stock_data(self, ticker: str, now: Optional[datetime] = None) -> str:
         """
         Inteligentnie aktualizuje dane dzienne dla danego tickera
         
+        Przed pobraniem sprawdza kalendarz giełdy: gdy ostatnie zapisane
+        notowanie to ostatnia zakończona sesja, ticker jest pomijany bez
+        zapytania do Yahoo. Świeca trwającej sesji nie jest zapisywana.
+        
+        Pobiera nowe notowania razem z oknem OVERLAP_DAYS już zapisanych dni;
+        jeśli Yahoo skorygowało historię (split, dywidenda), zapisana historia
+        jest przeskalowana w bazie zamiast ponownego pobierania 5 lat.
+        
         Args:
             ticker: Symbol spółki
+            now: Moment odniesienia dla kalendarza (domyślnie teraz)
+        
+        Returns:
+            'skipped', 'updated', 'no_data', 'failed' lub 'circuit_open' (wyłącznik wstrzymał zapytania)
+        """
+        return self._update_ticker(ticker, self.get_last_date(ticker, '1D'), now)
+    
+    def _update_ticker(self, ticker: str, last_date: Optional[date], now: Optional[datetime] = None,
+                       prefetched: Optional[Future] = None) -> str:
+        """
+        Aktualizacja notowań spółki przy znanej ostatniej zapisanej dacie (jak update_stock_data)
+        
+        prefetched - wynik fetch_daily_data(ticker, _fetch_start(last_date)) pobrany równolegle
         """
         try:
-            # Sprawdź ostatnią datę w bazie
-            last_date = self.get_last_date(ticker, '1D')
+            calendar = get_calendar_for_ticker(ticker)
+            last_session = calendar.last_completed_session(now) if calendar else None
+            
+            if last_date and last_session and last_date >= last_session:
+                logger.info(f"Pomijam {ticker} - brak nowej sesji od {last_date}")
+                return 'skipped'
             
             # Pobierz nowe dane
+            start_date = self._fetch_start(last_date)
             if last_date:
-                start_date = last_date + timedelta(days=1)
-                logger.info(f"Aktualizuję dane dzienne dla {ticker} od {start_date}")
+                logger.info(f"Aktualizuję dane dzienne dla {ticker} od {start_date} (z oknem porównania)")
             else:
-                start_date = None
                 logger.info(f"Pobieram pełną historię dzienną dla {ticker}")
             
-            data = self.fetch_daily_data(ticker, start_date)
+            data = prefetched.result() if prefetched is not None else self.fetch_daily_data(ticker, start_date)
+            
+            # Świeca trwającej sesji zmieni się do zamknięcia - nie zapisuj jej
+            if data is not None and last_session:
+                data = data[data.index.date <= last_session]
             
             if data is not None and not data.empty:
+                if not self.apply_corporate_actions(ticker, data, last_date):
+                    # Korekta niejednolita w oknie - pobierz całą historię od nowa
+                    data = self.fetch_daily_data(ticker)
+                    if data is None or data.empty:
+                        logger.warning(f"Brak danych dziennych dla {ticker}")
+                        self._record_fetch_error(ticker, '1D', 'Brak danych')
+                        return 'no_data'
+                    if last_session:
+                        data = data[data.index.date <= last_session]
+                    self.delete_price_history(ticker, '1D')
+                    self.apply_corporate_actions(ticker, data)
+                
                 # Zapisz nowe dane
                 self.save_data(ticker, data, '1D')
                 
                 logger.info(f"Dane dzienne dla {ticker} zaktualizowane pomyślnie")
+                return 'updated'
             else:
                 logger.warning(f"Brak nowych danych dziennych dla {ticker}")
+                self._record_fetch_error(ticker, '1D', 'Brak danych')
+                return 'no_data'
                 
+        except CircuitOpenError as e:
+            logger.warning(f"Pomijam {ticker}: {e}")
+            return 'circuit_open'
         except Exception as e:
             logger.error(f"Błąd podczas aktualizacji danych dla {ticker}: {e}")
+            self._record_fetch_error(ticker, '1D', str(e))
+            return 'failed'
+    
+    @staticmethod
+    def _fetch_start(last_date: Optional[date]) -> Optional[date]:
+        """Początek pobierania: ostatnia zapisana data minus okno porównania (None - pełna historia)"""
+        return last_date - timedelta(days=OVERLAP_DAYS) if last_date else None
+    
+    def apply_corporate_actions(self, ticker: str, data: pd.DataFrame, last_date: Optional[date] = None) -> bool:
+        """
+        Zapisuje zdarzenia korporacyjne i koryguje zapisaną historię do nowych danych
+        
+        Zamknięcia z okna porównania (dni przed last_date i przed pierwszym
+        zdarzeniem w pobranych danych) są dzielone przez zapisane. Jednolity
+        współczynnik różny od 1 oznacza, że Yahoo skorygowało historię - zapisane
+        notowania sprzed okna są mnożone przez ten współczynnik jednym UPDATE,
+        a wartości wskaźników spółki unieważniane.
+        
+        Args:
+            ticker: Symbol spółki
+            data: Pobrane notowania (z kolumnami Dividends i Stock Splits)
+            last_date: Ostatnia zapisana data (None - pełna historia, bez porównania)
+        
+        Returns:
+            False gdy współczynniki w oknie są niejednolite (potrzebne pełne pobranie)
+        """
+        day_numbers = np.asarray(self._day_numbers(data))
+        dividends = data['Dividends'].to_numpy(dtype=float) if 'Dividends' in data.columns else np.zeros(len(data))
+        splits = data['Stock Splits'].to_numpy(dtype=float) if 'Stock Splits' in data.columns else np.zeros(len(data))
+        has_action = (dividends != 0) | (splits != 0)
+        
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            ticker_id = self._get_ticker_id(cursor, ticker, create=True)
+            
+            cursor.executemany("""
+                INSERT OR REPLACE INTO corporate_actions (ticker_id, day_number, dividend, split_ratio)
+                VALUES (?, ?, ?, ?)
+            """, [
+                (ticker_id, int(day), float(dividend), float(split) if split else None)
+                for day, dividend, split in zip(day_numbers[has_action], dividends[has_action], splits[has_action])
+            ])
+            
+            if last_date is not None:
+                # Porównuj tylko dni sprzed pierwszego zdarzenia i sprzed ostatniego
+                # zapisanego dnia (mógł być zapisany w trakcie sesji)
+                compare_until = date_to_day_number(last_date)
+                if has_action.any():
+                    compare_until = min(compare_until, int(day_numbers[has_action].min()))
+                window = day_numbers < compare_until
+                
+                if window.any():
+                    fetched = pd.DataFrame({
+                        'close': data['Close'].to_numpy(dtype=float)[window],
+                        'volume': data['Volume'].to_numpy(dtype=float)[window]
+                    }, index=day_numbers[window])
+                    cursor.execute("""
+                        SELECT day_number, close, volume FROM stock_prices
+                        WHERE ticker_id = ? AND timeframe = '1D' AND day_number BETWEEN ? AND ?
+                    """, (ticker_id, int(fetched.index.min()), int(fetched.index.max())))
+                    stored = pd.DataFrame(cursor.fetchall(), columns=['day_number', 'close', 'volume']).set_index('day_number')
+                    overlap = fetched.join(stored, rsuffix='_stored', how='inner')
+                    overlap = overlap[(overlap['close'] > 0) & (overlap['close_stored'] > 0)]
+                    
+                    if not overlap.empty:
+                        ratios = (overlap['close'] / overlap['close_stored']).to_numpy()
+                        price_factor = float(np.median(ratios))
+                        if np.abs(ratios / price_factor - 1).max() > DRIFT_CONSISTENCY:
+                            logger.warning(f"{ticker}: niejednolita korekta cen w oknie porównania - pełne pobranie historii")
+                            conn.commit()
+                            return False
+                        
+                        if abs(price_factor - 1) > DRIFT_TOLERANCE:
+                            # Wolumen korygowany tylko przy splicie (dywidenda go nie zmienia)
+                            volume_factor = 1.0
+                            volumes = overlap[(overlap['volume'] > 0) & (overlap['volume_stored'] > 0)]
+                            if splits.any() and not volumes.empty:
+                                volume_factor = float(np.median(volumes['volume'] / volumes['volume_stored']))
+                            self._rescale_history(cursor, ticker_id, int(day_numbers.min()), price_factor, volume_factor)
+                            logger.info(f"{ticker}: przeskalowano zapisaną historię (ceny × {price_factor:.6f}, "
+                                        f"wolumen × {volume_factor:.6f})")
+            
+            conn.commit()
+        return True
+    
+    def delete_price_history(self, ticker: str, timeframe: str):
+        """Usuwa zapisane notowania i wartości wskaźników spółki (przed pełnym pobraniem)"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            ticker_id = self._get_ticker_id(cursor, ticker)
+            if ticker_id is None:
+                return
+            cursor.execute("DELETE FROM stock_prices WHERE ticker_id = ? AND timeframe = ?", (ticker_id, timeframe))
+            cursor.execute("DELETE FROM indicator_values WHERE ticker_id = ?", (ticker_id,))
+            self._update_freshness(cursor, ticker_id, timeframe, fetched=False)
+            conn.commit()
+    
+    def get_corporate_actions(self, ticker: str) -> pd.DataFrame:
+        """
+        Pobiera zapisane zdarzenia korporacyjne spółki
+        
+        Returns:
+            DataFrame z indeksem daty i kolumnami dividend, split_ratio
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                df = pd.read_sql_query("""
+                    SELECT a.day_number, a.dividend, a.split_ratio FROM corporate_actions a
+                    JOIN tickers t ON t.id = a.ticker_id
+                    WHERE t.symbol = ?
+                    ORDER BY a.day_number
+                """, conn, params=[ticker])
+            df['date'] = pd.to_datetime(df.pop('day_number'), unit='D')
+            return df.set_index('date')
+        except Exception as e:
+            logger.error(f"Błąd podczas pobierania zdarzeń korporacyjnych dla {ticker}: {e}")
+            return pd.DataFrame()
+    
+    def _rescale_history(self, cursor, ticker_id: int, before_day: int, price_factor: float, volume_factor: float):
+        """
+        Mnoży zapisane notowania sprzed before_day przez współczynniki korekty (jeden UPDATE)
+        
+        Unieważnia wartości wskaźników tylko tej spółki - zostaną policzone
+        ponownie przy następnym IndicatorEngine.update.
+        """
+        cursor.execute("""
+            UPDATE stock_prices
+            SET open = open * :price, high = high * :price, low = low * :price, close = close * :price,
+                volume = CAST(ROUND(volume * :volume) AS INTEGER)
+            WHERE ticker_id = :ticker_id AND timeframe = '1D' AND day_number < :before_day
+        """, {'price': price_factor, 'volume': volume_factor, 'ticker_id': ticker_id, 'before_day': before_day})
+        cursor.execute("DELETE FROM indicator_values WHERE ticker_id = ?", (ticker_id,))
     
-    def update_all_stock_data(self, selected_tickers: List[str]):
+    def update_all_stock_data(self, selected_tickers: List[str], timer=None) -> Dict[str, int]:
         """
         Inteligentnie aktualizuje dane dla wszystkich wybranych spółek
         
+        Zapytania do Yahoo są wykonywane równolegle (liczbę równoległych zapytań
+        i ich tempo dobiera kontroler współbieżności), zapis do bazy - po kolei
+        w kolejności planu.
+        
         Args:
             selected_tickers: Lista tickerów spółek które przeszły selekcję
+            timer: Opcjonalny RunTimer - pominięte tickery są zapisywane jako
+                   spany 'db_write.bulk_price_skip' (liczba w podsumowaniu uruchomienia),
+                   czasy zapytań do Yahoo jako 'db_write.yahoo_request'
+        
+        Returns:
+            Liczba tickerów według wyniku (skipped, updated, no_data, failed, circuit_open)
         """
+        counts = {'skipped': 0, 'updated': 0, 'no_data': 0, 'failed': 0, 'circuit_open': 0}
         try:
             logger.info(f"Rozpoczynam inteligentną aktualizację danych dla {len(selected_tickers)} spółek")
             
-            for ticker in selected_tickers:
-                try:
-                    self.update_stock_data(ticker)
-                except Exception as e:
-                    logger.error(f"Błąd podczas aktualizacji {ticker}: {e}")
-                    continue
+            # Jeden odczyt price_freshness: kolejność pobierania i spółki aktualne
+            freshness = self.get_freshness(selected_tickers)
+            plan = self.plan_updates(selected_tickers, freshness=freshness)
+            for ticker in plan['skip']:
+                counts['skipped'] += 1
+                if timer is not None:
+                    timer.record('db_write.bulk_price_skip', 0.0, ticker=ticker)
+            
+            controller = self.guard.controller
+            controller.drain_samples()  # opóźnienia tylko z tej aktualizacji
+            last_dates = {ticker: freshness.get(ticker, {}).get('last_date') for ticker in plan['fetch']}
+            executor = ThreadPoolExecutor(max_workers=controller.max_limit, thread_name_prefix='yahoo')
+            try:
+                prefetched = {ticker: executor.submit(self.fetch_daily_data, ticker, self._fetch_start(last_dates[ticker]))
+                              for ticker in plan['fetch']}
+                for position, ticker in enumerate(plan['fetch']):
+                    try:
+                        status = self._update_ticker(ticker, last_dates[ticker], prefetched=prefetched[ticker])
+                    except Exception as e:
+                        logger.error(f"Błąd podczas aktualizacji {ticker}: {e}")
+                        status = 'failed'
+                    if status == 'circuit_open':
+                        # Yahoo nie odpowiada poprawnie - pozostałe spółki przy kolejnym uruchomieniu
+                        counts['circuit_open'] += len(plan['fetch']) - position
+                        logger.warning(f"Przerywam aktualizację - wyłącznik zapytań otwarty, "
+                                       f"pozostało {counts['circuit_open']} spółek")
+                        break
+                    counts[status] += 1
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+            
+            if timer is not None:
+                for sample in controller.drain_samples():
+                    timer.record('db_write.yahoo_request', sample['latency'] * 1000)
+            metrics = controller.metrics()
+            logger.info(f"Współbieżność Yahoo po aktualizacji: {metrics['limit']} równoległych, "
+                        f"{metrics['rate']} zapytań/s, p95 {metrics['latency_p95_ms']} ms")
             
             # Wyczyść stare dane (starsze niż 5 lat)
             self.cleanup_old_data()
             
-            logger.info("Inteligentna aktualizacja danych zakończona")
+            logger.info(f"Inteligentna aktualizacja danych zakończona: pobrano {counts['updated']}, "
+                        f"pominięto {counts['skipped']} (brak nowej sesji), bez danych {counts['no_data']}, "
+                        f"błędy {counts['failed']}, wstrzymane {counts['circuit_open']}")
             
         except Exception as e:
             logger.error(f"Błąd podczas aktualizacji wszystkich danych: {e}")
+        return counts
     
     def calculate_stochastic_oscillator(self, data: pd.DataFrame, 
                                       k_period: int = 36, 
@@ -385,23 +850,8 @@ class StockDataManager:
                 logger.warning(f"Za mało danych dla obliczenia Stochastic: {len(data)} < {k_period + smoothing + d_period}")
                 return pd.Series(), pd.Series()
             
-            # Oblicz %K
-            lowest_low = data['low'].rolling(window=k_period).min()
-            highest_high = data['high'].rolling(window=k_period).max()
-            
-            # Unikaj dzielenia przez zero
-            denominator = highest_high - lowest_low
-            denominator = denominator.replace(0, np.nan)
-            
-            k_raw = 100 * ((data['close'] - lowest_low) / denominator)
-            
-            # Wygładź %K
-            k_smoothed = k_raw.rolling(window=smoothing).mean()
-            
-            # Oblicz %D (SMA z %K)
-            d_smoothed = k_smoothed.rolling(window=d_period).mean()
-            
-            return k_smoothed, d_smoothed
+            return stochastic_oscillator(data['high'], data['low'], data['close'],
+                                         k_period, d_period, smoothing)
             
         except Exception as e:
             logger.error(f"Błąd podczas obliczania Stochastic Oscillator: {e}")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Skrypt testowy dla schematu stock_prices (WITHOUT ROWID, numer dnia, słownik tickerów)
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import pandas as pd
+from datetime import date
+
+# Dodaj ścieżkę do modułów
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from stock_data_manager import StockDataManager, date_to_day_number
+
+def test_save_and_read():
+    """
+    Testuje zapis notowań z Yahoo Finance (indeks ze strefą czasową) i odczyt
+    """
+    print("=== TEST ZAPISU I ODCZYTU ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = StockDataManager(os.path.join(tmp_dir, 'test.db'))
+        index = pd.date_range('2025-01-06', periods=5, freq='B', tz='America/New_York')
+        data = pd.DataFrame({
+            'Open': [1.0, 2.0, 3.0, 4.0, 5.0],
+            'High': [1.5, 2.5, 3.5, 4.5, 5.5],
+            'Low': [0.5, 1.5, 2.5, 3.5, 4.5],
+            'Close': [1.2, 2.2, 3.2, 4.2, 5.2],
+            'Volume': [100, 200, None, 400, 500]
+        }, index=index)
+        
+        manager.save_data('AAPL', data, '1D')
+        manager.save_data('AAPL', data.tail(1), '1D')  # ponowny zapis nadpisuje wiersz
+        
+        df = manager.get_stock_data('AAPL', '1D', limit=10)
+        print(df)
+        assert len(df) == 5
+        assert df.index[0] == pd.Timestamp('2025-01-06')
+        assert list(df['close']) == [1.2, 2.2, 3.2, 4.2, 5.2]
+        assert pd.isna(df['volume'].iloc[2])
+        assert manager.get_last_date('AAPL', '1D') == date(2025, 1, 10)
+        assert manager.get_last_date('MSFT', '1D') is None
+
+def test_legacy_migration():
+    """
+    Testuje migrację ze starego schematu (tekstowy ticker i data)
+    """
+    print("=== TEST MIGRACJI ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'test.db')
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("""
+                CREATE TABLE stock_prices (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    ticker TEXT NOT NULL, date DATE NOT NULL, timeframe TEXT NOT NULL,
+                    open REAL, high REAL, low REAL, close REAL, volume INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(ticker, date, timeframe)
+                )
+            """)
+            conn.execute("CREATE INDEX idx_stock_prices_ticker_date ON stock_prices(ticker, date, timeframe)")
+            conn.executemany("""
+                INSERT INTO stock_prices (ticker, date, timeframe, open, high, low, close, volume)
+                VALUES (?, ?, '1D', 1, 2, 0.5, ?, 10)
+            """, [('AAPL', '2024-02-28', 10.0), ('AAPL', '2024-02-29', 11.0), ('MSFT', '2024-03-01', 20.0)])
+        
+        manager = StockDataManager(db_path)
+        
+        with sqlite3.connect(db_path) as conn:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(stock_prices)")]
+            indexes = [row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'stock_prices'")]
+            day_numbers = [row[0] for row in conn.execute("SELECT day_number FROM stock_prices ORDER BY day_number")]
+        
+        print(f"Kolumny: {columns}, indeksy: {indexes}")
+        assert 'ticker' not in columns and 'day_number' in columns
+        assert indexes == []  # tylko klucz główny tabeli WITHOUT ROWID
+        assert day_numbers == [date_to_day_number(date(2024, 2, 28)), date_to_day_number(date(2024, 2, 29)),
+                               date_to_day_number(date(2024, 3, 1))]
+        assert manager.get_last_date('AAPL', '1D') == date(2024, 2, 29)
+        assert list(manager.get_stock_data('MSFT', '1D')['close']) == [20.0]
+
+if __name__ == "__main__":
+    test_save_and_read()
+    test_legacy_migration()
+    print("✅ Testy stock_prices zakończone")
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Test obciążeniowy widoków Flask na dużej bazie (db_seed)
+
+Aplikacja (app.py) działa w osobnym katalogu roboczym z kopią konfiguracji
+(bez zadań schedulera). Zapytania idą równolegle przez aplikację WSGI (test_client),
+a wynik to percentyle czasów odpowiedzi, przepustowość i liczba zapytań SQL
+na żądanie dla każdej ścieżki.
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import sqlite3
+import platform
+import importlib
+import threading
+import statistics
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import yaml
+import logging
+try:
+    from .timezone_utils import get_utc_now
+except ImportError:
+    from timezone_utils import get_utc_now
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_ROUTES = ['/', '/results', '/results?show_all=true', '/notes', '/history/{ticker}']
+SCHEDULER_JOBS = ['auto_schedule', 'flag_snapshot', 'maintenance']
+
+def prepare_app_workdir(workdir: str, db_source: Optional[str] = None) -> str:
+    """
+    Przygotowuje katalog roboczy aplikacji: kopia config/ z wyłączonymi zadaniami schedulera i katalog data/
+    
+    Args:
+        workdir: Katalog roboczy
+        db_source: Baza kopiowana do data/analizator_growth.db (np. z db_seed)
+    
+    Returns:
+        Ścieżka do bazy aplikacji
+    """
+    config_dir = os.path.join(workdir, 'config')
+    if not os.path.exists(config_dir):
+        # Kopia, nie dowiązanie - scheduler zapisuje swoją konfigurację
+        shutil.copytree(os.path.join(REPO_ROOT, 'config'), config_dir)
+    schedule_path = os.path.join(config_dir, 'auto_schedule.yaml')
+    with open(schedule_path, 'r', encoding='utf-8') as file:
+        schedule = yaml.safe_load(file) or {}
+    for job in SCHEDULER_JOBS:
+        schedule.setdefault(job, {})['enabled'] = False
+    with open(schedule_path, 'w', encoding='utf-8') as file:
+        yaml.dump(schedule, file, default_flow_style=False)
+    
+    os.makedirs(os.path.join(workdir, 'data'), exist_ok=True)
+    db_path = os.path.join(workdir, 'data', 'analizator_growth.db')
+    if db_source:
+        shutil.copyfile(db_source, db_path)
+    return db_path
+
+@contextmanager
+def web_environment(workdir: str):
+    """
+    Importuje app.py w katalogu roboczym (przygotowanym przez prepare_app_workdir) i zwraca aplikację Flask
+    
+    Ścieżki bazy i konfiguracji aplikacji są względne - przez cały czas kontekstu
+    katalogiem bieżącym jest workdir.
+    """
+    previous_cwd = os.getcwd()
+    previous_secret = os.environ.get('FLASK_SECRET_KEY')
+    os.environ.setdefault('FLASK_SECRET_KEY', 'load-test')
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    os.chdir(workdir)
+    try:
+        module = importlib.import_module('app')
+        yield module.app
+    finally:
+        os.chdir(previous_cwd)
+        if previous_secret is None:
+            os.environ.pop('FLASK_SECRET_KEY', None)
+
+class QueryCounter:
+    """
+    Liczy zapytania SQL i połączenia sqlite3 w bieżącym wątku
+    
+    install() podmienia sqlite3.connect na wersję z trace callbackiem -
+    liczone są wszystkie instrukcje wykonane przez połączenia otwarte w trakcie pomiaru.
+    """
+    
+    def __init__(self):
+        self._local = threading.local()
+        self._original_connect = None
+    
+    def install(self):
+        if self._original_connect is not None:
+            return
+        self._original_connect = original = sqlite3.connect
+        counter = self
+        
+        def counting_connect(*args, **kwargs):
+            conn = original(*args, **kwargs)
+            counter._increment('connections')
+            conn.set_trace_callback(lambda statement: counter._increment('queries'))
+            return conn
+        
+        sqlite3.connect = counting_connect
+    
+    def uninstall(self):
+        if self._original_connect is not None:
+            sqlite3.connect = self._original_connect
+            self._original_connect = None
+    
+    def _increment(self, name: str):
+        setattr(self._local, name, getattr(self._local, name, 0) + 1)
+    
+    def reset(self):
+        self._local.queries = 0
+        self._local.connections = 0
+    
+    def count(self) -> Dict[str, int]:
+        return {'queries': getattr(self._local, 'queries', 0),
+                'connections': getattr(self._local, 'connections', 0)}
+
+class _ErrorLogCounter(logging.Handler):
+    """Liczy błędy logowane w bieżącym wątku - widoki zwracają stronę błędu ze statusem 200"""
+    
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self._local = threading.local()
+    
+    def emit(self, record):
+        self._local.errors = getattr(self._local, 'errors', 0) + 1
+    
+    def reset(self):
+        self._local.errors = 0
+    
+    def count(self) -> int:
+        return getattr(self._local, 'errors', 0)
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Percentyl metodą najbliższej pozycji (None dla pustej listy)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+def latest_tickers(db_path: str) -> List[str]:
+    """Spółki z najnowszego uruchomienia - do ścieżek z {ticker}"""
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("""
+            SELECT ticker FROM stage1_companies
+            WHERE run_id = (SELECT MAX(id) FROM analysis_runs)
+            ORDER BY ticker
+        """).fetchall()
+    return [row[0] for row in rows]
+
+def run_load(app, tickers: List[str], routes: List[str] = None, requests_per_route: int = 20,
+             concurrency: int = 8, seed: int = 0) -> dict:
+    """
+    Obciąża kolejno każdą ścieżkę requests_per_route zapytaniami w concurrency wątkach
+    
+    Każda ścieżka jest najpierw wywoływana raz bez pomiaru (rozgrzanie szablonów i cache).
+    
+    Args:
+        app: Aplikacja Flask
+        tickers: Spółki podstawiane za {ticker} w ścieżce (losowo z ziarnem)
+        routes: Ścieżki (domyślnie DEFAULT_ROUTES)
+        requests_per_route: Liczba zapytań na ścieżkę
+        concurrency: Liczba równoległych klientów
+        seed: Ziarno losowania spółek
+    
+    Returns:
+        Wynik w formacie JSON (config, routes, total, environment, created_at);
+        czasy w milisekundach, przepustowość w zapytaniach na sekundę
+    """
+    routes = routes or DEFAULT_ROUTES
+    rng = random.Random(seed)
+    local = threading.local()
+    queries = QueryCounter()
+    errors = _ErrorLogCounter()
+    
+    def client():
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        return local.client
+    
+    def request(path: str) -> dict:
+        queries.reset()
+        errors.reset()
+        start = time.perf_counter()
+        response = client().get(path)
+        response.get_data()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        return {'status': response.status_code, 'ms': elapsed_ms, 'errors': errors.count(), **queries.count()}
+    
+    results = {}
+    root_logger = logging.getLogger()
+    queries.install()
+    root_logger.addHandler(errors)
+    started = time.perf_counter()
+    try:
+        for route in routes:
+            paths = [route.format(ticker=rng.choice(tickers)) if '{ticker}' in route else route
+                     for _ in range(requests_per_route)]
+            request(paths[0])
+            
+            phase_start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                samples = list(executor.map(request, paths))
+            phase_seconds = time.perf_counter() - phase_start
+            
+            latencies = [sample['ms'] for sample in samples]
+            query_counts = [sample['queries'] for sample in samples]
+            results[route] = {
+                'requests': len(samples),
+                'errors': sum(1 for sample in samples if sample['status'] >= 400 or sample['errors']),
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'mean_ms': round(statistics.mean(latencies), 2),
+                'throughput_rps': round(len(samples) / phase_seconds, 2) if phase_seconds else None,
+                'queries_per_request': round(statistics.mean(query_counts), 1),
+                'max_queries': max(query_counts),
+                'connections_per_request': round(statistics.mean(sample['connections'] for sample in samples), 1),
+            }
+            logger.info(f"{route}: p50 {results[route]['p50_ms']} ms, p95 {results[route]['p95_ms']} ms, "
+                        f"{results[route]['queries_per_request']} zapytań SQL na żądanie")
+    finally:
+        root_logger.removeHandler(errors)
+        queries.uninstall()
+    elapsed = time.perf_counter() - started
+    
+    total_requests = sum(route['requests'] for route in results.values())
+    return {
+        'config': {'routes': routes, 'requests_per_route': requests_per_route,
+                   'concurrency': concurrency, 'seed': seed},
+        'routes': results,
+        'total': {'requests': total_requests,
+                  'errors': sum(route['errors'] for route in results.values()),
+                  'seconds': round(elapsed, 3),
+                  'throughput_rps': round(total_requests / elapsed, 2) if elapsed else None},
+        'environment': {'python': platform.python_version(), 'platform': platform.platform()},
+        'created_at': get_utc_now().isoformat(timespec='seconds'),
+    }
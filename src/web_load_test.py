@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Skrypt testowy dla dużej bazy testowej i testu obciążeniowego widoków
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+
+# Dodaj ścieżkę do modułów
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_seed import seed_large_database
+from web_load import DEFAULT_ROUTES, percentile, prepare_app_workdir, web_environment, latest_tickers, run_load
+
+def test_seed_large_database():
+    """
+    Testuje zapis historii uruchomień, notatek i flag do nowej bazy
+    """
+    print("=== TEST DUŻEJ BAZY TESTOWEJ ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'large.db')
+        counts = seed_large_database(db_path, days=10, tickers=30, selected=12)
+        print(counts)
+        
+        assert counts['analysis_runs'] == 10
+        assert counts['stage1_companies'] == 120
+        # Dane z arkusza zmieniają się co tydzień - treści JSON się powtarzają
+        assert counts['json_payloads'] < 2 * counts['stage1_companies']
+        with sqlite3.connect(db_path) as conn:
+            for table, count in counts.items():
+                assert conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] == count, table
+            missing = conn.execute("""
+                SELECT COUNT(*) FROM stage1_companies s
+                LEFT JOIN json_payloads p ON p.hash = s.informational_hash
+                WHERE p.hash IS NULL
+            """).fetchone()[0]
+        assert missing == 0
+        assert len(latest_tickers(db_path)) == 12
+        
+        try:
+            seed_large_database(db_path, days=1)
+            assert False, "Istniejąca baza nie może być nadpisana"
+        except FileExistsError:
+            pass
+    
+    print("Test dużej bazy testowej zakończony pomyślnie")
+
+def test_percentile():
+    """
+    Testuje percentyle metodą najbliższej pozycji
+    """
+    print("\n=== TEST PERCENTYLI ===")
+    
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([7.0], 99) == 7.0
+    assert percentile([], 50) is None
+    
+    print("Test percentyli zakończony pomyślnie")
+
+def test_load_on_seeded_database():
+    """
+    Testuje równoległe zapytania do widoków na zasilonej bazie
+    """
+    print("\n=== TEST OBCIĄŻENIOWY WIDOKÓW ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = prepare_app_workdir(tmp_dir)
+        seed_large_database(db_path, days=5, tickers=20, selected=8)
+        
+        with web_environment(tmp_dir) as app:
+            result = run_load(app, latest_tickers(db_path), requests_per_route=3, concurrency=2)
+        print(result)
+        
+        assert list(result['routes']) == DEFAULT_ROUTES
+        for route, stats in result['routes'].items():
+            assert stats['requests'] == 3
+            assert stats['errors'] == 0, route
+            assert stats['p50_ms'] <= stats['p95_ms'] <= stats['p99_ms']
+            assert stats['queries_per_request'] > 0, route
+        assert result['total']['requests'] == 3 * len(DEFAULT_ROUTES)
+    
+    print("Test obciążeniowy widoków zakończony pomyślnie")
+
+if __name__ == "__main__":
+    test_seed_large_database()
+    test_percentile()
+    test_load_on_seeded_database()
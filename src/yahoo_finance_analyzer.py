@@ -1,28 +1,61 @@
 import yfinance as yf
 import pandas as pd
 import numpy as np
+import re
+from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 import logging
+try:
+    from .run_timer import NullTimer
+    from .indicators import stochastic_oscillator
+    from .price_validation import split_valid_rows, rejected_rows, describe_reasons
+    from .yahoo_guard import CircuitOpenError
+    from .http_session import get_yahoo_session
+    from .quote_service import get_quote_service
+    from .market_calendar import get_calendar_for_ticker
+except ImportError:
+    from run_timer import NullTimer
+    from indicators import stochastic_oscillator
+    from price_validation import split_valid_rows, rejected_rows, describe_reasons
+    from yahoo_guard import CircuitOpenError
+    from http_session import get_yahoo_session
+    from quote_service import get_quote_service
+    from market_calendar import get_calendar_for_ticker
 
 # Konfiguracja logowania
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Okres yfinance (np. '5y', '1mo') -> długość okresu
+PERIOD_UNITS = {'d': 'days', 'wk': 'weeks', 'mo': 'months', 'y': 'years'}
+
+# Pierwsze zapisane notowanie może wypaść kilka dni po początku okresu (weekend,
+# święta, cleanup_old_data liczy 5 lat jako 1825 dni)
+PERIOD_START_TOLERANCE = timedelta(days=7)
+
 class YahooFinanceAnalyzer:
     """
     Klasa do analizy danych z Yahoo Finance i obliczania wskaźników technicznych
     """
     
-    def __init__(self):
+    def __init__(self, timer=None, stock_manager=None):
         self.cache = {}  # Prosty cache dla pobranych danych
+        self.timer = timer or NullTimer()  # Pomiar czasów pobierania i obliczeń
+        self.stock_manager = stock_manager  # Opcjonalny StockDataManager (kwarantanna, ochrona zapytań)
     
-    def get_stock_data(self, ticker: str, period: str = "1mo") -> Optional[pd.DataFrame]:
+    def get_stock_data(self, ticker: str, period: str = "1mo",
+                       now: Optional[datetime] = None) -> Optional[pd.DataFrame]:
         """
         Pobiera dane historyczne dla danej spółki z walidacją
         
+        Gdy podano stock_manager, a w bazie jest już ostatnia zakończona sesja
+        (price_freshness, kalendarz giełdy) i cały okres, notowania są czytane
+        z bazy bez zapytania do Yahoo.
+        
         Args:
             ticker: Symbol spółki (np. 'AAPL')
             period: Okres danych ('1mo', '1wk', '1d', etc.)
+            now: Moment odniesienia dla kalendarza (domyślnie teraz)
             
         Returns:
             DataFrame z danymi lub None jeśli błąd
@@ -37,16 +70,27 @@ class YahooFinanceAnalyzer:
                 logger.info(f"Używam cache dla {ticker} ({period})")
                 return self.cache[ticker][period]
             
+            data = self._stored_data(ticker, period, now)
+            if data is not None:
+                self.cache.setdefault(ticker, {})[period] = data
+                return data
+            
             logger.info(f"Pobieram dane dla {ticker} ({period})")
-            stock = yf.Ticker(ticker)
-            data = stock.history(period=period)
+            with self.timer.span('stage2.price_fetch', ticker):
+                if self.stock_manager is not None:
+                    # Negatywny cache, aliasy symboli i wyłącznik wspólne z StockDataManager
+                    data = self.stock_manager.guard.fetch(
+                        ticker, lambda symbol: yf.Ticker(symbol, session=get_yahoo_session()).history(period=period))
+                else:
+                    data = yf.Ticker(ticker, session=get_yahoo_session()).history(period=period)
             
-            if data.empty:
+            if data is None or data.empty:
                 logger.warning(f"Brak danych dla {ticker}")
                 return None
             
-            # Waliduj dane
-            if not self._validate_stock_data(data):
+            # Waliduj dane - błędne notowania do kwarantanny, reszta zostaje
+            data = self._validate_stock_data(ticker, data)
+            if data is None or data.empty:
                 logger.warning(f"Dane dla {ticker} nie przeszły walidacji")
                 return None
             
@@ -57,10 +101,46 @@ class YahooFinanceAnalyzer:
             
             return data
             
+        except CircuitOpenError as e:
+            logger.warning(f"Pomijam {ticker}: {e}")
+            return None
         except Exception as e:
             logger.error(f"Błąd podczas pobierania danych dla {ticker}: {e}")
             return None
     
+    def _stored_data(self, ticker: str, period: str, now: Optional[datetime] = None) -> Optional[pd.DataFrame]:
+        """
+        Notowania dzienne z bazy, gdy od ostatniego zapisanego nie zakończyła się nowa sesja
+        
+        Returns:
+            DataFrame w formacie yfinance (Open, High, Low, Close, Volume) lub None,
+            gdy trzeba pobrać dane z Yahoo (brak stock_manager, nieznana giełda,
+            nowa sesja, niepełny okres w bazie)
+        """
+        if self.stock_manager is None:
+            return None
+        match = re.match(r'^(\d+)(d|wk|mo|y)$', period)
+        calendar = get_calendar_for_ticker(ticker)
+        if not match or calendar is None:
+            return None
+        
+        freshness = self.stock_manager.get_freshness([ticker]).get(ticker)
+        if not freshness or freshness['last_date'] is None:
+            return None
+        if freshness['last_date'] < calendar.last_completed_session(now):
+            return None
+        
+        start = pd.Timestamp(freshness['last_date']) - pd.DateOffset(**{PERIOD_UNITS[match.group(2)]: int(match.group(1))})
+        if pd.Timestamp(freshness['first_date']) > start + PERIOD_START_TOLERANCE:
+            return None
+        
+        data = self.stock_manager.get_stock_data(ticker, '1D', limit=freshness['bar_count'])
+        data = data[data.index > start]
+        if data.empty:
+            return None
+        logger.info(f"Brak nowej sesji dla {ticker} od {freshness['last_date']} - używam notowań z bazy ({period})")
+        return data.rename(columns=str.capitalize)
+    
     def _validate_ticker(self, ticker: str) -> bool:
         """
         Waliduje format tickera
@@ -73,48 +153,26 @@ class YahooFinanceAnalyzer:
         pattern = r'^[A-Za-z0-9.]+$'
         return bool(re.match(pattern, ticker.strip()))
     
-    def _validate_stock_data(self, data: pd.DataFrame) -> bool:
+    def _validate_stock_data(self, ticker: str, data: pd.DataFrame) -> Optional[pd.DataFrame]:
         """
-        Waliduje dane giełdowe
+        Waliduje dane giełdowe i zwraca notowania bez naruszeń niezmienników OHLC
+        
+        Oznaczone notowania (odrzucone i zachowane) są zapisywane w price_quarantine
+        (gdy podano stock_manager).
         """
         try:
-            # Sprawdź czy DataFrame nie jest pusty
-            if data.empty:
-                return False
-            
-            # Sprawdź wymagane kolumny
-            required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-            if not all(col in data.columns for col in required_columns):
-                logger.warning(f"Brak wymaganych kolumn: {required_columns}")
-                return False
-            
-            # Sprawdź czy ceny są dodatnie
-            price_columns = ['Open', 'High', 'Low', 'Close']
-            for col in price_columns:
-                if (data[col] <= 0).any():
-                    logger.warning(f"Znaleziono nieprawidłowe ceny w kolumnie {col}")
-                    return False
-            
-            # Sprawdź czy High >= Low
-            if (data['High'] < data['Low']).any():
-                logger.warning("Znaleziono wiersze gdzie High < Low")
-                return False
-            
-            # Sprawdź czy High >= Open i High >= Close
-            if (data['High'] < data['Open']).any() or (data['High'] < data['Close']).any():
-                logger.warning("Znaleziono wiersze gdzie High < Open lub High < Close")
-                return False
-            
-            # Sprawdź czy Low <= Open i Low <= Close
-            if (data['Low'] > data['Open']).any() or (data['Low'] > data['Close']).any():
-                logger.warning("Znaleziono wiersze gdzie Low > Open lub Low > Close")
-                return False
-            
-            return True
+            clean, quarantined = split_valid_rows(data)
+            if not quarantined.empty:
+                reasons = sorted({name for mask in quarantined['reasons'] for name in describe_reasons(mask)})
+                logger.warning(f"{ticker}: {len(quarantined)} z {len(data)} notowań oznaczonych, "
+                               f"odrzucono {len(rejected_rows(quarantined))} ({', '.join(reasons)})")
+                if self.stock_manager is not None:
+                    self.stock_manager.quarantine_data(ticker, quarantined, '1D', 'yahoo_finance_analyzer')
+            return clean
             
         except Exception as e:
             logger.error(f"Błąd podczas walidacji danych: {e}")
-            return False
+            return None
     
     def calculate_stochastic_oscillator(self, data: pd.DataFrame, 
                                       k_period: int = 36, 
@@ -138,24 +196,9 @@ class YahooFinanceAnalyzer:
             if not all(col in data.columns for col in required_columns):
                 raise ValueError(f"Brak wymaganych kolumn: {required_columns}")
             
-            # Oblicz %K
-            lowest_low = data['Low'].rolling(window=k_period).min()
-            highest_high = data['High'].rolling(window=k_period).max()
-            
-            # Unikaj dzielenia przez zero
-            denominator = highest_high - lowest_low
-            denominator = denominator.replace(0, np.nan)
-            
-            k_raw = 100 * ((data['Close'] - lowest_low) / denominator)
-            
-            # Wygładź %K
-            k_smoothed = k_raw.rolling(window=smoothing).mean()
-            
-            # Oblicz %D (SMA z %K)
-            d_smoothed = k_smoothed.rolling(window=d_period).mean()
-            
-            return k_smoothed, d_smoothed
-            
+            return stochastic_oscillator(data['High'], data['Low'], data['Close'],
+                                         k_period, d_period, smoothing)
+        
         except Exception as e:
             logger.error(f"Błąd podczas obliczania Stochastic Oscillator: {e}")
             return pd.Series(), pd.Series()
@@ -164,6 +207,9 @@ class YahooFinanceAnalyzer:
         """
         Pobiera aktualną cenę spółki
         
+        Cena z ostatniego notowania w bazie lub z lekkiego zapytania spark
+        (QuoteService) zamiast pełnego Ticker.info.
+        
         Args:
             ticker: Symbol spółki (np. 'AAPL')
             
@@ -171,17 +217,8 @@ class YahooFinanceAnalyzer:
             Aktualna cena lub None jeśli błąd
         """
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            
-            # Spróbuj różne klucze dla ceny
-            current_price = None
-            price_keys = ['currentPrice', 'regularMarketPrice', 'price']
-            
-            for key in price_keys:
-                if key in info and info[key] is not None:
-                    current_price = float(info[key])
-                    break
+            quotes = get_quote_service(self.stock_manager.db_path) if self.stock_manager else get_quote_service()
+            current_price = quotes.get_quote(ticker)
             
             if current_price is None:
                 logger.warning(f"Nie można pobrać ceny dla {ticker}")
@@ -213,7 +250,8 @@ class YahooFinanceAnalyzer:
             if data_5y is not None and not data_5y.empty:
                 if len(data_5y) >= min_required_days:
                     # Użyj standardowych parametrów 36,12,12 dla miesięcznych
-                    k_1m, d_1m = self.calculate_stochastic_oscillator(data_5y, k_period=36, d_period=12, smoothing=12)
+                    with self.timer.span('stage2.indicators', ticker):
+                        k_1m, d_1m = self.calculate_stochastic_oscillator(data_5y, k_period=36, d_period=12, smoothing=12)
                     if not d_1m.empty:
                         result['1M'] = d_1m.iloc[-1]  # Ostatnia wartość %D
                 else:
@@ -224,7 +262,8 @@ class YahooFinanceAnalyzer:
             if data_2y is not None and not data_2y.empty:
                 if len(data_2y) >= min_required_days:
                     # Użyj standardowych parametrów 36,12,12 dla tygodniowych
-                    k_1w, d_1w = self.calculate_stochastic_oscillator(data_2y, k_period=36, d_period=12, smoothing=12)
+                    with self.timer.span('stage2.indicators', ticker):
+                        k_1w, d_1w = self.calculate_stochastic_oscillator(data_2y, k_period=36, d_period=12, smoothing=12)
                     if not d_1w.empty:
                         result['1W'] = d_1w.iloc[-1]  # Ostatnia wartość %D
                 else:
@@ -288,12 +327,13 @@ class YahooFinanceAnalyzer:
                 'error': str(e)
             }
     
-    def analyze_stage2_stocks(self, tickers: List[str]) -> pd.DataFrame:
+    def analyze_stage2_stocks(self, tickers: List[str], progress=None) -> pd.DataFrame:
         """
         Analizuje listę spółek pod kątem warunków Etapu 2
         
         Args:
             tickers: Lista symboli spółek
+            progress: Opcjonalny raport postępu (sprawdza też anulowanie przed każdym tickerem)
             
         Returns:
             DataFrame z wynikami analizy
@@ -301,9 +341,13 @@ class YahooFinanceAnalyzer:
         results = []
         
         for ticker in tickers:
+            if progress is not None:
+                progress.check_cancelled()
             logger.info(f"Analizuję {ticker}...")
             result = self.check_stage2_conditions(ticker)
             results.append(result)
+            if progress is not None:
+                progress.advance()
         
         df = pd.DataFrame(results)
         return df 
\ No newline at end of file
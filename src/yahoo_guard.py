@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Ochrona zapytań do Yahoo Finance przed stale błędnymi tickerami
+
+- negatywny cache: ticker bez danych jest sprawdzany ponownie po 1, 2, 4... dniach
+- aliasy symboli: ticker z arkusza (np. BRK.B) mapowany na symbol Yahoo (BRK-B)
+- wyłącznik (circuit breaker): przy skoku odsetka błędów zapytania są
+  wstrzymywane na czas cooldown zamiast przechodzenia całej listy tickerów
+- adaptacyjna współbieżność: każde zapytanie zajmuje miejsce w kontrolerze AIMD
+"""
+
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+import pandas as pd
+import logging
+try:
+    from .timezone_utils import get_utc_now
+    from .schema_migrations import apply_migrations
+    from .adaptive_concurrency import AdaptiveConcurrency, yahoo_controller, EMPTY, THROTTLED
+    from .http_session import last_status
+except ImportError:
+    from timezone_utils import get_utc_now
+    from schema_migrations import apply_migrations
+    from adaptive_concurrency import AdaptiveConcurrency, yahoo_controller, EMPTY, THROTTLED
+    from http_session import last_status
+
+# Konfiguracja logowania
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ponowne sprawdzenie tickera bez danych po RECHECK_BASE × 2^(n-1), maksymalnie RECHECK_MAX
+RECHECK_BASE = timedelta(days=1)
+RECHECK_MAX = timedelta(days=30)
+
+class CircuitOpenError(Exception):
+    """Wyłącznik otwarty - zapytania do Yahoo są chwilowo wstrzymane"""
+
+class CircuitBreaker:
+    """
+    Wyłącznik zapytań na podstawie odsetka błędów z ostatnich window zapytań
+    
+    Stany: zamknięty (zapytania przechodzą), otwarty (zapytania odrzucane przez
+    cooldown sekund), półotwarty (jedno zapytanie próbne - sukces zamyka, błąd
+    ponownie otwiera).
+    """
+    
+    def __init__(self, window: int = 20, min_requests: int = 10,
+                 error_threshold: float = 0.5, cooldown: float = 300.0, clock=time.monotonic):
+        """
+        Args:
+            window: Liczba ostatnich zapytań branych pod uwagę
+            min_requests: Minimalna liczba zapytań przed otwarciem wyłącznika
+            error_threshold: Odsetek błędów otwierający wyłącznik
+            cooldown: Czas wstrzymania zapytań (sekundy)
+            clock: Źródło czasu (do testów)
+        """
+        self.min_requests = min_requests
+        self.error_threshold = error_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self._results = deque(maxlen=window)
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """'closed', 'open' lub 'half_open'"""
+        with self._lock:
+            return self._state()
+    
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return 'closed'
+        if self.clock() - self._opened_at < self.cooldown:
+            return 'open'
+        return 'half_open'
+    
+    def before_request(self):
+        """Zgłasza CircuitOpenError, gdy zapytanie nie może zostać wykonane"""
+        with self._lock:
+            state = self._state()
+            if state == 'open' or (state == 'half_open' and self._trial_in_flight):
+                raise CircuitOpenError("Zapytania do Yahoo Finance wstrzymane (za dużo błędów)")
+            if state == 'half_open':
+                self._trial_in_flight = True
+    
+    def record(self, success: bool):
+        """Zapisuje wynik zapytania"""
+        with self._lock:
+            if self._opened_at is not None:
+                # Wynik zapytania próbnego
+                self._trial_in_flight = False
+                if success:
+                    logger.info("Wyłącznik zapytań Yahoo zamknięty - zapytanie próbne udane")
+                    self._opened_at = None
+                    self._results.clear()
+                else:
+                    self._opened_at = self.clock()
+                return
+            
+            self._results.append(success)
+            errors = self._results.count(False)
+            if len(self._results) >= self.min_requests and errors / len(self._results) >= self.error_threshold:
+                logger.warning(f"Wyłącznik zapytań Yahoo otwarty: {errors}/{len(self._results)} błędów, "
+                               f"przerwa {self.cooldown:.0f} s")
+                self._opened_at = self.clock()
+
+# Wspólny wyłącznik dla wszystkich ścieżek pobierania w procesie
+yahoo_breaker = CircuitBreaker()
+
+def symbol_candidates(ticker: str) -> List[str]:
+    """
+    Możliwe symbole Yahoo dla tickera z arkusza (najpierw oryginalny)
+    
+    Klasa akcji po kropce lub ukośniku (BRK.B, BF/B) w Yahoo jest zapisywana z myślnikiem.
+    """
+    candidates = [ticker]
+    symbol, separator, suffix = ticker.replace('/', '.').rpartition('.')
+    if separator and symbol and len(suffix) == 1:
+        candidates.append(f"{symbol}-{suffix}")
+    return candidates
+
+class SymbolGuard:
+    """
+    Wykonuje zapytanie o dane tickera przez negatywny cache, aliasy i wyłącznik
+    
+    Stan negatywnego cache i aliasy są w tabelach symbol_failures i symbol_aliases.
+    """
+    
+    def __init__(self, db_path: str = 'data/analizator_growth.db', breaker: CircuitBreaker = None,
+                 controller: AdaptiveConcurrency = None):
+        """
+        Args:
+            db_path: Ścieżka do pliku bazy danych
+            breaker: Wyłącznik zapytań (domyślnie wspólny yahoo_breaker)
+            controller: Kontroler współbieżności (domyślnie wspólny yahoo_controller)
+        """
+        self.db_path = db_path
+        self.breaker = breaker or yahoo_breaker
+        self.controller = controller or yahoo_controller
+        apply_migrations(self.db_path)
+    
+    def fetch(self, ticker: str, fetch: Callable[[str], Optional[pd.DataFrame]],
+              now: Optional[datetime] = None) -> Optional[pd.DataFrame]:
+        """
+        Pobiera dane tickera funkcją fetch(symbol_yahoo)
+        
+        Do negatywnego cache trafia tylko ticker, dla którego każdy symbol dał
+        prawdziwą odpowiedź bez danych; błędy i dławienie (429) trafiają tylko
+        do wyłącznika i kontrolera współbieżności.
+        
+        Args:
+            ticker: Symbol z arkusza
+            fetch: Funkcja pobierająca dane dla symbolu Yahoo (None/pusty DataFrame - brak danych)
+            now: Moment odniesienia (domyślnie teraz, UTC)
+        
+        Returns:
+            Dane lub None (brak danych, błąd, dławienie albo ponowne sprawdzenie jeszcze nie teraz)
+        
+        Raises:
+            CircuitOpenError: Gdy wyłącznik wstrzymuje zapytania
+        """
+        now = now or get_utc_now()
+        with sqlite3.connect(self.db_path) as conn:
+            failure = conn.execute("""
+                SELECT failure_count, next_check_at FROM symbol_failures WHERE symbol = ?
+            """, (ticker,)).fetchone()
+            alias = conn.execute("SELECT yahoo_symbol FROM symbol_aliases WHERE symbol = ?", (ticker,)).fetchone()
+        
+        if failure and datetime.fromisoformat(str(failure[1])) > now:
+            logger.info(f"Pomijam {ticker} - brak danych przy {failure[0]} próbach, ponowna próba po {failure[1]}")
+            return None
+        
+        candidates = symbol_candidates(ticker)
+        if alias:
+            candidates = [alias[0]] + [symbol for symbol in candidates if symbol != alias[0]]
+        
+        for symbol in candidates:
+            try:
+                # Wyłącznik sprawdzany po zajęciu miejsca, a wynik zapisywany przed jego zwolnieniem -
+                # zapytania czekające w kolejce widzą otwarty wyłącznik
+                with self.controller.slot(admit=self.breaker.before_request) as request:
+                    try:
+                        data = fetch(symbol)
+                    except Exception:
+                        self.breaker.record(False)
+                        raise
+                    found = data is not None and not data.empty
+                    self.breaker.record(found)
+                    # yfinance zamienia odpowiedź 429 na pusty wynik - kod HTTP ze wspólnej sesji
+                    throttled = not found and last_status() == 429
+                    if not found:
+                        request.outcome = THROTTLED if throttled else EMPTY
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                # Błąd sieci lub Yahoo - nie świadczy o tickerze, bez negatywnego cache
+                logger.error(f"Błąd zapytania do Yahoo dla {symbol}: {e}")
+                return None
+            
+            if found:
+                self._record_success(ticker, symbol, alias[0] if alias else None)
+                return data
+            if throttled:
+                # Pusty wynik z 429 nie świadczy o tickerze - bez negatywnego cache
+                logger.warning(f"Yahoo dławi zapytania (429) dla {symbol} - ponowna próba przy kolejnym pobraniu")
+                return None
+        
+        self._record_failure(ticker, failure[0] if failure else 0, now)
+        return None
+    
+    def set_alias(self, ticker: str, yahoo_symbol: str, source: str = 'manual'):
+        """Zapisuje symbol Yahoo dla tickera z arkusza"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO symbol_aliases (symbol, yahoo_symbol, source, resolved_at)
+                VALUES (?, ?, ?, ?)
+            """, (ticker, yahoo_symbol, source, get_utc_now()))
+            conn.commit()
+    
+    def get_failures(self) -> pd.DataFrame:
+        """Tickery w negatywnym cache (symbol, failure_count, last_failed_at, next_check_at)"""
+        with sqlite3.connect(self.db_path) as conn:
+            return pd.read_sql_query("""
+                SELECT symbol, failure_count, first_failed_at, last_failed_at, next_check_at
+                FROM symbol_failures ORDER BY next_check_at
+            """, conn)
+    
+    def _record_success(self, ticker: str, symbol: str, cached_alias: Optional[str]):
+        """Usuwa ticker z negatywnego cache i zapamiętuje alias, jeśli zadziałał inny symbol"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM symbol_failures WHERE symbol = ?", (ticker,))
+            if symbol != ticker and symbol != cached_alias:
+                logger.info(f"{ticker}: zapamiętuję symbol Yahoo {symbol}")
+                conn.execute("""
+                    INSERT OR REPLACE INTO symbol_aliases (symbol, yahoo_symbol, source, resolved_at)
+                    VALUES (?, ?, 'auto', ?)
+                """, (ticker, symbol, get_utc_now()))
+            elif symbol == ticker and cached_alias:
+                conn.execute("DELETE FROM symbol_aliases WHERE symbol = ?", (ticker,))
+            conn.commit()
+    
+    def _record_failure(self, ticker: str, failure_count: int, now: datetime):
+        """Dodaje ticker do negatywnego cache z wykładniczo rosnącym odstępem"""
+        failure_count += 1
+        interval = min(RECHECK_BASE * 2 ** (failure_count - 1), RECHECK_MAX)
+        logger.warning(f"{ticker}: brak danych w Yahoo ({failure_count}. raz), ponowna próba za {interval.days} dni")
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                INSERT INTO symbol_failures (symbol, failure_count, first_failed_at, last_failed_at, next_check_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (symbol) DO UPDATE SET
+                    failure_count = excluded.failure_count,
+                    last_failed_at = excluded.last_failed_at,
+                    next_check_at = excluded.next_check_at
+            """, (ticker, failure_count, now, now, now + interval))
+            conn.commit()
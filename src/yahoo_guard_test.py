@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Skrypt testowy dla negatywnego cache, aliasów symboli i wyłącznika zapytań do Yahoo
+"""
+
+import sys
+import os
+import tempfile
+import pandas as pd
+from datetime import datetime, timedelta
+
+# Dodaj ścieżkę do modułów
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import stock_data_manager
+from stock_data_manager import StockDataManager
+from yahoo_guard import SymbolGuard, CircuitBreaker, CircuitOpenError, symbol_candidates
+from adaptive_concurrency import AdaptiveConcurrency
+from fake_yahoo_server import FakeYahooServer
+from http_session import get_yahoo_session
+from shared_fixtures import FakeClock, daily_bars
+
+NOW = datetime(2025, 7, 1, 12, 0)
+
+def test_negative_cache_and_aliases():
+    """
+    Testuje ponowne sprawdzanie tickera po 1, 2, 4 dniach i zapamiętanie aliasu
+    """
+    print("=== TEST NEGATYWNEGO CACHE ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        guard = SymbolGuard(os.path.join(tmp_dir, 'test.db'), breaker=CircuitBreaker())
+        calls = []
+        
+        def fetch(symbol):
+            calls.append(symbol)
+            return daily_bars() if symbol in ('BRK-B', 'AAPL') else pd.DataFrame()
+        
+        assert symbol_candidates('BRK.B') == ['BRK.B', 'BRK-B']
+        assert symbol_candidates('BF/B') == ['BF/B', 'BF-B']
+        assert symbol_candidates('PKN.WA') == ['PKN.WA']
+        
+        # Ticker bez danych: odstępy 1, 2, 4 dni
+        assert guard.fetch('DEAD', fetch, now=NOW) is None
+        assert guard.fetch('DEAD', fetch, now=NOW + timedelta(hours=23)) is None
+        assert calls == ['DEAD']
+        assert guard.fetch('DEAD', fetch, now=NOW + timedelta(days=1)) is None
+        failures = guard.get_failures()
+        print(failures)
+        assert failures['failure_count'].tolist() == [2]
+        assert str(failures['next_check_at'].iloc[0]).startswith('2025-07-04 12:00')
+        
+        # Alias: BRK.B nie istnieje w Yahoo, BRK-B tak; kolejne pobranie od razu przez alias
+        calls.clear()
+        assert not guard.fetch('BRK.B', fetch, now=NOW).empty
+        assert not guard.fetch('BRK.B', fetch, now=NOW).empty
+        assert calls == ['BRK.B', 'BRK-B', 'BRK-B']
+        
+        # Ticker znów z danymi - usunięty z negatywnego cache
+        guard.set_alias('DEAD', 'AAPL')
+        assert not guard.fetch('DEAD', fetch, now=NOW + timedelta(days=3)).empty
+        assert guard.get_failures().empty
+
+def test_throttled_ticker_not_cached():
+    """
+    Testuje, że 429 i błąd sieci nie dodają tickera do negatywnego cache
+    """
+    print("=== TEST DŁAWIENIA BEZ NEGATYWNEGO CACHE ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir, FakeYahooServer(capacity=0, latency=0.0) as server:
+        breaker = CircuitBreaker()
+        guard = SymbolGuard(os.path.join(tmp_dir, 'test.db'), breaker=breaker,
+                            controller=AdaptiveConcurrency(initial_rate=1000.0, max_rate=1000.0))
+        
+        def fetch(symbol):
+            # Jak yfinance: odpowiedź bez notowań (tu 429) zamieniana na pusty wynik
+            response = get_yahoo_session().get(f"{server.url}/v8/finance/chart/{symbol}", timeout=5)
+            return daily_bars() if response.ok else pd.DataFrame()
+        
+        def failing_fetch(symbol):
+            raise ConnectionError("Connection reset")
+        
+        assert guard.fetch('AAPL', fetch, now=NOW) is None
+        assert guard.fetch('AAPL', failing_fetch, now=NOW) is None
+        assert server.stats['throttled'] == 1
+        assert guard.get_failures().empty
+        assert list(breaker._results) == [False, False]
+        
+        # Po ustąpieniu dławienia ticker jest od razu pobierany
+        server.capacity = 4
+        assert not guard.fetch('AAPL', fetch, now=NOW).empty
+        
+        # Prawdziwa odpowiedź bez danych (404) nadal trafia do negatywnego cache
+        server.unknown.add('GONE')
+        assert guard.fetch('GONE', fetch, now=NOW) is None
+        assert guard.get_failures()['symbol'].tolist() == ['GONE']
+
+def test_circuit_breaker():
+    """
+    Testuje otwarcie wyłącznika, odrzucanie zapytań i zapytanie próbne po cooldown
+    """
+    print("=== TEST WYŁĄCZNIKA ===")
+    
+    clock = FakeClock()
+    breaker = CircuitBreaker(window=10, min_requests=5, error_threshold=0.5, cooldown=60, clock=clock)
+    for success in (True, False, True, False, False):
+        breaker.before_request()
+        breaker.record(success)
+    assert breaker.state == 'open'
+    try:
+        breaker.before_request()
+        assert False, "Wyłącznik powinien odrzucić zapytanie"
+    except CircuitOpenError:
+        pass
+    
+    # Po cooldown jedno zapytanie próbne; błąd otwiera ponownie, sukces zamyka
+    clock.now = 61
+    breaker.before_request()
+    try:
+        breaker.before_request()
+        assert False, "Tylko jedno zapytanie próbne"
+    except CircuitOpenError:
+        pass
+    breaker.record(False)
+    assert breaker.state == 'open'
+    clock.now = 130
+    breaker.before_request()
+    breaker.record(True)
+    assert breaker.state == 'closed'
+
+def test_update_stops_when_circuit_opens():
+    """
+    Testuje przerwanie aktualizacji listy tickerów po otwarciu wyłącznika
+    """
+    print("=== TEST PRZERWANIA AKTUALIZACJI ===")
+    
+    calls = []
+    
+    class FailingTicker:
+        def __init__(self, symbol, session=None):
+            self.symbol = symbol
+        
+        def history(self, **kwargs):
+            calls.append(self.symbol)
+            raise ConnectionError("429 Too Many Requests")
+    
+    original = stock_data_manager.yf.Ticker
+    stock_data_manager.yf.Ticker = FailingTicker
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            manager = StockDataManager(os.path.join(tmp_dir, 'test.db'))
+            # Jedno zapytanie naraz - przy równoległych zapytaniach wyłącznik może przepuścić jeszcze te już rozpoczęte
+            manager.guard = SymbolGuard(manager.db_path, breaker=CircuitBreaker(min_requests=3, cooldown=600),
+                                        controller=AdaptiveConcurrency(initial_limit=1, max_limit=1, initial_rate=1000.0))
+            tickers = [f"T{i}" for i in range(20)]
+            counts = manager.update_all_stock_data(tickers)
+    finally:
+        stock_data_manager.yf.Ticker = original
+    
+    print(counts, calls)
+    assert len(calls) == 3
+    assert counts['no_data'] == 3 and counts['circuit_open'] == 17
+
+if __name__ == "__main__":
+    test_negative_cache_and_aliases()
+    test_throttled_ticker_not_cached()
+    test_circuit_breaker()
+    test_update_stops_when_circuit_opens()
+    print("✅ Testy ochrony zapytań zakończone")